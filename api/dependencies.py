@@ -6,10 +6,11 @@ import logging
 from collections.abc import AsyncGenerator
 from uuid import UUID
 
-from fastapi import Depends
+from fastapi import BackgroundTasks, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.auth import AppUser, get_current_user, require_current_user
+from core.config import get_settings
 from database import get_session, is_database_available
 from database.repositories import (
     APIKeyRepository,
@@ -24,6 +25,8 @@ from database.repositories import (
     TemplateRepository,
     UserRepository,
 )
+from services.task_queue import TaskQueue
+from services.user_cache import get_user_cache, profile_fingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -145,14 +148,25 @@ async def _sync_user(
     user: AppUser,
     user_repo: UserRepository,
 ) -> UUID:
-    """Sync auth-service user to local DB, return DB user UUID."""
-    db_user = await user_repo.create_or_update_from_auth(
-        auth_id=user.id,
-        email=user.email,
-        name=user.name,
-        avatar_url=user.avatar_url,
-    )
-    return db_user.id
+    """
+    Resolve auth-service user to DB user UUID, syncing the user only when needed.
+
+    The sync runs on a cache miss or when the token's profile fields changed,
+    and commits right away so the cached UUID always refers to a stored row.
+    """
+
+    async def sync() -> UUID:
+        db_user = await user_repo.create_or_update_from_auth(
+            auth_id=user.id,
+            email=user.email,
+            name=user.name,
+            avatar_url=user.avatar_url,
+        )
+        await user_repo.session.commit()
+        return db_user.id
+
+    fingerprint = profile_fingerprint(user.email, user.name, user.avatar_url)
+    return await get_user_cache().resolve(user.id, fingerprint, sync)
 
 
 async def ensure_db_user(
@@ -181,3 +195,16 @@ async def ensure_db_user_optional(
     if not user or not user_repo:
         return None
     return await _sync_user(user, user_repo)
+
+
+def get_task_queue(request: Request, background_tasks: BackgroundTasks) -> TaskQueue:
+    """
+    Get the generation task queue dependency.
+
+    Uses the app's ARQ pool when available, otherwise runs jobs as
+    background tasks of the current request.
+    """
+    pool = getattr(request.app.state, "arq_pool", None)
+    if not get_settings().task_queue_enabled:
+        pool = None
+    return TaskQueue(pool, background_tasks)
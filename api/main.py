@@ -11,7 +11,7 @@ from arq import create_pool
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from api.middleware import setup_exception_handlers
+from api.middleware import ImageBudgetMiddleware, setup_exception_handlers
 from api.routers import (
     admin_router,
     analytics_router,
@@ -34,8 +34,12 @@ from api.routers import (
     websocket_router,
 )
 from core.config import get_settings
-from core.redis import close_redis, init_redis
+from core.redis import close_redis, get_redis, init_redis
 from database import close_database, init_database
+from services.audit_logger import shutdown_audit_logger
+from services.image_codec import shutdown_image_executor
+from services.moderation_service import shutdown_moderation_service
+from services.storage import shutdown_storage_executor, shutdown_variant_executor
 from services.websocket_manager import get_websocket_manager
 
 # Configure logging
@@ -93,6 +97,18 @@ async def lifespan(app: FastAPI):
     await ws_manager.start_stale_cleanup()
     logger.info("WebSocket stale cleanup started")
 
+    # Fan out WebSocket events across API nodes through Redis
+    if settings.ws_relay_enabled:
+        try:
+            await ws_manager.start_relay(
+                await get_redis(),
+                replay_ttl=settings.ws_replay_ttl,
+                replay_maxlen=settings.ws_replay_maxlen,
+            )
+            logger.info("WebSocket Redis relay started")
+        except Exception as e:
+            logger.warning("Failed to start WebSocket relay (local delivery only): %s", e)
+
     logger.info("Application startup complete")
 
     yield
@@ -100,8 +116,10 @@ async def lifespan(app: FastAPI):
     # ============ Shutdown ============
     logger.info("Shutting down application...")
 
-    # Stop WebSocket cleanup
+    # Stop WebSocket cleanup and relay
     await ws_manager.stop_stale_cleanup()
+    await ws_manager.stop_relay()
+    await ws_manager.close()
 
     # Close ARQ pool
     if getattr(app.state, "arq_pool", None) is not None:
@@ -114,6 +132,15 @@ async def lifespan(app: FastAPI):
     # Close Database
     await close_database()
 
+    # Stop storage I/O and moderation threads
+    shutdown_storage_executor()
+    shutdown_variant_executor()
+    shutdown_image_executor()
+    shutdown_moderation_service()
+
+    # Write queued audit entries
+    shutdown_audit_logger()
+
     logger.info("Application shutdown complete")
 
 
@@ -147,6 +174,9 @@ def create_app() -> FastAPI:
         allow_headers=settings.cors_allow_headers,
     )
 
+    # Per-request limits on PIL decode/encode work
+    app.add_middleware(ImageBudgetMiddleware)
+
     # ============ Exception Handlers ============
     setup_exception_handlers(app)
 
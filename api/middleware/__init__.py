@@ -3,7 +3,9 @@ API middleware components.
 """
 
 from .error_handler import setup_exception_handlers
+from .image_budget import ImageBudgetMiddleware
 
 __all__ = [
+    "ImageBudgetMiddleware",
     "setup_exception_handlers",
 ]
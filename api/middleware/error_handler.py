@@ -116,6 +116,8 @@ def setup_exception_handlers(app: FastAPI) -> None:
                     "message": str(exc.detail) if exc.detail else "An error occurred",
                 },
             },
+            # e.g. Content-Range on 416, WWW-Authenticate on 401
+            headers=getattr(exc, "headers", None),
         )
 
     @app.exception_handler(Exception)
@@ -0,0 +1,35 @@
+"""
+Per-request image processing budget.
+"""
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.image_codec import image_budget
+
+
+class ImageBudgetMiddleware:
+    """
+    Give every HTTP request its own image codec budget.
+
+    A plain ASGI middleware, so the budget's context variable is visible
+    to the endpoint and to the tasks it spawns. The budget ends with the
+    response: background tasks run after the last body message is sent,
+    and a 413 can no longer reach the client then, so they run without it.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with image_budget() as budget:
+
+            async def send_wrapper(message: Message) -> None:
+                await send(message)
+                if message["type"] == "http.response.body" and not message.get("more_body"):
+                    budget.close()
+
+            await self.app(scope, receive, send_wrapper)
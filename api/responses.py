@@ -0,0 +1,157 @@
+"""
+HTTP responses for objects held in storage.
+
+Stored objects are served without buffering them in the worker:
+
+- The ETag is the SHA-256 recorded when the object was saved. Content-
+  addressed keys carry it in the key itself, so a matching If-None-Match is
+  answered with 304 before storage is touched. Other keys need one metadata
+  request (HEAD or stat), never a body read.
+- Local files are sent with FileResponse, which uses the server's zero-copy
+  path extension when available and handles Range requests itself.
+- Remote objects (MinIO, OSS) are streamed chunk by chunk. A single byte
+  range is forwarded to the backend as a ranged GET and answered with 206,
+  which video players rely on for seeking.
+"""
+
+from datetime import UTC, datetime
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from services.storage import StorageManager, StorageObject
+from utils.image_types import mime_type_from_key
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+
+def _not_modified_since(header: str | None, last_modified: float | None) -> bool:
+    if not header or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    return int(last_modified) <= since.timestamp()
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single-range Range header.
+
+    Args:
+        header: Range header value, e.g. "bytes=0-1023" or "bytes=-500"
+        size: Object size in bytes
+
+    Returns:
+        (start, length), or None to send the whole object (no header,
+        multiple ranges or a malformed value)
+
+    Raises:
+        HTTPException: 416 if the range lies outside the object
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if not first:
+            suffix = int(last)
+            start, end = max(size - suffix, 0), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end - start + 1
+
+
+async def storage_response(
+    request: Request,
+    storage: StorageManager,
+    key: str,
+    cache_control: str = "public, max-age=86400",
+    filename: str | None = None,
+    content_type: str | None = None,
+) -> Response:
+    """
+    Build a conditional, range-aware response for a stored object.
+
+    Args:
+        request: Incoming request (conditional and Range headers)
+        storage: Storage manager holding the object
+        key: Storage key
+        cache_control: Cache-Control header value
+        filename: Name for Content-Disposition (defaults to the key's basename)
+        content_type: Content-Type (defaults to one derived from the key)
+
+    Returns:
+        304, 206 or 200 response
+
+    Raises:
+        HTTPException: 404 if the object does not exist, 416 for a bad range
+    """
+    if_none_match = request.headers.get("if-none-match")
+    headers = {"Cache-Control": cache_control}
+
+    etag = storage.etag_from_key(key)
+    if etag and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={**headers, "ETag": etag})
+
+    info: StorageObject | None = await storage.head_image(key)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    etag = etag or info.etag
+    if etag:
+        headers["ETag"] = etag
+    if info.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            datetime.fromtimestamp(info.last_modified, UTC), usegmt=True
+        )
+    if (etag and _etag_matches(if_none_match, etag)) or (
+        if_none_match is None
+        and _not_modified_since(request.headers.get("if-modified-since"), info.last_modified)
+    ):
+        return Response(status_code=304, headers=headers)
+
+    media_type = content_type or mime_type_from_key(key, info.content_type)
+    headers["Content-Disposition"] = f'inline; filename="{filename or info.filename}"'
+
+    path = storage.local_image_path(key)
+    if path is not None:
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    headers["Accept-Ranges"] = "bytes"
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or (etag and if_range.strip() == etag):
+        byte_range = parse_range(request.headers.get("range"), info.size)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(info.size)
+        return StreamingResponse(storage.stream_image(key), media_type=media_type, headers=headers)
+
+    start, length = byte_range
+    headers["Content-Length"] = str(length)
+    headers["Content-Range"] = f"bytes {start}-{start + length - 1}/{info.size}"
+    return StreamingResponse(
+        storage.stream_image(key, start=start, length=length),
+        status_code=206,
+        media_type=media_type,
+        headers=headers,
+    )
@@ -7,25 +7,51 @@ Endpoints:
 - POST /api/admin/moderation/rules - Create moderation rule
 - PUT /api/admin/moderation/rules/{id} - Update moderation rule
 - GET /api/admin/moderation/stats - Get moderation statistics
+- POST /api/admin/moderation/keywords/reload - Reload banned keywords
+- GET /api/admin/moderation/audit-sink - Audit log writer queue status
 """
 
+import asyncio
 import logging
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 
+from api.dependencies import get_audit_repository
 from api.schemas.admin import (
+    AuditSinkStatusResponse,
     CreateModerationRuleRequest,
     ListModerationLogsResponse,
     ListModerationRulesResponse,
+    ModerationLogEntry,
     ModerationRule,
     ModerationStatsResponse,
+    ReloadKeywordsResponse,
 )
 from core.auth import AppUser, require_admin
+from database.repositories import AuditRepository
+from services import get_audit_logger, get_content_filter
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/moderation", tags=["admin-moderation"])
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def _encode_cursor(created_at: datetime, log_id: UUID) -> str:
+    """Cursor of a log row: microseconds since the epoch and the row id."""
+    return f"{(created_at - _EPOCH) // timedelta(microseconds=1)}_{log_id}"
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        micros, log_id = cursor.split("_", 1)
+        return _EPOCH + timedelta(microseconds=int(micros)), UUID(log_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 
 # ============ Endpoints ============
 
@@ -34,16 +60,49 @@ router = APIRouter(prefix="/moderation", tags=["admin-moderation"])
 async def get_moderation_logs(
     limit: int = Query(default=50, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None, description="next_cursor from the previous page"),
+    filter_result: str | None = Query(default=None, description="allowed, blocked or flagged"),
     admin: AppUser = Depends(require_admin),
+    audit_repo: AuditRepository | None = Depends(get_audit_repository),
 ):
-    """Get content moderation logs."""
-    # TODO: Implement moderation log retrieval
+    """
+    Get content moderation logs, newest first.
+
+    Follow next_cursor to page through the log: the cursor is a keyset seek
+    on (created_at, id), so deep pages cost the same as the first one.
+    offset is only applied when no cursor is given.
+    """
+    if not audit_repo:
+        raise HTTPException(status_code=503, detail="Database not configured")
+
+    before = _decode_cursor(cursor) if cursor else None
+    rows = await audit_repo.list_audit_logs(
+        action="content_moderation",
+        filter_result=filter_result,
+        limit=limit + 1,
+        offset=0 if before else offset,
+        before=before,
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
     return ListModerationLogsResponse(
-        logs=[],
-        total=0,
+        logs=[
+            ModerationLogEntry(
+                id=str(row.id),
+                user_id=str(row.user_id) if row.user_id else None,
+                action=row.filter_result or "allowed",
+                reason=row.blocked_reason or "",
+                content_preview=(row.prompt or "")[:100] or None,
+                rule_matched=row.blocked_reason,
+                created_at=row.created_at,
+            )
+            for row in rows
+        ],
         limit=limit,
-        offset=offset,
-        has_more=False,
+        offset=0 if before else offset,
+        has_more=has_more,
+        next_cursor=_encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
     )
 
 
@@ -82,14 +141,58 @@ async def update_moderation_rule(
 
 @router.get("/stats", response_model=ModerationStatsResponse)
 async def get_moderation_stats(
+    date: str | None = Query(default=None, description="Day as YYYY-MM-DD (UTC, default today)"),
+    hourly: bool = Query(default=False, description="Include per-hour summaries"),
     admin: AppUser = Depends(require_admin),
 ):
-    """Get moderation statistics."""
-    # TODO: Implement stats retrieval
+    """Get moderation statistics for a day from the incremental counters."""
+    if date is None:
+        date = datetime.now(UTC).strftime("%Y-%m-%d")
+    else:
+        try:
+            datetime.strptime(date, "%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+
+    audit_logger = get_audit_logger()
+    summary = await audit_logger.get_summary(date)
+    hours = None
+    if hourly:
+        try:
+            hours = await audit_logger.get_hourly_summaries(date)
+        except Exception as e:
+            logger.warning(f"Hourly moderation counters unavailable: {e}")
+            hours = []
+
     return ModerationStatsResponse(
-        total_checks=0,
-        blocked_count=0,
-        warned_count=0,
-        passed_count=0,
-        top_rules=[],
+        date=date,
+        total_checks=summary.get("total_checks", 0),
+        blocked_count=summary.get("blocked", 0),
+        warned_count=summary.get("flagged", 0),
+        passed_count=summary.get("allowed", 0),
+        top_rules=summary.get("top_blocked_keywords", []),
+        block_breakdown=summary.get("block_breakdown", {}),
+        ai_classifications=summary.get("ai_classifications", {}),
+        average_times_ms=summary.get("average_times_ms", {}),
+        timings=summary.get("timings", {}),
+        hourly=hours,
     )
+
+
+@router.post("/keywords/reload", response_model=ReloadKeywordsResponse)
+async def reload_keywords(
+    admin: AppUser = Depends(require_admin),
+):
+    """Reload config/banned_keywords.json in this process without interrupting checks."""
+    # Compiling a large keyword list takes a while; keep it off the event loop
+    count = await asyncio.to_thread(get_content_filter().refresh_keywords)
+    logger.info(f"Admin {admin.login} reloaded banned keywords ({count} in effect)")
+    return ReloadKeywordsResponse(keyword_count=count)
+
+
+@router.get("/audit-sink", response_model=AuditSinkStatusResponse)
+async def get_audit_sink_status(
+    admin: AppUser = Depends(require_admin),
+):
+    """Get this process's audit log writer queue and throughput counters."""
+    return AuditSinkStatusResponse(**get_audit_logger().get_stats())
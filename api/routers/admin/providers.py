@@ -17,6 +17,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from api.schemas.admin import (
     AdminProviderInfo,
     ListProvidersResponse,
+    ModelRateLimitInfo,
     ProviderActionResponse,
     ProviderStatus,
     ResetCircuitBreakersResponse,
@@ -37,57 +38,47 @@ router = APIRouter(prefix="/providers", tags=["admin-providers"])
 async def list_providers(
     admin: AppUser = Depends(require_admin),
 ):
-    """List all providers with their status."""
+    """List all providers with their status and rate limit token levels."""
     provider_router = get_provider_router()
 
-    providers = []
-
-    # Get image providers
-    for name, status in provider_router.list_available_providers(MediaType.IMAGE):
-        providers.append(
-            AdminProviderInfo(
+    providers: dict[str, AdminProviderInfo] = {}
+
+    for media_type in (MediaType.IMAGE, MediaType.VIDEO):
+        for info in provider_router.list_available_providers(media_type):
+            name = info["name"]
+            # Some providers support both media types
+            if name in providers:
+                providers[name].supports_video = True
+                continue
+
+            latency = provider_router.get_latency_percentiles(name)
+            latency_ms = {
+                k: round(v * 1000, 1) if v is not None else None for k, v in latency.items()
+            }
+            providers[name] = AdminProviderInfo(
                 name=name,
-                status=ProviderStatus.ENABLED if status else ProviderStatus.DISABLED,
+                status=ProviderStatus.ENABLED,
                 priority=100,  # TODO: get actual priority
-                enabled=status,
-                supports_image=True,
-                supports_video=False,
-                health_score=100.0 if status else 0.0,
+                enabled=True,
+                supports_image=media_type == MediaType.IMAGE,
+                supports_video=media_type == MediaType.VIDEO,
+                health_score=100.0,
                 total_requests_24h=0,
                 success_rate_24h=100.0,
-                avg_latency_ms=0.0,
+                avg_latency_ms=latency_ms["mean"] or 0.0,
+                p50_latency_ms=latency_ms["p50"],
+                p90_latency_ms=latency_ms["p90"],
+                p99_latency_ms=latency_ms["p99"],
                 circuit_breaker_state=None,
                 last_error=None,
                 last_error_at=None,
-            )
-        )
-
-    # Get video providers
-    for name, status in provider_router.list_available_providers(MediaType.VIDEO):
-        # Check if already in list (some providers support both)
-        existing = next((p for p in providers if p.name == name), None)
-        if existing:
-            existing.supports_video = True
-        else:
-            providers.append(
-                AdminProviderInfo(
-                    name=name,
-                    status=ProviderStatus.ENABLED if status else ProviderStatus.DISABLED,
-                    priority=100,
-                    enabled=status,
-                    supports_image=False,
-                    supports_video=True,
-                    health_score=100.0 if status else 0.0,
-                    total_requests_24h=0,
-                    success_rate_24h=100.0,
-                    avg_latency_ms=0.0,
-                    circuit_breaker_state=None,
-                    last_error=None,
-                    last_error_at=None,
-                )
+                rate_limits=[
+                    ModelRateLimitInfo(**levels)
+                    for levels in await provider_router.get_rate_limit_levels(name)
+                ],
             )
 
-    return ListProvidersResponse(providers=providers)
+    return ListProvidersResponse(providers=list(providers.values()))
 
 
 @router.put("/{provider_name}", response_model=ProviderActionResponse)
@@ -8,6 +8,10 @@ Endpoints:
 - GET /api/admin/system/storage - Storage status
 - GET /api/admin/system/redis - Redis status
 - GET /api/admin/system/database - Database status
+- GET /api/admin/system/prompt-cache - Prompt pipeline cache stats
+- POST /api/admin/system/prompt-cache/invalidate - Invalidate prompt pipeline cache
+- GET /api/admin/system/token-cache - Verified JWT cache stats
+- GET /api/admin/system/image-codec - Image codec executor queue and timing
 """
 
 import logging
@@ -17,17 +21,22 @@ from fastapi import APIRouter, Depends, Query
 
 from api.schemas.admin import (
     DatabaseStatusResponse,
+    ImageCodecStatusResponse,
+    PromptCacheStatusResponse,
     RedisStatusResponse,
     StorageStatusResponse,
     SystemLogsResponse,
     SystemMetricsResponse,
     SystemStatusResponse,
+    TokenCacheStatusResponse,
 )
-from core.auth import AppUser, require_admin
+from core.auth import AppUser, get_token_cache, require_admin
 from core.config import get_settings
 from core.redis import get_redis
 from database import is_database_available
-from services import get_websocket_manager
+from services import get_codec_stats, get_websocket_manager
+from services.prompt_cache import get_prompt_cache
+from services.prompt_pipeline import get_prompt_pipeline
 
 logger = logging.getLogger(__name__)
 
@@ -174,3 +183,39 @@ async def get_database_status(
         total_tables=0,
         total_rows={},
     )
+
+
+@router.get("/prompt-cache", response_model=PromptCacheStatusResponse)
+async def get_prompt_cache_status(
+    admin: AppUser = Depends(require_admin),
+):
+    """Get prompt pipeline cache hit/miss counters for this process."""
+    return PromptCacheStatusResponse(**get_prompt_cache().get_stats())
+
+
+@router.post("/prompt-cache/invalidate", response_model=PromptCacheStatusResponse)
+async def invalidate_prompt_cache(
+    admin: AppUser = Depends(require_admin),
+):
+    """Invalidate cached translations, enhancements and meta prompts on every node.
+
+    Call after changing PromptHub templates.
+    """
+    await get_prompt_pipeline().invalidate_cache()
+    return PromptCacheStatusResponse(**get_prompt_cache().get_stats())
+
+
+@router.get("/token-cache", response_model=TokenCacheStatusResponse)
+async def get_token_cache_status(
+    admin: AppUser = Depends(require_admin),
+):
+    """Get verified JWT cache counters and signature verification cost for this process."""
+    return TokenCacheStatusResponse(**get_token_cache().get_stats())
+
+
+@router.get("/image-codec", response_model=ImageCodecStatusResponse)
+async def get_image_codec_status(
+    admin: AppUser = Depends(require_admin),
+):
+    """Get queue depth and timing of the image codec executor for this process."""
+    return ImageCodecStatusResponse(**get_codec_stats())
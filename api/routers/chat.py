@@ -10,13 +10,11 @@ Endpoints:
 """
 
 import asyncio
-import json
 import logging
 import uuid
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, Header
-from PIL import Image
 
 from api.dependencies import get_chat_repository, get_quota_repository
 from api.schemas.chat import (
@@ -42,6 +40,8 @@ from core.redis import get_redis
 from database.repositories import ChatRepository, QuotaRepository
 from services import (
     ChatSession,
+    ChatStore,
+    get_chat_image_cache,
     get_friendly_error_message,
     get_quota_service,
     get_storage_manager,
@@ -52,7 +52,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 # Chat session TTL (24 hours)
-CHAT_SESSION_TTL = 86400
+CHAT_SESSION_TTL = ChatSession.SESSION_TTL
 
 
 # ============ Helpers ============
@@ -67,12 +67,12 @@ def get_user_id_from_user(user: AppUser | None) -> str:
 
 def get_session_key(user_id: str, session_id: str) -> str:
     """Get Redis key for a chat session."""
-    return f"chat:{user_id}:{session_id}"
+    return ChatStore.session_key(user_id, session_id)
 
 
-def get_user_sessions_key(user_id: str) -> str:
-    """Get Redis key for user's session list."""
-    return f"chat_sessions:{user_id}"
+async def get_chat_store() -> ChatStore:
+    """Get the Redis chat session store."""
+    return ChatStore(await get_redis(), ttl=CHAT_SESSION_TTL)
 
 
 async def check_chat_quota(user_id: str):
@@ -107,25 +107,19 @@ async def create_chat_session(
     session_id = str(uuid.uuid4())
     now = datetime.now()
 
-    redis = await get_redis()
-
-    # Store session data in Redis (for fast context replay)
-    session_data = {
-        "session_id": session_id,
-        "user_id": user_id,
-        "aspect_ratio": request.aspect_ratio.value,
-        "messages": [],
-        "created_at": now.isoformat(),
-        "last_activity": now.isoformat(),
-    }
-
-    session_key = get_session_key(user_id, session_id)
-    await redis.set(session_key, json.dumps(session_data), ex=CHAT_SESSION_TTL)
-
-    # Add to user's session list
-    sessions_key = get_user_sessions_key(user_id)
-    await redis.sadd(sessions_key, session_id)
-    await redis.expire(sessions_key, CHAT_SESSION_TTL)
+    # Store session in Redis (for fast context replay)
+    store = await get_chat_store()
+    await store.save(
+        user_id,
+        session_id,
+        {
+            "session_id": session_id,
+            "user_id": user_id,
+            "aspect_ratio": request.aspect_ratio.value,
+            "created_at": now.isoformat(),
+            "last_activity": now.isoformat(),
+        },
+    )
 
     # Persist to PostgreSQL if available
     if chat_repo:
@@ -162,24 +156,32 @@ async def send_message(
     Send a message in an existing chat session.
     """
     user_id = get_user_id_from_user(user)
-    redis = await get_redis()
+    store = await get_chat_store()
 
-    # Get session data from Redis (fast path for context replay)
+    # Get session from Redis (fast path for context replay). Only the
+    # messages the model still sees are read, not the whole conversation.
     session_key = get_session_key(user_id, session_id)
-    session_json = await redis.get(session_key)
+    history_window = ChatSession.MAX_HISTORY_TURNS * 2
+    session = await store.load(user_id, session_id, last=history_window)
 
-    if not session_json:
+    if not session:
         # Fallback: try loading from DB if Redis expired
         if chat_repo:
             try:
                 db_session = await chat_repo.get_session_with_messages(uuid.UUID(session_id))
                 if db_session:
                     # Rebuild Redis cache from DB
-                    session_data = {
-                        "session_id": session_id,
-                        "user_id": user_id,
-                        "aspect_ratio": db_session.aspect_ratio,
-                        "messages": [
+                    await store.save(
+                        user_id,
+                        session_id,
+                        {
+                            "session_id": session_id,
+                            "user_id": user_id,
+                            "aspect_ratio": db_session.aspect_ratio,
+                            "created_at": db_session.created_at.isoformat(),
+                            "last_activity": db_session.updated_at.isoformat(),
+                        },
+                        [
                             {
                                 "role": msg.role,
                                 "content": msg.content,
@@ -189,23 +191,15 @@ async def send_message(
                             }
                             for msg in db_session.messages
                         ],
-                        "created_at": db_session.created_at.isoformat(),
-                        "last_activity": db_session.updated_at.isoformat(),
-                    }
-                    # Re-cache in Redis
-                    await redis.set(
-                        session_key,
-                        json.dumps(session_data),
-                        ex=CHAT_SESSION_TTL,
                     )
-                    session_json = json.dumps(session_data)
+                    session = await store.load(user_id, session_id, last=history_window)
             except Exception as e:
                 logger.warning(f"Failed to load chat session from database: {e}")
 
-    if not session_json:
+    if not session:
         raise SessionNotFoundError()
 
-    session_data = json.loads(session_json)
+    session_data, history_messages = session
 
     # Check quota
     await check_chat_quota(user_id)
@@ -220,22 +214,25 @@ async def send_message(
     chat_session = ChatSession(api_key=api_key)
     chat_session.aspect_ratio = session_data["aspect_ratio"]
 
-    # Pre-load recent history images (async concurrent)
-    history_messages = session_data["messages"]
-    history_images: dict[str, Image.Image] = {}
+    # Recent history images as stored bytes: no decode, no re-encode.
+    # The session's image cache usually has them; misses load concurrently.
     image_cutoff = max(0, len(history_messages) - ChatSession.IMAGE_HISTORY_TURNS * 2)
 
     storage = get_storage_manager(user_id=user_id if user else None)
-    image_keys_to_load = [
+    image_cache = get_chat_image_cache()
+    image_keys = [
         msg.get("image_key") for msg in history_messages[image_cutoff:] if msg.get("image_key")
     ]
+    history_images = image_cache.get_many(session_key, image_keys)
+    image_keys_to_load = [key for key in image_keys if key not in history_images]
 
     if image_keys_to_load:
-        load_tasks = [storage.load_image(key) for key in image_keys_to_load]
+        load_tasks = [storage.load_image_bytes(key) for key in image_keys_to_load]
         loaded = await asyncio.gather(*load_tasks, return_exceptions=True)
-        for key, img in zip(image_keys_to_load, loaded, strict=True):
-            if isinstance(img, Image.Image):
-                history_images[key] = img
+        for key, data in zip(image_keys_to_load, loaded, strict=True):
+            if isinstance(data, bytes):
+                history_images[key] = data
+                image_cache.put(session_key, key, data)
 
     # Send message (sync SDK call offloaded to thread to avoid blocking)
     aspect_ratio = request.aspect_ratio.value if request.aspect_ratio else None
@@ -254,8 +251,9 @@ async def send_message(
     # Save image if generated
     image_data = None
     if response.image:
+        # Store the model's bytes verbatim rather than re-encoding the PIL image
         result = await storage.save_image(
-            image=response.image,
+            image=response.image_data or response.image,
             prompt=request.message,
             settings={"aspect_ratio": aspect_ratio or session_data["aspect_ratio"]},
             duration=response.duration,
@@ -265,6 +263,9 @@ async def send_message(
         )
 
         if result:
+            # The next turn sends this image back to the model
+            if response.image_data:
+                image_cache.put(session_key, result.key, response.image_data)
             image_data = GeneratedImage(
                 key=result.key,
                 filename=result.filename,
@@ -273,28 +274,27 @@ async def send_message(
                 height=response.image.height,
             )
 
-    # Update session with new messages in Redis
+    # Append the new turn to the session in Redis
     now = datetime.now()
-    session_data["messages"].append(
-        {
-            "role": "user",
-            "content": request.message,
-            "timestamp": now.isoformat(),
-        }
-    )
-    session_data["messages"].append(
-        {
-            "role": "assistant",
-            "content": response.text or "",
-            "image_key": image_data.key if image_data else None,
-            "thinking": response.thinking,
-            "timestamp": now.isoformat(),
-        }
+    message_count = await store.append(
+        user_id,
+        session_id,
+        [
+            {
+                "role": "user",
+                "content": request.message,
+                "timestamp": now.isoformat(),
+            },
+            {
+                "role": "assistant",
+                "content": response.text or "",
+                "image_key": image_data.key if image_data else None,
+                "thinking": response.thinking,
+                "timestamp": now.isoformat(),
+            },
+        ],
+        now,
     )
-    session_data["last_activity"] = now.isoformat()
-
-    # Save updated session to Redis
-    await redis.set(session_key, json.dumps(session_data), ex=CHAT_SESSION_TTL)
 
     # Persist messages to PostgreSQL if available
     if chat_repo:
@@ -339,7 +339,7 @@ async def send_message(
         image=image_data,
         thinking=response.thinking,
         duration=response.duration,
-        message_count=len(session_data["messages"]),
+        message_count=message_count,
     )
 
 
@@ -353,13 +353,11 @@ async def get_chat_history(
     Get the conversation history for a chat session.
     """
     user_id = get_user_id_from_user(user)
-    redis = await get_redis()
-
-    session_key = get_session_key(user_id, session_id)
-    session_json = await redis.get(session_key)
+    store = await get_chat_store()
+    session = await store.load(user_id, session_id)
 
     # Try DB if Redis miss
-    if not session_json and chat_repo:
+    if not session and chat_repo:
         try:
             db_session = await chat_repo.get_session_with_messages(uuid.UUID(session_id))
             if db_session:
@@ -392,14 +390,14 @@ async def get_chat_history(
         except Exception as e:
             logger.warning(f"Failed to load chat history from database: {e}")
 
-    if not session_json:
+    if not session:
         raise SessionNotFoundError()
 
-    session_data = json.loads(session_json)
+    session_data, session_messages = session
 
     # Convert messages to response format
     messages = []
-    for msg in session_data["messages"]:
+    for msg in session_messages:
         image = None
         if msg.get("image_key"):
             storage = get_storage_manager(user_id=user_id if user_id != "anonymous" else None)
@@ -459,31 +457,18 @@ async def list_chat_sessions(
         except Exception as e:
             logger.warning(f"Failed to list chat sessions from database: {e}")
 
-    # Fallback to Redis
-    redis = await get_redis()
-
-    sessions_key = get_user_sessions_key(user_id)
-    session_ids = await redis.smembers(sessions_key)
-
-    sessions = []
-    for sid in session_ids:
-        session_key = get_session_key(user_id, sid)
-        session_json = await redis.get(session_key)
-
-        if session_json:
-            data = json.loads(session_json)
-            sessions.append(
-                ChatSessionInfo(
-                    session_id=data["session_id"],
-                    aspect_ratio=data["aspect_ratio"],
-                    message_count=len(data["messages"]),
-                    created_at=datetime.fromisoformat(data["created_at"]),
-                    last_activity=datetime.fromisoformat(data["last_activity"]),
-                )
-            )
-
-    # Sort by last activity, newest first
-    sessions.sort(key=lambda x: x.last_activity, reverse=True)
+    # Fallback to Redis (index is ordered by last activity, newest first)
+    store = await get_chat_store()
+    sessions = [
+        ChatSessionInfo(
+            session_id=data["session_id"],
+            aspect_ratio=data["aspect_ratio"],
+            message_count=data["message_count"],
+            created_at=datetime.fromisoformat(data["created_at"]),
+            last_activity=datetime.fromisoformat(data["last_activity"]),
+        )
+        for data in await store.list_sessions(user_id)
+    ]
 
     return ListChatsResponse(
         sessions=sessions,
@@ -501,12 +486,11 @@ async def delete_chat_session(
     Delete a chat session.
     """
     user_id = get_user_id_from_user(user)
-    redis = await get_redis()
-
-    session_key = get_session_key(user_id, session_id)
+    store = await get_chat_store()
 
-    # Check if session exists in Redis
-    redis_exists = await redis.exists(session_key)
+    # Delete from Redis
+    redis_deleted = await store.delete(user_id, session_id)
+    get_chat_image_cache().drop(get_session_key(user_id, session_id))
 
     # Delete from DB if available
     db_deleted = False
@@ -516,13 +500,7 @@ async def delete_chat_session(
         except Exception as e:
             logger.warning(f"Failed to delete chat session from database: {e}")
 
-    if not redis_exists and not db_deleted:
+    if not redis_deleted and not db_deleted:
         raise SessionNotFoundError()
 
-    # Delete from Redis
-    if redis_exists:
-        await redis.delete(session_key)
-        sessions_key = get_user_sessions_key(user_id)
-        await redis.srem(sessions_key, session_id)
-
     return {"success": True, "message": "Chat session deleted"}
@@ -38,6 +38,7 @@ from api.schemas.favorites import (
 )
 from database.models import Favorite, FavoriteFolder
 from database.repositories import FavoriteRepository
+from services.storage import thumbnail_url
 
 logger = logging.getLogger(__name__)
 
@@ -66,7 +67,7 @@ def favorite_to_info(favorite: Favorite) -> FavoriteInfo:
         filename=image.filename,
         prompt=image.prompt,
         url=image.public_url,
-        thumbnail_url=None,  # TODO: implement thumbnails
+        thumbnail_url=thumbnail_url(image.storage_key, image.media_type),
         created_at=image.created_at,
     )
 
@@ -10,14 +10,20 @@ Endpoints:
 - POST /api/generate/search - Search-grounded generation
 """
 
+import asyncio
 import json
 import logging
 import uuid
 from datetime import datetime
 
-from fastapi import APIRouter, BackgroundTasks, Depends, Header, Query
+from fastapi import APIRouter, Depends, Header, Query
 
-from api.dependencies import get_image_repository, get_quota_repository, get_template_repository
+from api.dependencies import (
+    get_image_repository,
+    get_quota_repository,
+    get_task_queue,
+    get_template_repository,
+)
 from api.schemas.generate import (
     AsyncGenerateResponse,
     BatchGenerateRequest,
@@ -59,8 +65,11 @@ from services import (
     get_provider_router,
     get_quota_service,
 )
+from services.batch_task import batch_items_key
 from services.prompt_pipeline import get_prompt_pipeline
+from services.result_cache import get_result_cache
 from services.storage import get_storage_manager
+from services.task_queue import GenerationJob, TaskQueue
 
 logger = logging.getLogger(__name__)
 
@@ -123,11 +132,13 @@ def build_provider_request(
     edit_mode: str | None = None,
     mask_mode: str | None = None,
     mask_dilation: float = 0.03,
+    seed: int | None = None,
 ) -> ProviderRequest:
     """Build a unified provider request from API parameters."""
     return ProviderRequest(
         prompt=prompt,
         negative_prompt=negative_prompt,
+        seed=seed,
         aspect_ratio=settings.aspect_ratio.value,
         resolution=settings.resolution.value,
         safety_level=settings.safety_level.value,
@@ -145,13 +156,37 @@ def build_provider_request(
     )
 
 
+# Warm-up tasks started by speculative routing (kept referenced until done)
+_warm_up_tasks: set[asyncio.Task] = set()
+
+
+async def _route_speculatively(router_instance, provider_request: ProviderRequest):
+    """Route a request and start warming up the chosen provider in the background."""
+    decision = await router_instance.route(request=provider_request, media_type=MediaType.IMAGE)
+    task = asyncio.create_task(router_instance.warm_up(decision, MediaType.IMAGE))
+    _warm_up_tasks.add(task)
+    task.add_done_callback(_warm_up_tasks.discard)
+    return decision
+
+
+async def _abandon_speculative_route(router_instance, routing_task: asyncio.Task) -> None:
+    """Drop a speculative route whose request will not be dispatched."""
+    if not routing_task.done():
+        routing_task.cancel()
+        return
+    if routing_task.cancelled() or routing_task.exception() is not None:
+        return
+    decision = routing_task.result()
+    await router_instance.refund(decision.provider_name, decision.model_id)
+
+
 # ============ Endpoints ============
 
 
 @router.post("")
 async def generate_image(
     request: GenerateImageRequest,
-    background_tasks: BackgroundTasks,
+    task_queue: TaskQueue = Depends(get_task_queue),
     sync: bool = Query(False, description="If true, run synchronously and return full result"),
     user: AppUser | None = Depends(get_current_user),
     image_repo: ImageRepository | None = Depends(get_image_repository),
@@ -178,28 +213,6 @@ async def generate_image(
     # Check quota
     await check_quota_and_consume(user_id)
 
-    # Run prompt pipeline
-    app_settings = get_settings()
-    if app_settings.is_prompt_pipeline_configured:
-        pipeline = get_prompt_pipeline()
-        processed = await pipeline.process(
-            prompt=request.prompt,
-            enhance=request.enhance_prompt
-            if request.enhance_prompt is not None
-            else app_settings.prompt_auto_enhance,
-            generate_negative=request.generate_negative
-            if request.generate_negative is not None
-            else app_settings.prompt_auto_negative,
-            template_id=request.template_id,
-            template_repo=template_repo,
-        )
-        final_prompt = processed.final
-        negative_prompt = processed.negative_prompt
-    else:
-        final_prompt = request.prompt
-        negative_prompt = None
-        processed = None
-
     # Model resolution: alias or quality preset
     from services.model_router import QualityPreset, resolve_alias, select_model_by_preset
 
@@ -227,6 +240,57 @@ async def generate_image(
             effective_model = p_model
         preset_used = preset_str
 
+    app_settings = get_settings()
+    router_instance = get_provider_router()
+
+    # Routing does not depend on the processed prompt, so in speculative mode
+    # the provider is chosen and its connection warmed up while LLM steps run
+    routing_task = None
+    if app_settings.is_prompt_pipeline_configured and app_settings.prompt_speculative_routing:
+        routing_task = asyncio.create_task(
+            _route_speculatively(
+                router_instance,
+                build_provider_request(
+                    prompt=request.prompt,
+                    settings=request.settings,
+                    user_id=user_id,
+                    preferred_provider=effective_provider,
+                    preferred_model=effective_model,
+                    enable_thinking=request.include_thinking,
+                    seed=request.seed,
+                ),
+            )
+        )
+
+    # Run prompt pipeline
+    if app_settings.is_prompt_pipeline_configured:
+        pipeline = get_prompt_pipeline()
+        pipeline_run = pipeline.process(
+            prompt=request.prompt,
+            enhance=request.enhance_prompt
+            if request.enhance_prompt is not None
+            else app_settings.prompt_auto_enhance,
+            generate_negative=request.generate_negative
+            if request.generate_negative is not None
+            else app_settings.prompt_auto_negative,
+            template_id=request.template_id,
+            template_repo=template_repo,
+        )
+        if routing_task:
+            try:
+                processed = await pipeline_run
+            except BaseException:
+                await _abandon_speculative_route(router_instance, routing_task)
+                raise
+        else:
+            processed = await pipeline_run
+        final_prompt = processed.final
+        negative_prompt = processed.negative_prompt
+    else:
+        final_prompt = request.prompt
+        negative_prompt = None
+        processed = None
+
     # Build provider request
     provider_request = build_provider_request(
         prompt=final_prompt,
@@ -236,16 +300,18 @@ async def generate_image(
         preferred_model=effective_model,
         enable_thinking=request.include_thinking,
         negative_prompt=negative_prompt,
+        seed=request.seed,
     )
 
     # Route to determine primary provider and fallbacks
-    router_instance = get_provider_router()
-
     try:
-        decision = await router_instance.route(
-            request=provider_request,
-            media_type=MediaType.IMAGE,
-        )
+        if routing_task:
+            decision = await routing_task
+        else:
+            decision = await router_instance.route(
+                request=provider_request,
+                media_type=MediaType.IMAGE,
+            )
     except ValueError as e:
         logger.warning(f"No providers available: {e}")
         raise GenerationError(message="No providers available")
@@ -293,10 +359,8 @@ async def generate_image(
     )
     await redis.expire(task_key, 86400)  # 24h TTL
 
-    from services.generation_task import execute_generation_race
-
-    background_tasks.add_task(
-        execute_generation_race,
+    await task_queue.enqueue(
+        GenerationJob.RACE,
         task_id=task_id,
         request=provider_request,
         original_prompt=request.prompt,
@@ -336,12 +400,18 @@ async def _generate_sync(
     x_api_key: str | None,
 ) -> GenerateImageResponse:
     """Synchronous generation path — keeps the original blocking behavior."""
+    result_cache = get_result_cache()
     try:
-        result = await router_instance.execute_with_fallback(
-            request=provider_request,
-            decision=decision,
-            media_type=MediaType.IMAGE,
-        )
+        result = await result_cache.get(provider_request, decision.provider_name, decision.model_id)
+        if result is not None:
+            # No provider call follows, so give back the token routing took
+            await router_instance.refund(decision.provider_name, decision.model_id)
+        else:
+            result = await router_instance.execute_with_fallback(
+                request=provider_request,
+                decision=decision,
+                media_type=MediaType.IMAGE,
+            )
     except ValueError as e:
         logger.warning(f"No providers available, falling back to legacy: {e}")
         generator = create_generator(x_api_key)
@@ -358,27 +428,33 @@ async def _generate_sync(
             {
                 "success": legacy_result.image is not None,
                 "image": legacy_result.image,
+                "image_data": None,
+                "image_mime_type": None,
+                "has_image": legacy_result.image is not None,
                 "error": legacy_result.error,
                 "text_response": legacy_result.text,
                 "thinking": legacy_result.thinking,
                 "duration": legacy_result.duration,
                 "provider": "google",
                 "model": "gemini-3-pro-image-preview",
+                "cached": False,
             },
         )()
 
     if result.error:
         raise GenerationError(message=get_friendly_error_message(result.error))
 
-    if not result.image:
+    if not result.has_image:
         raise GenerationError(message="Failed to generate image")
 
-    # Save to storage
+    # Save to storage (seeded results are content-addressed so repeats share one object)
     storage = get_storage_manager(user_id=user_id if user else None)
+    cacheable = result_cache.is_cacheable(provider_request, result.provider)
 
     try:
         storage_obj = await storage.save_image(
-            image=result.image,
+            image=result.image_data or result.image,
+            content_type=result.image_mime_type,
             prompt=request.prompt,
             settings={
                 "aspect_ratio": request.settings.aspect_ratio.value,
@@ -390,15 +466,19 @@ async def _generate_sync(
             mode="basic",
             text_response=result.text_response,
             thinking=result.thinking,
+            content_addressed=cacheable,
         )
     except Exception as e:
         logger.error(f"Failed to save image: {e}")
         raise StorageError(message="Failed to save image")
 
-    # Save to PostgreSQL if available
+    if cacheable:
+        await result_cache.put(provider_request, result, storage_obj.key)
+
+    # Save to PostgreSQL if available (a repeated seeded result reuses its record)
     if image_repo:
         try:
-            await image_repo.create(
+            await image_repo.get_or_create(
                 storage_key=storage_obj.key,
                 filename=storage_obj.filename,
                 prompt=request.prompt,
@@ -470,15 +550,15 @@ async def _generate_sync(
         was_translated=processed.was_translated if processed else False,
         was_enhanced=processed.was_enhanced if processed else False,
         template_name=processed.template_name if processed else None,
+        cached=result.cached,
     )
 
 
 @router.post("/batch", response_model=BatchGenerateResponse)
 async def batch_generate(
     request: BatchGenerateRequest,
-    background_tasks: BackgroundTasks,
+    task_queue: TaskQueue = Depends(get_task_queue),
     user: AppUser | None = Depends(get_current_user),
-    x_api_key: str | None = Header(None, alias="X-API-Key"),
 ):
     """
     Queue a batch image generation task.
@@ -503,7 +583,6 @@ async def batch_generate(
         "prompts": request.prompts,
         "settings": request.settings.model_dump(),
         "user_id": user_id,
-        "api_key": x_api_key or "",
         "created_at": datetime.now().isoformat(),
     }
 
@@ -516,16 +595,16 @@ async def batch_generate(
     )
     await redis.expire(f"task:{task_id}", 86400)  # 24 hour TTL
 
-    # Queue task via arq (or run in background for simple cases)
-    # For now, we'll use FastAPI background tasks
-    # TODO: Replace with arq for production
-    background_tasks.add_task(
-        process_batch_generation,
+    await task_queue.enqueue(
+        GenerationJob.BATCH,
         task_id=task_id,
         prompts=request.prompts,
-        settings=request.settings,
+        settings_dict={
+            "aspect_ratio": request.settings.aspect_ratio.value,
+            "resolution": request.settings.resolution.value,
+            "safety_level": request.settings.safety_level.value,
+        },
         user_id=user_id,
-        api_key=x_api_key,
     )
 
     return BatchGenerateResponse(
@@ -535,103 +614,6 @@ async def batch_generate(
     )
 
 
-async def process_batch_generation(
-    task_id: str,
-    prompts: list,
-    settings: GenerationSettings,
-    user_id: str,
-    api_key: str | None,
-):
-    """Background task to process batch generation."""
-    import json
-
-    redis = await get_redis()
-    task_key = f"task:{task_id}"
-
-    await redis.hset(task_key, "status", "processing")
-    await redis.hset(task_key, "started_at", datetime.now().isoformat())
-
-    generator = create_generator(api_key)
-    storage = get_storage_manager(user_id=user_id if user_id != "anonymous" else None)
-
-    results = []
-    errors = []
-
-    # Run pipeline on each prompt if configured
-    app_settings = get_settings()
-    pipeline_configured = app_settings.is_prompt_pipeline_configured
-
-    for i, prompt in enumerate(prompts):
-        # Check if task was cancelled
-        cancelled = await redis.hget(task_key, "cancelled")
-        if cancelled == "1":
-            await redis.hset(task_key, "status", "cancelled")
-            await redis.hset(task_key, "completed_at", datetime.now().isoformat())
-            await redis.hdel(task_key, "current_prompt")
-            return
-
-        try:
-            # Update current prompt
-            await redis.hset(task_key, "current_prompt", prompt)
-
-            # Apply prompt pipeline
-            final_prompt = prompt
-            if pipeline_configured:
-                try:
-                    pipeline = get_prompt_pipeline()
-                    processed = await pipeline.process(
-                        prompt=prompt,
-                        enhance=app_settings.prompt_auto_enhance,
-                        generate_negative=False,
-                    )
-                    final_prompt = processed.final
-                except Exception as e:
-                    logger.warning(f"Batch pipeline failed for prompt {i + 1}: {e}")
-
-            result = generator.generate(
-                prompt=final_prompt,
-                aspect_ratio=settings.aspect_ratio.value,
-                resolution=settings.resolution.value,
-                safety_level=settings.safety_level.value,
-            )
-
-            if result.error:
-                errors.append(f"Prompt {i + 1}: {result.error}")
-            elif result.image:
-                storage_obj = await storage.save_image(
-                    image=result.image,
-                    prompt=prompt,
-                    settings={
-                        "aspect_ratio": settings.aspect_ratio.value,
-                        "resolution": settings.resolution.value,
-                    },
-                    duration=result.duration,
-                    mode="batch",
-                )
-
-                results.append(
-                    {
-                        "key": storage_obj.key,
-                        "filename": storage_obj.filename,
-                        "url": storage_obj.public_url,
-                    }
-                )
-
-        except Exception as e:
-            errors.append(f"Prompt {i + 1}: {str(e)}")
-            logger.error(f"Batch generation error: {e}")
-
-        # Update progress
-        await redis.hset(task_key, "progress", str(i + 1))
-        await redis.hset(task_key, "results", json.dumps(results))
-        await redis.hset(task_key, "errors", json.dumps(errors))
-
-    # Mark complete
-    await redis.hset(task_key, "status", "completed")
-    await redis.hset(task_key, "completed_at", datetime.now().isoformat())
-    await redis.hdel(task_key, "current_prompt")
-
-
 @router.get("/task/{task_id}", response_model=GenerateTaskProgress)
 async def get_task_progress(task_id: str):
     """Get progress of a generation task (single or batch)."""
@@ -645,7 +627,8 @@ async def get_task_progress(task_id: str):
     if task_id.startswith("gen_"):
         return _build_single_progress(task_id, task_data)
     else:
-        return _build_batch_progress(task_id, task_data)
+        items = await redis.hgetall(batch_items_key(task_id))
+        return _build_batch_progress(task_id, task_data, items)
 
 
 def _build_single_progress(task_id: str, task_data: dict) -> GenerateTaskProgress:
@@ -674,10 +657,26 @@ def _build_single_progress(task_id: str, task_data: dict) -> GenerateTaskProgres
     )
 
 
-def _build_batch_progress(task_id: str, task_data: dict) -> GenerateTaskProgress:
-    """Build unified progress response for a batch task."""
-    results = json.loads(task_data.get("results", "[]"))
-    errors = json.loads(task_data.get("errors", "[]"))
+def _build_batch_progress(
+    task_id: str, task_data: dict, items: dict[str, str] | None = None
+) -> GenerateTaskProgress:
+    """Build unified progress response for a batch task.
+
+    Per-item results come from the task's items hash; tasks written before
+    it existed keep JSON "results"/"errors" fields on the task hash.
+    """
+    if items:
+        results = []
+        errors = []
+        for index in sorted(items, key=int):
+            item = json.loads(items[index])
+            if item["status"] == "completed":
+                results.append(item["image"])
+            else:
+                errors.append(f"Prompt {int(index) + 1}: {item.get('error')}")
+    else:
+        results = json.loads(task_data.get("results", "[]"))
+        errors = json.loads(task_data.get("errors", "[]"))
     total = int(task_data.get("total", 0))
     progress = int(task_data.get("progress", 0))
 
@@ -702,7 +701,7 @@ def _build_batch_progress(task_id: str, task_data: dict) -> GenerateTaskProgress
 @router.post("/search")
 async def search_grounded_generate(
     request: SearchGenerateRequest,
-    background_tasks: BackgroundTasks,
+    task_queue: TaskQueue = Depends(get_task_queue),
     sync: bool = Query(False, description="If true, run synchronously and return full result"),
     user: AppUser | None = Depends(get_current_user),
     image_repo: ImageRepository | None = Depends(get_image_repository),
@@ -816,10 +815,8 @@ async def search_grounded_generate(
     )
     await redis.expire(task_key, 86400)
 
-    from services.image_task import execute_image_task
-
-    background_tasks.add_task(
-        execute_image_task,
+    await task_queue.enqueue(
+        GenerationJob.IMAGE,
         task_id=task_id,
         mode="search",
         user_id=user_id,
@@ -895,6 +892,9 @@ async def _search_sync(
             {
                 "success": legacy_result.image is not None,
                 "image": legacy_result.image,
+                "image_data": None,
+                "image_mime_type": None,
+                "has_image": legacy_result.image is not None,
                 "error": legacy_result.error,
                 "text_response": legacy_result.text,
                 "search_sources": legacy_result.search_sources,
@@ -907,7 +907,7 @@ async def _search_sync(
     if result.error:
         raise GenerationError(message=get_friendly_error_message(result.error))
 
-    if not result.image:
+    if not result.has_image:
         raise GenerationError(message="Failed to generate image")
 
     # Save to storage
@@ -915,7 +915,8 @@ async def _search_sync(
 
     try:
         storage_obj = await storage.save_image(
-            image=result.image,
+            image=result.image_data or result.image,
+            content_type=result.image_mime_type,
             prompt=request.prompt,
             settings={
                 "aspect_ratio": request.settings.aspect_ratio.value,
@@ -1011,7 +1012,7 @@ async def _search_sync(
 @router.post("/blend")
 async def blend_images(
     request: BlendImagesRequest,
-    background_tasks: BackgroundTasks,
+    task_queue: TaskQueue = Depends(get_task_queue),
     sync: bool = Query(False, description="If true, run synchronously and return full result"),
     user: AppUser | None = Depends(get_current_user),
     image_repo: ImageRepository | None = Depends(get_image_repository),
@@ -1066,10 +1067,8 @@ async def blend_images(
     )
     await redis.expire(task_key, 86400)
 
-    from services.image_task import execute_image_task
-
-    background_tasks.add_task(
-        execute_image_task,
+    await task_queue.enqueue(
+        GenerationJob.IMAGE,
         task_id=task_id,
         mode="blend",
         user_id=user_id,
@@ -1128,12 +1127,13 @@ async def _blend_sync(
     if result.error:
         raise GenerationError(message=get_friendly_error_message(result.error))
 
-    if not result.image:
+    if not result.has_image:
         raise GenerationError(message="Failed to blend images")
 
     try:
         storage_obj = await storage.save_image(
-            image=result.image,
+            image=result.image_data or result.image,
+            content_type=result.image_mime_type,
             prompt=prompt,
             settings={
                 "aspect_ratio": request.settings.aspect_ratio.value,
@@ -1218,7 +1218,7 @@ async def _blend_sync(
 @router.post("/inpaint")
 async def inpaint_image(
     request: InpaintRequest,
-    background_tasks: BackgroundTasks,
+    task_queue: TaskQueue = Depends(get_task_queue),
     sync: bool = Query(False, description="If true, run synchronously and return full result"),
     user: AppUser | None = Depends(get_current_user),
     image_repo: ImageRepository | None = Depends(get_image_repository),
@@ -1283,10 +1283,8 @@ async def inpaint_image(
     )
     await redis.expire(task_key, 86400)
 
-    from services.image_task import execute_image_task
-
-    background_tasks.add_task(
-        execute_image_task,
+    await task_queue.enqueue(
+        GenerationJob.IMAGE,
         task_id=task_id,
         mode="inpaint",
         user_id=user_id,
@@ -1358,12 +1356,13 @@ async def _inpaint_sync(
     if result.error:
         raise GenerationError(message=get_friendly_error_message(result.error))
 
-    if not result.image:
+    if not result.has_image:
         raise GenerationError(message="Failed to inpaint image")
 
     try:
         storage_obj = await storage.save_image(
-            image=result.image,
+            image=result.image_data or result.image,
+            content_type=result.image_mime_type,
             prompt=request.prompt,
             settings={
                 "aspect_ratio": request.settings.aspect_ratio.value,
@@ -1436,7 +1435,7 @@ async def _inpaint_sync(
 @router.post("/outpaint")
 async def outpaint_image(
     request: OutpaintRequest,
-    background_tasks: BackgroundTasks,
+    task_queue: TaskQueue = Depends(get_task_queue),
     sync: bool = Query(False, description="If true, run synchronously and return full result"),
     user: AppUser | None = Depends(get_current_user),
     image_repo: ImageRepository | None = Depends(get_image_repository),
@@ -1495,10 +1494,8 @@ async def outpaint_image(
     )
     await redis.expire(task_key, 86400)
 
-    from services.image_task import execute_image_task
-
-    background_tasks.add_task(
-        execute_image_task,
+    await task_queue.enqueue(
+        GenerationJob.IMAGE,
         task_id=task_id,
         mode="outpaint",
         user_id=user_id,
@@ -1561,12 +1558,13 @@ async def _outpaint_sync(
     if result.error:
         raise GenerationError(message=get_friendly_error_message(result.error))
 
-    if not result.image:
+    if not result.has_image:
         raise GenerationError(message="Failed to outpaint image")
 
     try:
         storage_obj = await storage.save_image(
-            image=result.image,
+            image=result.image_data or result.image,
+            content_type=result.image_mime_type,
             prompt=request.prompt,
             settings={
                 "aspect_ratio": request.settings.aspect_ratio.value,
@@ -9,17 +9,17 @@ Endpoints:
 
 Supports dual storage:
 - PostgreSQL (if configured) for fast queries
-- File storage (JSON) as fallback
+- File storage (indexed per-user history store) as fallback
 """
 
 import base64
 import logging
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 
 from api.dependencies import get_image_repository
+from api.responses import storage_response
 from api.schemas.history import (
     HistoryDeleteResponse,
     HistoryDetailResponse,
@@ -31,7 +31,7 @@ from api.schemas.history import (
 from core.auth import AppUser, get_current_user
 from database.models import GeneratedImage
 from database.repositories import ImageRepository
-from services.storage import StorageManager, get_storage_manager
+from services.storage import StorageManager, get_storage_manager, thumbnail_url
 
 logger = logging.getLogger(__name__)
 
@@ -88,6 +88,9 @@ def record_to_history_item(record: dict, user_id: str | None = None) -> HistoryI
         duration=record.get("duration"),
         created_at=created_at,
         url=url,
+        thumbnail_url=thumbnail_url(
+            record.get("key") or record.get("r2_key"), record.get("media_type", "image")
+        ),
         r2_key=record.get("key") or record.get("r2_key"),
         text_response=record.get("text_response"),
         thinking=record.get("thinking"),
@@ -114,6 +117,7 @@ def db_image_to_history_item(image: GeneratedImage) -> HistoryItem:
         duration=image.duration,
         created_at=image.created_at,
         url=image.public_url,
+        thumbnail_url=thumbnail_url(image.storage_key, image.media_type),
         r2_key=image.storage_key,
         text_response=image.text_response,
         thinking=image.thinking,
@@ -135,6 +139,7 @@ async def list_history(
     media_type: str | None = Query(default=None),
     search: str | None = Query(default=None),
     sort: str = Query(default="newest"),
+    cursor: int | None = Query(default=None, description="next_cursor from the previous page"),
     user: AppUser | None = Depends(get_current_user),
     image_repo: ImageRepository | None = Depends(get_image_repository),
 ):
@@ -142,7 +147,8 @@ async def list_history(
     List image generation history.
 
     Supports filtering by mode and search in prompts.
-    Uses PostgreSQL if available, falls back to file storage.
+    Uses PostgreSQL if available, falls back to file storage. With file
+    storage, following next_cursor avoids the cost of large offsets.
     """
     user_id = get_user_id_from_user(user)
 
@@ -193,38 +199,29 @@ async def list_history(
     # Fallback to file storage
     storage = get_user_storage(user)
 
-    # Get history from storage
-    all_items = await storage.get_history(limit=offset + limit + 1)
-
-    # Apply filters
-    if mode:
-        all_items = [r for r in all_items if r.get("mode") == mode]
-    if media_type:
-        all_items = [r for r in all_items if r.get("media_type", "image") == media_type]
-    if search:
-        search_lower = search.lower()
-        all_items = [r for r in all_items if search_lower in r.get("prompt", "").lower()]
-
-    # Apply offset
-    items_slice = all_items[offset : offset + limit + 1]
-    has_more = len(items_slice) > limit
-    items_slice = items_slice[:limit]
-
-    # Convert to response format
-    items = [record_to_history_item(r, user_id) for r in items_slice]
+    # Get one page of history from the indexed store
+    records = await storage.get_history(
+        limit=limit + 1,
+        offset=offset,
+        mode=mode,
+        media_type=media_type,
+        search=search,
+        oldest_first=sort == "oldest",
+        cursor=cursor,
+    )
+    total = await storage.count_history(mode=mode, media_type=media_type, search=search)
 
-    # Apply sort
-    if sort == "oldest":
-        items.sort(key=lambda x: x.created_at)
-    else:  # newest (default)
-        items.sort(key=lambda x: x.created_at, reverse=True)
+    has_more = len(records) > limit
+    records = records[:limit]
+    items = [record_to_history_item(r, user_id) for r in records]
 
     return HistoryListResponse(
         items=items,
-        total=len(all_items),
+        total=total,
         limit=limit,
         offset=offset,
         has_more=has_more,
+        next_cursor=records[-1].get("seq") if has_more else None,
     )
 
 
@@ -255,51 +252,17 @@ async def get_history_stats(
 
     # Fallback to file storage
     storage = get_user_storage(user)
+    stats = await storage.get_history_stats()
 
-    # Get all history
-    all_items = await storage.get_history(limit=1000)
-
-    if not all_items:
-        return HistoryStatsResponse()
-
-    # Calculate statistics
-    total_images = len(all_items)
-    total_duration = 0.0
-    images_by_mode = {}
-    dates = []
-
-    for record in all_items:
-        # Count by mode
-        mode = record.get("mode", "basic")
-        images_by_mode[mode] = images_by_mode.get(mode, 0) + 1
-
-        # Sum duration
-        duration = record.get("duration")
-        if duration:
-            total_duration += duration
-
-        # Track dates
-        created_at = record.get("created_at")
-        if created_at:
-            if isinstance(created_at, str):
-                try:
-                    created_at = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-                    dates.append(created_at)
-                except ValueError:
-                    pass
-            elif isinstance(created_at, datetime):
-                dates.append(created_at)
-
-    average_duration = total_duration / total_images if total_images > 0 else 0.0
-
-    return HistoryStatsResponse(
-        total_images=total_images,
-        images_by_mode=images_by_mode,
-        total_duration=total_duration,
-        average_duration=average_duration,
-        earliest_date=min(dates) if dates else None,
-        latest_date=max(dates) if dates else None,
-    )
+    # File stores keep created_at as ISO strings; ignore unparseable legacy values
+    for field in ("earliest_date", "latest_date"):
+        if isinstance(stats[field], str):
+            try:
+                stats[field] = datetime.fromisoformat(stats[field].replace("Z", "+00:00"))
+            except ValueError:
+                stats[field] = None
+
+    return HistoryStatsResponse(**stats)
 
 
 @router.get("/{item_id}", response_model=HistoryDetailResponse)
@@ -374,25 +337,20 @@ async def get_history_item(
 @router.get("/{item_id}/image")
 async def get_history_image(
     item_id: str,
+    request: Request,
     user: AppUser | None = Depends(get_current_user),
 ):
     """
     Get the actual image file for a history item.
 
-    Returns the image as a PNG file.
+    Streams the image with a Content-Type matching its stored format and
+    answers conditional and Range requests.
     """
     storage = get_user_storage(user)
 
-    # Load image bytes
-    image_bytes = await storage.load_image_bytes(item_id)
-
-    if not image_bytes:
-        raise HTTPException(status_code=404, detail="Image not found")
-
-    return Response(
-        content=image_bytes,
-        media_type="image/png",
-        headers={"Content-Disposition": f'inline; filename="{item_id}"'},
+    # Images are per user, so shared caches must not keep them
+    return await storage_response(
+        request, storage, item_id, cache_control="private, max-age=86400", filename=item_id
     )
 
 
@@ -3,15 +3,29 @@ Image serving router.
 
 Provides an endpoint to serve images when the storage backend
 doesn't have a public URL (e.g., local file system).
+
+Responses are streamed with content-hash ETags, conditional GET and
+single-range support (see api.responses).
+
+With ?w=<width>, a downscaled WebP/AVIF variant is served instead; it is
+rendered and stored on first request (see services.storage.variants).
 """
 
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from PIL import UnidentifiedImageError
 
+from api.responses import storage_response
 from core.auth import AppUser, get_current_user
-from services.storage import get_storage_manager
+from services.storage import (
+    VARIANT_WIDTHS,
+    StorageManager,
+    create_variant,
+    get_storage_manager,
+    variant_key,
+)
+from services.storage.variants import is_variant_key, supported_formats
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +42,9 @@ def get_user_id_from_user(user: AppUser | None) -> str | None:
 @router.get("/{path:path}")
 async def serve_image(
     path: str,
+    request: Request,
+    w: int | None = Query(default=None, description="Serve a variant of this width"),
+    fmt: str = Query(default="webp", alias="format", description="Variant format: webp or avif"),
     user: AppUser | None = Depends(get_current_user),
 ):
     """
@@ -40,11 +57,15 @@ async def serve_image(
     - users/{user_id}/YYYY/MM/DD/mode_HHMMSS_slug.png
     - YYYY/MM/DD/mode_HHMMSS_slug.png (for anonymous users)
 
+    Answers If-None-Match/If-Modified-Since with 304 and Range with 206.
+
     Args:
         path: The storage key/path of the image
+        w: Variant width (one of VARIANT_WIDTHS); omit for the original
+        fmt: Variant format (webp or avif)
 
     Returns:
-        Image file response
+        Streamed image file response
     """
     # Extract user_id from path if present
     user_id = get_user_id_from_user(user)
@@ -62,30 +83,45 @@ async def serve_image(
 
     storage = get_storage_manager(user_id=storage_user_id)
 
-    # Load image bytes
-    data = await storage.load_image_bytes(path)
+    if w is not None:
+        return await _serve_variant(request, storage, path, w, fmt)
+
+    # Content-addressed objects never change, so they can be cached for good
+    cache_control = "public, max-age=86400"  # 1 day cache
+    if storage.etag_from_key(path):
+        cache_control = "public, max-age=31536000, immutable"
 
-    if not data:
+    return await storage_response(request, storage, path, cache_control=cache_control)
+
+
+async def _serve_variant(
+    request: Request, storage: StorageManager, path: str, width: int, fmt: str
+):
+    """Serve a stored variant, rendering it first if it does not exist yet."""
+    if width not in VARIANT_WIDTHS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Width must be one of {', '.join(map(str, VARIANT_WIDTHS))}",
+        )
+    if fmt not in supported_formats():
+        raise HTTPException(status_code=400, detail=f"Unsupported variant format: {fmt}")
+    if is_variant_key(path):
+        raise HTTPException(status_code=400, detail="Cannot resize a variant")
+
+    # A variant is derived from an original that never changes in place
+    cache_control = "public, max-age=31536000, immutable"
+    key = variant_key(path, width, fmt)
+    try:
+        return await storage_response(request, storage, key, cache_control=cache_control)
+    except HTTPException as e:
+        if e.status_code != 404:
+            raise
+
+    try:
+        key = await create_variant(storage, path, width, fmt)
+    except UnidentifiedImageError as e:
+        raise HTTPException(status_code=415, detail="Not a resizable image") from e
+    if key is None:
         raise HTTPException(status_code=404, detail="Image not found")
 
-    # Determine content type from file extension
-    content_type = "image/png"
-    path_lower = path.lower()
-    if path_lower.endswith((".jpg", ".jpeg")):
-        content_type = "image/jpeg"
-    elif path_lower.endswith(".webp"):
-        content_type = "image/webp"
-    elif path_lower.endswith(".gif"):
-        content_type = "image/gif"
-
-    # Get filename for Content-Disposition
-    filename = path.split("/")[-1]
-
-    return Response(
-        content=data,
-        media_type=content_type,
-        headers={
-            "Cache-Control": "public, max-age=86400",  # 1 day cache
-            "Content-Disposition": f'inline; filename="{filename}"',
-        },
-    )
+    return await storage_response(request, storage, key, cache_control=cache_control)
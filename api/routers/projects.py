@@ -46,6 +46,7 @@ from api.schemas.projects import (
 )
 from database.models import Project, ProjectImage
 from database.repositories import ProjectRepository
+from services.storage import thumbnail_url
 
 logger = logging.getLogger(__name__)
 
@@ -93,7 +94,7 @@ def project_image_to_info(project_image: ProjectImage) -> ProjectImageInfo:
         filename=image.filename,
         prompt=image.prompt,
         url=image.public_url,
-        thumbnail_url=None,
+        thumbnail_url=thumbnail_url(image.storage_key, image.media_type),
         note=project_image.note,
         sort_order=project_image.sort_order,
         added_at=project_image.added_at,
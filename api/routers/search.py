@@ -32,6 +32,7 @@ from database.repositories import (
     ImageRepository,
     TemplateRepository,
 )
+from services.storage import thumbnail_url
 
 logger = logging.getLogger(__name__)
 
@@ -105,7 +106,7 @@ async def global_search(
                     title=img.filename,
                     description=img.prompt[:200] if img.prompt else None,
                     url=img.public_url,
-                    thumbnail_url=None,
+                    thumbnail_url=thumbnail_url(img.storage_key, img.media_type),
                     score=1.0,
                     created_at=img.created_at,
                     highlight=highlight_match(img.prompt, q) if img.prompt else None,
@@ -194,7 +195,7 @@ async def search_images(
                 id=str(img.id),
                 prompt=img.prompt,
                 url=img.public_url,
-                thumbnail_url=None,
+                thumbnail_url=thumbnail_url(img.storage_key, img.media_type),
                 mode=img.mode,
                 provider=img.provider,
                 created_at=img.created_at,
@@ -10,7 +10,7 @@ import logging
 
 from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 
-from core.auth import _to_app_user, get_validator
+from core.auth import verify_token
 from services.websocket_manager import get_websocket_manager
 
 logger = logging.getLogger(__name__)
@@ -28,9 +28,7 @@ async def authenticate_websocket(token: str | None) -> tuple[str | None, str | N
         return None, None  # Anonymous connection allowed
 
     try:
-        validator = get_validator()
-        auth_user = await validator.verify_async(token)
-        app_user = _to_app_user(auth_user)
+        app_user = await verify_token(token)
         return app_user.user_folder_id, None
     except Exception as e:
         logger.warning(f"WebSocket auth error: {e}")
@@ -41,6 +39,7 @@ async def authenticate_websocket(token: str | None) -> tuple[str | None, str | N
 async def websocket_endpoint(
     websocket: WebSocket,
     token: str | None = Query(default=None),
+    last_event_id: str | None = Query(default=None),
 ):
     """
     WebSocket endpoint for real-time updates.
@@ -49,6 +48,12 @@ async def websocket_endpoint(
     - Pass JWT token as query parameter: /api/ws?token=xxx
     - Anonymous connections are allowed but with limited functionality
 
+    Reconnecting:
+    - Pass the last received "event_id" as /api/ws?token=xxx&last_event_id=yyy to
+      replay user events missed while disconnected (kept for a few minutes)
+    - Subscribe with {"channel": ..., "task_id": ..., "last_event_id": ...} to
+      replay missed channel events
+
     Message Protocol:
     - Client sends JSON messages with "type" and "payload" fields
     - Server responds with JSON messages with "type", "payload", and "timestamp" fields
@@ -61,7 +66,7 @@ async def websocket_endpoint(
     Server -> Client Messages:
     - {"type": "connected", "payload": {"connection_id": "...", "user_id": "..."}}
     - {"type": "pong", "payload": {"server_time": 1234567890}}
-    - {"type": "task:progress", "payload": {...}}
+    - {"type": "task:progress", "payload": {...}, "event_id": "..."}
     - {"type": "task:complete", "payload": {...}}
     - {"type": "notification", "payload": {...}}
     - {"type": "quota:warning", "payload": {...}}
@@ -85,7 +90,7 @@ async def websocket_endpoint(
         return
 
     # Connect
-    connection_id = await ws_manager.connect(websocket, user_id)
+    connection_id = await ws_manager.connect(websocket, user_id, last_event_id)
 
     try:
         while True:
@@ -102,6 +102,17 @@ class ProviderStatus(StrEnum):
     DEGRADED = "degraded"
 
 
+class ModelRateLimitInfo(BaseModel):
+    """Rate limit token levels for a provider model."""
+
+    model_id: str = Field(..., description="Model ID")
+    rate_limit_rpm: int | None = Field(None, description="Requests per minute limit")
+    rate_limit_daily: int | None = Field(None, description="Daily request limit")
+    tokens: float | None = Field(None, description="Tokens left in the minute bucket")
+    daily_used: int | None = Field(None, description="Requests used today (UTC)")
+    retry_after: float | None = Field(None, description="Seconds until the next token")
+
+
 class AdminProviderInfo(BaseModel):
     """Provider information for admin views."""
 
@@ -115,12 +126,19 @@ class AdminProviderInfo(BaseModel):
     total_requests_24h: int = Field(default=0, description="Requests in last 24h")
     success_rate_24h: float = Field(default=100.0, description="Success rate 24h")
     avg_latency_ms: float = Field(default=0.0, description="Average latency")
+    p50_latency_ms: float | None = Field(None, description="Median latency")
+    p90_latency_ms: float | None = Field(None, description="90th percentile latency")
+    p99_latency_ms: float | None = Field(None, description="99th percentile latency")
     circuit_breaker_state: str | None = Field(
         None,
         description="Circuit breaker state",
     )
     last_error: str | None = Field(None, description="Last error message")
     last_error_at: datetime | None = Field(None, description="Last error time")
+    rate_limits: list[ModelRateLimitInfo] = Field(
+        default_factory=list,
+        description="Token levels of rate-limited models",
+    )
 
 
 class ListProvidersResponse(BaseModel):
@@ -170,10 +188,11 @@ class ListModerationLogsResponse(BaseModel):
     """Response for GET /api/admin/moderation/logs."""
 
     logs: list[ModerationLogEntry] = Field(default_factory=list)
-    total: int = Field(..., description="Total entries")
+    total: int | None = Field(None, description="Total entries (not counted for cursor pages)")
     limit: int = Field(..., description="Items per page")
     offset: int = Field(..., description="Current offset")
     has_more: bool = Field(..., description="More items exist")
+    next_cursor: str | None = Field(None, description="Pass as cursor to fetch the next page")
 
 
 class ModerationRule(BaseModel):
@@ -210,14 +229,54 @@ class CreateModerationRuleRequest(BaseModel):
 class ModerationStatsResponse(BaseModel):
     """Response for GET /api/admin/moderation/stats."""
 
+    date: str | None = Field(None, description="Day (YYYY-MM-DD, UTC) the counters cover")
     total_checks: int = Field(..., description="Total content checks")
     blocked_count: int = Field(..., description="Content blocked")
-    warned_count: int = Field(..., description="Content warned")
+    warned_count: int = Field(..., description="Content flagged for review")
     passed_count: int = Field(..., description="Content passed")
     top_rules: list[dict[str, Any]] = Field(
         default_factory=list,
         description="Most triggered rules",
     )
+    block_breakdown: dict[str, int] = Field(
+        default_factory=dict, description="Blocks per moderation layer"
+    )
+    ai_classifications: dict[str, int] = Field(
+        default_factory=dict, description="AI blocks per category"
+    )
+    average_times_ms: dict[str, float] = Field(
+        default_factory=dict, description="Average time per layer"
+    )
+    timings: dict[str, Any] = Field(
+        default_factory=dict, description="Per-layer timing histograms and percentiles"
+    )
+    hourly: list[dict[str, Any]] | None = Field(
+        None, description="Per-hour summaries (when requested)"
+    )
+
+
+class ReloadKeywordsResponse(BaseModel):
+    """Response for POST /api/admin/moderation/keywords/reload."""
+
+    keyword_count: int = Field(..., description="Banned keywords now in effect")
+
+
+class AuditSinkStatusResponse(BaseModel):
+    """Response for GET /api/admin/moderation/audit-sink."""
+
+    submitted: int = Field(default=0, description="Entries queued by this process")
+    dropped: int = Field(default=0, description="Entries dropped because the queue was full")
+    written: int = Field(default=0, description="Entries written to JSONL segments")
+    db_written: int = Field(default=0, description="Entries inserted into audit_logs")
+    db_failures: int = Field(default=0, description="Failed audit_logs batch inserts")
+    stats_failures: int = Field(default=0, description="Failed moderation counter updates")
+    batches: int = Field(default=0, description="Flushes performed")
+    last_flush_ms: float = Field(default=0.0, description="Duration of the latest flush")
+    queue_depth: int = Field(default=0, description="Entries waiting to be written")
+    max_queue: int = Field(default=0, description="Queue capacity")
+    high_watermark: int = Field(default=0, description="Deepest queue seen")
+    backpressure: bool = Field(default=False, description="Queue above its warning threshold")
+    segment: str | None = Field(default=None, description="Current JSONL segment")
 
 
 # ============ System Monitoring ============
@@ -293,6 +352,61 @@ class DatabaseStatusResponse(BaseModel):
     )
 
 
+class PromptCacheStepStats(BaseModel):
+    """Prompt cache counters for one pipeline step."""
+
+    local_hits: int = Field(default=0, description="Hits in the in-process LRU")
+    redis_hits: int = Field(default=0, description="Hits in Redis")
+    misses: int = Field(default=0, description="Lookups that called PromptHub/LLM")
+
+
+class PromptCacheStatusResponse(BaseModel):
+    """Response for GET /api/admin/system/prompt-cache."""
+
+    generation: int = Field(default=0, description="Current cache generation")
+    local_entries: int = Field(default=0, description="Entries in this process's LRU")
+    hit_rate: float = Field(default=0.0, description="Hit rate in this process (0-1)")
+    steps: dict[str, PromptCacheStepStats] = Field(
+        default_factory=dict,
+        description="Counters by step (translate, enhance, negative, render)",
+    )
+
+
+class TokenCacheStatusResponse(BaseModel):
+    """Response for GET /api/admin/system/token-cache."""
+
+    entries: int = Field(default=0, description="Verified tokens cached in this process")
+    max_entries: int = Field(default=0, description="Cache capacity")
+    hits: int = Field(default=0, description="Requests served from the cache")
+    misses: int = Field(default=0, description="Requests that needed a signature check")
+    memo_hits: int = Field(default=0, description="Repeat lookups within one request")
+    hit_rate: float = Field(default=0.0, description="Cache hit rate (0-1)")
+    verifications: int = Field(default=0, description="RS256 signature verifications")
+    verify_failures: int = Field(default=0, description="Tokens that failed verification")
+    verify_ms_total: float = Field(default=0.0, description="Time spent verifying")
+    verify_ms_avg: float = Field(default=0.0, description="Average verification time")
+    verify_ms_max: float = Field(default=0.0, description="Slowest verification")
+
+
+class ImageCodecStatusResponse(BaseModel):
+    """Response for GET /api/admin/system/image-codec."""
+
+    workers: int = Field(default=0, description="Codec threads (0 until first use)")
+    submitted: int = Field(default=0, description="Operations submitted")
+    completed: int = Field(default=0, description="Operations finished successfully")
+    failed: int = Field(default=0, description="Operations that raised")
+    queued: int = Field(default=0, description="Operations waiting for a thread")
+    running: int = Field(default=0, description="Operations running now")
+    max_queued: int = Field(default=0, description="Deepest queue seen")
+    wait_ms_total: float = Field(default=0.0, description="Time spent queued")
+    run_ms_total: float = Field(default=0.0, description="Time spent running")
+    avg_wait_ms: float = Field(default=0.0, description="Average queue wait")
+    avg_run_ms: float = Field(default=0.0, description="Average run time")
+    budget_rejections: int = Field(
+        default=0, description="Operations refused because a request's budget was spent"
+    )
+
+
 # ============ Quota Management ============
 
 
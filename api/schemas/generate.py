@@ -98,6 +98,9 @@ class GenerateImageRequest(BaseModel):
     )
     generate_negative: bool | None = Field(None, description="Auto-generate negative prompt")
     template_id: str | None = Field(None, description="Local template ID to apply")
+    seed: int | None = Field(
+        None, ge=0, description="Random seed for reproducible output (where supported)"
+    )
     quality_preset: str | None = Field(
         None,
         description="Quality preset: 'premium', 'balanced', 'fast'. Ignored if X-Model header is set.",
@@ -148,6 +151,7 @@ class GenerateImageResponse(BaseModel):
     was_translated: bool = Field(False, description="Whether prompt was auto-translated")
     was_enhanced: bool = Field(False, description="Whether prompt was AI-enhanced")
     template_name: str | None = Field(None, description="Template name if used")
+    cached: bool = Field(False, description="Served from the seeded result cache")
 
 
 class AsyncGenerateResponse(BaseModel):
@@ -25,6 +25,7 @@ class HistoryItem(BaseModel):
     duration: float | None = Field(None, description="Generation time in seconds")
     created_at: datetime
     url: str | None = Field(None, description="Public URL if available")
+    thumbnail_url: str | None = Field(None, description="Thumbnail URL")
     r2_key: str | None = Field(None, description="R2 storage key")
     text_response: str | None = Field(None, description="Model text response")
     thinking: str | None = Field(None, description="Model thinking process")
@@ -54,6 +55,9 @@ class HistoryListResponse(BaseModel):
     limit: int
     offset: int
     has_more: bool = Field(default=False)
+    next_cursor: int | None = Field(
+        None, description="Pass as cursor to fetch the next page (file storage only)"
+    )
 
 
 class HistoryDetailResponse(BaseModel):
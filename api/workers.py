@@ -1,23 +1,36 @@
 """
-ARQ background worker for Nano Banana Lab.
+ARQ background workers for Nano Banana Lab.
 
 Run with:
-    arq api.workers.WorkerSettings
+    arq api.workers.WorkerSettings             # maintenance queue
+    arq api.workers.GenerationWorkerSettings   # single-image and image-operation jobs
+    arq api.workers.BatchWorkerSettings        # batch generation jobs
+
+Each queue has its own worker class so concurrency can be tuned, and the
+worker tier scaled, per queue.
 
 Tasks:
     - generate_template_previews: Generate missing preview images for templates.
       Runs as a daily cron (03:00) and can be triggered manually via the admin API.
+    - generation_race: Race-pattern single-image generation.
+    - image_task: Blend, inpaint, outpaint and search-grounded generation.
+    - batch_generation: Batch image generation.
 """
 
 import logging
 from urllib.parse import urlparse
 
-from arq import cron
+from arq import cron, func
 from arq.connections import RedisSettings
 
 from core.config import get_settings
+from core.redis import close_redis, get_redis, init_redis
 from database import close_database, get_session, init_database
+from services.image_codec import shutdown_image_executor
 from services.preview_generator import PreviewGenerator
+from services.storage import shutdown_storage_executor
+from services.task_queue import BATCH_QUEUE, GENERATION_QUEUE, GenerationJob, run_job_once
+from services.websocket_manager import get_websocket_manager
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +51,17 @@ async def startup(ctx: dict) -> None:
     await init_database()
     logger.info("Database initialized")
 
+    await init_redis()
+    logger.info("Redis initialized")
+
+    # Progress events reach the API nodes' sockets through the Redis relay
+    settings = get_settings()
+    await get_websocket_manager().start_relay(
+        await get_redis(),
+        replay_ttl=settings.ws_replay_ttl,
+        replay_maxlen=settings.ws_replay_maxlen,
+    )
+
     # Pre-create the preview generator so it's reused across invocations
     ctx["preview_generator"] = PreviewGenerator()
     logger.info("PreviewGenerator ready")
@@ -46,6 +70,12 @@ async def startup(ctx: dict) -> None:
 async def shutdown(ctx: dict) -> None:
     """Clean up resources on worker shutdown."""
     logger.info("ARQ worker shutting down...")
+    ws_manager = get_websocket_manager()
+    await ws_manager.stop_relay()
+    await ws_manager.close()
+    await close_redis()
+    shutdown_storage_executor()
+    shutdown_image_executor()
     await close_database()
     logger.info("Database connection closed")
 
@@ -87,6 +117,21 @@ async def generate_template_previews(
     return {"success": success, "fail": fail}
 
 
+async def generation_race(ctx: dict, task_id: str, **kwargs) -> bool:  # noqa: ARG001
+    """Run a race-pattern single-image generation job (see execute_generation_race)."""
+    return await run_job_once(GenerationJob.RACE, task_id, **kwargs)
+
+
+async def image_task(ctx: dict, task_id: str, **kwargs) -> bool:  # noqa: ARG001
+    """Run a blend/inpaint/outpaint/search job (see execute_image_task)."""
+    return await run_job_once(GenerationJob.IMAGE, task_id, **kwargs)
+
+
+async def batch_generation(ctx: dict, task_id: str, **kwargs) -> bool:  # noqa: ARG001
+    """Run a batch generation job (see execute_batch_generation)."""
+    return await run_job_once(GenerationJob.BATCH, task_id, **kwargs)
+
+
 # ── ARQ configuration ───────────────────────────────────────────────────────
 
 
@@ -124,3 +169,39 @@ class WorkerSettings:
     # Allow long-running preview generation (up to 4 hours)
     max_jobs = 2
     job_timeout = 14400  # 4 hours
+
+
+class GenerationWorkerSettings:
+    """ARQ worker configuration for the interactive generation queue."""
+
+    functions = [
+        func(generation_race, max_tries=get_settings().task_max_tries),
+        func(image_task, max_tries=get_settings().task_max_tries),
+    ]
+
+    on_startup = startup
+    on_shutdown = shutdown
+
+    redis_settings = _parse_redis_settings()
+    queue_name = GENERATION_QUEUE
+
+    max_jobs = get_settings().generation_queue_max_jobs
+    job_timeout = get_settings().generation_overall_timeout * 5
+    # Let running jobs finish on SIGTERM before the worker exits
+    job_completion_wait = get_settings().task_drain_timeout
+
+
+class BatchWorkerSettings:
+    """ARQ worker configuration for the batch generation queue."""
+
+    functions = [func(batch_generation, max_tries=get_settings().task_max_tries)]
+
+    on_startup = startup
+    on_shutdown = shutdown
+
+    redis_settings = _parse_redis_settings()
+    queue_name = BATCH_QUEUE
+
+    max_jobs = get_settings().batch_queue_max_jobs
+    job_timeout = 3600  # 1 hour
+    job_completion_wait = get_settings().task_drain_timeout
@@ -3,10 +3,22 @@ Central authentication module using auth-service JWT validation.
 
 Replaces the old GitHub OAuth auth (services/auth_service.py) with
 RS256 JWT verification via the auth-client SDK.
+
+RSA verification is the expensive part of every authenticated request, and
+clients repeat the same bearer token (polling task status, reconnecting
+WebSockets). Verified tokens are therefore kept in a bounded LRU keyed by
+the token's SHA-256 until the token's exp claim, and each request memoizes
+its result so dependencies that resolve the user more than once (e.g.
+get_current_user next to require_admin) verify at most once.
 """
 
+import hashlib
 import logging
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
 from dataclasses import dataclass, field
+from typing import Any
 
 from auth import AuthenticatedUser, JWTValidator
 from fastapi import Header
@@ -74,6 +86,124 @@ def _to_app_user(auth_user: AuthenticatedUser) -> AppUser:
     )
 
 
+# ============ Verified Token Cache ============
+
+
+class TokenCache:
+    """Bounded LRU of verified tokens, each kept until its exp claim."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, AppUser]] = OrderedDict()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "memo_hits": 0,
+            "verifications": 0,
+            "verify_failures": 0,
+            "verify_ms_total": 0.0,
+            "verify_ms_max": 0.0,
+        }
+
+    def get(self, key: str) -> AppUser | None:
+        """Cached user for a token hash, if still unexpired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        expires_at, user = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return user
+
+    def put(self, key: str, user: AppUser) -> None:
+        """Cache a verified user until its token expires (tokens without exp are skipped)."""
+        exp = user.raw_payload.get("exp")
+        if not isinstance(exp, int | float) or exp <= time.time() or self.max_entries <= 0:
+            return
+        self._entries[key] = (float(exp), user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def record_verify(self, elapsed_ms: float, ok: bool) -> None:
+        """Account for one signature verification."""
+        self._stats["verifications"] += 1
+        self._stats["verify_ms_total"] += elapsed_ms
+        self._stats["verify_ms_max"] = max(self._stats["verify_ms_max"], elapsed_ms)
+        if not ok:
+            self._stats["verify_failures"] += 1
+
+    def record_memo_hit(self) -> None:
+        self._stats["memo_hits"] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Hit/miss counters and verification cost for this process."""
+        stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        verifications = stats["verifications"]
+        stats["verify_ms_total"] = round(stats["verify_ms_total"], 2)
+        stats["verify_ms_max"] = round(stats["verify_ms_max"], 2)
+        return {
+            **stats,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+            "verify_ms_avg": round(stats["verify_ms_total"] / verifications, 2)
+            if verifications
+            else 0.0,
+        }
+
+
+_token_cache: TokenCache | None = None
+
+# Per-request memo of (token, user or None for an invalid token)
+_request_user: ContextVar[tuple[str, AppUser | None] | None] = ContextVar(
+    "request_user", default=None
+)
+
+
+def get_token_cache() -> TokenCache:
+    """Get or create the verified token cache."""
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache(max_entries=get_settings().jwt_cache_size)
+    return _token_cache
+
+
+async def verify_token(token: str) -> AppUser:
+    """
+    Verify a JWT and return its user, reusing earlier verifications of the same token.
+
+    Raises:
+        Exception: If the token is invalid (as raised by the auth-client SDK)
+    """
+    cache = get_token_cache()
+    key = hashlib.sha256(token.encode()).hexdigest()
+    user = cache.get(key)
+    if user is not None:
+        return user
+
+    start = time.perf_counter()
+    try:
+        auth_user = await get_validator().verify_async(token)
+    except Exception:
+        cache.record_verify((time.perf_counter() - start) * 1000, ok=False)
+        raise
+    cache.record_verify((time.perf_counter() - start) * 1000, ok=True)
+
+    user = _to_app_user(auth_user)
+    cache.put(key, user)
+    return user
+
+
 # ============ FastAPI Dependencies ============
 
 
@@ -90,13 +220,19 @@ async def get_current_user(authorization: str | None = Header(None)) -> AppUser
     if len(parts) != 2 or parts[0].lower() != "bearer":
         return None
 
+    token = parts[1]
+    memo = _request_user.get()
+    if memo is not None and memo[0] == token:
+        get_token_cache().record_memo_hit()
+        return memo[1]
+
     try:
-        validator = get_validator()
-        auth_user = await validator.verify_async(parts[1])
-        return _to_app_user(auth_user)
+        user = await verify_token(token)
     except Exception as e:
         logger.warning("JWT verification failed: %s", e)
-        return None
+        user = None
+    _request_user.set((token, user))
+    return user
 
 
 async def require_current_user(authorization: str | None = Header(None)) -> AppUser:
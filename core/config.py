@@ -4,11 +4,19 @@ Application configuration using Pydantic Settings.
 Supports loading from environment variables and .env files.
 """
 
+from enum import StrEnum
 from functools import lru_cache
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class SlowConsumerPolicy(StrEnum):
+    """What to do when a WebSocket connection's outbound queue is full."""
+
+    DROP = "drop"  # Discard the oldest queued message to make room
+    DISCONNECT = "disconnect"  # Close the connection
+
+
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
 
@@ -42,6 +50,13 @@ class Settings(BaseSettings):
     redis_url: str = "redis://localhost:6379/0"
     redis_max_connections: int = 10
 
+    # ============ WebSocket ============
+    ws_relay_enabled: bool = True  # Fan out events across API nodes via Redis pub/sub
+    ws_replay_ttl: int = 300  # Seconds missed events stay available for replay
+    ws_replay_maxlen: int = 500  # Approximate events kept per user/channel replay stream
+    ws_send_queue_size: int = 256  # Outbound messages buffered per connection
+    ws_slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.DISCONNECT
+
     # ============ Multi-Provider Configuration ============
 
     # Google Gemini/Imagen (default provider)
@@ -119,6 +134,25 @@ class Settings(BaseSettings):
     provider_soft_timeout: int = 20  # Seconds before starting first fallback in race mode
     provider_stagger_interval: int = 5  # Seconds between launching successive fallback providers
     generation_overall_timeout: int = 60  # Hard limit for the entire generation task
+    rate_limit_max_wait: float = 2.0  # Seconds to queue for a saturated model before rerouting
+    provider_state_shared: bool = True  # Share circuit breakers/routing stats via Redis
+    provider_state_cache_ttl: float = 1.0  # Seconds between refreshes of shared provider state
+    coalesce_enabled: bool = True  # Share one provider call between identical in-flight requests
+    coalesce_lock_ttl: int = 90  # Seconds a coalescing leader holds its cross-worker lock
+    coalesce_result_ttl: int = 10  # Seconds a coalesced result stays available to late joiners
+    result_cache_enabled: bool = True  # Reuse stored images for repeated seeded requests
+    result_cache_providers: list[str] = ["bfl", "bytedance", "zhipu", "minimax", "alibaba"]
+    result_cache_ttl: int = 604800  # Seconds a seeded-result entry lives without a hit (7 days)
+    result_cache_max_entries: int = 10000  # Entries kept before LRU eviction
+
+    # ============ Task Queue (ARQ) ============
+    task_queue_enabled: bool = True  # Run generation jobs on ARQ workers when the pool is up
+    generation_queue_max_jobs: int = 8  # Concurrent jobs per generation worker process
+    batch_queue_max_jobs: int = 2  # Concurrent jobs per batch worker process
+    batch_max_concurrency: int = 8  # Batch items generating at once per batch worker process
+    batch_user_concurrency: int = 4  # Batch items generating at once for a single user
+    task_max_tries: int = 3  # Attempts per job when a worker stops mid-run
+    task_drain_timeout: int = 60  # Seconds a stopping worker waits for running jobs
 
     # ============ Storage Configuration ============
     # Backend: local, minio, oss
@@ -126,6 +160,15 @@ class Settings(BaseSettings):
     storage_bucket: str = "nano-banana-images"
     storage_public_url: str | None = None  # CDN URL
     storage_local_path: str = "outputs/web"
+    storage_io_workers: int = 16  # Thread pool / HTTP pool size for MinIO and OSS
+    storage_multipart_threshold: int = 8 * 1024 * 1024  # Bytes; larger uploads use multipart
+    storage_multipart_part_size: int = 8 * 1024 * 1024  # Bytes per multipart part
+    storage_stream_chunk_size: int = 256 * 1024  # Bytes per chunk for streamed downloads
+    image_variant_workers: int = 2  # Processes rendering thumbnails and resized variants
+    image_codec_workers: int = 4  # Threads for PIL decode/encode work
+    image_codec_request_concurrency: int = 2  # Codec operations one request runs at once
+    image_codec_request_budget_ms: int = 10000  # Codec time one request may use (0 = no limit)
+    chat_image_cache_max_bytes: int = 256 * 1024 * 1024  # Chat history images kept in memory
 
     # MinIO Configuration
     minio_endpoint: str | None = None  # e.g., localhost:9000
@@ -143,6 +186,10 @@ class Settings(BaseSettings):
     auth_enabled: bool = False
     auth_service_url: str = "http://localhost:8100"
     auth_service_client_id: str | None = None  # app_xxx from auth-service
+    jwt_cache_size: int = 10000  # Verified tokens kept until their exp (0 disables)
+    user_cache_enabled: bool = True  # Cache auth_id -> DB user instead of syncing per request
+    user_cache_ttl: int = 300  # Seconds before a cached user is synced again
+    user_cache_local_size: int = 10000  # Users kept in each process's in-memory cache
 
     # ============ PostgreSQL Database ============
     database_enabled: bool = False
@@ -165,7 +212,9 @@ class Settings(BaseSettings):
     prompthub_base_url: str = "https://api.prompthub.dev"
     prompthub_api_key: str | None = None
     prompthub_project_id: str | None = None
-    prompthub_cache_ttl: int = 3600  # seconds
+    prompthub_cache_ttl: int = 3600  # seconds (rendered meta prompts and LLM outputs)
+    prompt_cache_enabled: bool = True  # Cache translations/enhancements/negatives in memory + Redis
+    prompt_cache_local_size: int = 1024  # Entries in each process's in-memory prompt cache
 
     # OpenRouter LLM (for prompt processing)
     openrouter_api_key: str | None = None
@@ -176,6 +225,19 @@ class Settings(BaseSettings):
     prompt_auto_translate: bool = True
     prompt_auto_enhance: bool = False
     prompt_auto_negative: bool = False
+    prompt_speculative_routing: bool = False  # Route and warm up providers while LLM steps run
+
+    # ============ Content Moderation ============
+    ai_moderation_timeout: float = 5.0  # seconds per classifier call
+    ai_moderation_fail_closed: bool = False  # Block prompts when the classifier fails or times out
+    ai_moderation_batch_window_ms: int = 20  # Wait for concurrent prompts to share a call
+    ai_moderation_max_batch: int = 16  # Prompts per classifier call (1 disables batching)
+    ai_moderation_workers: int = 4  # Threads in the classifier executor
+    ai_moderation_cache_ttl: int = 86400  # seconds a verdict is shared across workers
+    audit_batch_size: int = 500  # Audit entries written per flush at most
+    audit_flush_interval: float = 1.0  # seconds an audit entry may wait for its batch
+    audit_queue_size: int = 50000  # Buffered audit entries before new ones are dropped
+    audit_segment_max_mb: int = 64  # Compressed size at which an audit JSONL segment rotates
 
     # ============ Defaults ============
     default_language: str = "en"
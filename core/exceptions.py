@@ -135,6 +135,14 @@ class StorageError(AppException):
     status_code = 500
 
 
+class ImageBudgetExceededError(AppException):
+    """Raised when a request has used up its image processing time."""
+
+    error_code = "image_budget_exceeded"
+    message = "Too much image processing for a single request"
+    status_code = 413
+
+
 class TaskNotFoundError(NotFoundError):
     """Raised when a task is not found."""
 
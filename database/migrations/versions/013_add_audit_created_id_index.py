@@ -0,0 +1,26 @@
+"""Add (created_at, id) index to audit_logs for keyset pagination.
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-16
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "013"
+down_revision = "012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "idx_audit_created_id",
+        "audit_logs",
+        [sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_audit_created_id", table_name="audit_logs")
@@ -172,6 +172,7 @@ Index("idx_audit_user", AuditLog.user_id)
 Index("idx_audit_action", AuditLog.action)
 Index("idx_audit_filter", AuditLog.filter_result)
 Index("idx_audit_created", AuditLog.created_at.desc())
+Index("idx_audit_created_id", AuditLog.created_at.desc(), AuditLog.id.desc())
 
 # Indexes for health queries
 Index("idx_health_provider", ProviderHealthLog.provider)
@@ -5,7 +5,7 @@ Audit repository for audit logs and provider health tracking.
 from datetime import datetime, timedelta
 from uuid import UUID
 
-from sqlalchemy import and_, desc, func, select
+from sqlalchemy import and_, desc, func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.models import AuditLog, ProviderHealthLog
@@ -56,8 +56,15 @@ class AuditRepository:
         filter_result: str | None = None,
         limit: int = 100,
         offset: int = 0,
+        before: tuple[datetime, UUID] | None = None,
     ) -> list[AuditLog]:
-        """List audit logs with filtering."""
+        """
+        List audit logs with filtering, newest first.
+
+        Pass the (created_at, id) of the last row of the previous page as
+        before to seek past it on the (created_at, id) index instead of
+        skipping offset rows.
+        """
         query = select(AuditLog)
 
         if user_id:
@@ -66,8 +73,11 @@ class AuditRepository:
             query = query.where(AuditLog.action == action)
         if filter_result:
             query = query.where(AuditLog.filter_result == filter_result)
+        if before:
+            query = query.where(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(*before))
 
-        query = query.order_by(desc(AuditLog.created_at))
+        # Rows of one batch insert share created_at; id keeps the order total
+        query = query.order_by(desc(AuditLog.created_at), desc(AuditLog.id))
         query = query.limit(limit).offset(offset)
 
         result = await self.session.execute(query)
@@ -24,11 +24,14 @@ class ImageRepository:
         return result.scalar_one_or_none()
 
     async def get_by_storage_key(self, storage_key: str) -> GeneratedImage | None:
-        """Get image by storage key."""
+        """Get image by storage key (the first record if several share it)."""
         result = await self.session.execute(
-            select(GeneratedImage).where(GeneratedImage.storage_key == storage_key)
+            select(GeneratedImage)
+            .where(GeneratedImage.storage_key == storage_key)
+            .order_by(GeneratedImage.created_at)
+            .limit(1)
         )
-        return result.scalar_one_or_none()
+        return result.scalars().first()
 
     async def create(
         self,
@@ -78,6 +81,18 @@ class ImageRepository:
         await self.session.flush()
         return image
 
+    async def get_or_create(self, storage_key: str, **fields) -> GeneratedImage:
+        """
+        Get the record for a storage key, creating it if there is none.
+
+        Content-addressed keys are shared by repeats of the same seeded
+        generation; they get one record, like their single history entry.
+        """
+        image = await self.get_by_storage_key(storage_key)
+        if image:
+            return image
+        return await self.create(storage_key=storage_key, **fields)
+
     async def list_by_user(
         self,
         user_id: UUID | None,
@@ -195,10 +210,13 @@ class ImageRepository:
         return False
 
     async def delete_by_storage_key(self, storage_key: str) -> bool:
-        """Delete an image by storage key."""
-        image = await self.get_by_storage_key(storage_key)
-        if image:
+        """Delete every image record with a storage key."""
+        result = await self.session.execute(
+            select(GeneratedImage).where(GeneratedImage.storage_key == storage_key)
+        )
+        images = result.scalars().all()
+        for image in images:
             await self.session.delete(image)
+        if images:
             await self.session.flush()
-            return True
-        return False
+        return bool(images)
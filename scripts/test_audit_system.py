@@ -117,12 +117,16 @@ def test_audit_system():
     print()
 
     from pathlib import Path
+
+    from services.audit_logger import get_audit_logger
+    get_audit_logger().shutdown()  # write queued entries
+
     log_dir = Path("outputs/logs/content_moderation")
     if log_dir.exists():
-        log_files = list(log_dir.rglob("*.json"))
+        log_files = list(log_dir.rglob("*.jsonl.gz"))
         print(f"✅ Audit logs written to local filesystem")
         print(f"   Path: {log_dir}")
-        print(f"   Log files found: {len(log_files)}")
+        print(f"   Log segments found: {len(log_files)}")
     else:
         print("⚠️ No audit log directory found yet")
         print(f"   Expected at: {log_dir}")
@@ -8,7 +8,9 @@ Services are designed to be framework-agnostic and can be used with FastAPI.
 # Core generation services (legacy, for backward compatibility)
 from .ai_content_moderator import AIContentModerator, get_ai_moderator
 from .audit_logger import AuditLogger, get_audit_logger
+from .chat_image_cache import ChatImageCache, get_chat_image_cache
 from .chat_session import ChatSession
+from .chat_store import ChatStore
 
 # Content moderation
 from .content_filter import ContentFilter, get_content_filter
@@ -23,6 +25,9 @@ from .health_check import (
     get_health_checker,
 )
 
+# PIL decode/encode off the event loop
+from .image_codec import decode_image, encode_image, get_codec_stats, run_image_op
+
 # LLM Client & Prompt Pipeline
 from .llm_client import LLMClient, get_llm_client
 
@@ -33,6 +38,8 @@ from .model_router import (
     resolve_alias,
     select_model_by_preset,
 )
+from .moderation_service import ModerationService, ModerationVerdict, get_moderation_service
+from .prompt_cache import PromptCache, get_prompt_cache
 from .prompt_pipeline import ProcessedPrompt, PromptPipeline, get_prompt_pipeline
 
 # Provider Router
@@ -72,6 +79,15 @@ from .quota_service import (
     get_quota_service,
 )
 
+# Per-model rate limiting
+from .rate_limiter import ProviderRateLimiter, get_rate_limiter
+
+# Single-flight coalescing of identical requests
+from .request_coalescer import RequestCoalescer, get_request_coalescer
+
+# Seeded result cache
+from .result_cache import ResultCache, get_result_cache
+
 # Pluggable storage system
 from .storage import (
     StorageConfig,
@@ -82,6 +98,9 @@ from .storage import (
     get_storage_manager,
 )
 
+# auth_id -> database user cache
+from .user_cache import UserCache, get_user_cache
+
 # WebSocket
 from .websocket_manager import WebSocketManager, get_websocket_manager
 
@@ -90,6 +109,9 @@ __all__ = [
     "ImageGenerator",
     "get_friendly_error_message",
     "ChatSession",
+    "ChatImageCache",
+    "get_chat_image_cache",
+    "ChatStore",
     # Cost
     "estimate_cost",
     "format_cost",
@@ -118,14 +140,27 @@ __all__ = [
     "get_content_filter",
     "AIContentModerator",
     "get_ai_moderator",
+    "ModerationService",
+    "ModerationVerdict",
+    "get_moderation_service",
     "AuditLogger",
     "get_audit_logger",
+    # Image codec executor
+    "decode_image",
+    "encode_image",
+    "get_codec_stats",
+    "run_image_op",
+    # User cache
+    "UserCache",
+    "get_user_cache",
     # LLM Client & Prompt Pipeline
     "LLMClient",
     "get_llm_client",
     "PromptPipeline",
     "ProcessedPrompt",
     "get_prompt_pipeline",
+    "PromptCache",
+    "get_prompt_cache",
     # Multi-provider abstraction
     "MediaType",
     "ProviderCapability",
@@ -142,6 +177,15 @@ __all__ = [
     "RoutingStrategy",
     "RoutingDecision",
     "get_provider_router",
+    # Rate limiting
+    "ProviderRateLimiter",
+    "get_rate_limiter",
+    # Request coalescing
+    "RequestCoalescer",
+    "get_request_coalescer",
+    # Result cache
+    "ResultCache",
+    "get_result_cache",
     # Model Router
     "QualityPreset",
     "resolve_alias",
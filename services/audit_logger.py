@@ -2,7 +2,9 @@
 Content moderation audit logging service.
 Records all moderation checks for analysis, review, and optimization.
 
-Logs are written to local filesystem under outputs/logs/content_moderation/.
+Logs are batched by services.audit_sink into compressed JSONL segments under
+outputs/logs/content_moderation/ and into the audit_logs table, and counted
+into per-day and per-hour statistics (services.moderation_stats).
 """
 
 import asyncio
@@ -10,12 +12,16 @@ import hashlib
 import json
 import logging
 import os
-import threading
 from datetime import UTC, datetime
 from pathlib import Path
-from queue import Queue
 from typing import Any
 
+from core.config import get_settings
+from core.redis import get_redis
+
+from .audit_sink import AuditSink, iter_segment_entries
+from .moderation_stats import add_entry, new_rollup, read_rollups, summarize
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,7 +33,7 @@ def get_config_value(key: str, default: str = "") -> str:
 class AuditLogger:
     """
     Audit logger for content moderation events.
-    Logs all checks to local filesystem for analysis and review.
+    Logs all checks through a batched AuditSink for analysis and review.
     """
 
     def __init__(self):
@@ -46,30 +52,19 @@ class AuditLogger:
         # Local storage base path
         self.base_path = Path("outputs/logs/content_moderation")
 
-        # Async write queue
-        self._write_queue: Queue = Queue()
-        self._write_thread: threading.Thread | None = None
-
-        if self.enabled and self.async_write:
-            self._start_write_worker()
-
-    def _start_write_worker(self):
-        """Start background thread for async writes."""
-
-        def worker():
-            while True:
-                try:
-                    log_data = self._write_queue.get(timeout=5)
-                    if log_data is None:  # Shutdown signal
-                        break
-                    self._write_to_local(log_data)
-                    self._write_to_db(log_data)
-                except Exception:
-                    # Empty queue or error, continue
-                    pass
-
-        self._write_thread = threading.Thread(target=worker, daemon=True)
-        self._write_thread.start()
+        # Batched writer (segments + audit_logs)
+        self._sink: AuditSink | None = None
+        if self.enabled:
+            settings = get_settings()
+            self._sink = AuditSink(
+                self.base_path,
+                batch_size=settings.audit_batch_size,
+                flush_interval=settings.audit_flush_interval,
+                max_queue=settings.audit_queue_size,
+                segment_max_bytes=settings.audit_segment_max_mb * 1024 * 1024,
+                database_url=settings.database_url if settings.is_database_configured else None,
+                redis_url=settings.redis_url,
+            )
 
     def log_moderation_check(
         self,
@@ -98,12 +93,10 @@ class AuditLogger:
                 prompt, layer1_result, layer2_result, final_decision, context
             )
 
-            # Write (async or sync)
-            if self.async_write:
-                self._write_queue.put(log_entry)
-            else:
-                self._write_to_local(log_entry)
-                self._write_to_db(log_entry)
+            # Queue for the next batch; in sync mode wait until it is written
+            self._sink.submit(log_entry)
+            if not self.async_write:
+                self._sink.flush()
 
         except Exception as e:
             # Don't block user flow on logging errors
@@ -197,91 +190,44 @@ class AuditLogger:
 
         return flags
 
-    def _write_to_local(self, log_entry: dict[str, Any]):
-        """Write log entry to local filesystem."""
-        try:
-            # Determine path based on decision
-            timestamp = datetime.fromisoformat(log_entry["timestamp"])
-            year = timestamp.strftime("%Y")
-            month = timestamp.strftime("%m")
-            day = timestamp.strftime("%d")
-
-            allowed = log_entry["final_decision"]["allowed"]
-            needs_review = log_entry["analysis_flags"]["needs_review"]
-
-            # Categorize into folders
-            if needs_review:
-                category = "flagged"
-            elif allowed:
-                category = "allowed"
-            else:
-                category = "blocked"
-
-            # Build local path
-            filename = f"{timestamp.strftime('%Y%m%d_%H%M%S')}_{log_entry['log_id']}.json"
-            log_dir = self.base_path / year / month / day / category
-            log_dir.mkdir(parents=True, exist_ok=True)
-            log_file = log_dir / filename
-
-            # Write to file
-            with open(log_file, "w", encoding="utf-8") as f:
-                json.dump(log_entry, f, ensure_ascii=False, indent=2)
+    def get_stats(self) -> dict[str, Any]:
+        """Queue and throughput counters of the audit sink."""
+        return self._sink.get_stats() if self._sink else {}
 
-        except Exception as e:
-            print(f"[AuditLogger] Failed to write log: {e}")
+    async def get_summary(self, date: str) -> dict[str, Any]:
+        """
+        Statistics for a day from the incremental counters.
 
-    def _write_to_db(self, log_entry: dict[str, Any]):
-        """Write queryable summary to PostgreSQL via AuditRepository."""
-        try:
-            from database import is_database_available
-
-            if not is_database_available():
-                return
-
-            # Map log entry to DB columns
-            final_decision = log_entry.get("final_decision", {})
-            allowed = final_decision.get("allowed", True)
-            needs_review = log_entry.get("analysis_flags", {}).get("needs_review", False)
-
-            if needs_review:
-                filter_result = "flagged"
-            elif allowed:
-                filter_result = "allowed"
-            else:
-                filter_result = "blocked"
-
-            prompt = log_entry.get("user_input", {}).get("prompt", "")
-            blocked_reason = final_decision.get("blocked_reason")
-
-            async def _persist():
-                from database import get_session
-                from database.repositories import AuditRepository
-
-                async for session in get_session():
-                    repo = AuditRepository(session)
-                    await repo.create_audit_log(
-                        action="content_moderation",
-                        prompt=prompt,
-                        filter_result=filter_result,
-                        blocked_reason=blocked_reason,
-                    )
-                    break
-
-            # Run async DB write from sync context
-            try:
-                loop = asyncio.get_running_loop()
-                # Already in an async context — schedule as a task
-                loop.create_task(_persist())
-            except RuntimeError:
-                # No running loop (background thread) — create one
-                asyncio.run(_persist())
+        Falls back to scanning the day's audit files when Redis holds no
+        counters for it (days logged before the counters existed, or Redis
+        unavailable).
 
-        except Exception as e:
-            logger.warning(f"Failed to write audit log to database: {e}")
+        Args:
+            date: Date in YYYY-MM-DD format
 
-    def generate_daily_summary(self, date: str) -> dict[str, Any]:
+        Returns:
+            Summary statistics dictionary
         """
-        Generate daily summary statistics.
+        try:
+            redis = await get_redis()
+            (rollup,) = await read_rollups(redis, [date])
+        except Exception as e:
+            logger.warning(f"Moderation counters unavailable, scanning logs: {e}")
+            rollup = None
+        if rollup is None:
+            return await asyncio.to_thread(self.scan_daily_summary, date)
+        return summarize(date, rollup)
+
+    async def get_hourly_summaries(self, date: str) -> list[dict[str, Any]]:
+        """Statistics for each UTC hour of a day, from the incremental counters."""
+        periods = [f"{date}T{hour:02d}" for hour in range(24)]
+        redis = await get_redis()
+        rollups = await read_rollups(redis, periods)
+        return [summarize(period, rollup) for period, rollup in zip(periods, rollups, strict=True)]
+
+    def scan_daily_summary(self, date: str) -> dict[str, Any]:
+        """
+        Summarize a day by reading every audit entry stored for it.
 
         Args:
             date: Date in YYYY-MM-DD format
@@ -290,125 +236,59 @@ class AuditLogger:
             Summary statistics dictionary
         """
         try:
-            # Parse date
             dt = datetime.strptime(date, "%Y-%m-%d")
-            year, month, day = dt.strftime("%Y"), dt.strftime("%m"), dt.strftime("%d")
-
-            # List all logs for the day
-            day_dir = self.base_path / year / month / day
-
+            day_dir = self.base_path / dt.strftime("%Y") / dt.strftime("%m") / dt.strftime("%d")
             if not day_dir.exists():
                 return {"date": date, "total_checks": 0}
 
-            # Read and analyze all log files
-            total_checks = 0
-            blocked_count = 0
-            allowed_count = 0
-            flagged_count = 0
-
-            layer1_blocks = 0
-            layer2_blocks = 0
-
-            keyword_counter = {}
-            ai_category_counter = {}
-
-            total_layer1_time = 0
-            total_layer2_time = 0
-
-            for category_dir in day_dir.iterdir():
-                if not category_dir.is_dir():
-                    continue
-                for log_file in category_dir.glob("*.json"):
-                    try:
-                        with open(log_file, encoding="utf-8") as f:
-                            log_data = json.load(f)
-
-                        total_checks += 1
-
-                        # Count decisions
-                        if log_data["final_decision"]["allowed"]:
-                            allowed_count += 1
-                        else:
-                            blocked_count += 1
-
-                        if log_data["analysis_flags"]["needs_review"]:
-                            flagged_count += 1
-
-                        # Count block reasons
-                        blocked_by = log_data["final_decision"].get("blocked_by")
-                        if blocked_by == "keyword":
-                            layer1_blocks += 1
-                            reason = log_data["final_decision"].get("blocked_reason", "")
-                            if reason.startswith("keyword:"):
-                                keyword = reason.split(":", 1)[1]
-                                keyword_counter[keyword] = keyword_counter.get(keyword, 0) + 1
-
-                        elif blocked_by == "ai":
-                            layer2_blocks += 1
-                            reason = log_data["final_decision"].get("blocked_reason", "")
-                            if reason.startswith("ai:"):
-                                category = reason.split(":", 1)[1]
-                                ai_category_counter[category] = (
-                                    ai_category_counter.get(category, 0) + 1
-                                )
-
-                        # Timing stats
-                        total_layer1_time += log_data["layer1_keyword"].get("execution_time_ms", 0)
-                        total_layer2_time += log_data["layer2_ai"].get("execution_time_ms", 0)
-
-                    except Exception as e:
-                        print(f"[AuditLogger] Error processing log {log_file}: {e}")
-                        continue
-
-            # Build summary
-            summary = {
-                "date": date,
-                "total_checks": total_checks,
-                "blocked": blocked_count,
-                "allowed": allowed_count,
-                "flagged": flagged_count,
-                "block_breakdown": {"layer1_keyword": layer1_blocks, "layer2_ai": layer2_blocks},
-                "top_blocked_keywords": sorted(
-                    [{"keyword": k, "count": v} for k, v in keyword_counter.items()],
-                    key=lambda x: x["count"],
-                    reverse=True,
-                )[:10],
-                "ai_classifications": ai_category_counter,
-                "average_times_ms": {
-                    "layer1": round(total_layer1_time / total_checks, 2) if total_checks > 0 else 0,
-                    "layer2": round(total_layer2_time / total_checks, 2) if total_checks > 0 else 0,
-                    "total": round((total_layer1_time + total_layer2_time) / total_checks, 2)
-                    if total_checks > 0
-                    else 0,
-                },
-                "accuracy_metrics": {
-                    "block_rate": round(blocked_count / total_checks * 100, 2)
-                    if total_checks > 0
-                    else 0,
-                    "flag_rate": round(flagged_count / total_checks * 100, 2)
-                    if total_checks > 0
-                    else 0,
-                },
-            }
-
-            # Save summary locally
-            summary_dir = self.base_path / "summary"
-            summary_dir.mkdir(parents=True, exist_ok=True)
-            summary_file = summary_dir / f"{date}_summary.json"
-            with open(summary_file, "w", encoding="utf-8") as f:
-                json.dump(summary, f, ensure_ascii=False, indent=2)
-
-            return summary
+            rollup = new_rollup()
+            for log_data in self._iter_day_entries(day_dir):
+                try:
+                    add_entry(rollup, log_data)
+                except Exception as e:
+                    print(f"[AuditLogger] Error processing log {log_data.get('log_id')}: {e}")
+            return summarize(date, rollup)
 
         except Exception as e:
             print(f"[AuditLogger] Failed to generate summary: {e}")
             return {}
 
+    def generate_daily_summary(self, date: str) -> dict[str, Any]:
+        """
+        Generate daily summary statistics and save them under summary/.
+
+        Args:
+            date: Date in YYYY-MM-DD format
+
+        Returns:
+            Summary statistics dictionary
+        """
+        summary = self.scan_daily_summary(date)
+        if summary.get("total_checks"):
+            try:
+                summary_dir = self.base_path / "summary"
+                summary_dir.mkdir(parents=True, exist_ok=True)
+                summary_file = summary_dir / f"{date}_summary.json"
+                with open(summary_file, "w", encoding="utf-8") as f:
+                    json.dump(summary, f, ensure_ascii=False, indent=2)
+            except Exception as e:
+                print(f"[AuditLogger] Failed to save summary: {e}")
+        return summary
+
+    def _iter_day_entries(self, day_dir: Path):
+        """Yield a day's entries from JSONL segments and legacy per-check files."""
+        yield from iter_segment_entries(day_dir)
+        for log_file in day_dir.glob("*/*.json"):
+            try:
+                with open(log_file, encoding="utf-8") as f:
+                    yield json.load(f)
+            except Exception as e:
+                print(f"[AuditLogger] Error reading log {log_file}: {e}")
+
     def shutdown(self):
         """Shutdown audit logger and flush queue."""
-        if self._write_thread and self._write_thread.is_alive():
-            self._write_queue.put(None)  # Shutdown signal
-            self._write_thread.join(timeout=5)
+        if self._sink:
+            self._sink.shutdown()
 
 
 # Global singleton instance
@@ -421,3 +301,11 @@ def get_audit_logger() -> AuditLogger:
     if _audit_logger is None:
         _audit_logger = AuditLogger()
     return _audit_logger
+
+
+def shutdown_audit_logger() -> None:
+    """Write queued audit entries and stop the writer, if the logger was started."""
+    global _audit_logger
+    if _audit_logger is not None:
+        _audit_logger.shutdown()
+        _audit_logger = None
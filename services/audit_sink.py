@@ -0,0 +1,335 @@
+"""
+Buffered sink for content moderation audit entries.
+
+Entries are queued by AuditLogger and written in batches by one background
+thread. The thread flushes when a batch reaches batch_size entries or
+flush_interval seconds after the first entry arrived, whichever comes first.
+Each flush:
+
+- appends the batch as one gzip member to the current JSONL segment,
+  base_path/YYYY/MM/DD/audit-<time>-<pid>-<seq>.jsonl.gz. Each entry goes to
+  the folder of its own timestamp's day (UTC), the same day the moderation
+  counters file it under, so a batch flushed just after midnight is split
+  across two folders. Segments rotate once they exceed segment_max_bytes.
+  Each process writes its own segments, so workers never interleave lines.
+  gzip.open() reads the multi-member files transparently.
+- inserts the batch's queryable summaries into audit_logs with one multi-row
+  INSERT. The thread runs a single long-lived event loop with its own
+  one-connection engine, so inserts never open a loop or session per entry
+  and never borrow connections from the request path's pool.
+- folds the batch into the per-day and per-hour moderation counters in
+  Redis (services.moderation_stats) with one pipelined round trip, over a
+  client owned by the same loop.
+
+The queue is bounded by max_queue. The request path never waits on it:
+entries beyond the bound are dropped and counted. get_stats() reports queue
+depth, its high watermark, drops and flush timings, and a warning is logged
+when the queue passes BACKPRESSURE_RATIO of its capacity.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from .moderation_stats import entry_time
+
+logger = logging.getLogger(__name__)
+
+# Queue fill ratio at which a backpressure warning is logged
+BACKPRESSURE_RATIO = 0.8
+
+# Shutdown signal for the writer thread
+_STOP = object()
+
+
+class _FlushMarker:
+    """Queue item released once every entry queued before it is written."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+def audit_filter_result(entry: dict[str, Any]) -> str:
+    """Category of an audit entry: flagged, allowed or blocked."""
+    if entry.get("analysis_flags", {}).get("needs_review", False):
+        return "flagged"
+    if entry.get("final_decision", {}).get("allowed", True):
+        return "allowed"
+    return "blocked"
+
+
+class AuditSink:
+    """Batches audit entries into compressed JSONL segments and audit_logs rows."""
+
+    def __init__(
+        self,
+        base_path: Path,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_queue: int = 50000,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        database_url: str | None = None,
+        redis_url: str | None = None,
+    ):
+        """
+        Initialize sink and start its writer thread.
+
+        Args:
+            base_path: Directory holding the dated JSONL segments
+            batch_size: Entries per flush at most
+            flush_interval: Seconds an entry may wait for its batch to fill
+            max_queue: Entries buffered before new ones are dropped
+            segment_max_bytes: Compressed size at which a segment rotates
+            database_url: Database to insert summaries into (None to skip)
+            redis_url: Redis holding the moderation counters (None to skip)
+        """
+        self.base_path = base_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.segment_max_bytes = segment_max_bytes
+        self.database_url = database_url
+        self.redis_url = redis_url
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._segment: Path | None = None
+        self._segments: dict[str, Path] = {}  # Current segment per day folder
+        self._segment_seq = 0
+        self._backpressure = False
+        self._stats = {
+            "submitted": 0,
+            "dropped": 0,
+            "written": 0,
+            "db_written": 0,
+            "db_failures": 0,
+            "stats_failures": 0,
+            "batches": 0,
+            "high_watermark": 0,
+            "last_flush_ms": 0.0,
+        }
+
+        self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+        self._thread.start()
+
+    # ============ Producer side ============
+
+    def submit(self, entry: dict[str, Any]) -> bool:
+        """
+        Queue an entry without blocking.
+
+        Returns:
+            False if the queue is full and the entry was dropped
+        """
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._stats["dropped"] += 1
+            if self._stats["dropped"] % 1000 == 1:
+                logger.error(f"Audit queue full, dropped {self._stats['dropped']} entries so far")
+            return False
+
+        self._stats["submitted"] += 1
+        depth = self._queue.qsize()
+        if depth > self._stats["high_watermark"]:
+            self._stats["high_watermark"] = depth
+        if not self._backpressure and depth >= self.max_queue * BACKPRESSURE_RATIO:
+            self._backpressure = True
+            logger.warning(f"Audit queue at {depth}/{self.max_queue} entries")
+        return True
+
+    def flush(self, timeout: float | None = 10.0) -> bool:
+        """
+        Wait until every entry submitted so far is written.
+
+        Returns:
+            False if the writer did not catch up within timeout
+        """
+        marker = _FlushMarker()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Queue depth, throughput and backpressure counters."""
+        return {
+            **self._stats,
+            "queue_depth": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "backpressure": self._backpressure,
+            "segment": str(self._segment) if self._segment else None,
+        }
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Write what is queued and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=timeout)
+
+    # ============ Writer thread ============
+
+    def _run(self) -> None:
+        asyncio.run(self._write_loop())
+
+    def _next_batch(self) -> tuple[list[dict[str, Any]], list[_FlushMarker], bool]:
+        """
+        Block for the next batch.
+
+        Returns:
+            (entries, flush markers reached, whether to stop afterwards)
+        """
+        entries: list[dict[str, Any]] = []
+        markers: list[_FlushMarker] = []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if item is _STOP:
+                return entries, markers, True
+            if isinstance(item, _FlushMarker):
+                # Flush now so the caller doesn't wait for the interval
+                markers.append(item)
+                return entries, markers, False
+            entries.append(item)
+            if len(entries) >= self.batch_size:
+                return entries, markers, False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return entries, markers, False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return entries, markers, False
+
+    async def _write_loop(self) -> None:
+        engine = None
+        if self.database_url:
+            try:
+                from sqlalchemy.ext.asyncio import create_async_engine
+
+                engine = create_async_engine(
+                    self.database_url, pool_size=1, max_overflow=0, pool_pre_ping=True
+                )
+            except Exception as e:
+                logger.warning(f"Audit sink database unavailable: {e}")
+
+        redis = None
+        if self.redis_url:
+            import redis.asyncio as aioredis
+
+            redis = aioredis.from_url(self.redis_url, decode_responses=True)
+
+        try:
+            stop = False
+            while not stop:
+                entries, markers, stop = await asyncio.to_thread(self._next_batch)
+                if entries:
+                    await self._flush(entries, engine, redis)
+                for marker in markers:
+                    marker.done.set()
+        finally:
+            if engine is not None:
+                await engine.dispose()
+            if redis is not None:
+                await redis.close()
+
+    async def _flush(self, entries: list[dict[str, Any]], engine, redis=None) -> None:
+        start = time.monotonic()
+        await asyncio.to_thread(self._append_segment, entries)
+        if engine is not None:
+            await self._insert_rows(entries, engine)
+        if redis is not None:
+            await self._record_stats(entries, redis)
+
+        self._stats["written"] += len(entries)
+        self._stats["batches"] += 1
+        self._stats["last_flush_ms"] = round((time.monotonic() - start) * 1000, 2)
+        if self._backpressure and self._queue.qsize() < self.max_queue * BACKPRESSURE_RATIO / 2:
+            self._backpressure = False
+            logger.info("Audit queue drained below backpressure threshold")
+
+    # ============ Segments ============
+
+    def _segment_path(self, day: str, now: datetime) -> Path:
+        segment = self._segments.get(day)
+        if segment is None or (
+            segment.exists() and segment.stat().st_size >= self.segment_max_bytes
+        ):
+            self._segment_seq += 1
+            name = f"audit-{now.strftime('%H%M%S')}-{os.getpid()}-{self._segment_seq}.jsonl.gz"
+            segment = self.base_path / day / name
+            segment.parent.mkdir(parents=True, exist_ok=True)
+            self._segments[day] = segment
+            # Batches only straddle one midnight, so two open days are enough
+            for old_day in sorted(self._segments)[:-2]:
+                del self._segments[old_day]
+        self._segment = segment
+        return segment
+
+    def _append_segment(self, entries: list[dict[str, Any]]) -> None:
+        by_day: dict[str, list[dict[str, Any]]] = {}
+        for entry in entries:
+            by_day.setdefault(entry_time(entry).strftime("%Y/%m/%d"), []).append(entry)
+
+        now = datetime.now(UTC)
+        for day, day_entries in by_day.items():
+            lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in day_entries)
+            try:
+                with gzip.open(self._segment_path(day, now), "at", encoding="utf-8") as f:
+                    f.write(lines)
+            except Exception as e:
+                logger.error(f"Failed to write {len(day_entries)} audit entries: {e}")
+
+    # ============ Database ============
+
+    async def _insert_rows(self, entries: list[dict[str, Any]], engine) -> None:
+        from sqlalchemy import insert
+
+        from database.models import AuditLog
+
+        rows = [
+            {
+                "id": UUID(entry["log_id"]),
+                "action": "content_moderation",
+                "prompt": entry.get("user_input", {}).get("prompt", ""),
+                "filter_result": audit_filter_result(entry),
+                "blocked_reason": entry.get("final_decision", {}).get("blocked_reason"),
+            }
+            for entry in entries
+        ]
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(insert(AuditLog).values(rows))
+            self._stats["db_written"] += len(rows)
+        except Exception as e:
+            self._stats["db_failures"] += 1
+            logger.warning(f"Failed to insert {len(rows)} audit logs: {e}")
+
+    # ============ Counters ============
+
+    async def _record_stats(self, entries: list[dict[str, Any]], redis) -> None:
+        from .moderation_stats import record_entries
+
+        try:
+            await record_entries(redis, entries)
+        except Exception as e:
+            self._stats["stats_failures"] += 1
+            logger.warning(f"Failed to count {len(entries)} audit entries: {e}")
+
+
+def iter_segment_entries(day_dir: Path):
+    """Yield the audit entries stored for one day, oldest segment first."""
+    for segment in sorted(day_dir.glob("*.jsonl.gz"), key=lambda p: p.stat().st_mtime):
+        try:
+            with gzip.open(segment, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        except Exception as e:
+            logger.warning(f"Skipping unreadable audit segment {segment}: {e}")
@@ -0,0 +1,235 @@
+"""
+Background task for batch image generation.
+
+Prompts of a batch run concurrently through the provider router. Each item is
+routed round-robin so a batch spreads across the available providers, and
+falls back through the usual provider chain on failure.
+
+Concurrency is bounded per worker process by a global cap and a per-user cap
+(batch_max_concurrency / batch_user_concurrency), so one user's large batch
+cannot occupy every slot.
+
+Per-item outcomes are written to a companion Redis hash
+(task:{task_id}:items, field = prompt index) and streamed to the task's
+WebSocket channel as each item finishes. A job retried after a worker
+restart only generates the items that have no record yet.
+"""
+
+import asyncio
+import json
+import logging
+import weakref
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any
+
+from core.config import Settings, get_settings
+from core.redis import get_redis
+
+from .prompt_pipeline import get_prompt_pipeline
+from .provider_router import ProviderRouter, RoutingStrategy, get_provider_router
+from .providers.base import GenerationRequest
+from .storage import StorageManager, get_storage_manager
+from .websocket_manager import get_websocket_manager
+
+logger = logging.getLogger(__name__)
+
+# Per-item results live next to the task hash for the task's lifetime
+ITEMS_TTL = 86400
+
+
+def batch_items_key(task_id: str) -> str:
+    """Redis hash holding per-item results of a batch task."""
+    return f"task:{task_id}:items"
+
+
+class BatchLimiter:
+    """Global and per-user concurrency caps for batch items."""
+
+    def __init__(self, max_concurrency: int, user_concurrency: int):
+        """
+        Initialize limiter.
+
+        Args:
+            max_concurrency: Items running at once across all batches
+            user_concurrency: Items running at once for a single user
+        """
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._user_concurrency = user_concurrency
+        # Semaphores disappear once no running item references them
+        self._users: weakref.WeakValueDictionary[str, asyncio.Semaphore] = (
+            weakref.WeakValueDictionary()
+        )
+
+    @asynccontextmanager
+    async def slot(self, user_id: str) -> AsyncIterator[None]:
+        """Hold one user slot and one global slot while generating an item."""
+        user_semaphore = self._users.get(user_id)
+        if user_semaphore is None:
+            user_semaphore = asyncio.Semaphore(self._user_concurrency)
+            self._users[user_id] = user_semaphore
+
+        # Take the user slot first so queued items of one user never hold global slots
+        async with user_semaphore, self._global:
+            yield
+
+
+_batch_limiter: BatchLimiter | None = None
+
+
+def get_batch_limiter() -> BatchLimiter:
+    """Get the process-wide batch limiter."""
+    global _batch_limiter
+
+    if _batch_limiter is None:
+        settings = get_settings()
+        _batch_limiter = BatchLimiter(
+            settings.batch_max_concurrency, settings.batch_user_concurrency
+        )
+
+    return _batch_limiter
+
+
+async def execute_batch_generation(
+    task_id: str,
+    prompts: list[str],
+    settings_dict: dict,
+    user_id: str,
+) -> None:
+    """Background task entry point for batch generation.
+
+    Args:
+        task_id: Unique task ID (batch_* prefix).
+        prompts: Prompts to generate, in order.
+        settings_dict: Serialized generation settings.
+        user_id: User ID for storage isolation.
+    """
+    redis = await get_redis()
+    task_key = f"task:{task_id}"
+    items_key = batch_items_key(task_id)
+    total = len(prompts)
+
+    await redis.hset(
+        task_key,
+        mapping={"status": "processing", "started_at": datetime.now().isoformat()},
+    )
+
+    app_settings = get_settings()
+    router = get_provider_router()
+    limiter = get_batch_limiter()
+    storage = get_storage_manager(user_id=user_id if user_id != "anonymous" else None)
+    ws_manager = get_websocket_manager()
+
+    # A retried job keeps the items finished before the worker stopped
+    finished = await redis.hgetall(items_key)
+
+    async def run_item(index: int, prompt: str) -> dict[str, Any] | None:
+        if str(index) in finished:
+            return json.loads(finished[str(index)])
+
+        async with limiter.slot(user_id):
+            if await redis.hget(task_key, "cancelled") == "1":
+                return None
+            await redis.hset(task_key, "current_prompt", prompt)
+
+            try:
+                item = await _generate_item(
+                    task_id, index, prompt, settings_dict, user_id, router, storage, app_settings
+                )
+            except Exception as e:
+                logger.error(f"Batch {task_id} item {index + 1} failed: {e}")
+                item = {"status": "failed", "error": str(e)}
+
+        await redis.hset(items_key, str(index), json.dumps(item))
+        await redis.expire(items_key, ITEMS_TTL)
+        progress = await redis.hincrby(task_key, "progress", 1)
+
+        await ws_manager.send_task_item(
+            task_id=task_id,
+            index=index,
+            progress=progress,
+            total=total,
+            status=item["status"],
+            image=item.get("image"),
+            error=item.get("error"),
+        )
+        return item
+
+    items = await asyncio.gather(*(run_item(i, p) for i, p in enumerate(prompts)))
+
+    await redis.hdel(task_key, "current_prompt")
+    status = "cancelled" if await redis.hget(task_key, "cancelled") == "1" else "completed"
+    await redis.hset(
+        task_key,
+        mapping={"status": status, "completed_at": datetime.now().isoformat()},
+    )
+
+    if status == "completed":
+        results = [item["image"] for item in items if item and item["status"] == "completed"]
+        await ws_manager.send_task_complete(task_id=task_id, results=results)
+
+
+async def _generate_item(
+    task_id: str,
+    index: int,
+    prompt: str,
+    settings_dict: dict,
+    user_id: str,
+    router: ProviderRouter,
+    storage: StorageManager,
+    app_settings: Settings,
+) -> dict[str, Any]:
+    """Generate and store one batch prompt, returning its item record."""
+    final_prompt = prompt
+    if app_settings.is_prompt_pipeline_configured:
+        try:
+            processed = await get_prompt_pipeline().process(
+                prompt=prompt,
+                enhance=app_settings.prompt_auto_enhance,
+                generate_negative=False,
+            )
+            final_prompt = processed.final
+        except Exception as e:
+            logger.warning(f"Batch pipeline failed for prompt {index + 1}: {e}")
+
+    request = GenerationRequest(
+        prompt=final_prompt,
+        aspect_ratio=settings_dict["aspect_ratio"],
+        resolution=settings_dict["resolution"],
+        safety_level=settings_dict["safety_level"],
+        user_id=user_id,
+        request_id=f"{task_id}_{index}",
+    )
+
+    # Round-robin spreads a batch across providers; fallbacks still apply per item.
+    # Repeated prompts in a batch ask for variations, so items are never coalesced.
+    decision = await router.route(request, strategy=RoutingStrategy.ROUND_ROBIN)
+    result = await router.execute_with_fallback(request, decision=decision, coalesce=False)
+
+    if not result.success or not result.has_image:
+        return {"status": "failed", "error": result.error or "No image generated"}
+
+    storage_obj = await storage.save_image(
+        image=result.image_data or result.image,
+        content_type=result.image_mime_type,
+        prompt=prompt,
+        settings={
+            "aspect_ratio": settings_dict["aspect_ratio"],
+            "resolution": settings_dict["resolution"],
+            "provider": result.provider,
+            "model": result.model,
+        },
+        duration=result.duration,
+        mode="batch",
+    )
+
+    return {
+        "status": "completed",
+        "provider": result.provider,
+        "image": {
+            "key": storage_obj.key,
+            "filename": storage_obj.filename,
+            "url": storage_obj.public_url,
+        },
+    }
@@ -0,0 +1,152 @@
+"""
+Per-session cache of chat history images as encoded bytes.
+
+Each chat turn sends the images of the last few turns back to the model.
+Without a cache every turn re-downloads those images from storage; this
+cache keeps them in process memory, exactly as stored (PNG/JPEG/WebP
+bytes), so they go into the request without a decode or re-encode.
+
+Entries are grouped by chat session. A session holds at most the images
+the model can still see (ChatSession.IMAGE_HISTORY_TURNS) and expires after
+the chat session TTL without activity. When the total size exceeds the
+byte limit, the least recently active sessions are dropped first. A miss
+(e.g. on another worker) falls back to loading the bytes from storage.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any
+
+from core.config import get_settings
+
+from .chat_session import ChatSession
+
+
+class _Session:
+    __slots__ = ("expires_at", "images", "size")
+
+    def __init__(self):
+        self.expires_at = 0.0
+        self.images: OrderedDict[str, bytes] = OrderedDict()
+        self.size = 0
+
+
+class ChatImageCache:
+    """In-process LRU of encoded history images, grouped by chat session."""
+
+    def __init__(self, ttl: int = 86400, images_per_session: int = 5, max_bytes: int = 0):
+        """
+        Initialize cache.
+
+        Args:
+            ttl: Seconds a session's images live after its last use
+            images_per_session: Most recent images kept per session
+            max_bytes: Total byte limit across sessions (0 disables the cache)
+        """
+        self.ttl = ttl
+        self.images_per_session = images_per_session
+        self.max_bytes = max_bytes
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._size = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _session(self, session_key: str, create: bool = False) -> _Session | None:
+        entry = self._sessions.get(session_key)
+        now = time.monotonic()
+        if entry is not None and entry.expires_at < now:
+            self.drop(session_key)
+            entry = None
+        if entry is None:
+            if not create:
+                return None
+            entry = self._sessions[session_key] = _Session()
+        entry.expires_at = now + self.ttl
+        self._sessions.move_to_end(session_key)
+        return entry
+
+    def get_many(self, session_key: str, image_keys: list[str]) -> dict[str, bytes]:
+        """
+        Get cached images of a session.
+
+        Args:
+            session_key: Chat session key
+            image_keys: Storage keys of the wanted images
+
+        Returns:
+            Encoded bytes of the cached images, keyed by storage key
+        """
+        entry = self._session(session_key)
+        found = {}
+        for key in image_keys:
+            data = entry.images.get(key) if entry is not None else None
+            if data is None:
+                self._stats["misses"] += 1
+                continue
+            entry.images.move_to_end(key)
+            found[key] = data
+            self._stats["hits"] += 1
+        return found
+
+    def put(self, session_key: str, image_key: str, data: bytes) -> None:
+        """
+        Cache an image for a session.
+
+        Args:
+            session_key: Chat session key
+            image_key: Storage key of the image
+            data: Encoded image bytes as stored
+        """
+        if not self.max_bytes or len(data) > self.max_bytes:
+            return
+
+        entry = self._session(session_key, create=True)
+        old = entry.images.pop(image_key, None)
+        if old is not None:
+            entry.size -= len(old)
+            self._size -= len(old)
+        entry.images[image_key] = data
+        entry.size += len(data)
+        self._size += len(data)
+
+        while len(entry.images) > self.images_per_session:
+            _, evicted = entry.images.popitem(last=False)
+            entry.size -= len(evicted)
+            self._size -= len(evicted)
+
+        while self._size > self.max_bytes and self._sessions:
+            oldest = next(iter(self._sessions))
+            self.drop(oldest)
+            self._stats["evictions"] += 1
+
+    def drop(self, session_key: str) -> None:
+        """Forget all images of a session (e.g. when it is deleted)."""
+        entry = self._sessions.pop(session_key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    def get_stats(self) -> dict[str, Any]:
+        """Hit/miss counters and memory use for this process."""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "sessions": len(self._sessions),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+        }
+
+
+_chat_image_cache: ChatImageCache | None = None
+
+
+def get_chat_image_cache() -> ChatImageCache:
+    """Get the global chat image cache."""
+    global _chat_image_cache
+    if _chat_image_cache is None:
+        settings = get_settings()
+        _chat_image_cache = ChatImageCache(
+            ttl=ChatSession.SESSION_TTL,
+            images_per_session=ChatSession.IMAGE_HISTORY_TURNS,
+            max_bytes=settings.chat_image_cache_max_bytes,
+        )
+    return _chat_image_cache
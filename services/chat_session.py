@@ -16,6 +16,8 @@ from google import genai
 from google.genai import types
 from PIL import Image
 
+from utils.image_types import detect_image_mime_type
+
 from .generator import build_safety_settings
 
 load_dotenv()
@@ -27,6 +29,7 @@ class ChatResponse:
 
     text: str | None = None
     image: Image.Image | None = None
+    image_data: bytes | None = None  # Encoded image exactly as returned by the model
     thinking: str | None = None
     duration: float = 0.0
     error: str | None = None
@@ -45,6 +48,7 @@ class ChatSession:
     MODEL_ID = "gemini-3-pro-image-preview"
     MAX_HISTORY_TURNS = 20  # max turns (1 turn = user + model = 2 messages)
     IMAGE_HISTORY_TURNS = 5  # only include images from last N turns
+    SESSION_TTL = 86400  # seconds a session is kept after its last activity
 
     def __init__(self, api_key: str | None = None):
         self._api_key = api_key or os.getenv("GOOGLE_API_KEY")
@@ -62,9 +66,15 @@ class ChatSession:
         self,
         history: list[dict],
         new_message: str,
-        history_images: dict[str, Image.Image] | None = None,
+        history_images: dict[str, bytes | Image.Image] | None = None,
     ) -> list[types.Content]:
-        """Build the contents list for generate_content from Redis history + new message."""
+        """
+        Build the contents list for generate_content from Redis history + new message.
+
+        History images are normally the encoded bytes from storage and are
+        sent as-is with their detected MIME type; PIL images are encoded to
+        PNG here.
+        """
         # Truncate old history beyond MAX_HISTORY_TURNS
         max_messages = self.MAX_HISTORY_TURNS * 2
         if len(history) > max_messages:
@@ -85,11 +95,13 @@ class ChatSession:
             image_key = msg.get("image_key")
             if i >= image_cutoff and image_key and history_images and image_key in history_images:
                 img = history_images[image_key]
-                buf = BytesIO()
-                img.save(buf, format="PNG")
-                parts.append(
-                    types.Part(inline_data=types.Blob(mime_type="image/png", data=buf.getvalue()))
-                )
+                if isinstance(img, Image.Image):
+                    buf = BytesIO()
+                    img.save(buf, format="PNG")
+                    data, mime_type = buf.getvalue(), "image/png"
+                else:
+                    data, mime_type = img, detect_image_mime_type(img)
+                parts.append(types.Part(inline_data=types.Blob(mime_type=mime_type, data=data)))
 
             if parts:
                 contents.append(types.Content(role=role, parts=parts))
@@ -102,7 +114,7 @@ class ChatSession:
         self,
         message: str,
         history: list[dict] | None = None,
-        history_images: dict[str, Image.Image] | None = None,
+        history_images: dict[str, bytes | Image.Image] | None = None,
         aspect_ratio: str | None = None,
         safety_level: str = "moderate",
     ) -> ChatResponse:
@@ -112,7 +124,7 @@ class ChatSession:
         Args:
             message: New user message/prompt
             history: Previous messages from Redis (list of dicts with role/content/image_key)
-            history_images: Pre-loaded PIL images keyed by image_key
+            history_images: Pre-loaded encoded images (or PIL images) keyed by image_key
             aspect_ratio: Override aspect ratio for this request
             safety_level: Content safety level
         """
@@ -150,6 +162,7 @@ class ChatSession:
                 elif hasattr(part, "text") and part.text:
                     response.text = part.text
                 elif hasattr(part, "inline_data") and part.inline_data:
+                    response.image_data = part.inline_data.data
                     response.image = Image.open(BytesIO(part.inline_data.data))
 
             response.duration = time.time() - start_time
@@ -0,0 +1,272 @@
+"""
+Redis storage for chat sessions.
+
+A session is a small metadata hash plus a list of messages:
+
+    chat:{user_id}:{session_id}:meta      hash (aspect_ratio, created_at, last_activity, message_count)
+    chat:{user_id}:{session_id}:messages  list of JSON messages, oldest first
+    chat_index:{user_id}                  sorted set of session IDs scored by last activity
+
+Adding a turn is one pipelined RPUSH/HSET/ZADD however long the session is,
+and a turn only reads the messages the model will see (LRANGE of the tail)
+instead of the whole conversation. Listing reads the index and every metadata
+hash in two round trips.
+
+Sessions written by earlier versions as one JSON string under
+chat:{user_id}:{session_id} (listed in the set chat_sessions:{user_id}) are
+converted on first access.
+"""
+
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any
+
+from .chat_session import ChatSession
+
+logger = logging.getLogger(__name__)
+
+_META_FIELDS = ("session_id", "user_id", "aspect_ratio", "created_at", "last_activity")
+# Fields every complete session has; a hash without them is a leftover
+_REQUIRED_FIELDS = ("session_id", "aspect_ratio", "created_at", "last_activity")
+
+
+def _score(last_activity: str | None) -> float:
+    """Sorted-set score of a session (epoch seconds of its last activity)."""
+    if last_activity:
+        try:
+            return datetime.fromisoformat(last_activity).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+def _decode_meta(meta: dict[str, str]) -> dict[str, Any] | None:
+    """Typed session metadata, or None for a missing or partial hash."""
+    if not all(meta.get(name) for name in _REQUIRED_FIELDS):
+        return None
+    data: dict[str, Any] = dict(meta)
+    data["message_count"] = int(meta.get("message_count", 0))
+    return data
+
+
+class ChatStore:
+    """Chat sessions in Redis as message lists with a metadata hash."""
+
+    def __init__(self, redis, ttl: int = ChatSession.SESSION_TTL):
+        """
+        Initialize store.
+
+        Args:
+            redis: Async Redis client (decode_responses=True)
+            ttl: Seconds a session is kept after its last activity
+        """
+        self.redis = redis
+        self.ttl = ttl
+
+    @staticmethod
+    def session_key(user_id: str, session_id: str) -> str:
+        """Base key of a session (also names the session in other caches)."""
+        return f"chat:{user_id}:{session_id}"
+
+    def _meta_key(self, user_id: str, session_id: str) -> str:
+        return f"{self.session_key(user_id, session_id)}:meta"
+
+    def _messages_key(self, user_id: str, session_id: str) -> str:
+        return f"{self.session_key(user_id, session_id)}:messages"
+
+    @staticmethod
+    def _index_key(user_id: str) -> str:
+        return f"chat_index:{user_id}"
+
+    @staticmethod
+    def _legacy_index_key(user_id: str) -> str:
+        return f"chat_sessions:{user_id}"
+
+    async def save(
+        self,
+        user_id: str,
+        session_id: str,
+        meta: dict[str, Any],
+        messages: list[dict[str, Any]] | None = None,
+    ) -> None:
+        """
+        Write a whole session, replacing any stored one.
+
+        Used when a session is created or rebuilt (e.g. from the database);
+        new turns go through append().
+
+        Args:
+            user_id: Owner of the session
+            session_id: Session ID
+            meta: Session fields (aspect_ratio, created_at, last_activity, ...)
+            messages: Messages, oldest first
+        """
+        messages = messages or []
+        meta_key = self._meta_key(user_id, session_id)
+        messages_key = self._messages_key(user_id, session_id)
+        index_key = self._index_key(user_id)
+        fields = {"session_id": session_id, "user_id": user_id}
+        fields.update({k: v for k, v in meta.items() if k in _META_FIELDS and v is not None})
+
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(meta_key, messages_key)
+        pipe.hset(meta_key, mapping={**fields, "message_count": len(messages)})
+        pipe.expire(meta_key, self.ttl)
+        if messages:
+            pipe.rpush(messages_key, *(json.dumps(msg) for msg in messages))
+            pipe.expire(messages_key, self.ttl)
+        pipe.zadd(index_key, {session_id: _score(fields.get("last_activity"))})
+        pipe.expire(index_key, self.ttl)
+        await pipe.execute()
+
+    async def load(
+        self, user_id: str, session_id: str, last: int | None = None
+    ) -> tuple[dict[str, Any], list[dict[str, Any]]] | None:
+        """
+        Load a session's metadata and messages.
+
+        Args:
+            user_id: Owner of the session
+            session_id: Session ID
+            last: Only load this many of the most recent messages (None for all)
+
+        Returns:
+            (metadata, messages oldest first), or None if the session does not exist
+        """
+        for _ in range(2):
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hgetall(self._meta_key(user_id, session_id))
+            pipe.lrange(self._messages_key(user_id, session_id), -last if last else 0, -1)
+            meta, raw_messages = await pipe.execute()
+
+            session = _decode_meta(meta)
+            if session is not None:
+                return session, [json.loads(msg) for msg in raw_messages]
+            if not await self._migrate_legacy(user_id, session_id):
+                return None
+        return None
+
+    async def append(
+        self,
+        user_id: str,
+        session_id: str,
+        messages: list[dict[str, Any]],
+        now: datetime,
+    ) -> int:
+        """
+        Append messages to a session and refresh its expiry.
+
+        Args:
+            user_id: Owner of the session
+            session_id: Session ID
+            messages: New messages, oldest first
+            now: Time of the activity
+
+        Returns:
+            Number of messages in the session afterwards (0 if the session
+            expired since it was loaded; nothing is stored then)
+        """
+        meta_key = self._meta_key(user_id, session_id)
+        messages_key = self._messages_key(user_id, session_id)
+        index_key = self._index_key(user_id)
+
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.rpush(messages_key, *(json.dumps(msg) for msg in messages))
+        pipe.hset(meta_key, "last_activity", now.isoformat())
+        pipe.hincrby(meta_key, "message_count", len(messages))
+        pipe.expire(meta_key, self.ttl)
+        pipe.expire(messages_key, self.ttl)
+        pipe.zadd(index_key, {session_id: now.timestamp()})
+        pipe.expire(index_key, self.ttl)
+        results = await pipe.execute()
+
+        # HSET reports last_activity as a new field only when the session
+        # expired after it was loaded; drop the partial keys it recreated
+        if results[1]:
+            logger.warning(f"Chat session {session_id} expired before its turn was stored")
+            await self._delete_keys(user_id, session_id)
+            return 0
+        return int(results[0])
+
+    async def list_sessions(self, user_id: str) -> list[dict[str, Any]]:
+        """
+        List a user's sessions, most recently active first.
+
+        Args:
+            user_id: Owner of the sessions
+
+        Returns:
+            Session metadata dicts
+        """
+        await self._migrate_legacy_index(user_id)
+
+        index_key = self._index_key(user_id)
+        pipe = self.redis.pipeline(transaction=False)
+        # Sessions idle longer than the TTL have expired; drop them from the index
+        pipe.zremrangebyscore(index_key, "-inf", time.time() - self.ttl)
+        pipe.zrevrange(index_key, 0, -1)
+        _, session_ids = await pipe.execute()
+        if not session_ids:
+            return []
+
+        pipe = self.redis.pipeline(transaction=False)
+        for sid in session_ids:
+            pipe.hgetall(self._meta_key(user_id, sid))
+        metas = await pipe.execute()
+        sessions = [_decode_meta(meta) for meta in metas]
+        return [session for session in sessions if session is not None]
+
+    async def delete(self, user_id: str, session_id: str) -> bool:
+        """
+        Delete a session.
+
+        Args:
+            user_id: Owner of the session
+            session_id: Session ID
+
+        Returns:
+            True if the session existed
+        """
+        legacy_deleted = await self.redis.delete(self.session_key(user_id, session_id))
+        if legacy_deleted:
+            await self.redis.srem(self._legacy_index_key(user_id), session_id)
+
+        deleted = await self._delete_keys(user_id, session_id)
+        return bool(deleted or legacy_deleted)
+
+    async def _delete_keys(self, user_id: str, session_id: str) -> int:
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(self._meta_key(user_id, session_id), self._messages_key(user_id, session_id))
+        pipe.zrem(self._index_key(user_id), session_id)
+        deleted, _ = await pipe.execute()
+        return deleted
+
+    async def _migrate_legacy(self, user_id: str, session_id: str) -> bool:
+        """Convert a session stored as a single JSON blob, if there is one."""
+        legacy_key = self.session_key(user_id, session_id)
+        raw = await self.redis.get(legacy_key)
+        if not raw:
+            return False
+
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            logger.warning(f"Dropping unreadable chat session {legacy_key}")
+            await self.redis.delete(legacy_key)
+            return False
+
+        await self.save(user_id, session_id, data, data.get("messages", []))
+        await self.redis.delete(legacy_key)
+        await self.redis.srem(self._legacy_index_key(user_id), session_id)
+        logger.debug(f"Migrated chat session {legacy_key} to list storage")
+        return True
+
+    async def _migrate_legacy_index(self, user_id: str) -> None:
+        legacy_index = self._legacy_index_key(user_id)
+        session_ids = list(await self.redis.smembers(legacy_index))
+        for sid in session_ids:
+            await self._migrate_legacy(user_id, sid)
+        if session_ids:
+            await self.redis.delete(legacy_index)
@@ -2,14 +2,17 @@
 Content filter service for prompt safety checking.
 Prevents generation of NSFW/violent/illegal content.
 
-Keywords are loaded from local config/banned_keywords.json.
+Keywords are loaded from local config/banned_keywords.json and compiled into
+a KeywordMatcher (see services.keyword_matcher).
 """
 
 import json
 import os
-import re
+import time
 from pathlib import Path
 
+from .keyword_matcher import KeywordMatcher
+
 # Minimal fallback keywords (used if local file is missing)
 DEFAULT_BANNED_KEYWORDS = [
     "nsfw",
@@ -36,8 +39,8 @@ class ContentFilter:
 
     def __init__(self, api_key: str = None):
         """Initialize content filter with banned keywords and AI moderator."""
-        # Load keywords from local file
-        self.banned_keywords = self._load_keywords()
+        # Load keywords from local file and compile them
+        self._matcher = KeywordMatcher(self._load_keywords())
 
         # Check if filter is enabled
         self.enabled = get_config_value("CONTENT_FILTER_ENABLED", "true").lower() in [
@@ -89,9 +92,35 @@ class ContentFilter:
             print(f"[ContentFilter] Failed to load keywords file: {e}")
             return None
 
-    def refresh_keywords(self):
-        """Force refresh keywords from file."""
-        self.banned_keywords = self._load_keywords()
+    @property
+    def banned_keywords(self) -> list[str]:
+        """Keywords currently in effect."""
+        return self._matcher.keywords
+
+    def refresh_keywords(self) -> int:
+        """
+        Reload keywords from file without interrupting checks.
+
+        The new matcher is built off to the side and swapped in once complete;
+        checks running meanwhile use the previous one. If the file cannot be
+        read, the current keywords stay in effect.
+
+        Returns:
+            Number of keywords in effect
+        """
+        keywords = self._load_from_file()
+        if not keywords:
+            print("[ContentFilter] WARNING: keyword reload failed, keeping current keywords")
+            return len(self._matcher)
+
+        start = time.time()
+        matcher = KeywordMatcher(keywords)
+        self._matcher = matcher
+        print(
+            f"[ContentFilter] Reloaded {len(matcher)} keywords "
+            f"in {(time.time() - start) * 1000:.0f}ms"
+        )
+        return len(matcher)
 
     def is_safe(self, prompt: str, context: dict | None = None) -> tuple[bool, str]:
         """
@@ -99,6 +128,8 @@ class ContentFilter:
         1. Fast keyword blacklist (Layer 1)
         2. AI-powered analysis (Layer 2)
 
+        Layer 2 blocks the calling thread; in async code use is_safe_async.
+
         Args:
             prompt: The user's prompt text
             context: Optional context dict (generation_mode, user_id, session_id, etc.)
@@ -108,58 +139,107 @@ class ContentFilter:
             - is_safe: True if safe, False if blocked
             - reason: Empty string if safe, keyword/category if blocked
         """
-        import time
-
         if not self.enabled:
             return True, ""
 
         # Track timing for audit
         start_time = time.time()
-        layer1_time_ms = 0
-        layer2_time_ms = 0
 
         # === LAYER 1: Keyword Blacklist (Fast) ===
-        layer1_start = time.time()
-        keyword_safe, keyword_reason = self._check_keywords(prompt)
-        layer1_time_ms = (time.time() - layer1_start) * 1000
-
-        layer1_result = {
-            "checked": True,
-            "passed": keyword_safe,
-            "matched_keywords": [] if keyword_safe else [keyword_reason],
-            "execution_time_ms": round(layer1_time_ms, 2),
-            "total_keywords_count": len(self.banned_keywords),
-        }
+        layer1_result = self._check_layer1(prompt)
 
         # === LAYER 2: AI Deep Analysis (Slower but Smart) ===
         layer2_result = None
-        ai_safe = True
-        ai_reason = ""
-
-        if self.ai_moderator and self.ai_moderator.enabled and keyword_safe:
+        if self.ai_moderator and self.ai_moderator.enabled and layer1_result["passed"]:
             layer2_start = time.time()
             ai_safe, ai_reason = self.ai_moderator.check_safety(prompt)
-            layer2_time_ms = (time.time() - layer2_start) * 1000
 
             # Check if result was cached
             cache_key = self.ai_moderator._get_cache_key(prompt)
             was_cached = cache_key in self.ai_moderator._cache
 
-            layer2_result = {
-                "checked": True,
-                "passed": ai_safe,
-                "classification": "safe" if ai_safe else "unsafe",
-                "reason": ai_reason,
-                "ai_raw_response": None,  # We don't store the full response
-                "execution_time_ms": round(layer2_time_ms, 2),
-                "model": "gemini-2.0-flash-exp",
-                "cache_hit": was_cached,
-            }
+            layer2_result = self._layer2_result(ai_safe, ai_reason, layer2_start, was_cached)
+
+        return self._decide(prompt, start_time, layer1_result, layer2_result, context)
+
+    async def is_safe_async(self, prompt: str, context: dict | None = None) -> tuple[bool, str]:
+        """
+        Two-layer safety check without blocking the event loop.
+
+        Same as is_safe, but layer 2 goes through the moderation service: the
+        classifier runs on its own executor, concurrent prompts are batched,
+        and verdicts are shared across workers.
+
+        Args:
+            prompt: The user's prompt text
+            context: Optional context dict (generation_mode, user_id, session_id, etc.)
+
+        Returns:
+            Tuple of (is_safe, reason), as for is_safe
+        """
+        if not self.enabled:
+            return True, ""
+
+        start_time = time.time()
+        layer1_result = self._check_layer1(prompt)
+
+        layer2_result = None
+        if self.ai_moderator and self.ai_moderator.enabled and layer1_result["passed"]:
+            from .moderation_service import get_moderation_service
+
+            layer2_start = time.time()
+            verdict = await get_moderation_service().check(prompt)
+            layer2_result = self._layer2_result(
+                verdict.safe, verdict.reason, layer2_start, verdict.cached
+            )
 
+        return self._decide(prompt, start_time, layer1_result, layer2_result, context)
+
+    def _check_layer1(self, prompt: str) -> dict:
+        """Run the keyword check and describe it for the audit log."""
+        layer1_start = time.time()
+        matcher = self._matcher
+        matched_keywords = matcher.find_all(prompt)
+        layer1_time_ms = (time.time() - layer1_start) * 1000
+
+        return {
+            "checked": True,
+            "passed": not matched_keywords,
+            "matched_keywords": matched_keywords,
+            "execution_time_ms": round(layer1_time_ms, 2),
+            "total_keywords_count": len(matcher),
+        }
+
+    def _layer2_result(
+        self, ai_safe: bool, ai_reason: str, layer2_start: float, was_cached: bool
+    ) -> dict:
+        """Describe an AI check for the audit log."""
+        layer2_time_ms = (time.time() - layer2_start) * 1000
+        return {
+            "checked": True,
+            "passed": ai_safe,
+            "classification": "safe" if ai_safe else "unsafe",
+            "reason": ai_reason,
+            "ai_raw_response": None,  # We don't store the full response
+            "execution_time_ms": round(layer2_time_ms, 2),
+            "model": self.ai_moderator.MODEL_NAME,
+            "cache_hit": was_cached,
+        }
+
+    def _decide(
+        self,
+        prompt: str,
+        start_time: float,
+        layer1_result: dict,
+        layer2_result: dict | None,
+        context: dict | None,
+    ) -> tuple[bool, str]:
+        """Combine both layers into the final decision and audit it."""
         # === Final Decision ===
         total_time_ms = (time.time() - start_time) * 1000
 
-        if not keyword_safe:
+        if not layer1_result["passed"]:
+            keyword_reason = layer1_result["matched_keywords"][0]
             final_decision = {
                 "allowed": False,
                 "blocked_by": "keyword",
@@ -167,7 +247,8 @@ class ContentFilter:
                 "total_time_ms": round(total_time_ms, 2),
             }
             result = (False, f"keyword:{keyword_reason}")
-        elif not ai_safe:
+        elif layer2_result and not layer2_result["passed"]:
+            ai_reason = layer2_result["reason"]
             final_decision = {
                 "allowed": False,
                 "blocked_by": "ai",
@@ -202,38 +283,15 @@ class ContentFilter:
 
         return result
 
+    def find_keywords(self, prompt: str) -> list[str]:
+        """Layer 1: All banned keywords in a prompt, in keyword list order."""
+        return self._matcher.find_all(prompt)
+
     def _check_keywords(self, prompt: str) -> tuple[bool, str]:
         """Layer 1: Fast keyword blacklist checking with word boundary detection."""
-        # Normalize prompt for checking
-        normalized = prompt.lower()
-
-        # Remove spaces and special chars for evasion detection
-        # e.g., "n s f w" or "n-s-f-w" should still match "nsfw"
-        compact = re.sub(r"[\s\-_]+", "", normalized)
-
-        # Check each banned keyword
-        for keyword in self.banned_keywords:
-            keyword_lower = keyword.lower()
-
-            # For multi-word phrases, use substring match
-            if " " in keyword_lower:
-                if keyword_lower in normalized:
-                    return False, keyword
-
-            # For single words, use word boundary match (avoid "bra" in "embracing")
-            else:
-                # Word boundary pattern: \b{keyword}\b
-                pattern = r"\b" + re.escape(keyword_lower) + r"\b"
-                if re.search(pattern, normalized):
-                    return False, keyword
-
-            # Evasion detection for compact form (spaces removed)
-            keyword_compact = re.sub(r"[\s\-_]+", "", keyword_lower)
-            if (
-                keyword_compact in compact and len(keyword_compact) > 3
-            ):  # Avoid short false positives
-                return False, keyword
-
+        matched = self._matcher.find_all(prompt)
+        if matched:
+            return False, matched[0]
         return True, ""
 
     def get_blocked_message(self, language: str = "en", reason: str = "") -> str:
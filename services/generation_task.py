@@ -5,7 +5,7 @@ Starts the primary provider, then launches staggered fallback providers
 concurrently after a soft timeout — without killing the primary.
 The first provider to succeed wins.
 
-# TODO: migrate to ARQ for production reliability
+Enqueued through services.task_queue and run on the ARQ generation worker.
 """
 
 import asyncio
@@ -20,8 +20,16 @@ from database import get_session, is_database_available
 from database.repositories import ImageRepository, QuotaRepository
 
 from .provider_router import get_provider_router
-from .providers.base import CircuitBreakerManager, GenerationRequest, GenerationResult
+from .providers.base import (
+    CircuitBreakerManager,
+    GenerationRequest,
+    GenerationResult,
+    MediaType,
+    ProviderModel,
+)
 from .providers.registry import get_provider_registry
+from .request_coalescer import get_request_coalescer
+from .result_cache import get_result_cache
 from .storage import get_storage_manager
 from .websocket_manager import get_websocket_manager
 
@@ -73,22 +81,35 @@ async def execute_generation_race(
             progress=0.2,
         )
 
-        # Run the race
-        result = await _race_providers(
-            task_id=task_id,
-            task_key=task_key,
-            request=request,
-            user_id=user_id,
-            primary_provider=primary_provider,
-            primary_model=primary_model,
-            fallback_names=fallback_names,
-        )
+        # Reuse a stored seeded result, else run the race or join an identical one
+        result_cache = get_result_cache()
+        raced = False
+
+        def race():
+            nonlocal raced
+            raced = True
+            return _race_providers(
+                task_id=task_id,
+                task_key=task_key,
+                request=request,
+                user_id=user_id,
+                primary_provider=primary_provider,
+                primary_model=primary_model,
+                fallback_names=fallback_names,
+            )
+
+        result = await result_cache.get(request, primary_provider, primary_model)
+        if result is None:
+            result = await get_request_coalescer().run(request, race, media_type=MediaType.IMAGE)
+        if not raced:
+            # The primary's token was taken when the request was routed
+            await get_provider_router().refund(primary_provider, primary_model)
 
         if result is None:
             # Cancelled
             return
 
-        if not result.success or not result.image:
+        if not result.success or not result.has_image:
             # All providers failed
             error_msg = result.error or "All providers failed"
             await redis.hset(
@@ -112,6 +133,7 @@ async def execute_generation_race(
             return
 
         # Success — save and finalize
+        cacheable = result_cache.is_cacheable(request, result.provider)
         response_data = await _save_and_finalize(
             result=result,
             original_prompt=original_prompt,
@@ -124,7 +146,10 @@ async def execute_generation_race(
             was_translated=was_translated,
             was_enhanced=was_enhanced,
             template_name=template_name,
+            content_addressed=cacheable,
         )
+        if cacheable:
+            await result_cache.put(request, result, response_data["image"]["key"])
 
         await redis.hset(
             task_key,
@@ -194,10 +219,11 @@ async def _race_providers(
     overall_timeout = settings.generation_overall_timeout
     stagger_interval = settings.provider_stagger_interval
 
-    # Dynamic soft_timeout from primary provider's P90 latency
-    latencies = router._adaptive.latencies.get(primary_provider, [])
-    if len(latencies) >= 5:
-        p90 = sorted(latencies)[int(len(latencies) * 0.9)]
+    # Dynamic soft_timeout from the primary model's decayed P90 latency
+    p90 = router._adaptive.latency_quantile(
+        primary_provider, 0.9, model=primary_model, min_samples=5
+    ) or router._adaptive.latency_quantile(primary_provider, 0.9, min_samples=5)
+    if p90 is not None:
         soft_timeout = min(p90 * 1.2, overall_timeout * 0.5)
         soft_timeout = max(soft_timeout, 10)  # floor at 10s
     else:
@@ -209,7 +235,7 @@ async def _race_providers(
     fallbacks = scored  # list of (name, score)
 
     # Resolve provider+model for each fallback
-    fallback_configs: list[tuple[str, str]] = []
+    fallback_configs: list[tuple[str, ProviderModel]] = []
     for name, _ in fallbacks:
         provider_inst = router._registry.get_image_provider(name)
         if provider_inst and provider_inst.is_available:
@@ -217,7 +243,7 @@ async def _race_providers(
             if breaker.can_execute():
                 model = provider_inst.get_default_model()
                 if model:
-                    fallback_configs.append((name, model.id))
+                    fallback_configs.append((name, model))
 
     race_start = time.monotonic()
     last_error: GenerationResult | None = None
@@ -239,16 +265,24 @@ async def _race_providers(
             if result.success:
                 CircuitBreakerManager.get(prov_name).record_success()
                 router._adaptive.update(
-                    prov_name, success=True, latency=latency, cost=result.cost or 0
+                    prov_name,
+                    success=True,
+                    latency=latency,
+                    cost=result.cost or 0,
+                    model=model_id,
                 )
             else:
                 CircuitBreakerManager.get(prov_name).record_failure()
-                router._adaptive.update(prov_name, success=False, latency=latency, cost=0)
+                router._adaptive.update(
+                    prov_name, success=False, latency=latency, cost=0, model=model_id
+                )
             return prov_name, result
         except Exception as e:
             latency = time.time() - start
             CircuitBreakerManager.get(prov_name).record_failure()
-            router._adaptive.update(prov_name, success=False, latency=latency, cost=0)
+            router._adaptive.update(
+                prov_name, success=False, latency=latency, cost=0, model=model_id
+            )
             return prov_name, GenerationResult(
                 success=False,
                 error=str(e),
@@ -295,11 +329,18 @@ async def _race_providers(
     # Phase 2: staggered fallbacks (DON'T cancel primary — it may still finish)
     fallback_index = 0
     while time.monotonic() - race_start < overall_timeout:
-        # Launch next fallback if available
-        if fallback_index < len(fallback_configs):
+        # Launch next fallback that has rate-limit capacity
+        launch: tuple[str, str] | None = None
+        while launch is None and fallback_index < len(fallback_configs):
             fb_name, fb_model = fallback_configs[fallback_index]
             fallback_index += 1
+            if await router.admit(fb_model):
+                launch = (fb_name, fb_model.id)
+            else:
+                logger.info("Race: skipping rate-limited fallback provider %s", fb_name)
 
+        if launch:
+            fb_name, fb_model_id = launch
             logger.info("Race: launching fallback provider %s (index %d)", fb_name, fallback_index)
             await redis.hset(
                 task_key,
@@ -316,7 +357,7 @@ async def _race_providers(
             )
 
             fb_task = asyncio.create_task(
-                _run_provider(fb_name, fb_model),
+                _run_provider(fb_name, fb_model_id),
                 name=f"gen:{fb_name}",
             )
             pending.add(fb_task)
@@ -403,6 +444,7 @@ async def _save_and_finalize(
     was_translated: bool,
     was_enhanced: bool,
     template_name: str | None,
+    content_addressed: bool = False,
 ) -> dict:
     """Save image to storage + DB and return serializable response dict."""
     from api.schemas.generate import (
@@ -415,7 +457,8 @@ async def _save_and_finalize(
     storage = get_storage_manager(user_id=user_id if user_id != "anonymous" else None)
 
     storage_obj = await storage.save_image(
-        image=result.image,
+        image=result.image_data or result.image,
+        content_type=result.image_mime_type,
         prompt=original_prompt,
         settings={
             "aspect_ratio": settings_dict.get("aspect_ratio", "16:9"),
@@ -427,14 +470,15 @@ async def _save_and_finalize(
         mode="basic",
         text_response=result.text_response,
         thinking=result.thinking,
+        content_addressed=content_addressed,
     )
 
-    # Save to PostgreSQL if available
+    # Save to PostgreSQL if available (a repeated seeded result reuses its record)
     if is_database_available():
         try:
             async for session in get_session():
                 image_repo = ImageRepository(session)
-                await image_repo.create(
+                await image_repo.get_or_create(
                     storage_key=storage_obj.key,
                     filename=storage_obj.filename,
                     prompt=original_prompt,
@@ -512,6 +556,7 @@ async def _save_and_finalize(
         was_translated=was_translated,
         was_enhanced=was_enhanced,
         template_name=template_name,
+        cached=result.cached,
     )
 
     return response.model_dump(mode="json")
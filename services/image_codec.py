@@ -0,0 +1,266 @@
+"""
+Bounded thread pool for PIL image work (decode, encode, mask conversion).
+
+Encoding a 4K PNG takes a few hundred milliseconds; done inline it stalls
+the event loop and every other request on the worker. Pillow releases the
+GIL inside its codecs and resamplers, so running these calls on a small
+dedicated thread pool keeps the loop responsive without the pickling cost a
+process pool would add for PIL images.
+
+Each operation is counted (queued, running, wait and run time) so pool
+saturation shows up in the admin status endpoint. Within an HTTP request,
+ImageBudget limits how many operations the request runs at once (so one
+request with many images cannot occupy the whole pool) and how much codec
+time it may spend in total.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from io import BytesIO
+from typing import Any, TypeVar
+
+from PIL import Image
+
+from core.exceptions import ImageBudgetExceededError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ImageBudget:
+    """Per-request limits on image codec work."""
+
+    def __init__(self, max_concurrency: int, max_ms: float):
+        """
+        Initialize budget.
+
+        Args:
+            max_concurrency: Operations of one request running at once
+            max_ms: Total codec time a request may use (0 for no limit)
+        """
+        self.max_ms = max_ms
+        self.spent_ms = 0.0
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.closed = False
+
+    def close(self) -> None:
+        """Stop applying the budget (e.g. once the response has been sent)."""
+        self.closed = True
+
+    def check(self) -> None:
+        """Raise if the time budget is spent."""
+        if self.max_ms and self.spent_ms >= self.max_ms:
+            raise ImageBudgetExceededError(details={"spent_ms": round(self.spent_ms, 1)})
+
+
+_executor: ThreadPoolExecutor | None = None
+_request_budget: ContextVar[ImageBudget | None] = ContextVar("image_budget", default=None)
+
+_stats_lock = threading.Lock()
+_stats = {
+    "submitted": 0,
+    "completed": 0,
+    "failed": 0,
+    "queued": 0,
+    "running": 0,
+    "max_queued": 0,
+    "wait_ms_total": 0.0,
+    "run_ms_total": 0.0,
+    "budget_rejections": 0,
+}
+
+
+def get_image_executor() -> ThreadPoolExecutor:
+    """
+    Get the shared image codec executor, creating it on first use.
+
+    The pool size comes from the image_codec_workers setting.
+
+    Returns:
+        ThreadPoolExecutor instance
+    """
+    global _executor
+
+    if _executor is None:
+        from core.config import get_settings
+
+        workers = get_settings().image_codec_workers
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-codec")
+        logger.info(f"Image codec executor started with {workers} workers")
+
+    return _executor
+
+
+def shutdown_image_executor(wait: bool = True):
+    """Shut down the image codec executor if it was started."""
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown(wait=wait)
+        _executor = None
+        logger.info("Image codec executor shut down")
+
+
+@contextmanager
+def image_budget(
+    max_concurrency: int | None = None, max_ms: float | None = None
+) -> Iterator[ImageBudget]:
+    """
+    Apply an image budget to the operations run inside the block.
+
+    Tasks created inside the block (e.g. by asyncio.gather) share it.
+
+    Args:
+        max_concurrency: Operations running at once (defaults to config)
+        max_ms: Total codec time in milliseconds (defaults to config)
+
+    Yields:
+        The active ImageBudget
+    """
+    if max_concurrency is None or max_ms is None:
+        from core.config import get_settings
+
+        settings = get_settings()
+        max_concurrency = max_concurrency or settings.image_codec_request_concurrency
+        if max_ms is None:
+            max_ms = settings.image_codec_request_budget_ms
+
+    budget = ImageBudget(max_concurrency, max_ms)
+    token = _request_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _request_budget.reset(token)
+
+
+def _submit(func: Callable[..., T], args: tuple, kwargs: dict, budget: ImageBudget | None):
+    submitted_at = time.perf_counter()
+
+    def call() -> T:
+        started_at = time.perf_counter()
+        with _stats_lock:
+            _stats["queued"] -= 1
+            _stats["running"] += 1
+            _stats["wait_ms_total"] += (started_at - submitted_at) * 1000
+        ok = False
+        try:
+            result = func(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            elapsed_ms = (time.perf_counter() - started_at) * 1000
+            with _stats_lock:
+                _stats["running"] -= 1
+                _stats["completed" if ok else "failed"] += 1
+                _stats["run_ms_total"] += elapsed_ms
+                if budget is not None:
+                    budget.spent_ms += elapsed_ms
+
+    def on_done(future: Future) -> None:
+        # An operation cancelled before it started never ran call()
+        if future.cancelled():
+            with _stats_lock:
+                _stats["queued"] -= 1
+
+    with _stats_lock:
+        _stats["submitted"] += 1
+        _stats["queued"] += 1
+        _stats["max_queued"] = max(_stats["max_queued"], _stats["queued"])
+
+    future = get_image_executor().submit(call)
+    future.add_done_callback(on_done)
+    return asyncio.wrap_future(future)
+
+
+async def run_image_op(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a CPU-bound PIL callable on the image codec executor.
+
+    Args:
+        func: Synchronous callable
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        The callable's return value
+
+    Raises:
+        ImageBudgetExceededError: If the current request's budget is spent
+    """
+    budget = _request_budget.get()
+    if budget is None or budget.closed:
+        return await _submit(func, args, kwargs, None)
+
+    try:
+        budget.check()
+    except ImageBudgetExceededError:
+        with _stats_lock:
+            _stats["budget_rejections"] += 1
+        raise
+    async with budget.semaphore:
+        return await _submit(func, args, kwargs, budget)
+
+
+def _encode(image: Image.Image, format: str, save_kwargs: dict[str, Any]) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, format=format, **save_kwargs)
+    return buffer.getvalue()
+
+
+def _decode(data: bytes) -> Image.Image:
+    image = Image.open(BytesIO(data))
+    # Image.open is lazy; force the decode to happen on the pool
+    image.load()
+    return image
+
+
+async def encode_image(image: Image.Image, format: str = "PNG", **save_kwargs: Any) -> bytes:
+    """
+    Encode a PIL image off the event loop.
+
+    Args:
+        image: Image to encode
+        format: PIL format name (PNG, JPEG, WEBP)
+        **save_kwargs: Extra options for Image.save (e.g. quality)
+
+    Returns:
+        Encoded bytes
+    """
+    return await run_image_op(_encode, image, format.upper(), save_kwargs)
+
+
+async def decode_image(data: bytes) -> Image.Image:
+    """
+    Decode image bytes into a fully loaded PIL image off the event loop.
+
+    Args:
+        data: Encoded image bytes
+
+    Returns:
+        Loaded PIL image
+
+    Raises:
+        PIL.UnidentifiedImageError: If data is not a decodable image
+    """
+    return await run_image_op(_decode, data)
+
+
+def get_codec_stats() -> dict[str, Any]:
+    """Queue depth and timing counters of the image codec executor."""
+    with _stats_lock:
+        stats = dict(_stats)
+    finished = stats["completed"] + stats["failed"]
+    started = finished + stats["running"]
+    stats["avg_wait_ms"] = round(stats["wait_ms_total"] / started, 2) if started else 0.0
+    stats["avg_run_ms"] = round(stats["run_ms_total"] / finished, 2) if finished else 0.0
+    stats["wait_ms_total"] = round(stats["wait_ms_total"], 1)
+    stats["run_ms_total"] = round(stats["run_ms_total"], 1)
+    stats["workers"] = _executor._max_workers if _executor is not None else 0
+    return stats
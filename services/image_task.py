@@ -4,7 +4,7 @@ Background task for image operations: blend, inpaint, outpaint, search.
 Simpler than generation_task.py's race pattern — single provider execution,
 no staggered fallbacks.
 
-# TODO: migrate to ARQ for production reliability
+Enqueued through services.task_queue and run on the ARQ generation worker.
 """
 
 import json
@@ -78,7 +78,7 @@ async def execute_image_task(
             user_id=user_id,
         )
 
-        if not result.success or not result.image:
+        if not result.success or not result.has_image:
             error_msg = result.error or f"Failed to {mode} image"
             await redis.hset(
                 task_key,
@@ -379,7 +379,8 @@ async def _save_and_finalize(
     storage = get_storage_manager(user_id=user_id if user_id != "anonymous" else None)
 
     storage_obj = await storage.save_image(
-        image=result.image,
+        image=result.image_data or result.image,
+        content_type=result.image_mime_type,
         prompt=prompt,
         settings={
             "aspect_ratio": settings_dict.get("aspect_ratio", "16:9"),
@@ -0,0 +1,183 @@
+"""
+Multi-pattern keyword matching for the content filter.
+
+KeywordMatcher compiles the banned keyword list into one Aho–Corasick
+automaton when it is built, so checking a prompt costs one pass over the
+text regardless of how many keywords there are. A matcher is immutable once
+built: reloading the keyword list builds a new matcher and swaps it in.
+
+Matching keeps the semantics of the original per-keyword regex checks. Text
+and keywords are lowercased. Each keyword is then looked for in two ways:
+
+- Exact: multi-word phrases match as plain substrings. Single words only
+  match at word boundaries, as with a ``\\b...\\b`` regex, so "bra" does not
+  match "embracing".
+- Compact: runs of whitespace, "-" and "_" are removed from both the text
+  and the keyword, which catches evasions like "n s f w" or "n-s-f-w". This
+  applies only to keywords that are longer than COMPACT_MIN_LENGTH once
+  compacted, to avoid short false positives.
+"""
+
+import re
+from collections import deque
+
+# Compacted keywords of this length or shorter are only matched exactly
+COMPACT_MIN_LENGTH = 3
+
+_SEPARATORS = re.compile(r"[\s\-_]+")
+
+# Keyword entry modes
+_PHRASE = 0  # substring of the normalized text
+_WORD = 1  # word-bounded match in the normalized text
+_COMPACT = 2  # substring of the compacted text
+
+
+def normalize(text: str) -> str:
+    """Lowercase text for matching."""
+    return text.lower()
+
+
+def compact(text: str) -> str:
+    """Remove whitespace, hyphens and underscores used to split up keywords."""
+    return _SEPARATORS.sub("", text)
+
+
+def _is_word_char(char: str) -> bool:
+    # Same definition as the re module's \w for str patterns
+    return char.isalnum() or char == "_"
+
+
+def _at_word_boundary(text: str, pos: int) -> bool:
+    """Whether \\b matches at pos in text."""
+    before = pos > 0 and _is_word_char(text[pos - 1])
+    after = pos < len(text) and _is_word_char(text[pos])
+    return before != after
+
+
+class KeywordMatcher:
+    """Aho–Corasick automaton over a fixed keyword list."""
+
+    def __init__(self, keywords: list[str]):
+        """
+        Build the automaton.
+
+        Args:
+            keywords: Banned keywords; their order decides the order of matches
+        """
+        self.keywords = list(keywords)
+
+        # Trie as parallel arrays: goto transitions, failure links, the
+        # pattern ending at each state and the nearest state on the failure
+        # chain that ends a pattern ("dictionary suffix link")
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._pattern: list[int] = [-1]
+        self._output_link: list[int] = [-1]
+
+        # pattern id -> pattern length and [(keyword index, mode), ...]
+        self._pattern_ids: dict[str, int] = {}
+        self._lengths: list[int] = []
+        self._entries: list[list[tuple[int, int]]] = []
+
+        for index, keyword in enumerate(self.keywords):
+            lowered = normalize(keyword)
+            if not lowered:
+                continue
+            self._add(lowered, index, _PHRASE if " " in lowered else _WORD)
+            compacted = compact(lowered)
+            if len(compacted) > COMPACT_MIN_LENGTH:
+                self._add(compacted, index, _COMPACT)
+
+        self._link()
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def _add(self, pattern: str, index: int, mode: int) -> None:
+        pattern_id = self._pattern_ids.get(pattern)
+        if pattern_id is None:
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._pattern.append(-1)
+                    self._output_link.append(-1)
+                    self._goto[state][char] = next_state
+                state = next_state
+            pattern_id = len(self._lengths)
+            self._pattern_ids[pattern] = pattern_id
+            self._lengths.append(len(pattern))
+            self._entries.append([])
+            self._pattern[state] = pattern_id
+        self._entries[pattern_id].append((index, mode))
+
+    def _link(self) -> None:
+        """Compute failure and output links breadth-first."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                fail = self._goto[fallback].get(char, 0)
+                self._fail[child] = fail
+                if self._pattern[fail] >= 0:
+                    self._output_link[child] = fail
+                else:
+                    self._output_link[child] = self._output_link[fail]
+                queue.append(child)
+
+    def _scan(self, text: str):
+        """Yield (pattern id, end position) for every pattern occurrence in text."""
+        goto, fail, pattern, output_link = (
+            self._goto,
+            self._fail,
+            self._pattern,
+            self._output_link,
+        )
+        state = 0
+        for pos, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            match = state if pattern[state] >= 0 else output_link[state]
+            while match > 0:
+                yield pattern[match], pos + 1
+                match = output_link[match]
+
+    def find_all(self, text: str) -> list[str]:
+        """
+        Find every banned keyword in text.
+
+        Args:
+            text: Text to check (e.g. a user prompt)
+
+        Returns:
+            Matched keywords without duplicates, in keyword list order
+        """
+        if not self._lengths:
+            return []
+
+        normalized = normalize(text)
+        matched: set[int] = set()
+
+        for pattern_id, end in self._scan(normalized):
+            start = end - self._lengths[pattern_id]
+            for index, mode in self._entries[pattern_id]:
+                if index in matched or mode == _COMPACT:
+                    continue
+                if mode == _PHRASE or (
+                    _at_word_boundary(normalized, start) and _at_word_boundary(normalized, end)
+                ):
+                    matched.add(index)
+
+        for pattern_id, _ in self._scan(compact(normalized)):
+            for index, mode in self._entries[pattern_id]:
+                if mode == _COMPACT:
+                    matched.add(index)
+
+        return [self.keywords[index] for index in sorted(matched)]
@@ -0,0 +1,197 @@
+"""
+Compact, mergeable latency histograms for routing decisions.
+
+Latencies are counted in logarithmic buckets (HDR-histogram style): each
+bucket is 10% wider than the previous one, from 10 ms to 10 minutes, so a
+quantile is accurate to about 5% regardless of how many samples were
+recorded. Adding a sample is O(1) and a quantile query scans a fixed number
+of buckets, with no sorting.
+
+DecayingLatencyHistogram keeps one histogram per time window and weighs older
+windows down with a half-life, so percentiles follow the provider's current
+behaviour. Windows are keyed by their start time, which lets histograms from
+different workers be merged window by window (see services.provider_state).
+"""
+
+import math
+import time
+from collections.abc import Iterable
+
+MIN_LATENCY = 0.01  # seconds
+MAX_LATENCY = 600.0  # seconds
+BUCKET_GROWTH = 1.1
+
+NUM_BUCKETS = math.ceil(math.log(MAX_LATENCY / MIN_LATENCY) / math.log(BUCKET_GROWTH)) + 1
+
+_LOG_GROWTH = math.log(BUCKET_GROWTH)
+
+
+def bucket_index(latency: float) -> int:
+    """Bucket holding a latency in seconds (clamped to the tracked range)."""
+    if latency <= MIN_LATENCY:
+        return 0
+    return min(int(math.log(latency / MIN_LATENCY) / _LOG_GROWTH), NUM_BUCKETS - 1)
+
+
+def bucket_value(index: int) -> float:
+    """Representative latency of a bucket (its geometric midpoint)."""
+    return MIN_LATENCY * BUCKET_GROWTH ** (index + 0.5)
+
+
+class LatencyHistogram:
+    """Fixed-size log-bucketed latency histogram with weighted counts."""
+
+    __slots__ = ("counts", "total", "sum")
+
+    def __init__(self):
+        self.counts = [0.0] * NUM_BUCKETS
+        self.total = 0.0
+        self.sum = 0.0
+
+    def add(self, latency: float, weight: float = 1.0) -> None:
+        """Record a latency in seconds."""
+        self.counts[bucket_index(latency)] += weight
+        self.total += weight
+        self.sum += latency * weight
+
+    def merge(self, other: "LatencyHistogram", weight: float = 1.0) -> None:
+        """Add another histogram's counts, scaled by weight."""
+        for i, count in enumerate(other.counts):
+            if count:
+                self.counts[i] += count * weight
+        self.total += other.total * weight
+        self.sum += other.sum * weight
+
+    def quantile(self, q: float) -> float | None:
+        """Latency at quantile q (0-1), or None when empty."""
+        if self.total <= 0:
+            return None
+        target = q * self.total
+        seen = 0.0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return bucket_value(i)
+        return bucket_value(NUM_BUCKETS - 1)
+
+    def mean(self) -> float | None:
+        """Mean latency, or None when empty."""
+        return self.sum / self.total if self.total > 0 else None
+
+    def to_dict(self) -> dict[str, float]:
+        """Sparse {bucket index: count} form, plus the sum under "sum"."""
+        data = {str(i): count for i, count in enumerate(self.counts) if count}
+        data["sum"] = self.sum
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, str | float]) -> "LatencyHistogram":
+        """Rebuild a histogram from to_dict() output (values may be strings)."""
+        hist = cls()
+        for key, value in data.items():
+            if key == "sum":
+                hist.sum = float(value)
+                continue
+            count = float(value)
+            hist.counts[int(key)] += count
+            hist.total += count
+        return hist
+
+
+class DecayingLatencyHistogram:
+    """
+    Time-windowed latency histogram with exponential decay.
+
+    Samples go into the window containing the current time. Quantiles are read
+    from an aggregate in which a window of age t weighs 0.5 ** (t / half_life).
+    The aggregate is rebuilt only when a new window starts.
+    """
+
+    def __init__(
+        self,
+        window_seconds: int = 60,
+        max_windows: int = 10,
+        half_life: float = 300.0,
+    ):
+        """
+        Initialize histogram.
+
+        Args:
+            window_seconds: Length of each window
+            max_windows: Number of windows kept
+            half_life: Seconds after which a window counts half as much
+        """
+        self.window_seconds = window_seconds
+        self.max_windows = max_windows
+        self.half_life = half_life
+        self._windows: dict[int, LatencyHistogram] = {}
+        self._current: int | None = None
+        self._aggregate = LatencyHistogram()
+
+    def window_start(self, now: float | None = None) -> int:
+        """Start time of the window containing now."""
+        now = time.time() if now is None else now
+        return int(now // self.window_seconds) * self.window_seconds
+
+    def _roll(self, now: float | None) -> None:
+        start = self.window_start(now)
+        if start == self._current:
+            return
+        self._current = start
+        oldest = start - (self.max_windows - 1) * self.window_seconds
+        self._windows = {s: h for s, h in self._windows.items() if s >= oldest}
+        self._windows.setdefault(start, LatencyHistogram())
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        aggregate = LatencyHistogram()
+        for start, hist in self._windows.items():
+            age = self._current - start
+            aggregate.merge(hist, 0.5 ** (age / self.half_life))
+        self._aggregate = aggregate
+
+    def add(self, latency: float, now: float | None = None) -> None:
+        """Record a latency in seconds."""
+        self._roll(now)
+        self._windows[self._current].add(latency)
+        self._aggregate.add(latency)
+
+    def replace_windows(
+        self, windows: Iterable[tuple[int, LatencyHistogram]], now: float | None = None
+    ) -> None:
+        """Replace the recorded windows, e.g. with fleet-wide windows from Redis."""
+        self._current = self.window_start(now)
+        oldest = self._current - (self.max_windows - 1) * self.window_seconds
+        self._windows = {start: hist for start, hist in windows if start >= oldest}
+        self._windows.setdefault(self._current, LatencyHistogram())
+        self._rebuild()
+
+    def window_starts(self, now: float | None = None) -> list[int]:
+        """Start times of all windows that can hold live data, newest first."""
+        current = self.window_start(now)
+        return [current - i * self.window_seconds for i in range(self.max_windows)]
+
+    @property
+    def count(self) -> float:
+        """Decayed number of samples."""
+        self._roll(None)
+        return self._aggregate.total
+
+    def quantile(self, q: float) -> float | None:
+        """Decayed latency at quantile q (0-1), or None when empty."""
+        self._roll(None)
+        return self._aggregate.quantile(q)
+
+    def mean(self) -> float | None:
+        """Decayed mean latency, or None when empty."""
+        self._roll(None)
+        return self._aggregate.mean()
+
+    def percentiles(self) -> dict[str, float | None]:
+        """P50, P90 and P99 latencies in seconds."""
+        self._roll(None)
+        return {
+            "p50": self._aggregate.quantile(0.5),
+            "p90": self._aggregate.quantile(0.9),
+            "p99": self._aggregate.quantile(0.99),
+        }
@@ -0,0 +1,235 @@
+"""
+Asynchronous AI moderation (content filter layer 2).
+
+AIContentModerator's classifier is a blocking model call. This service keeps
+it off the event loop and off the request path's critical section:
+
+- Classifier calls run on a dedicated thread pool, so a slow model cannot
+  starve other blocking work (or the loop itself).
+- Prompts submitted within batch_window of each other are micro-batched
+  into one classifier call of up to max_batch prompts. Setting max_batch to
+  1 sends every prompt on its own.
+- Verdicts are cached in Redis for every worker, keyed by a hash of the
+  prompt after Unicode/whitespace normalization and lowercasing, plus the
+  classifier model. Identical prompts waiting for the same batch share one
+  classification.
+- Every classifier call is bounded by timeout. When it times out or fails,
+  the verdict follows the configured policy: fail open (allow, the
+  historical behaviour) or fail closed (block). Such verdicts are never
+  cached.
+
+Without Redis the cache is bypassed and every unseen prompt is classified.
+"""
+
+import asyncio
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from core.config import get_settings
+from core.redis import get_redis
+
+from .ai_content_moderator import AIContentModerator, get_ai_moderator
+from .prompt_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "moderation:verdict"
+
+# Reason reported for prompts blocked because the classifier was unavailable
+UNAVAILABLE_REASON = "moderation_unavailable"
+
+
+@dataclass
+class ModerationVerdict:
+    """Outcome of an AI moderation check."""
+
+    safe: bool
+    reason: str  # "safe", an unsafe category, or why the classifier was skipped
+    cached: bool = False
+
+
+def verdict_key(prompt: str, model: str) -> str:
+    """Redis key of the cached verdict for a prompt."""
+    digest = hashlib.sha256(f"{model}\0{normalize_text(prompt).lower()}".encode()).hexdigest()
+    return f"{KEY_PREFIX}:{digest}"
+
+
+class ModerationService:
+    """Micro-batching, cached front end for the AI content moderator."""
+
+    def __init__(
+        self,
+        moderator: AIContentModerator,
+        timeout: float = 5.0,
+        fail_closed: bool = False,
+        batch_window: float = 0.02,
+        max_batch: int = 16,
+        workers: int = 4,
+        cache_ttl: int = 86400,
+    ):
+        """
+        Initialize moderation service.
+
+        Args:
+            moderator: Classifier to run
+            timeout: Seconds a classifier call may take
+            fail_closed: Block prompts (instead of allowing them) when it fails
+            batch_window: Seconds to wait for more prompts before classifying
+            max_batch: Most prompts sent in one classifier call
+            workers: Threads in the classifier executor
+            cache_ttl: Seconds a verdict stays cached
+        """
+        self.moderator = moderator
+        self.timeout = timeout
+        self.fail_closed = fail_closed
+        self.batch_window = batch_window
+        self.max_batch = max(1, max_batch)
+        self.cache_ttl = cache_ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="moderation")
+        # verdict key -> (prompt, future) for prompts waiting for the next batch
+        self._pending: dict[str, tuple[str, asyncio.Future]] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.moderator.enabled and self.moderator.model)
+
+    async def check(self, prompt: str) -> ModerationVerdict:
+        """
+        Classify a prompt.
+
+        Args:
+            prompt: The user's prompt text
+
+        Returns:
+            Verdict; cached=True when served from the shared cache
+        """
+        if not self.enabled:
+            return ModerationVerdict(safe=True, reason="ai_moderation_disabled")
+
+        key = verdict_key(prompt, self.moderator.MODEL_NAME)
+        cached = await self._get_cached(key)
+        if cached is not None:
+            return cached
+
+        pending = self._pending.get(key)
+        if pending is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = (prompt, future)
+            self._schedule_flush()
+        else:
+            future = pending[1]
+        # Shielded so one caller's cancellation doesn't fail the others
+        return await asyncio.shield(future)
+
+    # ============ Batching ============
+
+    def _schedule_flush(self) -> None:
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+
+    def _flush(self) -> None:
+        """Send everything pending as one batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._classify(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _classify(self, batch: dict[str, tuple[str, asyncio.Future]]) -> None:
+        prompts = [prompt for prompt, _ in batch.values()]
+        loop = asyncio.get_running_loop()
+        try:
+            results = await asyncio.wait_for(
+                loop.run_in_executor(self._executor, self.moderator.classify_batch, prompts),
+                timeout=self.timeout,
+            )
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                logger.warning(f"AI moderation of {len(batch)} prompts timed out")
+                reason = "ai_timeout"
+            else:
+                logger.error(f"AI moderation failed ({len(batch)} prompts): {e}")
+                reason = f"ai_error: {str(e)[:50]}"
+            verdict = (
+                ModerationVerdict(safe=False, reason=UNAVAILABLE_REASON)
+                if self.fail_closed
+                else ModerationVerdict(safe=True, reason=reason)
+            )
+            for _, future in batch.values():
+                if not future.done():
+                    future.set_result(verdict)
+            return
+
+        verdicts = {}
+        for (key, (_, future)), (safe, reason) in zip(batch.items(), results, strict=True):
+            verdicts[key] = ModerationVerdict(safe=safe, reason=reason)
+            if not future.done():
+                future.set_result(verdicts[key])
+        await self._store(verdicts)
+
+    # ============ Shared cache ============
+
+    async def _get_cached(self, key: str) -> ModerationVerdict | None:
+        try:
+            redis = await get_redis()
+            raw = await redis.get(key)
+        except Exception as e:
+            logger.debug(f"Moderation cache unavailable: {e}")
+            return None
+        if not raw:
+            return None
+        safe, _, reason = raw.partition(":")
+        return ModerationVerdict(safe=safe == "1", reason=reason, cached=True)
+
+    async def _store(self, verdicts: dict[str, ModerationVerdict]) -> None:
+        try:
+            redis = await get_redis()
+            pipe = redis.pipeline(transaction=False)
+            for key, verdict in verdicts.items():
+                pipe.set(key, f"{int(verdict.safe)}:{verdict.reason}", ex=self.cache_ttl)
+            await pipe.execute()
+        except Exception as e:
+            logger.debug(f"Failed to cache moderation verdicts: {e}")
+
+    def shutdown(self) -> None:
+        """Stop the classifier threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_moderation_service: ModerationService | None = None
+
+
+def get_moderation_service() -> ModerationService:
+    """Get the global moderation service."""
+    global _moderation_service
+    if _moderation_service is None:
+        settings = get_settings()
+        _moderation_service = ModerationService(
+            get_ai_moderator(),
+            timeout=settings.ai_moderation_timeout,
+            fail_closed=settings.ai_moderation_fail_closed,
+            batch_window=settings.ai_moderation_batch_window_ms / 1000,
+            max_batch=settings.ai_moderation_max_batch,
+            workers=settings.ai_moderation_workers,
+            cache_ttl=settings.ai_moderation_cache_ttl,
+        )
+    return _moderation_service
+
+
+def shutdown_moderation_service() -> None:
+    """Stop the moderation service's threads, if it was started."""
+    global _moderation_service
+    if _moderation_service is not None:
+        _moderation_service.shutdown()
+        _moderation_service = None
@@ -0,0 +1,248 @@
+"""
+Incremental content moderation statistics.
+
+Counters are folded into Redis as audit entries are written (see
+services.audit_sink), so reading a day's statistics never touches the
+audit segments. Each day (YYYY-MM-DD) and each hour (YYYY-MM-DDTHH, UTC)
+gets:
+
+- a counters hash: checks, allowed/blocked/flagged decisions, blocks per
+  layer, and per-layer timing histograms (count per TIMING_BUCKETS_MS upper
+  bound plus the sum of milliseconds)
+- a keywords sorted set: checks blocked per banned keyword
+- a categories sorted set: checks blocked per AI classification reason
+
+A batch of entries becomes one pipeline of HINCRBY/ZINCRBY commands. Reads
+are one HGETALL and two short ZRANGEs per period, independent of traffic.
+The same fold_entries()/summarize() pair builds summaries from segments when
+Redis holds nothing for a day, so both paths report the same shape.
+"""
+
+import logging
+import math
+from collections import Counter
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "moderation:stats"
+DAY_TTL = 90 * 86400
+HOUR_TTL = 8 * 86400
+
+# Upper bounds (ms) of the timing histogram buckets; slower checks land in "inf"
+TIMING_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+LAYERS = ("layer1", "layer2")
+
+# Keywords returned by top-keyword queries
+TOP_KEYWORDS = 10
+
+
+def counters_key(period: str) -> str:
+    """Redis hash of a period's counters."""
+    return f"{KEY_PREFIX}:{period}"
+
+
+def keywords_key(period: str) -> str:
+    """Redis sorted set of a period's blocked keywords."""
+    return f"{KEY_PREFIX}:{period}:keywords"
+
+
+def categories_key(period: str) -> str:
+    """Redis sorted set of a period's AI block categories."""
+    return f"{KEY_PREFIX}:{period}:categories"
+
+
+def timing_bucket(ms: float) -> str:
+    """Histogram bucket label of a duration in milliseconds."""
+    for bound in TIMING_BUCKETS_MS:
+        if ms <= bound:
+            return str(bound)
+    return "inf"
+
+
+def entry_time(entry: dict[str, Any]) -> datetime:
+    """UTC time of an audit entry (now if it has no readable timestamp)."""
+    try:
+        ts = datetime.fromisoformat(entry["timestamp"])
+        return ts.astimezone(UTC) if ts.tzinfo else ts.replace(tzinfo=UTC)
+    except (KeyError, TypeError, ValueError):
+        return datetime.now(UTC)
+
+
+def new_rollup() -> dict[str, Counter]:
+    """Empty counters for one period."""
+    return {"counters": Counter(), "keywords": Counter(), "categories": Counter()}
+
+
+def add_entry(rollup: dict[str, Counter], entry: dict[str, Any]) -> None:
+    """Count one audit entry into a period's rollup."""
+    counters = rollup["counters"]
+    decision = entry.get("final_decision") or {}
+
+    counters["checks"] += 1
+    counters["allowed" if decision.get("allowed", True) else "blocked"] += 1
+    if (entry.get("analysis_flags") or {}).get("needs_review"):
+        counters["flagged"] += 1
+
+    blocked_by = decision.get("blocked_by")
+    reason = decision.get("blocked_reason") or ""
+    if blocked_by == "keyword":
+        counters["blocked:layer1"] += 1
+        if reason.startswith("keyword:"):
+            rollup["keywords"][reason.split(":", 1)[1]] += 1
+    elif blocked_by == "ai":
+        counters["blocked:layer2"] += 1
+        if reason.startswith("ai:"):
+            rollup["categories"][reason.split(":", 1)[1]] += 1
+
+    for layer, field in (("layer1", "layer1_keyword"), ("layer2", "layer2_ai")):
+        result = entry.get(field) or {}
+        if not result.get("checked"):
+            continue
+        ms = float(result.get("execution_time_ms") or 0)
+        counters[f"{layer}:count"] += 1
+        counters[f"{layer}:sum_ms"] += ms
+        counters[f"{layer}:le:{timing_bucket(ms)}"] += 1
+
+
+def fold_entries(entries: Iterable[dict[str, Any]]) -> dict[str, dict[str, Counter]]:
+    """
+    Roll entries up per day and per hour.
+
+    Returns:
+        Rollups keyed by period ("YYYY-MM-DD" or "YYYY-MM-DDTHH")
+    """
+    rollups: dict[str, dict[str, Counter]] = {}
+    for entry in entries:
+        ts = entry_time(entry)
+        for period in (ts.strftime("%Y-%m-%d"), ts.strftime("%Y-%m-%dT%H")):
+            add_entry(rollups.setdefault(period, new_rollup()), entry)
+    return rollups
+
+
+async def record_entries(redis, entries: list[dict[str, Any]]) -> None:
+    """Add a batch of audit entries to the Redis counters in one round trip."""
+    pipe = redis.pipeline(transaction=False)
+    for period, rollup in fold_entries(entries).items():
+        ttl = HOUR_TTL if "T" in period else DAY_TTL
+        for field, value in rollup["counters"].items():
+            if isinstance(value, float):
+                pipe.hincrbyfloat(counters_key(period), field, value)
+            else:
+                pipe.hincrby(counters_key(period), field, value)
+        pipe.expire(counters_key(period), ttl)
+        for key, counts in (
+            (keywords_key(period), rollup["keywords"]),
+            (categories_key(period), rollup["categories"]),
+        ):
+            if counts:
+                for member, count in counts.items():
+                    pipe.zincrby(key, count, member)
+                pipe.expire(key, ttl)
+    await pipe.execute()
+
+
+async def read_rollups(redis, periods: list[str]) -> list[dict[str, Counter] | None]:
+    """
+    Read the counters of several periods in one round trip.
+
+    Returns:
+        One rollup per period (None where nothing was recorded)
+    """
+    pipe = redis.pipeline(transaction=False)
+    for period in periods:
+        pipe.hgetall(counters_key(period))
+        pipe.zrevrange(keywords_key(period), 0, TOP_KEYWORDS - 1, withscores=True)
+        pipe.zrevrange(categories_key(period), 0, -1, withscores=True)
+    replies = await pipe.execute()
+
+    rollups: list[dict[str, Counter] | None] = []
+    for i in range(len(periods)):
+        raw, keywords, categories = replies[3 * i : 3 * i + 3]
+        if not raw:
+            rollups.append(None)
+            continue
+        rollup = new_rollup()
+        for field, value in raw.items():
+            number = float(value)
+            rollup["counters"][field] = number if field.endswith("sum_ms") else int(number)
+        rollup["keywords"].update({k: int(v) for k, v in keywords})
+        rollup["categories"].update({k: int(v) for k, v in categories})
+        rollups.append(rollup)
+    return rollups
+
+
+def timing_percentile(counters: Counter, layer: str, q: float) -> float | None:
+    """Upper bound (ms) of the bucket holding quantile q of a layer's timings."""
+    total = counters.get(f"{layer}:count", 0)
+    if not total:
+        return None
+    rank = math.ceil(q * total)
+    seen = 0
+    for bound in TIMING_BUCKETS_MS:
+        seen += counters.get(f"{layer}:le:{bound}", 0)
+        if seen >= rank:
+            return float(bound)
+    return math.inf
+
+
+def summarize(period: str, rollup: dict[str, Counter] | None) -> dict[str, Any]:
+    """
+    Summary of a period in the shape of AuditLogger.generate_daily_summary.
+
+    Average layer times are taken over all checks, matching the old scan.
+    """
+    rollup = rollup or new_rollup()
+    counters = rollup["counters"]
+    total = counters.get("checks", 0)
+    blocked = counters.get("blocked", 0)
+    flagged = counters.get("flagged", 0)
+    layer1_ms = counters.get("layer1:sum_ms", 0.0)
+    layer2_ms = counters.get("layer2:sum_ms", 0.0)
+
+    def ratio(value: float) -> float:
+        return round(value / total, 2) if total else 0
+
+    timings: dict[str, Any] = {}
+    for layer in LAYERS:
+        buckets = {
+            str(bound): counters.get(f"{layer}:le:{bound}", 0) for bound in TIMING_BUCKETS_MS
+        }
+        buckets["inf"] = counters.get(f"{layer}:le:inf", 0)
+        p50, p95 = (timing_percentile(counters, layer, q) for q in (0.5, 0.95))
+        timings[layer] = {
+            "count": counters.get(f"{layer}:count", 0),
+            "buckets_ms": buckets,
+            # Quantiles past the last bucket have no finite bound to report
+            "p50_ms": None if p50 == math.inf else p50,
+            "p95_ms": None if p95 == math.inf else p95,
+        }
+
+    return {
+        "date": period,
+        "total_checks": total,
+        "blocked": blocked,
+        "allowed": counters.get("allowed", 0),
+        "flagged": flagged,
+        "block_breakdown": {
+            "layer1_keyword": counters.get("blocked:layer1", 0),
+            "layer2_ai": counters.get("blocked:layer2", 0),
+        },
+        "top_blocked_keywords": [
+            {"keyword": k, "count": v} for k, v in rollup["keywords"].most_common(TOP_KEYWORDS)
+        ],
+        "ai_classifications": dict(rollup["categories"]),
+        "average_times_ms": {
+            "layer1": ratio(layer1_ms),
+            "layer2": ratio(layer2_ms),
+            "total": ratio(layer1_ms + layer2_ms),
+        },
+        "timings": timings,
+        "accuracy_metrics": {
+            "block_rate": ratio(blocked * 100),
+            "flag_rate": ratio(flagged * 100),
+        },
+    }
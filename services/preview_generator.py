@@ -11,7 +11,6 @@ Used by both `scripts/seed_templates.py` and `api/workers.py` (ARQ worker).
 import asyncio
 import logging
 import re
-from io import BytesIO
 
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -20,6 +19,7 @@ from database.models.template import PromptTemplate
 from services.providers.base import GenerationRequest
 from services.providers.google import GoogleProvider
 from services.storage import get_storage_manager
+from utils.image_types import IMAGE_EXTENSIONS
 
 logger = logging.getLogger(__name__)
 
@@ -124,7 +124,7 @@ class PreviewGenerator:
         for i, tpl in enumerate(templates):
             slug = _slugify(tpl.display_name_en)
             category = tpl.category
-            key = f"templates/preview/{category}/{slug}.png"
+            key_stem = f"templates/preview/{category}/{slug}"
 
             logger.info("[%d/%d] Generating: %s/%s ...", i + 1, total, category, slug)
 
@@ -136,7 +136,7 @@ class PreviewGenerator:
                 safety_level="moderate",
             )
 
-            generated = await self._generate_single(session, tpl, request, key, storage)
+            generated = await self._generate_single(session, tpl, request, key_stem, storage)
 
             if generated:
                 success += 1
@@ -159,24 +159,27 @@ class PreviewGenerator:
         session: AsyncSession,
         tpl: PromptTemplate,
         request: GenerationRequest,
-        key: str,
+        key_stem: str,
         storage,
     ) -> bool:
         """Generate a single preview image with retry logic.
 
+        The storage key is key_stem plus an extension matching the format of
+        the bytes the provider returned.
+
         Returns True on success, False on failure.
         """
         for attempt in range(MAX_RETRIES + 1):
             try:
                 gen_result = await self._provider.generate(request)
 
-                if gen_result.success and gen_result.image is not None:
-                    buf = BytesIO()
-                    gen_result.image.save(buf, format="PNG")
-                    await storage.provider.save(
-                        key=key,
-                        data=buf.getvalue(),
-                        content_type="image/png",
+                if gen_result.success and gen_result.has_image:
+                    ext = IMAGE_EXTENSIONS.get(gen_result.image_mime_type or "image/png", "png")
+                    key = f"{key_stem}.{ext}"
+                    await storage.provider.save_image(
+                        key,
+                        gen_result.image_data or gen_result.image,
+                        content_type=gen_result.image_mime_type,
                     )
                     public_url = storage.provider.get_public_url(key)
 
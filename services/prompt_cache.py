@@ -0,0 +1,205 @@
+"""
+Two-tier cache for prompt pipeline LLM and PromptHub output.
+
+Translations, enhancements, negative prompts and rendered PromptHub meta
+prompts are pure functions of their input text and meta prompt, and the same
+strings (template variants, popular prompts) recur constantly. Each result is
+cached in a per-process LRU and in Redis, keyed by:
+
+- the step ("translate", "enhance", "negative", "render:<slug>"),
+- a hash of the meta prompt (or render variables) used for the step, so a
+  changed PromptHub template yields new keys, and
+- a hash of the input text after Unicode/whitespace normalization.
+
+All keys also carry a cache generation stored in Redis. invalidate() bumps it,
+which retires every entry on every node at once; other nodes notice the new
+generation within GENERATION_REFRESH_INTERVAL. Entries expire after
+prompthub_cache_ttl either way.
+
+Without Redis the in-process tier keeps working on its own.
+"""
+
+import hashlib
+import logging
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from core.config import get_settings
+from core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "promptcache"
+GENERATION_KEY = f"{KEY_PREFIX}:generation"
+
+# Seconds between re-reads of the shared cache generation
+GENERATION_REFRESH_INTERVAL = 5.0
+
+
+def normalize_text(text: str) -> str:
+    """Normalize prompt text so trivially different inputs share a key."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class PromptCache:
+    """In-process LRU in front of a Redis cache for prompt processing results."""
+
+    def __init__(self, enabled: bool = True, ttl: int = 3600, local_size: int = 1024):
+        """
+        Initialize cache.
+
+        Args:
+            enabled: Whether to cache at all
+            ttl: Seconds an entry lives in either tier
+            local_size: Entries kept in the in-process LRU
+        """
+        self.enabled = enabled
+        self.ttl = ttl
+        self.local_size = local_size
+        self._local: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._generation = 0
+        self._generation_checked = 0.0
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def _key(self, step: str, text: str, context: str) -> str:
+        digest = hashlib.sha256(
+            f"{context}\0{normalize_text(text)}".encode(),
+        ).hexdigest()
+        return f"{KEY_PREFIX}:{self._generation}:{step}:{digest}"
+
+    def _count(self, step: str, outcome: str) -> None:
+        kind = step.split(":", 1)[0]
+        stats = self._stats.setdefault(kind, {"local_hits": 0, "redis_hits": 0, "misses": 0})
+        stats[outcome] += 1
+
+    async def _refresh_generation(self, redis) -> None:
+        if time.monotonic() - self._generation_checked < GENERATION_REFRESH_INTERVAL:
+            return
+        self._generation_checked = time.monotonic()
+        generation = int(await redis.get(GENERATION_KEY) or 0)
+        if generation != self._generation:
+            self._generation = generation
+            self._local.clear()
+
+    def _get_local(self, key: str) -> str | None:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: str) -> None:
+        self._local[key] = (time.monotonic() + self.ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    async def get_or_compute(
+        self,
+        step: str,
+        text: str,
+        compute: Callable[[], Awaitable[str | None]],
+        context: str = "",
+    ) -> str | None:
+        """
+        Return the cached result for a step, computing and storing it on a miss.
+
+        Args:
+            step: Pipeline step name, e.g. "translate" or "render:<slug>"
+            text: Input text the result is derived from
+            compute: Zero-argument coroutine factory producing the result
+            context: Meta prompt or other input that changes the result
+
+        Returns:
+            Cached or computed result; None results are not cached
+        """
+        if not self.enabled:
+            return await compute()
+
+        try:
+            redis = await get_redis()
+            await self._refresh_generation(redis)
+        except Exception:
+            redis = None
+
+        key = self._key(step, text, context)
+        value = self._get_local(key)
+        if value is not None:
+            self._count(step, "local_hits")
+            return value
+
+        if redis is not None:
+            try:
+                value = await redis.get(key)
+            except Exception as e:
+                logger.debug(f"Prompt cache read failed: {e}")
+            if value is not None:
+                self._count(step, "redis_hits")
+                self._set_local(key, value)
+                return value
+
+        self._count(step, "misses")
+        value = await compute()
+        if value is None:
+            return None
+
+        self._set_local(key, value)
+        if redis is not None:
+            try:
+                await redis.set(key, value, ex=self.ttl)
+            except Exception as e:
+                logger.debug(f"Prompt cache write failed: {e}")
+        return value
+
+    async def invalidate(self) -> int:
+        """
+        Retire all cached entries on every node (e.g. after PromptHub templates change).
+
+        Returns:
+            The new cache generation
+        """
+        self._local.clear()
+        try:
+            redis = await get_redis()
+            self._generation = int(await redis.incr(GENERATION_KEY))
+            self._generation_checked = time.monotonic()
+        except Exception as e:
+            logger.warning(f"Failed to invalidate shared prompt cache: {e}")
+            self._generation += 1
+        logger.info(f"Prompt cache invalidated (generation {self._generation})")
+        return self._generation
+
+    def get_stats(self) -> dict[str, Any]:
+        """Hit/miss counters per step for this process."""
+        steps = {kind: dict(stats) for kind, stats in self._stats.items()}
+        hits = sum(s["local_hits"] + s["redis_hits"] for s in steps.values())
+        lookups = hits + sum(s["misses"] for s in steps.values())
+        return {
+            "generation": self._generation,
+            "local_entries": len(self._local),
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "steps": steps,
+        }
+
+
+_prompt_cache: PromptCache | None = None
+
+
+def get_prompt_cache() -> PromptCache:
+    """Get the global prompt cache."""
+    global _prompt_cache
+    if _prompt_cache is None:
+        settings = get_settings()
+        _prompt_cache = PromptCache(
+            enabled=settings.prompt_cache_enabled,
+            ttl=settings.prompthub_cache_ttl,
+            local_size=settings.prompt_cache_local_size,
+        )
+    return _prompt_cache
@@ -3,22 +3,28 @@ Prompt processing pipeline with PromptHub integration.
 
 Provides auto-translation (Chinese -> English), AI enhancement,
 and negative prompt generation using PromptHub meta prompts and
-an OpenRouter LLM backend.
+an OpenRouter LLM backend. Rendered meta prompts and LLM outputs are
+cached through services.prompt_cache.
 """
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
 import re
 import time
-from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from collections.abc import Coroutine
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
 from uuid import UUID
 
 import httpx
 
 from core.config import get_settings
 
+from .prompt_cache import PromptCache, get_prompt_cache
+
 if TYPE_CHECKING:
     from database.repositories.template_repo import TemplateRepository
 
@@ -48,18 +54,24 @@ class ProcessedPrompt:
     was_translated: bool = False
     was_enhanced: bool = False
     template_name: str | None = None
+    step_timings: dict[str, float] = field(default_factory=dict)  # seconds per step
+
+
+async def _skip() -> None:
+    """Placeholder for a disabled pipeline step."""
+    return None
 
 
 class PromptPipeline:
     """
     Multi-step prompt processing pipeline.
 
-    Steps (all optional, executed in order):
+    Steps (all optional):
     1. Template rendering — apply a local DB template
     2. Language detection — simple regex-based Chinese detection
     3. Translation — Chinese -> English via PromptHub meta prompt + LLM
     4. Enhancement — optimize prompt for image generation
-    5. Negative prompt — generate a negative prompt
+    5. Negative prompt — generate a negative prompt (concurrently with 4)
     """
 
     # Mapping: pipeline step -> PromptHub prompt slug
@@ -71,10 +83,44 @@ class PromptPipeline:
         "negative_zh": "negative-generate-zh",
     }
 
-    def __init__(self):
+    def __init__(self, cache: PromptCache | None = None):
+        """
+        Initialize pipeline.
+
+        Args:
+            cache: Cache for rendered meta prompts and LLM outputs (none if omitted)
+        """
         self._http_client: httpx.AsyncClient | None = None
         # slug -> prompt ID cache (populated on first list call)
         self._slug_to_id: dict[str, str] = {}
+        self._slug_lock = asyncio.Lock()
+        self._cache = cache or PromptCache(enabled=False)
+
+    async def invalidate_cache(self) -> int:
+        """
+        Drop cached PromptHub lookups and prompt results after templates change.
+
+        Returns:
+            The new prompt cache generation
+        """
+        self._slug_to_id = {}
+        return await self._cache.invalidate()
+
+    async def _generate_cached(
+        self, step: str, text: str, meta: str, temperature: float
+    ) -> str | None:
+        """Run an LLM step through the prompt cache, keyed by model and meta prompt."""
+        from services.llm_client import get_llm_client
+
+        model = get_settings().openrouter_model
+
+        async def generate() -> str | None:
+            llm = get_llm_client()
+            return await llm.generate(prompt=text, system_message=meta, temperature=temperature)
+
+        return await self._cache.get_or_compute(
+            step, text, generate, context=f"{model}\0{temperature}\0{meta}"
+        )
 
     async def _get_http_client(self) -> httpx.AsyncClient:
         """Lazy-init an httpx client for the self-hosted PromptHub API."""
@@ -96,22 +142,37 @@ class PromptPipeline:
         """Fetch project prompts once and cache slug -> ID mapping."""
         if self._slug_to_id:
             return
-        settings = get_settings()
-        client = await self._get_http_client()
-        resp = await client.get(
-            f"/api/v1/projects/{settings.prompthub_project_id}/prompts",
-            params={"page_size": 50},
-        )
-        resp.raise_for_status()
-        for p in resp.json().get("data", []):
-            self._slug_to_id[p["slug"]] = p["id"]
+        # Concurrent steps render at the same time; only one fetches the map
+        async with self._slug_lock:
+            if self._slug_to_id:
+                return
+            settings = get_settings()
+            client = await self._get_http_client()
+            resp = await client.get(
+                f"/api/v1/projects/{settings.prompthub_project_id}/prompts",
+                params={"page_size": 50},
+            )
+            resp.raise_for_status()
+            self._slug_to_id = {p["slug"]: p["id"] for p in resp.json().get("data", [])}
 
     async def _render_prompt(
         self,
         slug: str,
         variables: dict[str, str],
     ) -> str | None:
-        """Render a PromptHub prompt by slug with variables."""
+        """Render a PromptHub prompt by slug with variables (cached)."""
+        return await self._cache.get_or_compute(
+            f"render:{slug}",
+            json.dumps(variables, sort_keys=True, ensure_ascii=False),
+            lambda: self._fetch_rendered_prompt(slug, variables),
+        )
+
+    async def _fetch_rendered_prompt(
+        self,
+        slug: str,
+        variables: dict[str, str],
+    ) -> str | None:
+        """Render a PromptHub prompt by slug with variables via the API."""
         try:
             await self._ensure_slug_map()
             prompt_id = self._slug_to_id.get(slug)
@@ -145,7 +206,10 @@ class PromptPipeline:
           pre-optimized prompt_text directly, skipping translation/enhancement.
         - Path B (manual): Run full pipeline (detect → translate → enhance).
 
-        Both paths share negative prompt generation at the end.
+        Both paths share negative prompt generation at the end. Steps form a
+        small DAG: translation runs first, then enhancement and negative
+        prompt generation run concurrently from the translated text. Each
+        step's duration is recorded in ProcessedPrompt.step_timings.
 
         Args:
             prompt: Raw user prompt
@@ -191,46 +255,56 @@ class PromptPipeline:
             else:
                 result.language_detected = "en"
 
-            # Auto-translation (Chinese -> English)
+            # Auto-translation (Chinese -> English); every later step depends on it
             if result.language_detected == "zh" and settings.prompt_auto_translate:
-                try:
-                    translated = await self._translate(current)
-                    if translated:
-                        result.translated = translated
-                        result.was_translated = True
-                        current = translated
-                        result.final = current
-                except Exception as e:
-                    logger.warning(f"Translation failed, using original: {e}")
-
-            # Enhancement
-            if enhance:
-                try:
-                    enhanced = await self._enhance(current)
-                    if enhanced:
-                        result.enhanced = enhanced
-                        result.was_enhanced = True
-                        current = enhanced
-                        result.final = current
-                except Exception as e:
-                    logger.warning(f"Enhancement failed, using previous: {e}")
-
-        # === Shared: Negative prompt generation ===
-        if generate_negative:
-            try:
-                negative = await self._generate_negative(current)
-                if negative:
-                    result.negative_prompt = negative
-            except Exception as e:
-                logger.warning(f"Negative prompt generation failed: {e}")
+                translated = await self._run_step(
+                    "translate", self._translate(current), result.step_timings
+                )
+                if translated:
+                    result.translated = translated
+                    result.was_translated = True
+                    current = translated
+                    result.final = current
+
+        # === Enhancement and negative prompt, concurrently from the same text ===
+        enhance_step = (
+            self._run_step("enhance", self._enhance(current), result.step_timings)
+            if enhance and not result.template_used
+            else _skip()
+        )
+        negative_step = (
+            self._run_step("negative", self._generate_negative(current), result.step_timings)
+            if generate_negative
+            else _skip()
+        )
+        enhanced, negative = await asyncio.gather(enhance_step, negative_step)
+
+        if enhanced:
+            result.enhanced = enhanced
+            result.was_enhanced = True
+            result.final = enhanced
+        if negative:
+            result.negative_prompt = negative
 
         result.pipeline_duration = time.time() - start
         return result
 
+    @staticmethod
+    async def _run_step(
+        name: str, step: Coroutine[Any, Any, str | None], timings: dict[str, float]
+    ) -> str | None:
+        """Run one pipeline step, recording its duration; failures yield None."""
+        start = time.time()
+        try:
+            return await step
+        except Exception as e:
+            logger.warning(f"Prompt pipeline step '{name}' failed, skipping: {e}")
+            return None
+        finally:
+            timings[name] = time.time() - start
+
     async def _translate(self, text: str) -> str | None:
         """Translate Chinese prompt to English via PromptHub meta prompt + LLM."""
-        from services.llm_client import get_llm_client
-
         meta = await self._render_prompt(
             self._PROMPT_SLUGS["translate_zh"],
             {"chinese_prompt": text, "target_model": "flux", "optimize_for": "quality"},
@@ -242,13 +316,10 @@ class PromptPipeline:
                 "Output ONLY the English translation, nothing else."
             )
 
-        llm = get_llm_client()
-        return await llm.generate(prompt=text, system_message=meta, temperature=0.3)
+        return await self._generate_cached("translate", text, meta, temperature=0.3)
 
     async def _enhance(self, text: str) -> str | None:
         """Enhance prompt for image generation via PromptHub meta prompt + LLM."""
-        from services.llm_client import get_llm_client
-
         slug = self._PROMPT_SLUGS["enhance_zh" if contains_chinese(text) else "enhance_en"]
         meta = await self._render_prompt(
             slug,
@@ -261,13 +332,10 @@ class PromptPipeline:
                 "for image generation. Output ONLY the improved prompt, nothing else."
             )
 
-        llm = get_llm_client()
-        return await llm.generate(prompt=text, system_message=meta, temperature=0.7)
+        return await self._generate_cached("enhance", text, meta, temperature=0.7)
 
     async def _generate_negative(self, text: str) -> str | None:
         """Generate a negative prompt via PromptHub meta prompt + LLM."""
-        from services.llm_client import get_llm_client
-
         slug = self._PROMPT_SLUGS["negative_zh" if contains_chinese(text) else "negative_en"]
         meta = await self._render_prompt(
             slug,
@@ -280,8 +348,7 @@ class PromptPipeline:
                 "NOT appear in the image. Output ONLY the negative prompt, nothing else."
             )
 
-        llm = get_llm_client()
-        return await llm.generate(prompt=text, system_message=meta, temperature=0.5)
+        return await self._generate_cached("negative", text, meta, temperature=0.5)
 
 
 # Singleton
@@ -292,5 +359,5 @@ def get_prompt_pipeline() -> PromptPipeline:
     """Get or create the singleton PromptPipeline."""
     global _pipeline
     if _pipeline is None:
-        _pipeline = PromptPipeline()
+        _pipeline = PromptPipeline(cache=get_prompt_cache())
     return _pipeline
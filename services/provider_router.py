@@ -14,6 +14,8 @@ from typing import Any
 
 from core.config import get_settings
 
+from .latency_histogram import DecayingLatencyHistogram
+from .provider_state import get_provider_state
 from .providers.base import (
     CircuitBreakerManager,
     CostTracker,
@@ -21,13 +23,19 @@ from .providers.base import (
     GenerationResult,
     MediaType,
     ProviderConfig,
+    ProviderModel,
     ProviderRegion,
     is_retryable_error,
 )
 from .providers.registry import ProviderRegistry, get_provider_registry
+from .rate_limiter import get_rate_limiter
+from .request_coalescer import get_request_coalescer
 
 logger = logging.getLogger(__name__)
 
+# Seconds a speculative provider warm-up may take
+WARM_UP_TIMEOUT = 5.0
+
 
 class RoutingStrategy(StrEnum):
     """Strategy for selecting providers."""
@@ -71,14 +79,22 @@ class AdaptiveRoutingStrategy:
     ML-inspired routing based on historical performance.
 
     Tracks success rates, latencies, and costs to score providers
-    and select the best one dynamically.
+    and select the best one dynamically. Latencies are kept in time-decayed
+    histograms per provider and per provider model ("provider/model").
     """
 
     def __init__(self):
         self.success_rates: dict[str, float] = {}
-        self.latencies: dict[str, list[float]] = {}
+        self.latencies: dict[str, DecayingLatencyHistogram] = {}
+        self.model_latencies: dict[str, DecayingLatencyHistogram] = {}
         self.costs: dict[str, float] = {}
         self._alpha = 0.1  # Exponential moving average factor
+        self._shared = None
+
+    def use_shared_state(self, shared) -> None:
+        """Mirror statistics through a shared state backend (see services.provider_state)."""
+        self._shared = shared
+        shared.attach_adaptive(self)
 
     def update(
         self,
@@ -86,25 +102,55 @@ class AdaptiveRoutingStrategy:
         success: bool,
         latency: float,
         cost: float,
+        model: str | None = None,
     ) -> None:
-        """Update metrics for a provider after a request."""
+        """Update metrics for a provider (and optionally model) after a request."""
         # Update success rate (exponential moving average)
         old_rate = self.success_rates.get(provider, 1.0)
         self.success_rates[provider] = (
             self._alpha * (1.0 if success else 0.0) + (1 - self._alpha) * old_rate
         )
 
-        # Update latency history
-        if provider not in self.latencies:
-            self.latencies[provider] = []
-        self.latencies[provider].append(latency)
-        # Keep only last 100 latencies
-        if len(self.latencies[provider]) > 100:
-            self.latencies[provider] = self.latencies[provider][-100:]
+        # Update latency histograms
+        self.latencies.setdefault(provider, DecayingLatencyHistogram()).add(latency)
+        if model:
+            model_key = f"{provider}/{model}"
+            self.model_latencies.setdefault(model_key, DecayingLatencyHistogram()).add(latency)
 
         # Update cost
         self.costs[provider] = cost
 
+        if self._shared:
+            self._shared.publish_stats(provider, success, latency, cost, self._alpha, model)
+
+    def latency_quantile(
+        self,
+        provider: str,
+        q: float,
+        model: str | None = None,
+        min_samples: float = 0,
+    ) -> float | None:
+        """
+        Decayed latency quantile for a provider or provider model.
+
+        Args:
+            provider: Provider name
+            q: Quantile between 0 and 1
+            model: Optional model ID for a per-model quantile
+            min_samples: Return None if fewer (decayed) samples were recorded
+
+        Returns:
+            Latency in seconds, or None without enough data
+        """
+        hist = (
+            self.model_latencies.get(f"{provider}/{model}")
+            if model
+            else self.latencies.get(provider)
+        )
+        if hist is None or hist.count < max(min_samples, 1e-9):
+            return None
+        return hist.quantile(q)
+
     def score(
         self,
         provider: str,
@@ -126,8 +172,8 @@ class AdaptiveRoutingStrategy:
         success_score = self.success_rates.get(provider, 0.8)
 
         # Speed score (0-1, normalized)
-        latencies = self.latencies.get(provider, [10.0])
-        avg_latency = sum(latencies) / len(latencies)
+        hist = self.latencies.get(provider)
+        avg_latency = (hist.mean() if hist else None) or 10.0
         speed_score = 1.0 / (1.0 + avg_latency / 10.0)  # Normalize around 10s
 
         # Cost score (0-1, normalized)
@@ -157,10 +203,21 @@ class AdaptiveRoutingStrategy:
         """Get current routing statistics."""
         return {
             "success_rates": dict(self.success_rates),
-            "avg_latencies": {p: sum(l) / len(l) if l else 0 for p, l in self.latencies.items()},
+            "avg_latencies": {p: h.mean() or 0 for p, h in self.latencies.items()},
+            "latency_percentiles": {p: h.percentiles() for p, h in self.latencies.items()},
+            "model_latency_percentiles": {
+                m: h.percentiles() for m, h in self.model_latencies.items()
+            },
             "last_costs": dict(self.costs),
         }
 
+    def get_latency_percentiles(self, provider: str) -> dict[str, float | None]:
+        """Mean and P50/P90/P99 latency in seconds for a provider (None without data)."""
+        hist = self.latencies.get(provider)
+        if hist is None:
+            return {"mean": None, "p50": None, "p90": None, "p99": None}
+        return {"mean": hist.mean(), **hist.percentiles()}
+
 
 class ProviderRouter:
     """
@@ -173,6 +230,7 @@ class ProviderRouter:
     - Health checking with caching
     - Cost tracking
     - Adaptive routing based on historical performance
+    - Per-model rate limits (token buckets) checked before dispatch
     """
 
     # Health cache TTL in seconds
@@ -193,6 +251,14 @@ class ProviderRouter:
         # New components
         self._adaptive = AdaptiveRoutingStrategy()
         self._cost_tracker = CostTracker()
+        self._rate_limiter = get_rate_limiter()
+        self._coalescer = get_request_coalescer()
+
+        # Share breaker and adaptive state with the other processes
+        if self._settings.provider_state_shared:
+            shared = get_provider_state()
+            CircuitBreakerManager.use_shared_state(shared)
+            self._adaptive.use_shared_state(shared)
 
     def initialize(self) -> None:
         """Initialize the router and register providers."""
@@ -380,14 +446,17 @@ class ProviderRouter:
                     if request.preferred_model and hasattr(provider, "get_model_by_id")
                     else provider.get_default_model()
                 )
-                return RoutingDecision(
-                    provider_name=provider.name,
-                    model_id=model.id if model else "",
-                    estimated_cost=model.pricing_per_unit if model else 0,
-                    estimated_latency=model.latency_estimate if model else 10,
-                    fallback_providers=self._get_fallback_list(provider.name, media_type),
-                    strategy_used="user_specified",
-                )
+                # Queue briefly for the requested model, then route around it
+                if await self.admit(model, wait=self._settings.rate_limit_max_wait):
+                    return RoutingDecision(
+                        provider_name=provider.name,
+                        model_id=model.id if model else "",
+                        estimated_cost=model.pricing_per_unit if model else 0,
+                        estimated_latency=model.latency_estimate if model else 10,
+                        fallback_providers=self._get_fallback_list(provider.name, media_type),
+                        strategy_used="user_specified",
+                    )
+                logger.warning(f"Requested provider {provider.name} is rate limited, rerouting")
 
         # Get available providers
         if media_type == MediaType.IMAGE:
@@ -418,26 +487,31 @@ class ProviderRouter:
                 available_providers = region_providers
             # If no providers in preferred region, continue with all
 
-        # Select based on strategy
-        if strategy_enum == RoutingStrategy.COST:
-            selected = self._select_by_cost(available_providers, request)
-        elif strategy_enum == RoutingStrategy.QUALITY:
-            selected = self._select_by_quality(available_providers, request)
-        elif strategy_enum == RoutingStrategy.SPEED:
-            selected = self._select_by_speed(available_providers, request)
-        elif strategy_enum == RoutingStrategy.ROUND_ROBIN:
-            selected = self._select_round_robin(available_providers)
-        elif strategy_enum == RoutingStrategy.ADAPTIVE:
-            selected = self._select_adaptive(available_providers, request)
-        elif strategy_enum == RoutingStrategy.REGION:
-            selected = self._select_by_region(available_providers, request, prefer_region)
-        else:  # PRIORITY
-            selected = self._select_by_priority(available_providers)
-
-        if not selected:
-            raise ValueError("Failed to select a provider")
-
-        provider, model = selected
+        # A requested provider reaching this point is unavailable or saturated
+        if request.preferred_provider:
+            available_providers = [
+                p for p in available_providers if p.name != request.preferred_provider
+            ] or available_providers
+
+        # Select based on strategy, skipping providers whose model is rate limited
+        first_choice = None
+        while True:
+            selected = self._select(strategy_enum, available_providers, request, prefer_region)
+            if not selected:
+                raise ValueError("Failed to select a provider")
+
+            provider, model = selected
+            if await self.admit(model):
+                break
+
+            first_choice = first_choice or selected
+            available_providers = [p for p in available_providers if p is not provider]
+            if not available_providers:
+                # Every candidate is saturated: queue on the best one
+                provider, model = first_choice
+                if not await self.admit(model, wait=self._settings.rate_limit_max_wait):
+                    raise ValueError(f"All providers for {media_type.value} are rate limited")
+                break
 
         # Determine provider region
         provider_region = None
@@ -454,6 +528,80 @@ class ProviderRouter:
             region=provider_region,
         )
 
+    def _select(
+        self,
+        strategy: RoutingStrategy,
+        providers: list,
+        request: GenerationRequest,
+        prefer_region: ProviderRegion | None,
+    ) -> tuple | None:
+        """Select a provider and model from candidates using a strategy."""
+        if strategy == RoutingStrategy.COST:
+            return self._select_by_cost(providers, request)
+        if strategy == RoutingStrategy.QUALITY:
+            return self._select_by_quality(providers, request)
+        if strategy == RoutingStrategy.SPEED:
+            return self._select_by_speed(providers, request)
+        if strategy == RoutingStrategy.ROUND_ROBIN:
+            return self._select_round_robin(providers)
+        if strategy == RoutingStrategy.ADAPTIVE:
+            return self._select_adaptive(providers, request)
+        if strategy == RoutingStrategy.REGION:
+            return self._select_by_region(providers, request, prefer_region)
+        return self._select_by_priority(providers)
+
+    async def admit(self, model: ProviderModel | None, wait: float = 0) -> bool:
+        """
+        Take a rate-limit token before dispatching to a model.
+
+        Args:
+            model: Model about to receive a request (None is always admitted)
+            wait: Seconds to queue for a token if the model is saturated
+
+        Returns:
+            True if the request may be dispatched
+        """
+        if model is None:
+            return True
+        if wait > 0:
+            return await self._rate_limiter.wait(model, wait)
+        return (await self._rate_limiter.acquire(model)).allowed
+
+    async def refund(
+        self, provider_name: str, model_id: str, media_type: MediaType = MediaType.IMAGE
+    ) -> None:
+        """
+        Give back the rate-limit token route() took when no provider call follows.
+
+        Args:
+            provider_name: Provider the request was routed to
+            model_id: Model the request was routed to
+            media_type: Type of media the request was routed for
+        """
+        provider = self._get_provider(provider_name, media_type)
+        if not provider:
+            return
+        model = next((m for m in provider.models if m.id == model_id), None)
+        if model:
+            await self._rate_limiter.release(model)
+
+    async def get_rate_limit_levels(self, provider_name: str) -> list[dict[str, Any]]:
+        """Current token levels of a provider's rate-limited models."""
+        self.initialize()
+
+        provider = self._registry.get_image_provider(
+            provider_name
+        ) or self._registry.get_video_provider(provider_name)
+        if not provider:
+            return []
+
+        levels = []
+        for model in provider.models:
+            model_levels = await self._rate_limiter.get_levels(model)
+            if model_levels:
+                levels.append(model_levels)
+        return levels
+
     async def execute(
         self,
         request: GenerationRequest,
@@ -505,21 +653,47 @@ class ProviderRouter:
         decision: RoutingDecision | None = None,
         media_type: MediaType = MediaType.IMAGE,
         max_fallbacks: int = 2,
+        coalesce: bool = True,
     ) -> GenerationResult:
         """
         Execute request with automatic fallback on failure.
 
-        Integrates circuit breakers and adaptive routing metrics.
+        Integrates circuit breakers and adaptive routing metrics. Identical
+        concurrent requests share one execution (see services.request_coalescer).
 
         Args:
             request: The generation request
             decision: Optional pre-computed routing decision
             media_type: Type of media to generate
             max_fallbacks: Maximum number of fallback attempts
+            coalesce: Whether to share the call with identical in-flight requests
 
         Returns:
             GenerationResult from successful provider or last error
         """
+
+        dispatched = False
+
+        def call():
+            nonlocal dispatched
+            dispatched = True
+            return self._execute_with_fallback(request, decision, media_type, max_fallbacks)
+
+        if not coalesce:
+            return await call()
+        result = await self._coalescer.run(request, call, media_type=media_type)
+        if not dispatched and decision is not None:
+            # Joined an identical request, so the routed token went unused
+            await self.refund(decision.provider_name, decision.model_id, media_type)
+        return result
+
+    async def _execute_with_fallback(
+        self,
+        request: GenerationRequest,
+        decision: RoutingDecision | None,
+        media_type: MediaType,
+        max_fallbacks: int,
+    ) -> GenerationResult:
         self.initialize()
 
         if decision is None:
@@ -543,10 +717,15 @@ class ProviderRouter:
                 continue
 
             # Use the model from decision for primary, default for fallbacks
-            model_id = decision.model_id if i == 0 else None
-            if model_id is None:
+            if i == 0:
+                model_id = decision.model_id
+            else:
                 model = provider.get_default_model()
                 model_id = model.id if model else None
+                # The primary was admitted by route(); fallbacks need their own token
+                if model and not await self.admit(model):
+                    logger.info(f"Fallback {provider_name} is rate limited, skipping")
+                    continue
 
             if not model_id:
                 continue
@@ -569,6 +748,7 @@ class ProviderRouter:
                         success=True,
                         latency=latency,
                         cost=result.cost or 0,
+                        model=model_id,
                     )
                     self._record_result(provider_name, result)
 
@@ -596,6 +776,7 @@ class ProviderRouter:
                         success=False,
                         latency=latency,
                         cost=0,
+                        model=model_id,
                     )
                     self._record_result(provider_name, result)
 
@@ -611,6 +792,7 @@ class ProviderRouter:
                     success=False,
                     latency=latency,
                     cost=0,
+                    model=model_id,
                 )
                 logger.warning(
                     f"Provider {provider_name} timed out after {timeout}s, "
@@ -633,6 +815,7 @@ class ProviderRouter:
                     success=False,
                     latency=latency,
                     cost=0,
+                    model=model_id,
                 )
                 logger.warning(f"Provider {provider_name} failed with exception: {e}")
 
@@ -899,10 +1082,35 @@ class ProviderRouter:
             result.append(info)
         return result
 
+    async def warm_up(
+        self, decision: RoutingDecision, media_type: MediaType = MediaType.IMAGE
+    ) -> None:
+        """
+        Open the routed provider's connection before the request is ready.
+
+        Providers without a warm_up hook are skipped; failures are ignored.
+
+        Args:
+            decision: Routing decision whose primary provider to warm up
+            media_type: Type of media the request generates
+        """
+        provider = self._get_provider(decision.provider_name, media_type)
+        warm_up = getattr(provider, "warm_up", None)
+        if warm_up is None:
+            return
+        try:
+            await asyncio.wait_for(warm_up(), timeout=WARM_UP_TIMEOUT)
+        except Exception as e:
+            logger.debug(f"Warm-up of {decision.provider_name} failed: {e}")
+
     def get_adaptive_stats(self) -> dict[str, Any]:
         """Get adaptive routing statistics."""
         return self._adaptive.get_stats()
 
+    def get_latency_percentiles(self, provider_name: str) -> dict[str, float | None]:
+        """Get decayed mean and P50/P90/P99 latency in seconds for a provider."""
+        return self._adaptive.get_latency_percentiles(provider_name)
+
     def get_circuit_breaker_status(self) -> dict[str, dict[str, Any]]:
         """Get status of all circuit breakers."""
         return CircuitBreakerManager.get_all_status()
@@ -0,0 +1,349 @@
+"""
+Provider health state shared across API nodes and workers.
+
+Circuit breakers and adaptive routing statistics are kept in memory so the
+routing hot path never waits on the network. This module mirrors them into
+Redis so the whole fleet reacts to the same evidence:
+
+- Every breaker outcome is applied to a Redis hash by a Lua script that runs
+  the same closed/open/half-open transitions as CircuitBreaker. Failures from
+  all processes count towards one threshold, and the resulting state is
+  copied back into the local breaker.
+- Every adaptive update folds the success flag into a shared EMA and counts
+  the latency in the current window of a shared latency histogram, per
+  provider and per provider model. Histogram windows from all processes land
+  in the same Redis hash, so merging across workers is a bucket-wise sum.
+- A process refreshes its local copies from Redis at most once per
+  provider_state_cache_ttl, in the background, so a breaker opened by one
+  worker is honoured everywhere within one cache interval. Latency windows
+  change slowly and are re-read every LATENCY_REFRESH_INTERVAL.
+
+Half-open probing stays per process: after the open timeout each process may
+send its own probe requests.
+
+Writes are fire-and-forget tasks; without a running event loop or Redis the
+local state keeps working on its own.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Coroutine
+from typing import TYPE_CHECKING, Any
+
+from core.config import get_settings
+from core.redis import get_redis
+
+from .latency_histogram import DecayingLatencyHistogram, LatencyHistogram, bucket_index
+from .providers.base import CircuitBreaker, CircuitBreakerManager
+
+if TYPE_CHECKING:
+    from .provider_router import AdaptiveRoutingStrategy
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "provider"
+PROVIDERS_KEY = f"{KEY_PREFIX}:names"
+LATENCY_NAMES_KEY = f"{KEY_PREFIX}:latency_names"
+STATE_TTL = 86400
+
+# Seconds between re-reads of the shared latency histograms
+LATENCY_REFRESH_INTERVAL = 10.0
+
+# Window layout shared by every process
+_LATENCY_LAYOUT = DecayingLatencyHistogram()
+
+# KEYS[1] breaker hash
+# ARGV: outcome ("success"/"failure"), failure threshold, success threshold,
+#       open timeout, key ttl
+# Returns: state, failure count, success count, last failure time
+_BREAKER_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+local failures = tonumber(redis.call('HGET', KEYS[1], 'failures') or '0')
+local successes = tonumber(redis.call('HGET', KEYS[1], 'successes') or '0')
+local last_failure = tonumber(redis.call('HGET', KEYS[1], 'last_failure') or '0')
+
+if state == 'open' and now - last_failure > tonumber(ARGV[4]) then
+    state = 'half-open'
+end
+
+if ARGV[1] == 'success' then
+    if state == 'half-open' then
+        successes = successes + 1
+        if successes >= tonumber(ARGV[3]) then
+            state = 'closed'
+            failures = 0
+            successes = 0
+        end
+    else
+        failures = 0
+    end
+else
+    failures = failures + 1
+    last_failure = now
+    if state == 'half-open' then
+        state = 'open'
+        successes = 0
+    elseif failures >= tonumber(ARGV[2]) then
+        state = 'open'
+        successes = 0
+    end
+end
+
+redis.call('HSET', KEYS[1], 'state', state, 'failures', failures, 'successes', successes,
+    'last_failure', tostring(last_failure))
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[5]))
+return {state, failures, successes, tostring(last_failure)}
+"""
+
+# KEYS[1] stats hash, KEYS[2..] latency histogram windows to count the sample in
+# ARGV: success (1/0), cost, EMA alpha, key ttl, latency bucket, latency, window ttl
+_STATS_SCRIPT = """
+local alpha = tonumber(ARGV[3])
+local rate = tonumber(redis.call('HGET', KEYS[1], 'success_rate') or '1')
+rate = alpha * tonumber(ARGV[1]) + (1 - alpha) * rate
+redis.call('HSET', KEYS[1], 'success_rate', tostring(rate), 'cost', ARGV[2])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[4]))
+for i = 2, #KEYS do
+    redis.call('HINCRBY', KEYS[i], ARGV[5], 1)
+    redis.call('HINCRBYFLOAT', KEYS[i], 'sum', ARGV[6])
+    redis.call('EXPIRE', KEYS[i], tonumber(ARGV[7]))
+end
+return tostring(rate)
+"""
+
+
+def breaker_key(name: str) -> str:
+    """Redis hash holding a provider's shared breaker state."""
+    return f"{KEY_PREFIX}:breaker:{name}"
+
+
+def stats_key(name: str) -> str:
+    """Redis hash holding a provider's shared success rate and cost."""
+    return f"{KEY_PREFIX}:stats:{name}"
+
+
+def latency_key(name: str, window_start: int) -> str:
+    """Redis hash holding one window of a latency histogram ("provider" or "provider/model")."""
+    return f"{KEY_PREFIX}:latency:{name}:{window_start}"
+
+
+class SharedProviderState:
+    """Redis mirror of circuit breaker and adaptive routing state."""
+
+    def __init__(self, cache_ttl: float = 1.0):
+        """
+        Initialize shared state.
+
+        Args:
+            cache_ttl: Seconds between background refreshes of local state
+        """
+        self.cache_ttl = cache_ttl
+        self._adaptive: AdaptiveRoutingStrategy | None = None
+        self._scripts: dict[str, Any] = {}
+        self._script_client = None
+        self._tasks: set[asyncio.Task] = set()
+        self._last_refresh = 0.0
+        self._last_latency_refresh = 0.0
+        self._refreshing = False
+
+    def attach_adaptive(self, adaptive: "AdaptiveRoutingStrategy") -> None:
+        """Mirror an adaptive routing strategy's statistics."""
+        self._adaptive = adaptive
+
+    # ============ Background scheduling ============
+
+    def _schedule(self, coro: Coroutine[Any, Any, Any]) -> None:
+        """Run a coroutine in the background, dropping it when no loop is running."""
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _script(self, name: str, source: str):
+        redis = await get_redis()
+        if self._script_client is not redis:
+            self._scripts = {}
+            self._script_client = redis
+        if name not in self._scripts:
+            self._scripts[name] = redis.register_script(source)
+        return redis, self._scripts[name]
+
+    # ============ Circuit breakers ============
+
+    def publish_outcome(self, breaker: CircuitBreaker, success: bool) -> None:
+        """Apply a breaker outcome to the shared state in the background."""
+        self._schedule(self._record_outcome(breaker, success))
+
+    async def _record_outcome(self, breaker: CircuitBreaker, success: bool) -> None:
+        try:
+            redis, script = await self._script("breaker", _BREAKER_SCRIPT)
+            state = await script(
+                keys=[breaker_key(breaker.name)],
+                args=[
+                    "success" if success else "failure",
+                    breaker.config.failure_threshold,
+                    breaker.config.success_threshold,
+                    breaker.config.timeout,
+                    STATE_TTL,
+                ],
+            )
+            await redis.sadd(PROVIDERS_KEY, breaker.name)
+        except Exception as e:
+            logger.debug(f"Failed to share breaker outcome for {breaker.name}: {e}")
+            return
+        breaker.apply_shared_state(
+            state=state[0],
+            failure_count=int(state[1]),
+            success_count=int(state[2]),
+            last_failure_time=float(state[3]),
+        )
+
+    def publish_reset(self, name: str) -> None:
+        """Clear a provider's shared breaker state in the background."""
+        self._schedule(self._reset(name))
+
+    async def _reset(self, name: str) -> None:
+        try:
+            redis = await get_redis()
+            await redis.delete(breaker_key(name))
+        except Exception as e:
+            logger.debug(f"Failed to reset shared breaker for {name}: {e}")
+
+    # ============ Adaptive statistics ============
+
+    def publish_stats(
+        self,
+        provider: str,
+        success: bool,
+        latency: float,
+        cost: float,
+        alpha: float,
+        model: str | None = None,
+    ) -> None:
+        """Fold a request outcome into the shared statistics in the background."""
+        self._schedule(self._record_stats(provider, success, latency, cost, alpha, model))
+
+    async def _record_stats(
+        self,
+        provider: str,
+        success: bool,
+        latency: float,
+        cost: float,
+        alpha: float,
+        model: str | None,
+    ) -> None:
+        names = [provider, f"{provider}/{model}"] if model else [provider]
+        window = _LATENCY_LAYOUT.window_start()
+        window_ttl = _LATENCY_LAYOUT.window_seconds * _LATENCY_LAYOUT.max_windows
+        try:
+            redis, script = await self._script("stats", _STATS_SCRIPT)
+            rate = await script(
+                keys=[stats_key(provider)] + [latency_key(name, window) for name in names],
+                args=[
+                    1 if success else 0,
+                    cost,
+                    alpha,
+                    STATE_TTL,
+                    bucket_index(latency),
+                    latency,
+                    window_ttl,
+                ],
+            )
+            await redis.sadd(PROVIDERS_KEY, provider)
+            await redis.sadd(LATENCY_NAMES_KEY, *names)
+        except Exception as e:
+            logger.debug(f"Failed to share routing stats for {provider}: {e}")
+            return
+        if self._adaptive:
+            self._adaptive.success_rates[provider] = float(rate)
+
+    # ============ Refresh ============
+
+    def maybe_refresh(self) -> None:
+        """Start a background refresh if the local copy is older than the cache TTL."""
+        if self._refreshing or time.monotonic() - self._last_refresh < self.cache_ttl:
+            return
+        self._refreshing = True
+        self._last_refresh = time.monotonic()
+        self._schedule(self.refresh())
+
+    async def refresh(self) -> None:
+        """Copy the shared state of every known provider into local state."""
+        try:
+            redis = await get_redis()
+            names = sorted(await redis.smembers(PROVIDERS_KEY))
+            if names:
+                pipe = redis.pipeline(transaction=False)
+                for name in names:
+                    pipe.hgetall(breaker_key(name))
+                    pipe.hgetall(stats_key(name))
+                replies = await pipe.execute()
+                self._apply_provider_state(names, replies)
+
+            if (
+                self._adaptive
+                and time.monotonic() - self._last_latency_refresh >= LATENCY_REFRESH_INTERVAL
+            ):
+                self._last_latency_refresh = time.monotonic()
+                await self._refresh_latencies(redis)
+        except Exception as e:
+            logger.debug(f"Failed to refresh shared provider state: {e}")
+        finally:
+            self._refreshing = False
+
+    def _apply_provider_state(self, names: list[str], replies: list[dict]) -> None:
+        for i, name in enumerate(names):
+            breaker, stats = replies[2 * i : 2 * i + 2]
+            if breaker:
+                CircuitBreakerManager.get(name).apply_shared_state(
+                    state=breaker["state"],
+                    failure_count=int(breaker["failures"]),
+                    success_count=int(breaker["successes"]),
+                    last_failure_time=float(breaker["last_failure"]),
+                )
+            if self._adaptive and stats:
+                self._adaptive.success_rates[name] = float(stats["success_rate"])
+                self._adaptive.costs[name] = float(stats["cost"])
+
+    async def _refresh_latencies(self, redis) -> None:
+        """Replace local latency histograms with the fleet-wide windows."""
+        names = sorted(await redis.smembers(LATENCY_NAMES_KEY))
+        if not names:
+            return
+
+        starts = _LATENCY_LAYOUT.window_starts()
+        pipe = redis.pipeline(transaction=False)
+        for name in names:
+            for start in starts:
+                pipe.hgetall(latency_key(name, start))
+        replies = await pipe.execute()
+
+        for i, name in enumerate(names):
+            offset = i * len(starts)
+            windows = [
+                (start, LatencyHistogram.from_dict(replies[offset + j]))
+                for j, start in enumerate(starts)
+                if replies[offset + j]
+            ]
+            if not windows:
+                continue
+            target = self._adaptive.model_latencies if "/" in name else self._adaptive.latencies
+            target.setdefault(name, DecayingLatencyHistogram()).replace_windows(windows)
+
+
+_provider_state: SharedProviderState | None = None
+
+
+def get_provider_state() -> SharedProviderState:
+    """Get the global shared provider state."""
+    global _provider_state
+    if _provider_state is None:
+        _provider_state = SharedProviderState(cache_ttl=get_settings().provider_state_cache_ttl)
+    return _provider_state
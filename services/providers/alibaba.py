@@ -236,7 +236,7 @@ class AlibabaProvider(ChinaImageProvider):
                 "parameters": {
                     "size": self._get_size(request.aspect_ratio),
                     "n": 1,  # Number of images
-                    "seed": request.seed if request.seed else None,
+                    "seed": request.seed,
                 },
             }
 
@@ -16,11 +16,14 @@ from collections.abc import Callable
 from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from enum import StrEnum
+from io import BytesIO
 from typing import Any, Protocol, runtime_checkable
 
 import httpx
 from PIL import Image
 
+from utils.image_types import detect_image_mime_type
+
 logger = logging.getLogger(__name__)
 
 
@@ -289,12 +292,20 @@ class GenerationRequest:
 
 @dataclass
 class GenerationResult:
-    """Unified generation result from any provider."""
+    """
+    Unified generation result from any provider.
+
+    Image results keep the encoded bytes exactly as the provider returned them
+    (``image_data`` / ``image_mime_type``) so storage can write them without a
+    decode/re-encode round trip. The ``image`` property opens a PIL image from
+    those bytes on first access only.
+    """
 
     success: bool = False
     media_type: MediaType = MediaType.IMAGE
-    # Image result
-    image: Image.Image | None = None
+    # Image result (original encoded bytes)
+    image_data: bytes | None = None
+    image_mime_type: str | None = None
     # Video result
     video_url: str | None = None
     video_data: bytes | None = None
@@ -306,6 +317,7 @@ class GenerationResult:
     thinking: str | None = None
     search_sources: str | None = None
     safety_ratings: list[dict] | None = None
+    cached: bool = False  # Served from the result cache without a provider call
     # Timing & Cost
     duration: float = 0.0  # Generation time in seconds
     cost: float = 0.0  # Estimated cost in USD
@@ -314,6 +326,33 @@ class GenerationResult:
     error_type: str | None = None
     safety_blocked: bool = False
     retryable: bool = False
+    # Lazily-opened PIL image (see ``image`` property)
+    _image: Image.Image | None = field(default=None, repr=False, compare=False)
+
+    @property
+    def image(self) -> Image.Image | None:
+        """PIL image, opened from ``image_data`` on first access."""
+        if self._image is None and self.image_data:
+            self._image = Image.open(BytesIO(self.image_data))
+        return self._image
+
+    @image.setter
+    def image(self, value: Image.Image | None) -> None:
+        self._image = value
+        # A caller-supplied image supersedes any encoded bytes
+        self.image_data = None
+        self.image_mime_type = None
+
+    @property
+    def has_image(self) -> bool:
+        """Check for an image result without decoding it."""
+        return self.image_data is not None or self._image is not None
+
+    def set_image_bytes(self, data: bytes, mime_type: str | None = None) -> None:
+        """Attach encoded image bytes returned by the provider."""
+        self._image = None
+        self.image_data = data
+        self.image_mime_type = mime_type or detect_image_mime_type(data)
 
 
 # ============ Authentication Strategies ============
@@ -488,6 +527,8 @@ class CircuitBreaker:
         self.success_count = 0
         self.last_failure_time: float = 0
         self._half_open_calls = 0
+        # Optional fleet-wide mirror (see services.provider_state)
+        self.shared = None
 
     def can_execute(self) -> bool:
         """Check if a request can be executed."""
@@ -521,6 +562,9 @@ class CircuitBreaker:
         else:
             self.failure_count = 0
 
+        if self.shared:
+            self.shared.publish_outcome(self, success=True)
+
     def record_failure(self) -> None:
         """Record a failed call."""
         self.failure_count += 1
@@ -537,12 +581,40 @@ class CircuitBreaker:
                 f"[CircuitBreaker:{self.name}] Circuit opened after {self.failure_count} failures"
             )
 
+        if self.shared:
+            self.shared.publish_outcome(self, success=False)
+
+    def apply_shared_state(
+        self,
+        state: str,
+        failure_count: int,
+        success_count: int,
+        last_failure_time: float,
+    ) -> None:
+        """Adopt breaker state aggregated across all processes."""
+        # The shared record stays "open" until the next outcome; keep a local probe going
+        if state == "open" and self.state == "half-open":
+            if last_failure_time <= self.last_failure_time:
+                return
+
+        if state != self.state:
+            self._half_open_calls = 0
+            if state == "open":
+                logger.warning(f"[CircuitBreaker:{self.name}] Circuit opened by shared state")
+
+        self.state = state
+        self.failure_count = failure_count
+        self.success_count = success_count
+        self.last_failure_time = last_failure_time
+
     def reset(self) -> None:
         """Reset the circuit breaker to closed state."""
         self.state = "closed"
         self.failure_count = 0
         self.success_count = 0
         self._half_open_calls = 0
+        if self.shared:
+            self.shared.publish_reset(self.name)
 
     def get_status(self) -> dict[str, Any]:
         """Get current circuit breaker status."""
@@ -559,12 +631,24 @@ class CircuitBreakerManager:
     """Manages circuit breakers for all providers."""
 
     _breakers: dict[str, CircuitBreaker] = {}
+    _shared = None
+
+    @classmethod
+    def use_shared_state(cls, shared) -> None:
+        """Mirror all breakers through a shared state backend (see services.provider_state)."""
+        cls._shared = shared
+        for breaker in cls._breakers.values():
+            breaker.shared = shared
 
     @classmethod
     def get(cls, provider_name: str, config: CircuitBreakerConfig | None = None) -> CircuitBreaker:
         """Get or create a circuit breaker for a provider."""
+        if cls._shared:
+            cls._shared.maybe_refresh()
         if provider_name not in cls._breakers:
-            cls._breakers[provider_name] = CircuitBreaker(provider_name, config)
+            breaker = CircuitBreaker(provider_name, config)
+            breaker.shared = cls._shared
+            cls._breakers[provider_name] = breaker
         return cls._breakers[provider_name]
 
     @classmethod
@@ -1072,6 +1156,12 @@ class HTTPProviderMixin:
             )
         return self._client
 
+    async def warm_up(self) -> None:
+        """Open a pooled connection (TCP + TLS) ahead of the first request."""
+        client = await self._get_client()
+        # Any response will do; only the established connection matters
+        await client.head("/")
+
     async def close(self) -> None:
         """Close the HTTP client."""
         if self._client:
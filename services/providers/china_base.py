@@ -8,11 +8,8 @@ which typically use an async task polling pattern (submit -> poll -> download).
 import logging
 import time
 from abc import abstractmethod
-from io import BytesIO
 from typing import Any
 
-from PIL import Image
-
 from .base import (
     BaseImageProvider,
     BaseVideoProvider,
@@ -141,7 +138,7 @@ class ChinaImageProvider(TaskPollingMixin, HTTPProviderMixin, BaseImageProvider)
                 if result_url:
                     # Download image
                     image_data = await self.download_result(result_url)
-                    result.image = Image.open(BytesIO(image_data))
+                    result.set_image_bytes(image_data)
                     result.success = True
                     result.cost = self._estimate_cost(model, request.resolution)
                     logger.info(f"[{self.name}] Generation completed successfully")
@@ -9,10 +9,8 @@ import asyncio
 import logging
 import os
 import time
-from io import BytesIO
 
 import httpx
-from PIL import Image
 
 from .base import (
     BaseImageProvider,
@@ -314,7 +312,7 @@ class FluxProvider(HTTPProviderMixin, BaseImageProvider):
                         if image_url:
                             img_response = await client.get(image_url)
                             if img_response.status_code == 200:
-                                result.image = Image.open(BytesIO(img_response.content))
+                                result.set_image_bytes(img_response.content)
                                 result.success = True
                                 result.duration = time.time() - start_time
                                 result.cost = self._estimate_cost(model, request.resolution)
@@ -17,6 +17,8 @@ from google import genai
 from google.genai import types
 from PIL import Image
 
+from services.image_codec import run_image_op
+
 from .base import (
     BaseImageProvider,
     GenerationRequest,
@@ -309,8 +311,7 @@ class GoogleProvider(BaseImageProvider):
                 elif hasattr(part, "text") and part.text:
                     result.text_response = part.text
                 elif hasattr(part, "inline_data") and part.inline_data:
-                    image_data = part.inline_data.data
-                    result.image = Image.open(BytesIO(image_data))
+                    result.set_image_bytes(part.inline_data.data)
 
         # Extract search sources if requested
         if (
@@ -442,7 +443,7 @@ class GoogleProvider(BaseImageProvider):
             result.duration = time.time() - start_time
             return result
 
-        result.success = result.image is not None
+        result.success = result.has_image
         result.duration = time.time() - start_time
         result.cost = self._estimate_cost(model, request.resolution)
         self._record_stats(result.duration)
@@ -491,7 +492,7 @@ class GoogleProvider(BaseImageProvider):
             result.duration = time.time() - start_time
             return result
 
-        result.success = result.image is not None
+        result.success = result.has_image
         result.duration = time.time() - start_time
         result.cost = self._estimate_cost(model, request.resolution)
         self._record_stats(result.duration)
@@ -535,7 +536,7 @@ class GoogleProvider(BaseImageProvider):
             result.duration = time.time() - start_time
             return result
 
-        result.success = result.image is not None
+        result.success = result.has_image
         result.duration = time.time() - start_time
         result.cost = self._estimate_cost(model, request.resolution) * 1.5  # Search costs more
         self._record_stats(result.duration)
@@ -554,10 +555,20 @@ class GoogleProvider(BaseImageProvider):
             return result
 
         source_image = request.reference_images[0]
+        user_mask = request.mask_mode == "user_provided" and request.mask_image is not None
+
+        # PNG-encode the source (and mask) on the image codec pool
+        if user_mask:
+            source_genai, mask_genai = await asyncio.gather(
+                run_image_op(self._pil_to_genai_image, source_image),
+                run_image_op(self._pil_to_genai_image, request.mask_image),
+            )
+        else:
+            source_genai = await run_image_op(self._pil_to_genai_image, source_image)
 
         # Build raw reference image
         raw_ref = types.RawReferenceImage(
-            referenceImage=self._pil_to_genai_image(source_image),
+            referenceImage=source_genai,
             referenceId=0,
         )
 
@@ -566,8 +577,8 @@ class GoogleProvider(BaseImageProvider):
             "referenceId": 1,
         }
 
-        if request.mask_mode == "user_provided" and request.mask_image is not None:
-            mask_ref_kwargs["referenceImage"] = self._pil_to_genai_image(request.mask_image)
+        if user_mask:
+            mask_ref_kwargs["referenceImage"] = mask_genai
             mask_ref_kwargs["config"] = types.MaskReferenceConfig(
                 maskMode="MASK_MODE_USER_PROVIDED",
                 maskDilation=request.mask_dilation,
@@ -627,8 +638,7 @@ class GoogleProvider(BaseImageProvider):
         # Process edit_image response
         try:
             if response.generated_images and len(response.generated_images) > 0:
-                image_bytes = response.generated_images[0].image.image_bytes
-                result.image = Image.open(BytesIO(image_bytes))
+                result.set_image_bytes(response.generated_images[0].image.image_bytes)
                 result.success = True
             else:
                 result.error = "No images returned from inpainting"
@@ -658,14 +668,20 @@ class GoogleProvider(BaseImageProvider):
 
         source_image = request.reference_images[0]
 
+        # PNG-encode the source and mask on the image codec pool
+        source_genai, mask_genai = await asyncio.gather(
+            run_image_op(self._pil_to_genai_image, source_image),
+            run_image_op(self._pil_to_genai_image, request.mask_image),
+        )
+
         raw_ref = types.RawReferenceImage(
-            referenceImage=self._pil_to_genai_image(source_image),
+            referenceImage=source_genai,
             referenceId=0,
         )
 
         mask_ref = types.MaskReferenceImage(
             referenceId=1,
-            referenceImage=self._pil_to_genai_image(request.mask_image),
+            referenceImage=mask_genai,
             config=types.MaskReferenceConfig(
                 maskMode="MASK_MODE_USER_PROVIDED",
                 maskDilation=request.mask_dilation,
@@ -698,8 +714,7 @@ class GoogleProvider(BaseImageProvider):
         # Process edit_image response
         try:
             if response.generated_images and len(response.generated_images) > 0:
-                image_bytes = response.generated_images[0].image.image_bytes
-                result.image = Image.open(BytesIO(image_bytes))
+                result.set_image_bytes(response.generated_images[0].image.image_bytes)
                 result.success = True
             else:
                 result.error = "No images returned from outpainting"
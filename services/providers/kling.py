@@ -12,11 +12,12 @@ import contextlib
 import logging
 import os
 import time
-from io import BytesIO
 
 import httpx
 import jwt
 
+from services.image_codec import encode_image
+
 from .base import (
     BaseVideoProvider,
     GenerationRequest,
@@ -370,9 +371,7 @@ class KlingProvider(HTTPProviderMixin, BaseVideoProvider):
 
         # Convert first reference image to base64
         ref_image = request.reference_images[0]
-        img_buffer = BytesIO()
-        ref_image.save(img_buffer, format="PNG")
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode("utf-8")
+        img_base64 = base64.b64encode(await encode_image(ref_image)).decode("utf-8")
 
         payload = {
             "model": api_model,
@@ -10,10 +10,8 @@ import base64
 import logging
 import os
 import time
-from io import BytesIO
 
 import httpx
-from PIL import Image
 
 from .base import (
     BaseImageProvider,
@@ -273,8 +271,7 @@ class OpenAIProvider(HTTPProviderMixin, BaseImageProvider):
                     if data.get("data") and len(data["data"]) > 0:
                         image_b64 = data["data"][0].get("b64_json")
                         if image_b64:
-                            image_data = base64.b64decode(image_b64)
-                            result.image = Image.open(BytesIO(image_data))
+                            result.set_image_bytes(base64.b64decode(image_b64))
                             result.success = True
                             result.duration = time.time() - start_time
                             result.cost = self._estimate_cost(model, request.resolution)
@@ -287,7 +284,7 @@ class OpenAIProvider(HTTPProviderMixin, BaseImageProvider):
                             # Download image from URL
                             img_response = await client.get(image_url)
                             if img_response.status_code == 200:
-                                result.image = Image.open(BytesIO(img_response.content))
+                                result.set_image_bytes(img_response.content)
                                 result.success = True
                                 result.duration = time.time() - start_time
                                 result.cost = self._estimate_cost(model, request.resolution)
@@ -371,8 +368,7 @@ class OpenAIProvider(HTTPProviderMixin, BaseImageProvider):
                     if data.get("data") and len(data["data"]) > 0:
                         image_b64 = data["data"][0].get("b64_json")
                         if image_b64:
-                            image_data = base64.b64decode(image_b64)
-                            result.image = Image.open(BytesIO(image_data))
+                            result.set_image_bytes(base64.b64decode(image_b64))
                             result.success = True
 
                             # DALL-E 3 may revise the prompt
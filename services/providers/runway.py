@@ -11,10 +11,11 @@ import contextlib
 import logging
 import os
 import time
-from io import BytesIO
 
 import httpx
 
+from services.image_codec import encode_image
+
 from .base import (
     BaseVideoProvider,
     GenerationRequest,
@@ -324,9 +325,7 @@ class RunwayProvider(HTTPProviderMixin, BaseVideoProvider):
 
         # Convert first reference image to base64
         ref_image = request.reference_images[0]
-        img_buffer = BytesIO()
-        ref_image.save(img_buffer, format="PNG")
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode("utf-8")
+        img_base64 = base64.b64encode(await encode_image(ref_image)).decode("utf-8")
 
         payload = {
             "model": api_model,
@@ -0,0 +1,240 @@
+"""
+Provider admission control with Redis token buckets.
+
+Each provider model that declares rate_limit_rpm and/or rate_limit_daily gets
+a token bucket shared by every API node and worker. The bucket refills
+continuously at rpm/60 tokens per second up to a burst of rpm tokens; the
+daily limit is a counter that resets at midnight UTC. Checks and updates run
+in a single Lua script so concurrent dispatches never overdraw a bucket, and
+Redis server time is used so node clock skew does not matter.
+
+A token taken for a request that is then never dispatched (served from the
+result cache, joined to an identical in-flight request, or abandoned) is given
+back with release().
+
+Models without declared limits are always admitted without touching Redis.
+If Redis is unavailable the limiter fails open: providers still return 429s
+in that case, but generation keeps working.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+from core.redis import get_redis
+
+from .providers.base import ProviderModel
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ratelimit"
+
+# Shortest pause between attempts while queueing for a token
+MIN_RETRY_INTERVAL = 0.05
+
+# KEYS[1] bucket hash, KEYS[2] daily usage hash (UTC day number and count)
+# ARGV: rpm (0 = none), daily limit (0 = none), cost (0 = peek, -1 = give back)
+# Returns: allowed, tokens (milli-tokens), retry after (ms), daily used
+_TOKEN_BUCKET_SCRIPT = """
+local rpm = tonumber(ARGV[1])
+local daily_limit = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local tokens = rpm
+if rpm > 0 then
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    if state[1] then
+        local elapsed = math.max(0, now - tonumber(state[2]))
+        tokens = math.min(rpm, tonumber(state[1]) + elapsed * rpm / 60)
+    end
+end
+
+local day = math.floor(now / 86400)
+local used = 0
+local daily = redis.call('HMGET', KEYS[2], 'day', 'used')
+if daily[1] and tonumber(daily[1]) == day then
+    used = tonumber(daily[2])
+end
+
+if daily_limit > 0 and used + cost > daily_limit then
+    local midnight = (day + 1) * 86400
+    return {0, math.floor(tokens * 1000), math.ceil((midnight - now) * 1000), used}
+end
+
+if rpm > 0 and tokens < cost then
+    local wait = (cost - tokens) * 60 / rpm
+    return {0, math.floor(tokens * 1000), math.ceil(wait * 1000), used}
+end
+
+if cost ~= 0 then
+    if rpm > 0 then
+        tokens = math.min(rpm, tokens - cost)
+        redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+        redis.call('EXPIRE', KEYS[1], 120)
+    end
+    if daily_limit > 0 then
+        used = math.max(0, used + cost)
+        redis.call('HSET', KEYS[2], 'day', tostring(day), 'used', tostring(used))
+        redis.call('EXPIRE', KEYS[2], 90000)
+    end
+end
+
+return {1, math.floor(tokens * 1000), 0, used}
+"""
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of an admission check."""
+
+    allowed: bool
+    tokens: float | None = None  # Tokens left in the minute bucket
+    retry_after: float = 0.0  # Seconds until a token is available
+    daily_used: int | None = None
+
+
+class ProviderRateLimiter:
+    """Distributed token-bucket limiter keyed by provider and model."""
+
+    def __init__(self):
+        self._script = None
+        self._script_client = None
+
+    @staticmethod
+    def is_limited(model: ProviderModel) -> bool:
+        """Whether the model declares any rate limit."""
+        return bool(model.rate_limit_rpm or model.rate_limit_daily)
+
+    @staticmethod
+    def _keys(model: ProviderModel) -> list[str]:
+        base = f"{KEY_PREFIX}:{model.provider}:{model.id}"
+        return [base, f"{base}:daily"]
+
+    async def _run(self, model: ProviderModel, cost: int) -> RateLimitDecision:
+        redis = await get_redis()
+        if self._script is None or self._script_client is not redis:
+            self._script = redis.register_script(_TOKEN_BUCKET_SCRIPT)
+            self._script_client = redis
+
+        allowed, tokens, retry_after, used = await self._script(
+            keys=self._keys(model),
+            args=[model.rate_limit_rpm or 0, model.rate_limit_daily or 0, cost],
+        )
+        return RateLimitDecision(
+            allowed=bool(int(allowed)),
+            tokens=int(tokens) / 1000 if model.rate_limit_rpm else None,
+            retry_after=int(retry_after) / 1000,
+            daily_used=int(used) if model.rate_limit_daily else None,
+        )
+
+    async def acquire(self, model: ProviderModel) -> RateLimitDecision:
+        """
+        Take one token for a request to a model.
+
+        Args:
+            model: Model the request will be dispatched to
+
+        Returns:
+            RateLimitDecision; allowed is False if the model is saturated
+        """
+        if not self.is_limited(model):
+            return RateLimitDecision(allowed=True)
+
+        try:
+            decision = await self._run(model, cost=1)
+        except Exception as e:
+            logger.warning(f"Rate limiter unavailable, admitting {model.provider}/{model.id}: {e}")
+            return RateLimitDecision(allowed=True)
+
+        if not decision.allowed:
+            logger.info(
+                f"Rate limit reached for {model.provider}/{model.id}, "
+                f"retry in {decision.retry_after:.1f}s"
+            )
+        return decision
+
+    async def release(self, model: ProviderModel) -> None:
+        """
+        Give back a token taken for a request that was never dispatched.
+
+        Args:
+            model: Model the token was taken for
+        """
+        if not self.is_limited(model):
+            return
+
+        try:
+            await self._run(model, cost=-1)
+        except Exception as e:
+            logger.warning(f"Failed to give back token for {model.provider}/{model.id}: {e}")
+
+    async def wait(self, model: ProviderModel, timeout: float) -> bool:
+        """
+        Queue for a token, waiting at most timeout seconds.
+
+        Args:
+            model: Model the request will be dispatched to
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if a token was acquired
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        while True:
+            decision = await self.acquire(model)
+            if decision.allowed:
+                return True
+            remaining = deadline - loop.time()
+            if decision.retry_after > remaining:
+                return False
+            await asyncio.sleep(max(decision.retry_after, MIN_RETRY_INTERVAL))
+
+    async def get_levels(self, model: ProviderModel) -> dict[str, Any] | None:
+        """
+        Current bucket levels for a model, without consuming a token.
+
+        Args:
+            model: Model to inspect
+
+        Returns:
+            Dict with limits and current levels, or None if the model is unlimited
+        """
+        if not self.is_limited(model):
+            return None
+
+        levels: dict[str, Any] = {
+            "model_id": model.id,
+            "rate_limit_rpm": model.rate_limit_rpm,
+            "rate_limit_daily": model.rate_limit_daily,
+            "tokens": None,
+            "daily_used": None,
+            "retry_after": None,
+        }
+        try:
+            decision = await self._run(model, cost=0)
+        except Exception as e:
+            logger.warning(f"Failed to read rate limit for {model.provider}/{model.id}: {e}")
+            return levels
+
+        levels["tokens"] = decision.tokens
+        levels["daily_used"] = decision.daily_used
+        if decision.tokens is not None and decision.tokens < 1:
+            levels["retry_after"] = (1 - decision.tokens) * 60 / model.rate_limit_rpm
+        return levels
+
+
+_rate_limiter: ProviderRateLimiter | None = None
+
+
+def get_rate_limiter() -> ProviderRateLimiter:
+    """Get the global provider rate limiter."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = ProviderRateLimiter()
+    return _rate_limiter
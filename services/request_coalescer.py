@@ -0,0 +1,253 @@
+"""
+Single-flight coalescing of identical generation requests.
+
+Identical submissions (same prompt, settings, provider/model hints and seed)
+arriving close together share one provider call instead of each paying for
+their own: double clicks, template-preview bursts and client retry storms.
+
+Within a process, concurrent callers with the same request fingerprint await
+the same in-flight call. Across API nodes and workers, the first caller takes
+a Redis lock for the fingerprint and publishes its result under a short-lived
+key; the other callers poll for that result while the lock is held, and take
+over the call themselves if the lock expires without a result (the leader
+died) or the leader had nothing to share.
+
+Requests carrying input images (reference, style or mask) are not coalesced.
+Without Redis the layer degrades to in-process coalescing.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import fields
+from io import BytesIO
+from typing import Any
+
+from core.config import get_settings
+from core.redis import get_redis
+
+from .providers.base import GenerationRequest, GenerationResult, MediaType
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "coalesce"
+
+# Failed results are only shared with callers already waiting on them
+FAILURE_RESULT_TTL = 2
+
+# Request fields that identify the caller rather than what is generated
+_IDENTITY_FIELDS = {"user_id", "request_id"}
+_IMAGE_FIELDS = ("reference_images", "style_image", "mask_image")
+
+# KEYS[1] lock key, ARGV[1] owner token
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def request_fingerprint(
+    request: GenerationRequest, media_type: MediaType | None = None
+) -> str | None:
+    """
+    Canonical hash of everything that determines a request's output.
+
+    Args:
+        request: Generation request
+        media_type: Media type the request is executed as, if not on the request
+
+    Returns:
+        Hex digest, or None if the request carries input images
+    """
+    if any(getattr(request, name) for name in _IMAGE_FIELDS):
+        return None
+
+    payload = {
+        f.name: getattr(request, f.name)
+        for f in fields(request)
+        if f.name not in _IDENTITY_FIELDS and f.name not in _IMAGE_FIELDS
+    }
+    payload["media_type"] = media_type or request.media_type
+    encoded = json.dumps(payload, sort_keys=True, default=lambda v: getattr(v, "value", str(v)))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def dump_result(result: GenerationResult) -> str:
+    """Serialize a generation result, including its media bytes, to JSON."""
+    data: dict[str, Any] = {
+        f.name: getattr(result, f.name) for f in fields(result) if not f.name.startswith("_")
+    }
+    data["media_type"] = result.media_type.value
+
+    image_data = result.image_data
+    if image_data is None and result.image is not None:
+        buffer = BytesIO()
+        result.image.save(buffer, format="PNG")
+        image_data = buffer.getvalue()
+        data["image_mime_type"] = "image/png"
+    for name, value in (("image_data", image_data), ("video_data", result.video_data)):
+        data[name] = base64.b64encode(value).decode() if value else None
+
+    return json.dumps(data)
+
+
+def load_result(raw: str) -> GenerationResult:
+    """Rebuild a generation result from dump_result() output."""
+    data = json.loads(raw)
+    data["media_type"] = MediaType(data["media_type"])
+    for name in ("image_data", "video_data"):
+        if data.get(name):
+            data[name] = base64.b64decode(data[name])
+    return GenerationResult(**data)
+
+
+class RequestCoalescer:
+    """Shares one in-flight provider call between identical requests."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        lock_ttl: int = 90,
+        result_ttl: int = 10,
+        poll_interval: float = 0.25,
+    ):
+        """
+        Initialize coalescer.
+
+        Args:
+            enabled: Whether to coalesce at all
+            lock_ttl: Seconds a leader holds the cross-process lock
+            result_ttl: Seconds a successful result stays available to late joiners
+            poll_interval: Seconds between checks while waiting on another process
+        """
+        self.enabled = enabled
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._release = None
+        self._release_client = None
+
+    @staticmethod
+    def lock_key(fingerprint: str) -> str:
+        return f"{KEY_PREFIX}:lock:{fingerprint}"
+
+    @staticmethod
+    def result_key(fingerprint: str) -> str:
+        return f"{KEY_PREFIX}:result:{fingerprint}"
+
+    async def run(
+        self,
+        request: GenerationRequest,
+        call: Callable[[], Awaitable[GenerationResult | None]],
+        media_type: MediaType | None = None,
+    ) -> GenerationResult | None:
+        """
+        Run call, or join an identical request that is already running.
+
+        A None result (e.g. a cancelled task) is never shared; callers that
+        waited on it run their own call.
+
+        Args:
+            request: Generation request, used for the fingerprint
+            call: Zero-argument coroutine factory performing the provider call
+            media_type: Media type the request is executed as
+
+        Returns:
+            The shared or own result of call
+        """
+        fingerprint = request_fingerprint(request, media_type) if self.enabled else None
+        if fingerprint is None:
+            return await call()
+
+        inflight = self._inflight.get(fingerprint)
+        if inflight is not None:
+            logger.info(f"Joining in-flight generation {fingerprint[:12]}")
+            result = await asyncio.shield(inflight)
+            return result if result is not None else await call()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[fingerprint] = future
+        result = None
+        try:
+            result = await self._run_distributed(fingerprint, call)
+            return result
+        finally:
+            self._inflight.pop(fingerprint, None)
+            future.set_result(result)
+
+    async def _run_distributed(
+        self,
+        fingerprint: str,
+        call: Callable[[], Awaitable[GenerationResult | None]],
+    ) -> GenerationResult | None:
+        try:
+            redis = await get_redis()
+        except Exception:
+            return await call()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_ttl
+        token = uuid.uuid4().hex
+
+        while True:
+            try:
+                cached = await redis.get(self.result_key(fingerprint))
+                if cached:
+                    logger.info(f"Reusing coalesced generation {fingerprint[:12]}")
+                    return load_result(cached)
+                if await redis.set(self.lock_key(fingerprint), token, nx=True, ex=self.lock_ttl):
+                    break
+            except Exception as e:
+                logger.warning(f"Request coalescing unavailable, running directly: {e}")
+                return await call()
+
+            if loop.time() >= deadline:
+                return await call()
+            await asyncio.sleep(self.poll_interval)
+
+        try:
+            result = await call()
+            if result is not None:
+                await self._publish(redis, fingerprint, result)
+            return result
+        finally:
+            await self._unlock(redis, fingerprint, token)
+
+    async def _publish(self, redis, fingerprint: str, result: GenerationResult) -> None:
+        ttl = self.result_ttl if result.success else FAILURE_RESULT_TTL
+        try:
+            await redis.set(self.result_key(fingerprint), dump_result(result), ex=ttl)
+        except Exception as e:
+            logger.warning(f"Failed to share coalesced result {fingerprint[:12]}: {e}")
+
+    async def _unlock(self, redis, fingerprint: str, token: str) -> None:
+        try:
+            if self._release is None or self._release_client is not redis:
+                self._release = redis.register_script(_RELEASE_SCRIPT)
+                self._release_client = redis
+            await self._release(keys=[self.lock_key(fingerprint)], args=[token])
+        except Exception as e:
+            logger.debug(f"Failed to release coalescing lock {fingerprint[:12]}: {e}")
+
+
+_request_coalescer: RequestCoalescer | None = None
+
+
+def get_request_coalescer() -> RequestCoalescer:
+    """Get the global request coalescer."""
+    global _request_coalescer
+    if _request_coalescer is None:
+        settings = get_settings()
+        _request_coalescer = RequestCoalescer(
+            enabled=settings.coalesce_enabled,
+            lock_ttl=settings.coalesce_lock_ttl,
+            result_ttl=settings.coalesce_result_ttl,
+        )
+    return _request_coalescer
@@ -0,0 +1,204 @@
+"""
+Content-addressed result cache for seeded generations.
+
+Providers that honour an explicit seed return the same image for the same
+prompt, settings, model and seed, so paying for a repeat is wasted money.
+For opted-in providers (result_cache_providers) this cache maps a canonical
+hash of those inputs to the storage key of the image saved the first time.
+Entries hold only the pointer, never pixels.
+
+Entries expire after result_cache_ttl and are evicted least-recently-used
+once more than result_cache_max_entries are stored: every hit refreshes the
+entry's score in a sorted set, and inserts trim the lowest scores.
+
+A hit returns a GenerationResult with cached=True carrying the stored bytes.
+Callers save it with content addressing (see StorageManager.save_image), so
+repeats by the same user resolve to the same storage object. If the pointed-to
+object has been deleted, the entry is dropped and the request is generated
+again. Without Redis the cache is bypassed.
+"""
+
+import hashlib
+import json
+import logging
+import time
+
+from core.config import get_settings
+from core.redis import get_redis
+
+from .providers.base import GenerationRequest, GenerationResult, MediaType
+from .storage import get_storage_manager
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "resultcache"
+LRU_KEY = f"{KEY_PREFIX}:lru"
+
+
+def result_cache_key(request: GenerationRequest, provider: str, model: str) -> str:
+    """Canonical hash of the inputs that determine a seeded generation."""
+    payload = {
+        "prompt": request.prompt,
+        "negative_prompt": request.negative_prompt,
+        "provider": provider,
+        "model": model,
+        "seed": request.seed,
+        "resolution": request.resolution,
+        "aspect_ratio": request.aspect_ratio,
+        "safety_level": request.safety_level,
+    }
+    encoded = json.dumps(payload, sort_keys=True)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ResultCache:
+    """Redis index from seeded requests to previously stored images."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        providers: list[str] | None = None,
+        ttl: int = 604800,
+        max_entries: int = 10000,
+    ):
+        """
+        Initialize result cache.
+
+        Args:
+            enabled: Whether to use the cache at all
+            providers: Providers whose seeded output is deterministic
+            ttl: Seconds an entry lives without being hit
+            max_entries: Entries kept before least-recently-used eviction
+        """
+        self.enabled = enabled
+        self.providers = set(providers or [])
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @staticmethod
+    def entry_key(digest: str) -> str:
+        return f"{KEY_PREFIX}:entry:{digest}"
+
+    def is_cacheable(self, request: GenerationRequest, provider: str | None) -> bool:
+        """Whether a request routed to provider can be served from or stored in the cache."""
+        return (
+            self.enabled
+            and provider in self.providers
+            and request.seed is not None
+            and request.media_type in (None, MediaType.IMAGE)
+            and not (request.reference_images or request.style_image or request.mask_image)
+        )
+
+    async def get(
+        self, request: GenerationRequest, provider: str, model: str
+    ) -> GenerationResult | None:
+        """
+        Look up a previously stored result.
+
+        Args:
+            request: Generation request
+            provider: Provider the request is routed to
+            model: Model the request is routed to
+
+        Returns:
+            GenerationResult with cached=True, or None on a miss
+        """
+        if not self.is_cacheable(request, provider):
+            return None
+
+        digest = result_cache_key(request, provider, model)
+        try:
+            redis = await get_redis()
+            raw = await redis.get(self.entry_key(digest))
+        except Exception as e:
+            logger.debug(f"Result cache unavailable: {e}")
+            return None
+        if not raw:
+            return None
+
+        entry = json.loads(raw)
+        data = await get_storage_manager().load_image_bytes(entry["storage_key"])
+        if not data:
+            # The stored image was deleted; generate it again
+            await self._forget(redis, digest)
+            return None
+
+        try:
+            await redis.expire(self.entry_key(digest), self.ttl)
+            await redis.zadd(LRU_KEY, {digest: time.time()})
+        except Exception as e:
+            logger.debug(f"Failed to refresh result cache entry: {e}")
+
+        logger.info(f"Result cache hit for {provider}/{model} seed={request.seed}")
+        result = GenerationResult(
+            success=True,
+            provider=entry["provider"],
+            model=entry["model"],
+            text_response=entry.get("text_response"),
+            cached=True,
+        )
+        result.set_image_bytes(data, entry.get("content_type"))
+        return result
+
+    async def put(
+        self, request: GenerationRequest, result: GenerationResult, storage_key: str
+    ) -> None:
+        """
+        Remember where a generated result was stored.
+
+        Args:
+            request: Generation request that produced the result
+            result: Successful generation result
+            storage_key: Storage key the image was saved under
+        """
+        if result.cached or not result.success or not self.is_cacheable(request, result.provider):
+            return
+
+        digest = result_cache_key(request, result.provider, result.model)
+        entry = {
+            "storage_key": storage_key,
+            "content_type": result.image_mime_type,
+            "provider": result.provider,
+            "model": result.model,
+            "text_response": result.text_response,
+        }
+        try:
+            redis = await get_redis()
+            await redis.set(self.entry_key(digest), json.dumps(entry), ex=self.ttl)
+            await redis.zadd(LRU_KEY, {digest: time.time()})
+            await self._evict(redis)
+        except Exception as e:
+            logger.debug(f"Failed to store result cache entry: {e}")
+
+    async def _evict(self, redis) -> None:
+        """Drop the least recently used entries beyond max_entries."""
+        excess = await redis.zcard(LRU_KEY) - self.max_entries
+        if excess <= 0:
+            return
+        evicted = await redis.zpopmin(LRU_KEY, excess)
+        if evicted:
+            await redis.delete(*(self.entry_key(digest) for digest, _ in evicted))
+
+    async def _forget(self, redis, digest: str) -> None:
+        try:
+            await redis.delete(self.entry_key(digest))
+            await redis.zrem(LRU_KEY, digest)
+        except Exception as e:
+            logger.debug(f"Failed to drop result cache entry: {e}")
+
+
+_result_cache: ResultCache | None = None
+
+
+def get_result_cache() -> ResultCache:
+    """Get the global result cache."""
+    global _result_cache
+    if _result_cache is None:
+        settings = get_settings()
+        _result_cache = ResultCache(
+            enabled=settings.result_cache_enabled,
+            providers=settings.result_cache_providers,
+            ttl=settings.result_cache_ttl,
+            max_entries=settings.result_cache_max_entries,
+        )
+    return _result_cache
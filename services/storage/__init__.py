@@ -25,10 +25,20 @@ Usage:
 """
 
 from .base import StorageConfig, StorageObject, StorageProvider
+from .executor import get_storage_executor, run_blocking, shutdown_storage_executor
+from .history import BucketHistoryStore, HistoryStore
 from .local import LocalStorageProvider
 from .manager import StorageManager
 from .minio import MinIOStorageProvider
 from .oss import AliyunOSSProvider
+from .variants import (
+    THUMBNAIL_WIDTH,
+    VARIANT_WIDTHS,
+    create_variant,
+    shutdown_variant_executor,
+    thumbnail_url,
+    variant_key,
+)
 
 # Cache for user-specific storage manager instances
 _storage_instances: dict[str | None, StorageManager] = {}
@@ -50,6 +60,10 @@ def get_storage_config() -> StorageConfig:
         bucket_name=settings.storage_bucket,
         public_url=settings.storage_public_url,
         local_path=settings.storage_local_path,
+        io_workers=settings.storage_io_workers,
+        multipart_threshold=settings.storage_multipart_threshold,
+        multipart_part_size=settings.storage_multipart_part_size,
+        stream_chunk_size=settings.storage_stream_chunk_size,
     )
 
     # Configure provider-specific settings
@@ -100,6 +114,8 @@ __all__ = [
     "StorageObject",
     "StorageProvider",
     "StorageManager",
+    "HistoryStore",
+    "BucketHistoryStore",
     # Providers
     "LocalStorageProvider",
     "MinIOStorageProvider",
@@ -108,4 +124,15 @@ __all__ = [
     "get_storage_config",
     "get_storage_manager",
     "clear_storage_cache",
+    # Blocking I/O executor
+    "get_storage_executor",
+    "run_blocking",
+    "shutdown_storage_executor",
+    # Thumbnails and resized variants
+    "THUMBNAIL_WIDTH",
+    "VARIANT_WIDTHS",
+    "create_variant",
+    "shutdown_variant_executor",
+    "thumbnail_url",
+    "variant_key",
 ]
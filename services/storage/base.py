@@ -4,13 +4,18 @@ Storage provider abstract base class and data types.
 This module defines the interface that all storage backends must implement.
 """
 
+import hashlib
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from dataclasses import dataclass, field
-from io import BytesIO
+from pathlib import Path
 from typing import Any
 
 from PIL import Image
 
+from services.image_codec import decode_image, encode_image
+from utils.image_types import detect_image_mime_type
+
 
 @dataclass
 class StorageConfig:
@@ -35,6 +40,12 @@ class StorageConfig:
     # Local storage settings
     local_path: str = "outputs/web"
 
+    # Remote I/O settings (MinIO, OSS)
+    io_workers: int = 16  # Threads for blocking SDK calls (also HTTP pool size)
+    multipart_threshold: int = 8 * 1024 * 1024  # Uploads at or above this use multipart
+    multipart_part_size: int = 8 * 1024 * 1024  # Bytes per multipart part (min 5MB)
+    stream_chunk_size: int = 256 * 1024  # Bytes per chunk for streamed reads
+
 
 @dataclass
 class StorageObject:
@@ -47,6 +58,17 @@ class StorageObject:
     created_at: str = ""  # ISO timestamp
     public_url: str | None = None  # Public access URL
     metadata: dict[str, Any] = field(default_factory=dict)
+    etag: str | None = None  # Quoted entity tag, from the content hash where stored
+    last_modified: float | None = None  # Unix timestamp
+
+
+# Object metadata field holding the SHA-256 of the content, written at save time
+CONTENT_HASH_FIELD = "content-sha256"
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 of stored bytes, recorded at save time and served as the ETag."""
+    return hashlib.sha256(data).hexdigest()
 
 
 class StorageProvider(ABC):
@@ -56,6 +78,8 @@ class StorageProvider(ABC):
     All storage providers must implement this interface.
     """
 
+    config: StorageConfig
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -147,29 +171,37 @@ class StorageProvider(ABC):
     async def save_image(
         self,
         key: str,
-        image: Image.Image,
+        image: Image.Image | bytes,
         format: str = "PNG",
         metadata: dict[str, Any] | None = None,
+        content_type: str | None = None,
     ) -> StorageObject:
         """
-        Save a PIL Image to storage.
+        Save an image to storage.
+
+        Encoded bytes are written as-is; PIL images are encoded first.
 
         Args:
             key: Storage key/path
-            image: PIL Image object
-            format: Image format (PNG, JPEG, WEBP)
+            image: PIL Image object or already-encoded image bytes
+            format: Image format used when encoding a PIL image (PNG, JPEG, WEBP)
             metadata: Optional metadata dict
+            content_type: MIME type of encoded bytes (detected if omitted)
 
         Returns:
             StorageObject with storage info
         """
-        buffer = BytesIO()
+        if isinstance(image, bytes | bytearray):
+            data = bytes(image)
+            return await self.save(
+                key, data, content_type or detect_image_mime_type(data), metadata
+            )
+
         save_kwargs = {}
         if format.upper() in ("JPEG", "JPG") or format.upper() == "WEBP":
             save_kwargs["quality"] = 95
 
-        image.save(buffer, format=format.upper(), **save_kwargs)
-        data = buffer.getvalue()
+        data = await encode_image(image, format, **save_kwargs)
 
         content_type = f"image/{format.lower()}"
         if format.upper() in ("JPEG", "JPG"):
@@ -189,7 +221,73 @@ class StorageProvider(ABC):
         """
         data = await self.load(key)
         if data:
-            return Image.open(BytesIO(data))
+            return await decode_image(data)
+        return None
+
+    async def stream(
+        self,
+        key: str,
+        chunk_size: int | None = None,
+        start: int = 0,
+        length: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream data from storage in chunks.
+
+        Default implementation loads the whole object and slices it.
+        Subclasses can override to read incrementally.
+
+        Args:
+            key: Storage key/path
+            chunk_size: Maximum bytes per yielded chunk (defaults to config)
+            start: Offset of the first byte to read
+            length: Number of bytes to read (None reads to the end)
+
+        Yields:
+            Chunks of raw bytes (nothing if not found)
+        """
+        data = await self.load(key)
+        if not data:
+            return
+        end = len(data) if length is None else min(len(data), start + length)
+        chunk_size = chunk_size or self.config.stream_chunk_size
+        for offset in range(start, end, chunk_size):
+            yield data[offset : min(offset + chunk_size, end)]
+
+    async def head(self, key: str) -> StorageObject | None:
+        """
+        Get an object's size, type and ETag without reading its body.
+
+        Default implementation loads the object; backends override it with a
+        metadata-only request.
+
+        Args:
+            key: Storage key/path
+
+        Returns:
+            StorageObject or None if not found
+        """
+        data = await self.load(key)
+        if data is None:
+            return None
+        return StorageObject(
+            key=key,
+            filename=key.rsplit("/", 1)[-1],
+            size=len(data),
+            content_type=detect_image_mime_type(data),
+            etag=f'"{content_hash(data)}"',
+        )
+
+    def local_path(self, key: str) -> Path | None:
+        """
+        Path of an object on the local file system, for zero-copy responses.
+
+        Args:
+            key: Storage key/path
+
+        Returns:
+            Existing file path, or None for remote backends or missing objects
+        """
         return None
 
     async def list_keys(self, prefix: str = "", limit: int = 100) -> list[str]:
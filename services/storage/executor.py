@@ -0,0 +1,102 @@
+"""
+Bounded thread pools for blocking storage calls.
+
+The MinIO and OSS SDKs are synchronous. Running their network calls on a
+dedicated pool keeps uploads and downloads off the event loop without letting
+a burst of storage traffic exhaust the default executor.
+
+The SQLite history index gets its own small pool so that history reads never
+queue behind multi-second object uploads.
+"""
+
+import asyncio
+import functools
+import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+HISTORY_IO_WORKERS = 4
+
+_storage_executor: ThreadPoolExecutor | None = None
+_history_executor: ThreadPoolExecutor | None = None
+
+
+def get_storage_executor() -> ThreadPoolExecutor:
+    """
+    Get the shared object-storage I/O executor, creating it on first use.
+
+    The pool size comes from the storage_io_workers setting.
+
+    Returns:
+        ThreadPoolExecutor instance
+    """
+    global _storage_executor
+
+    if _storage_executor is None:
+        from core.config import get_settings
+
+        workers = get_settings().storage_io_workers
+        _storage_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage-io")
+        logger.info(f"Storage I/O executor started with {workers} workers")
+
+    return _storage_executor
+
+
+def get_history_executor() -> ThreadPoolExecutor:
+    """
+    Get the executor for history index (SQLite) work, creating it on first use.
+
+    Returns:
+        ThreadPoolExecutor instance
+    """
+    global _history_executor
+
+    if _history_executor is None:
+        _history_executor = ThreadPoolExecutor(
+            max_workers=HISTORY_IO_WORKERS, thread_name_prefix="history-io"
+        )
+
+    return _history_executor
+
+
+async def run_blocking(
+    func: Callable[..., T],
+    *args: Any,
+    executor: ThreadPoolExecutor | None = None,
+    **kwargs: Any,
+) -> T:
+    """
+    Run a blocking callable on a storage executor.
+
+    Args:
+        func: Synchronous callable
+        *args: Positional arguments for func
+        executor: Pool to run on (defaults to the object-storage pool)
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        The callable's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor or get_storage_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+def shutdown_storage_executor(wait: bool = True):
+    """Shut down the storage and history executors if they were started."""
+    global _storage_executor, _history_executor
+
+    if _storage_executor is not None:
+        _storage_executor.shutdown(wait=wait)
+        _storage_executor = None
+        logger.info("Storage I/O executor shut down")
+
+    if _history_executor is not None:
+        _history_executor.shutdown(wait=wait)
+        _history_executor = None
@@ -0,0 +1,596 @@
+"""
+Per-user history stores.
+
+HistoryStore is the indexed store for local file storage: each user gets an
+embedded SQLite database next to their images. Records are appended with a
+monotonically increasing sequence number, so inserts and deletes touch a
+single row and newest-first pagination is an index range scan. WAL mode and a
+busy timeout let several worker processes write safely.
+
+BucketHistoryStore keeps history as a JSON document inside the object-storage
+bucket (MinIO/OSS), so history lives alongside the images it describes rather
+than on the disk of whichever API node wrote it. Writes read, modify and
+rewrite the whole document, so they take a Redis lock per document to keep
+API nodes and workers from overwriting each other's records. Without Redis
+only writers in the same process are serialized.
+
+Both stores return records carrying a "seq" value. Passing the last seen seq
+back as a cursor continues a listing without rescanning skipped rows, which
+OFFSET pagination cannot avoid.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from core.redis import get_redis
+
+from .executor import get_history_executor, run_blocking
+
+if TYPE_CHECKING:
+    from .base import StorageProvider
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    filename TEXT,
+    mode TEXT,
+    media_type TEXT,
+    prompt TEXT,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_filename ON records (filename);
+CREATE INDEX IF NOT EXISTS idx_records_mode ON records (mode, seq);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Maximum records kept in a bucket-resident history document
+BUCKET_HISTORY_LIMIT = 100
+
+# Seconds a bucket history writer may hold the document lock
+BUCKET_HISTORY_LOCK_TTL = 10
+_LOCK_POLL_INTERVAL = 0.05
+
+# KEYS[1] lock key, ARGV[1] owner token
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _empty_stats() -> dict[str, Any]:
+    return {
+        "total_images": 0,
+        "images_by_mode": {},
+        "total_duration": 0.0,
+        "average_duration": 0.0,
+        "earliest_date": None,
+        "latest_date": None,
+    }
+
+
+class HistoryStore:
+    """
+    SQLite-backed history index for a single user.
+
+    All public methods are async and run the SQLite calls on the dedicated
+    history executor. Each call opens its own short-lived connection, so
+    cached managers never hold file descriptors between requests.
+    """
+
+    def __init__(self, path: str | Path):
+        """
+        Initialize history store.
+
+        Args:
+            path: Path of the SQLite database file (created on first use)
+        """
+        self.path = Path(path)
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection, creating the database and schema on first use."""
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.path, timeout=10)
+                    try:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.executescript(_SCHEMA)
+                    finally:
+                        conn.close()
+                    self._schema_ready = True
+
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _execute(self, fn, *args):
+        """Run fn(conn, *args) inside a transaction on a fresh connection."""
+        conn = self._connect()
+        try:
+            with conn:
+                return fn(conn, *args)
+        finally:
+            conn.close()
+
+    async def _run(self, fn, *args):
+        """Run fn(conn, *args) on the history executor."""
+        return await run_blocking(self._execute, fn, *args, executor=get_history_executor())
+
+    # ============ Sync implementations ============
+
+    @staticmethod
+    def _row_values(record: dict[str, Any]) -> tuple:
+        return (
+            record["key"],
+            record.get("filename"),
+            record.get("mode", "basic"),
+            record.get("media_type", "image"),
+            record.get("prompt", ""),
+            record.get("created_at"),
+            json.dumps(record, ensure_ascii=False),
+        )
+
+    @classmethod
+    def _add(cls, conn: sqlite3.Connection, record: dict[str, Any]):
+        # Re-saving a key moves it to the head of the history
+        conn.execute("DELETE FROM records WHERE key = ?", (record["key"],))
+        conn.execute(
+            "INSERT INTO records (key, filename, mode, media_type, prompt, created_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            cls._row_values(record),
+        )
+
+    @classmethod
+    def _import(cls, conn: sqlite3.Connection, records: list[dict[str, Any]]) -> int:
+        count = 0
+        for record in records:
+            if record.get("key"):
+                conn.execute(
+                    "INSERT OR IGNORE INTO records "
+                    "(key, filename, mode, media_type, prompt, created_at, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    cls._row_values(record),
+                )
+                count += 1
+        return count
+
+    @staticmethod
+    def _filters(
+        mode: str | None, media_type: str | None, search: str | None
+    ) -> tuple[str, list[Any]]:
+        clauses = []
+        params: list[Any] = []
+        if mode:
+            clauses.append("mode = ?")
+            params.append(mode)
+        if media_type:
+            clauses.append("media_type = ?")
+            params.append(media_type)
+        if search:
+            clauses.append("prompt LIKE ? ESCAPE '\\'")
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    @classmethod
+    def _list(
+        cls,
+        conn: sqlite3.Connection,
+        limit: int,
+        offset: int,
+        mode: str | None,
+        media_type: str | None,
+        search: str | None,
+        oldest_first: bool,
+        cursor: int | None,
+    ) -> list[dict[str, Any]]:
+        where, params = cls._filters(mode, media_type, search)
+        if cursor is not None:
+            where += " AND " if where else "WHERE "
+            where += "seq > ?" if oldest_first else "seq < ?"
+            params.append(cursor)
+        order = "ASC" if oldest_first else "DESC"
+        rows = conn.execute(
+            f"SELECT seq, data FROM records {where} ORDER BY seq {order} LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        ).fetchall()
+        return [{**json.loads(data), "seq": seq} for seq, data in rows]
+
+    @classmethod
+    def _count(
+        cls,
+        conn: sqlite3.Connection,
+        mode: str | None,
+        media_type: str | None,
+        search: str | None,
+    ) -> int:
+        where, params = cls._filters(mode, media_type, search)
+        return conn.execute(f"SELECT COUNT(*) FROM records {where}", params).fetchone()[0]
+
+    @staticmethod
+    def _stats(conn: sqlite3.Connection) -> dict[str, Any]:
+        rows = conn.execute(
+            "SELECT mode, COUNT(*), "
+            "COALESCE(SUM(json_extract(data, '$.duration')), 0), "
+            "MIN(created_at), MAX(created_at) "
+            "FROM records GROUP BY mode"
+        ).fetchall()
+        stats = _empty_stats()
+        for mode, count, duration, earliest, latest in rows:
+            stats["images_by_mode"][mode or "basic"] = count
+            stats["total_images"] += count
+            stats["total_duration"] += float(duration)
+            if earliest and (not stats["earliest_date"] or earliest < stats["earliest_date"]):
+                stats["earliest_date"] = earliest
+            if latest and (not stats["latest_date"] or latest > stats["latest_date"]):
+                stats["latest_date"] = latest
+        if stats["total_images"]:
+            stats["average_duration"] = stats["total_duration"] / stats["total_images"]
+        return stats
+
+    @staticmethod
+    def _get(conn: sqlite3.Connection, item_id: str) -> dict[str, Any] | None:
+        row = conn.execute(
+            "SELECT data FROM records WHERE key = ? OR filename = ? ORDER BY seq DESC LIMIT 1",
+            (item_id, item_id),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @staticmethod
+    def _remove(conn: sqlite3.Connection, key: str) -> bool:
+        return conn.execute("DELETE FROM records WHERE key = ?", (key,)).rowcount > 0
+
+    @staticmethod
+    def _keys(conn: sqlite3.Connection) -> list[str]:
+        return [row[0] for row in conn.execute("SELECT key FROM records")]
+
+    @staticmethod
+    def _clear(conn: sqlite3.Connection):
+        conn.execute("DELETE FROM records")
+
+    @staticmethod
+    def _get_meta(conn: sqlite3.Connection, name: str) -> str | None:
+        row = conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_meta(conn: sqlite3.Connection, name: str, value: str):
+        conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    # ============ Async API ============
+
+    async def add(self, record: dict[str, Any]):
+        """
+        Append a record as the newest entry.
+
+        Args:
+            record: History record (must contain "key")
+        """
+        await self._run(self._add, record)
+
+    async def import_records(self, records: list[dict[str, Any]]) -> int:
+        """
+        Bulk import records, oldest first, skipping keys already present.
+
+        Args:
+            records: History records ordered oldest to newest
+
+        Returns:
+            Number of records processed
+        """
+        return await self._run(self._import, records)
+
+    async def query(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        mode: str | None = None,
+        media_type: str | None = None,
+        search: str | None = None,
+        oldest_first: bool = False,
+        cursor: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        List records, newest first by default.
+
+        Args:
+            limit: Maximum number of records to return
+            offset: Number of matching records to skip
+            mode: Filter by generation mode
+            media_type: Filter by media type
+            search: Case-insensitive substring match on the prompt
+            oldest_first: Return oldest records first
+            cursor: Only return records after this seq in the listing order
+
+        Returns:
+            List of history records, each with its "seq"
+        """
+        return await self._run(
+            self._list, limit, offset, mode, media_type, search, oldest_first, cursor
+        )
+
+    async def count(
+        self,
+        mode: str | None = None,
+        media_type: str | None = None,
+        search: str | None = None,
+    ) -> int:
+        """
+        Count records matching the given filters.
+
+        Args:
+            mode: Filter by generation mode
+            media_type: Filter by media type
+            search: Case-insensitive substring match on the prompt
+
+        Returns:
+            Number of matching records
+        """
+        return await self._run(self._count, mode, media_type, search)
+
+    async def stats(self) -> dict[str, Any]:
+        """
+        Aggregate statistics over all records.
+
+        Returns:
+            Dict with total_images, images_by_mode, total_duration,
+            average_duration, earliest_date and latest_date
+        """
+        return await self._run(self._stats)
+
+    async def get(self, item_id: str) -> dict[str, Any] | None:
+        """
+        Get a record by key or filename.
+
+        Args:
+            item_id: Storage key or filename
+
+        Returns:
+            History record or None
+        """
+        return await self._run(self._get, item_id)
+
+    async def remove(self, key: str) -> bool:
+        """
+        Remove a record by key.
+
+        Args:
+            key: Storage key
+
+        Returns:
+            True if a record was removed
+        """
+        return await self._run(self._remove, key)
+
+    async def keys(self) -> list[str]:
+        """Get all stored keys."""
+        return await self._run(self._keys)
+
+    async def clear(self):
+        """Remove all records."""
+        await self._run(self._clear)
+
+    async def get_meta(self, name: str) -> str | None:
+        """Get a store metadata value."""
+        return await self._run(self._get_meta, name)
+
+    async def set_meta(self, name: str, value: str):
+        """Set a store metadata value."""
+        await self._run(self._set_meta, name, value)
+
+
+class BucketHistoryStore:
+    """
+    History kept as a JSON document in the storage bucket.
+
+    Used for MinIO/OSS so that history is as durable and shared as the images
+    themselves. The document is newest-first and capped at
+    BUCKET_HISTORY_LIMIT records, which keeps each rewrite small.
+    """
+
+    def __init__(
+        self,
+        provider: "StorageProvider",
+        key: str,
+        max_records: int = BUCKET_HISTORY_LIMIT,
+        lock_ttl: float = BUCKET_HISTORY_LOCK_TTL,
+    ):
+        """
+        Initialize bucket history store.
+
+        Args:
+            provider: Storage provider holding the document
+            key: Storage key of the history document
+            max_records: Maximum number of records kept
+            lock_ttl: Seconds a writer may hold the cross-process lock
+        """
+        self._provider = provider
+        self.key = key
+        self.max_records = max_records
+        self.lock_ttl = lock_ttl
+        self._lock = asyncio.Lock()
+
+    @property
+    def lock_key(self) -> str:
+        """Redis key of the document's write lock."""
+        return f"history_lock:{self.key}"
+
+    @asynccontextmanager
+    async def _write_lock(self):
+        """Hold the document for a read-modify-write, across processes when Redis is up."""
+        async with self._lock:
+            token = uuid.uuid4().hex
+            redis = await self._acquire(token)
+            try:
+                yield
+            finally:
+                if redis is not None:
+                    await self._release(redis, token)
+
+    async def _acquire(self, token: str):
+        """Take the Redis lock, returning the client (None if writing without it)."""
+        try:
+            redis = await get_redis()
+        except Exception:
+            return None
+
+        loop = asyncio.get_running_loop()
+        # A holder that died releases the lock when it expires
+        deadline = loop.time() + self.lock_ttl
+        while True:
+            try:
+                if await redis.set(self.lock_key, token, nx=True, ex=int(self.lock_ttl)):
+                    return redis
+            except Exception as e:
+                logger.warning(f"History lock unavailable for {self.key}: {e}")
+                return None
+            if loop.time() >= deadline:
+                logger.warning(f"Timed out waiting for history lock on {self.key}")
+                return None
+            await asyncio.sleep(_LOCK_POLL_INTERVAL)
+
+    async def _release(self, redis, token: str):
+        try:
+            await redis.register_script(_RELEASE_SCRIPT)(keys=[self.lock_key], args=[token])
+        except Exception as e:
+            logger.debug(f"Failed to release history lock on {self.key}: {e}")
+
+    async def _load(self) -> list[dict[str, Any]]:
+        """Load the document, assigning seq values to legacy records."""
+        data = await self._provider.load(self.key)
+        if not data:
+            return []
+        try:
+            records = json.loads(data.decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            logger.error(f"Failed to parse {self.key}")
+            return []
+
+        next_seq = max((r.get("seq", 0) for r in records), default=0) + 1
+        for record in reversed(records):
+            if "seq" not in record:
+                record["seq"] = next_seq
+                next_seq += 1
+        return records
+
+    async def _save(self, records: list[dict[str, Any]]):
+        await self._provider.save(
+            self.key,
+            json.dumps(records[: self.max_records], ensure_ascii=False).encode("utf-8"),
+            "application/json",
+        )
+
+    @staticmethod
+    def _matches(
+        record: dict[str, Any], mode: str | None, media_type: str | None, search: str | None
+    ) -> bool:
+        if mode and record.get("mode", "basic") != mode:
+            return False
+        if media_type and record.get("media_type", "image") != media_type:
+            return False
+        return not search or search.lower() in record.get("prompt", "").lower()
+
+    async def add(self, record: dict[str, Any]):
+        """
+        Append a record as the newest entry.
+
+        Args:
+            record: History record (must contain "key")
+        """
+        async with self._write_lock():
+            records = [r for r in await self._load() if r.get("key") != record["key"]]
+            seq = max((r["seq"] for r in records), default=0) + 1
+            records.insert(0, {**record, "seq": seq})
+            await self._save(records)
+
+    async def query(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        mode: str | None = None,
+        media_type: str | None = None,
+        search: str | None = None,
+        oldest_first: bool = False,
+        cursor: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """List records; arguments match HistoryStore.query."""
+        records = [r for r in await self._load() if self._matches(r, mode, media_type, search)]
+        if oldest_first:
+            records.reverse()
+        if cursor is not None:
+            records = [
+                r for r in records if (r["seq"] > cursor if oldest_first else r["seq"] < cursor)
+            ]
+        return records[offset : offset + limit]
+
+    async def count(
+        self,
+        mode: str | None = None,
+        media_type: str | None = None,
+        search: str | None = None,
+    ) -> int:
+        """Count records; arguments match HistoryStore.count."""
+        return sum(1 for r in await self._load() if self._matches(r, mode, media_type, search))
+
+    async def stats(self) -> dict[str, Any]:
+        """Aggregate statistics over all records."""
+        stats = _empty_stats()
+        dates = []
+        for record in await self._load():
+            mode = record.get("mode", "basic")
+            stats["images_by_mode"][mode] = stats["images_by_mode"].get(mode, 0) + 1
+            stats["total_images"] += 1
+            stats["total_duration"] += record.get("duration") or 0
+            if record.get("created_at"):
+                dates.append(record["created_at"])
+        if stats["total_images"]:
+            stats["average_duration"] = stats["total_duration"] / stats["total_images"]
+        if dates:
+            stats["earliest_date"], stats["latest_date"] = min(dates), max(dates)
+        return stats
+
+    async def get(self, item_id: str) -> dict[str, Any] | None:
+        """Get a record by key or filename."""
+        for record in await self._load():
+            if record.get("key") == item_id or record.get("filename") == item_id:
+                return record
+        return None
+
+    async def remove(self, key: str) -> bool:
+        """Remove a record by key."""
+        async with self._write_lock():
+            records = await self._load()
+            remaining = [r for r in records if r.get("key") != key]
+            if len(remaining) == len(records):
+                return False
+            await self._save(remaining)
+            return True
+
+    async def keys(self) -> list[str]:
+        """Get all stored keys."""
+        return [r["key"] for r in await self._load() if r.get("key")]
+
+    async def clear(self):
+        """Remove the history document."""
+        async with self._write_lock():
+            await self._provider.delete(self.key)
@@ -3,9 +3,15 @@ Local file system storage provider.
 
 This provider stores files on the local file system.
 Suitable for development and single-server deployments.
+
+The SHA-256 of each saved file is written to a sidecar under ETAG_DIR, so
+head() can answer with a content ETag from a stat and a tiny read. Files
+saved before sidecars existed get a weak ETag from their size and mtime.
 """
 
 import logging
+import os
+from collections.abc import AsyncIterator
 from datetime import datetime
 from pathlib import Path
 from typing import Any
@@ -13,10 +19,15 @@ from typing import Any
 import aiofiles
 import aiofiles.os
 
-from .base import StorageConfig, StorageObject, StorageProvider
+from utils.image_types import mime_type_from_key
+
+from .base import StorageConfig, StorageObject, StorageProvider, content_hash
 
 logger = logging.getLogger(__name__)
 
+# Directory under the base path mirroring keys with their content hashes
+ETAG_DIR = ".etags"
+
 
 class LocalStorageProvider(StorageProvider):
     """Local file system storage provider."""
@@ -51,6 +62,10 @@ class LocalStorageProvider(StorageProvider):
         """Get full file path for a key."""
         return self.base_path / key
 
+    def _get_etag_path(self, key: str) -> Path:
+        """Get the content hash sidecar path for a key."""
+        return self.base_path / ETAG_DIR / key
+
     async def save(
         self,
         key: str,
@@ -72,12 +87,18 @@ class LocalStorageProvider(StorageProvider):
         """
         file_path = self._get_full_path(key)
 
-        # Ensure parent directory exists
+        etag_path = self._get_etag_path(key)
+        digest = content_hash(data)
+
+        # Ensure parent directories exist
         await aiofiles.os.makedirs(file_path.parent, exist_ok=True)
+        await aiofiles.os.makedirs(etag_path.parent, exist_ok=True)
 
-        # Write file
+        # Write file, then its content hash
         async with aiofiles.open(file_path, "wb") as f:
             await f.write(data)
+        async with aiofiles.open(etag_path, "w") as f:
+            await f.write(digest)
 
         logger.debug(f"Saved file to local storage: {key}")
 
@@ -89,6 +110,7 @@ class LocalStorageProvider(StorageProvider):
             created_at=datetime.now().isoformat(),
             public_url=self.get_public_url(key),
             metadata=metadata or {},
+            etag=f'"{digest}"',
         )
 
     async def load(self, key: str) -> bytes | None:
@@ -113,6 +135,82 @@ class LocalStorageProvider(StorageProvider):
             logger.error(f"Failed to load file {key}: {e}")
             return None
 
+    async def stream(
+        self,
+        key: str,
+        chunk_size: int | None = None,
+        start: int = 0,
+        length: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a file from local storage in chunks.
+
+        Args:
+            key: Storage key/path
+            chunk_size: Maximum bytes per yielded chunk (defaults to config)
+            start: Offset of the first byte to read
+            length: Number of bytes to read (None reads to the end)
+
+        Yields:
+            Chunks of raw bytes (nothing if not found)
+        """
+        file_path = self._get_full_path(key)
+
+        if not file_path.exists():
+            return
+
+        chunk_size = chunk_size or self.config.stream_chunk_size
+        remaining = length
+        async with aiofiles.open(file_path, "rb") as f:
+            if start:
+                await f.seek(start)
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = await f.read(size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    async def head(self, key: str) -> StorageObject | None:
+        """
+        Get a file's size, type and ETag without reading it.
+
+        Args:
+            key: Storage key/path
+
+        Returns:
+            StorageObject or None if not found
+        """
+        file_path = self._get_full_path(key)
+        try:
+            stat = await aiofiles.os.stat(file_path)
+        except FileNotFoundError:
+            return None
+
+        try:
+            async with aiofiles.open(self._get_etag_path(key)) as f:
+                etag = f'"{(await f.read()).strip()}"'
+        except OSError:
+            etag = f'W/"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+        return StorageObject(
+            key=key,
+            filename=file_path.name,
+            size=stat.st_size,
+            content_type=mime_type_from_key(key),
+            created_at=datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            public_url=self.get_public_url(key),
+            etag=etag,
+            last_modified=stat.st_mtime,
+        )
+
+    def local_path(self, key: str) -> Path | None:
+        """Path of a stored file, for zero-copy responses."""
+        file_path = self._get_full_path(key)
+        return file_path if os.path.isfile(file_path) else None
+
     async def delete(self, key: str) -> bool:
         """
         Delete file from local storage.
@@ -130,6 +228,10 @@ class LocalStorageProvider(StorageProvider):
 
         try:
             await aiofiles.os.remove(file_path)
+            try:
+                await aiofiles.os.remove(self._get_etag_path(key))
+            except FileNotFoundError:
+                pass
             logger.debug(f"Deleted file from local storage: {key}")
             return True
         except Exception as e:
@@ -184,7 +286,7 @@ class LocalStorageProvider(StorageProvider):
         # If prefix is a directory, list its contents
         if search_path.is_dir():
             for path in search_path.rglob("*"):
-                if path.is_file():
+                if path.is_file() and ETAG_DIR not in path.relative_to(self.base_path).parts:
                     # Get relative path from base
                     rel_path = path.relative_to(self.base_path)
                     keys.append(str(rel_path))
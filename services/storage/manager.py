@@ -5,18 +5,35 @@ This module provides a high-level interface for storing and managing images,
 abstracting away the underlying storage backend.
 """
 
+import asyncio
+import hashlib
 import json
 import logging
 import re
+from collections.abc import AsyncIterator
 from datetime import datetime
+from pathlib import Path
 from typing import Any
 
 from PIL import Image
 
+from utils.image_types import IMAGE_EXTENSIONS, detect_image_mime_type
+
 from .base import StorageConfig, StorageObject, StorageProvider
+from .history import BucketHistoryStore, HistoryStore
+from .variants import variant_keys
 
 logger = logging.getLogger(__name__)
 
+# SQLite history index file (local backend), stored under the user's prefix
+HISTORY_DB_NAME = "history.db"
+
+# Meta entry recording that a legacy history.json was imported
+LEGACY_MIGRATED_KEY = "legacy_history_json_migrated"
+
+# Content-addressed keys carry the SHA-256 of their bytes
+_CONTENT_KEY_RE = re.compile(r"(?:^|/)objects/[0-9a-f]{2}/([0-9a-f]{64})\.\w+$")
+
 
 class StorageManager:
     """
@@ -37,7 +54,10 @@ class StorageManager:
         self.config = config
         self.user_id = user_id
         self._provider = self._create_provider()
-        self._history_cache: list[dict] | None = None
+        self._history = self._create_history_store()
+        self._history_lock = asyncio.Lock()
+        # Only the SQLite store has a legacy history.json to import
+        self._history_ready = not isinstance(self._history, HistoryStore)
 
     def _create_provider(self) -> StorageProvider:
         """Create storage provider based on configuration."""
@@ -58,6 +78,18 @@ class StorageManager:
         else:
             raise ValueError(f"Unknown storage backend: {backend}")
 
+    def _create_history_store(self) -> HistoryStore | BucketHistoryStore:
+        """
+        Create the history store for the active backend.
+
+        Local storage gets an SQLite index next to the images. Object-storage
+        backends keep history in the bucket so it is shared by every API node
+        and survives node replacement.
+        """
+        if self._provider.name == "local":
+            return HistoryStore(Path(self.config.local_path) / self._get_prefix() / HISTORY_DB_NAME)
+        return BucketHistoryStore(self._provider, self._get_history_key())
+
     @property
     def provider(self) -> StorageProvider:
         """Get the underlying storage provider."""
@@ -74,15 +106,16 @@ class StorageManager:
             return f"users/{self.user_id}/"
         return ""
 
-    def _generate_key(self, prompt: str, mode: str = "basic") -> str:
+    def _generate_key(self, prompt: str, mode: str = "basic", ext: str = "png") -> str:
         """
         Generate storage key for an image.
 
-        Format: {prefix}YYYY/MM/DD/{mode}_{HHMMSS}_{slug}.png
+        Format: {prefix}YYYY/MM/DD/{mode}_{HHMMSS}_{slug}.{ext}
 
         Args:
             prompt: Image generation prompt
             mode: Generation mode (basic, chat, batch, etc.)
+            ext: File extension matching the stored image format
 
         Returns:
             Storage key
@@ -97,15 +130,31 @@ class StorageManager:
         if not slug:
             slug = "image"
 
-        return f"{self._get_prefix()}{date_path}/{mode}_{timestamp}_{slug}.png"
+        return f"{self._get_prefix()}{date_path}/{mode}_{timestamp}_{slug}.{ext}"
+
+    def _content_key(self, data: bytes, ext: str = "png") -> str:
+        """
+        Generate a content-addressed storage key for encoded image bytes.
+
+        Format: {prefix}objects/{sha256[:2]}/{sha256}.{ext}
+
+        Args:
+            data: Encoded image bytes
+            ext: File extension matching the stored image format
+
+        Returns:
+            Storage key
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        return f"{self._get_prefix()}objects/{digest[:2]}/{digest}.{ext}"
 
     def _get_history_key(self) -> str:
-        """Get the history.json key for the current user."""
+        """Get the legacy history.json key for the current user."""
         return f"{self._get_prefix()}history.json"
 
     async def save_image(
         self,
-        image: Image.Image,
+        image: Image.Image | bytes,
         prompt: str,
         settings: dict[str, Any],
         mode: str = "basic",
@@ -114,13 +163,22 @@ class StorageManager:
         thinking: str | None = None,
         session_id: str | None = None,
         chat_index: int | None = None,
+        content_type: str | None = None,
+        content_addressed: bool = False,
         **extra,
     ) -> StorageObject:
         """
         Save a generated image.
 
+        Encoded bytes (as returned by providers) are stored verbatim, skipping
+        the decode/re-encode round trip; PIL images are encoded as PNG.
+
+        With content_addressed, encoded bytes are keyed by their SHA-256 so
+        identical images map to one object; saving bytes that are already
+        stored only records the history entry.
+
         Args:
-            image: PIL Image to save
+            image: PIL Image or encoded image bytes to save
             prompt: Generation prompt
             settings: Generation settings
             mode: Generation mode
@@ -129,12 +187,23 @@ class StorageManager:
             thinking: Optional thinking process
             session_id: Optional chat session ID
             chat_index: Optional index within chat session
+            content_type: MIME type of encoded bytes (detected if omitted)
+            content_addressed: Key encoded bytes by content hash
             **extra: Additional metadata
 
         Returns:
             StorageObject with storage info
         """
-        key = self._generate_key(prompt, mode)
+        is_bytes = isinstance(image, bytes | bytearray)
+        if not is_bytes:
+            content_type = "image/png"
+        elif not content_type:
+            content_type = detect_image_mime_type(image)
+        ext = IMAGE_EXTENSIONS.get(content_type, "png")
+        if content_addressed and is_bytes:
+            key = self._content_key(bytes(image), ext)
+        else:
+            key = self._generate_key(prompt, mode, ext)
 
         metadata = {
             "prompt": prompt[:500],
@@ -153,7 +222,20 @@ class StorageManager:
         if chat_index is not None:
             metadata["chat_index"] = chat_index
 
-        result = await self._provider.save_image(key, image, metadata=metadata)
+        if content_addressed and is_bytes and await self._provider.exists(key):
+            result = StorageObject(
+                key=key,
+                filename=key.rsplit("/", 1)[-1],
+                size=len(image),
+                content_type=content_type,
+                created_at=datetime.now().isoformat(),
+                public_url=self._provider.get_public_url(key),
+                metadata=metadata,
+            )
+        else:
+            result = await self._provider.save_image(
+                key, image, metadata=metadata, content_type=content_type
+            )
 
         # Update history index
         await self._update_history(result, metadata)
@@ -184,6 +266,60 @@ class StorageManager:
         """
         return await self._provider.load(key)
 
+    def stream_image(
+        self, key: str, start: int = 0, length: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream image bytes from storage in configured-size chunks.
+
+        Args:
+            key: Storage key
+            start: Offset of the first byte to read
+            length: Number of bytes to read (None reads to the end)
+
+        Returns:
+            Async iterator of byte chunks (empty if not found)
+        """
+        return self._provider.stream(key, start=start, length=length)
+
+    async def head_image(self, key: str) -> StorageObject | None:
+        """
+        Get an image's size, type and ETag without reading it.
+
+        Args:
+            key: Storage key
+
+        Returns:
+            StorageObject or None if not found
+        """
+        return await self._provider.head(key)
+
+    def local_image_path(self, key: str) -> Path | None:
+        """
+        Get the file path of an image when it is stored on local disk.
+
+        Args:
+            key: Storage key
+
+        Returns:
+            File path, or None for remote backends or missing images
+        """
+        return self._provider.local_path(key)
+
+    @staticmethod
+    def etag_from_key(key: str) -> str | None:
+        """
+        Get the ETag of a content-addressed key without touching storage.
+
+        Args:
+            key: Storage key
+
+        Returns:
+            Quoted ETag, or None if the key is not content-addressed
+        """
+        match = _CONTENT_KEY_RE.search(key)
+        return f'"{match.group(1)}"' if match else None
+
     def get_public_url(self, key: str) -> str | None:
         """
         Get public URL for an image.
@@ -211,36 +347,109 @@ class StorageManager:
         if deleted:
             # Remove from history
             await self._remove_from_history(key)
+            # Drop any stored thumbnails/variants of it
+            await asyncio.gather(*(self._provider.delete(v) for v in variant_keys(key)))
 
         return deleted
 
-    async def get_history(self, limit: int = 50) -> list[dict[str, Any]]:
+    async def _get_history_store(self) -> HistoryStore | BucketHistoryStore:
+        """Get the history store, importing a legacy history.json on first use."""
+        if not self._history_ready:
+            async with self._history_lock:
+                if not self._history_ready:
+                    await self._migrate_legacy_history()
+                    self._history_ready = True
+        return self._history
+
+    async def _migrate_legacy_history(self):
+        """
+        Import records from history.json into the history store once.
+
+        The migration is only marked done after the file was imported (or
+        found not to exist), so an unreadable file is retried next time
+        instead of being silently dropped.
+        """
+        if await self._history.get_meta(LEGACY_MIGRATED_KEY):
+            return
+
+        history_key = self._get_history_key()
+        if await self._provider.exists(history_key):
+            data = await self._provider.load(history_key)
+            try:
+                records = json.loads(data.decode("utf-8")) if data else None
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                records = None
+            if not isinstance(records, list):
+                logger.error(f"Failed to read {history_key}, will retry migration")
+                return
+
+            # history.json is newest-first; the store appends oldest-first
+            count = await self._history.import_records(list(reversed(records)))
+            logger.info(f"Migrated {count} records from {history_key}")
+
+        await self._history.set_meta(LEGACY_MIGRATED_KEY, datetime.now().isoformat())
+
+    async def get_history(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        mode: str | None = None,
+        media_type: str | None = None,
+        search: str | None = None,
+        oldest_first: bool = False,
+        cursor: int | None = None,
+    ) -> list[dict[str, Any]]:
         """
-        Get image history.
+        Get image history, newest first by default.
+
+        Prefer cursor over offset for deep pages: the cursor is a keyset seek,
+        while offset still has to step over every skipped record.
 
         Args:
             limit: Maximum number of records to return
+            offset: Number of matching records to skip
+            mode: Filter by generation mode
+            media_type: Filter by media type
+            search: Case-insensitive substring match on the prompt
+            oldest_first: Return oldest records first
+            cursor: "seq" of the last record of the previous page
 
         Returns:
-            List of history records
+            List of history records, each with its "seq"
         """
-        if self._history_cache is not None:
-            return self._history_cache[:limit]
+        store = await self._get_history_store()
+        return await store.query(limit, offset, mode, media_type, search, oldest_first, cursor)
 
-        # Load from storage
-        history_key = self._get_history_key()
-        data = await self._provider.load(history_key)
+    async def count_history(
+        self,
+        mode: str | None = None,
+        media_type: str | None = None,
+        search: str | None = None,
+    ) -> int:
+        """
+        Count history records matching the given filters.
 
-        if data:
-            try:
-                self._history_cache = json.loads(data.decode("utf-8"))
-            except (json.JSONDecodeError, UnicodeDecodeError):
-                logger.error("Failed to parse history.json")
-                self._history_cache = []
-        else:
-            self._history_cache = []
+        Args:
+            mode: Filter by generation mode
+            media_type: Filter by media type
+            search: Case-insensitive substring match on the prompt
+
+        Returns:
+            Number of matching records
+        """
+        store = await self._get_history_store()
+        return await store.count(mode, media_type, search)
 
-        return self._history_cache[:limit]
+    async def get_history_stats(self) -> dict[str, Any]:
+        """
+        Get aggregate history statistics.
+
+        Returns:
+            Dict with total_images, images_by_mode, total_duration,
+            average_duration, earliest_date and latest_date
+        """
+        store = await self._get_history_store()
+        return await store.stats()
 
     async def get_history_item(self, item_id: str) -> dict[str, Any] | None:
         """
@@ -252,13 +461,8 @@ class StorageManager:
         Returns:
             History record or None
         """
-        history = await self.get_history(limit=100)
-
-        for record in history:
-            if record.get("key") == item_id or record.get("filename") == item_id:
-                return record
-
-        return None
+        store = await self._get_history_store()
+        return await store.get(item_id)
 
     async def _update_history(self, obj: StorageObject, metadata: dict[str, Any]):
         """
@@ -269,8 +473,6 @@ class StorageManager:
             metadata: Associated metadata
         """
         try:
-            history = await self.get_history(limit=100)
-
             record = {
                 "key": obj.key,
                 "filename": obj.filename,
@@ -297,18 +499,8 @@ class StorageManager:
             if metadata.get("chat_index") is not None:
                 record["chat_index"] = metadata["chat_index"]
 
-            history.insert(0, record)
-            history = history[:100]  # Keep last 100 records
-
-            self._history_cache = history
-
-            # Save updated history
-            history_key = self._get_history_key()
-            await self._provider.save(
-                history_key,
-                json.dumps(history, ensure_ascii=False, indent=2).encode("utf-8"),
-                "application/json",
-            )
+            store = await self._get_history_store()
+            await store.add(record)
 
         except Exception as e:
             logger.error(f"Failed to update history: {e}")
@@ -321,39 +513,20 @@ class StorageManager:
             key: Storage key to remove
         """
         try:
-            history = await self.get_history(limit=100)
-            history = [r for r in history if r.get("key") != key]
-
-            self._history_cache = history
-
-            # Save updated history
-            history_key = self._get_history_key()
-            await self._provider.save(
-                history_key,
-                json.dumps(history, ensure_ascii=False, indent=2).encode("utf-8"),
-                "application/json",
-            )
-
+            store = await self._get_history_store()
+            await store.remove(key)
         except Exception as e:
             logger.error(f"Failed to remove from history: {e}")
 
     async def clear_history(self):
         """Clear all images and history for the current user."""
-        # Get current history
-        history = await self.get_history(limit=1000)
+        store = await self._get_history_store()
 
         # Delete all images
-        for record in history:
-            key = record.get("key")
-            if key:
-                await self._provider.delete(key)
-
-        # Delete history file
-        history_key = self._get_history_key()
-        await self._provider.delete(history_key)
-
-        self._history_cache = []
+        for key in await store.keys():
+            await self._provider.delete(key)
 
-    def invalidate_cache(self):
-        """Invalidate the history cache."""
-        self._history_cache = None
+        # Delete history index and legacy history file
+        await store.clear()
+        if isinstance(store, HistoryStore):
+            await self._provider.delete(self._get_history_key())
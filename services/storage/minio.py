@@ -6,16 +6,19 @@ Suitable for self-hosted object storage deployments.
 """
 
 import logging
+from collections.abc import AsyncIterator
 from datetime import datetime, timedelta
 from io import BytesIO
 from typing import Any
 
-from .base import StorageConfig, StorageObject, StorageProvider
+from .base import CONTENT_HASH_FIELD, StorageConfig, StorageObject, StorageProvider, content_hash
+from .executor import run_blocking
 
 logger = logging.getLogger(__name__)
 
 # Try to import minio
 try:
+    import urllib3
     from minio import Minio
     from minio.error import S3Error
 
@@ -24,6 +27,10 @@ except ImportError:
     MINIO_AVAILABLE = False
     Minio = None
     S3Error = Exception
+    urllib3 = None
+
+# S3 rejects multipart parts smaller than 5MB (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
 
 
 class MinIOStorageProvider(StorageProvider):
@@ -64,11 +71,23 @@ class MinIOStorageProvider(StorageProvider):
             elif endpoint.startswith("https://"):
                 endpoint = endpoint[8:]
 
+            # Size the HTTP pool to match the I/O threads so concurrent
+            # uploads reuse connections instead of queueing for one
+            http_client = urllib3.PoolManager(
+                maxsize=self.config.io_workers,
+                block=True,
+                timeout=urllib3.Timeout(connect=10, read=300),
+                retries=urllib3.Retry(
+                    total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]
+                ),
+            )
+
             self._client = Minio(
                 endpoint=endpoint,
                 access_key=self.config.access_key,
                 secret_key=self.config.secret_key,
                 secure=self.config.use_ssl,
+                http_client=http_client,
             )
 
             # Ensure bucket exists
@@ -127,14 +146,24 @@ class MinIOStorageProvider(StorageProvider):
                         # URL-encode to handle non-ASCII characters
                         value = str(v)[:256]
                         minio_metadata[k] = urllib.parse.quote(value, safe="")
+            digest = content_hash(data)
+            minio_metadata[CONTENT_HASH_FIELD] = digest
 
-            self._client.put_object(
+            # The SDK switches to multipart upload once the object is
+            # larger than part_size
+            part_size = max(self.config.multipart_part_size, MIN_PART_SIZE)
+            if len(data) < self.config.multipart_threshold:
+                part_size = max(part_size, len(data))
+
+            await run_blocking(
+                self._client.put_object,
                 self.bucket,
                 key,
                 BytesIO(data),
                 len(data),
                 content_type=content_type,
-                metadata=minio_metadata if minio_metadata else None,
+                metadata=minio_metadata,
+                part_size=part_size,
             )
 
             logger.debug(f"Saved file to MinIO: {key}")
@@ -147,6 +176,7 @@ class MinIOStorageProvider(StorageProvider):
                 created_at=datetime.now().isoformat(),
                 public_url=self.get_public_url(key),
                 metadata=metadata or {},
+                etag=f'"{digest}"',
             )
 
         except S3Error as e:
@@ -167,17 +197,96 @@ class MinIOStorageProvider(StorageProvider):
             return None
 
         try:
-            response = self._client.get_object(self.bucket, key)
-            data = response.read()
-            response.close()
-            response.release_conn()
-            return data
+            return await run_blocking(self._get_object_bytes, key)
         except S3Error as e:
             if e.code == "NoSuchKey":
                 return None
             logger.error(f"Failed to load from MinIO: {e}")
             return None
 
+    def _get_object_bytes(self, key: str) -> bytes:
+        """Download a whole object (runs on the storage executor)."""
+        response = self._client.get_object(self.bucket, key)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    async def stream(
+        self,
+        key: str,
+        chunk_size: int | None = None,
+        start: int = 0,
+        length: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream an object from MinIO in chunks.
+
+        Args:
+            key: Storage key/path
+            chunk_size: Maximum bytes per yielded chunk (defaults to config)
+            start: Offset of the first byte to read
+            length: Number of bytes to read (None reads to the end)
+
+        Yields:
+            Chunks of raw bytes (nothing if not found)
+        """
+        if not self.is_available:
+            return
+
+        chunk_size = chunk_size or self.config.stream_chunk_size
+        try:
+            # A ranged GET, so only the requested bytes leave the bucket
+            response = await run_blocking(
+                self._client.get_object, self.bucket, key, offset=start, length=length or 0
+            )
+        except S3Error as e:
+            if e.code != "NoSuchKey":
+                logger.error(f"Failed to stream from MinIO: {e}")
+            return
+
+        try:
+            while chunk := await run_blocking(response.read, chunk_size):
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
+
+    async def head(self, key: str) -> StorageObject | None:
+        """
+        Get an object's size, type and ETag with a HEAD request.
+
+        Args:
+            key: Storage key/path
+
+        Returns:
+            StorageObject or None if not found
+        """
+        if not self.is_available:
+            return None
+
+        try:
+            stat = await run_blocking(self._client.stat_object, self.bucket, key)
+        except S3Error as e:
+            if e.code not in ("NoSuchKey", "NoSuchObject"):
+                logger.error(f"Failed to stat MinIO object: {e}")
+            return None
+
+        # Objects saved before content hashes were recorded fall back to
+        # the S3 ETag (an MD5 for single-part uploads)
+        digest = (stat.metadata or {}).get(f"x-amz-meta-{CONTENT_HASH_FIELD}")
+        return StorageObject(
+            key=key,
+            filename=key.split("/")[-1],
+            size=stat.size or 0,
+            content_type=stat.content_type or "application/octet-stream",
+            created_at=stat.last_modified.isoformat() if stat.last_modified else "",
+            public_url=self.get_public_url(key),
+            etag=f'"{digest or stat.etag}"',
+            last_modified=stat.last_modified.timestamp() if stat.last_modified else None,
+        )
+
     async def delete(self, key: str) -> bool:
         """
         Delete file from MinIO.
@@ -192,7 +301,7 @@ class MinIOStorageProvider(StorageProvider):
             return False
 
         try:
-            self._client.remove_object(self.bucket, key)
+            await run_blocking(self._client.remove_object, self.bucket, key)
             logger.debug(f"Deleted file from MinIO: {key}")
             return True
         except S3Error as e:
@@ -213,7 +322,7 @@ class MinIOStorageProvider(StorageProvider):
             return False
 
         try:
-            self._client.stat_object(self.bucket, key)
+            await run_blocking(self._client.stat_object, self.bucket, key)
             return True
         except S3Error:
             return False
@@ -255,14 +364,18 @@ class MinIOStorageProvider(StorageProvider):
         if not self.is_available:
             return []
 
-        keys = []
         try:
-            objects = self._client.list_objects(self.bucket, prefix=prefix, recursive=True)
-            for obj in objects:
-                keys.append(obj.object_name)
-                if len(keys) >= limit:
-                    break
+            return await run_blocking(self._list_keys, prefix, limit)
         except S3Error as e:
             logger.error(f"Failed to list objects: {e}")
+            return []
 
+    def _list_keys(self, prefix: str, limit: int) -> list[str]:
+        """List object keys (runs on the storage executor)."""
+        keys = []
+        objects = self._client.list_objects(self.bucket, prefix=prefix, recursive=True)
+        for obj in objects:
+            keys.append(obj.object_name)
+            if len(keys) >= limit:
+                break
         return keys
@@ -6,10 +6,12 @@ Suitable for China-based deployments with good domestic performance.
 """
 
 import logging
+from collections.abc import AsyncIterator
 from datetime import datetime
 from typing import Any
 
-from .base import StorageConfig, StorageObject, StorageProvider
+from .base import CONTENT_HASH_FIELD, StorageConfig, StorageObject, StorageProvider, content_hash
+from .executor import run_blocking
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +26,9 @@ except ImportError:
     oss2 = None
     NoSuchKey = Exception
 
+# OSS rejects multipart parts smaller than 100KB (except the last one)
+MIN_PART_SIZE = 100 * 1024
+
 
 class AliyunOSSProvider(StorageProvider):
     """Alibaba Cloud OSS storage provider."""
@@ -64,6 +69,9 @@ class AliyunOSSProvider(StorageProvider):
             if not endpoint.startswith("http"):
                 endpoint = f"https://{endpoint}"
 
+            # Size the HTTP pool to match the I/O threads so concurrent
+            # uploads reuse connections instead of queueing for one
+            oss2.defaults.connection_pool_size = self.config.io_workers
             self._bucket = oss2.Bucket(auth, endpoint, self.bucket_name)
             self._available = True
             logger.info(f"Alibaba OSS client initialized for bucket: {self.bucket_name}")
@@ -118,8 +126,13 @@ class AliyunOSSProvider(StorageProvider):
                     if v is not None:
                         # OSS custom headers must start with x-oss-meta-
                         headers[f"x-oss-meta-{k}"] = str(v)[:256]
+            digest = content_hash(data)
+            headers[f"x-oss-meta-{CONTENT_HASH_FIELD}"] = digest
 
-            self._bucket.put_object(key, data, headers=headers)
+            if len(data) >= self.config.multipart_threshold:
+                await run_blocking(self._put_multipart, key, data, headers)
+            else:
+                await run_blocking(self._bucket.put_object, key, data, headers=headers)
 
             logger.debug(f"Saved file to OSS: {key}")
 
@@ -131,6 +144,7 @@ class AliyunOSSProvider(StorageProvider):
                 created_at=datetime.now().isoformat(),
                 public_url=self.get_public_url(key),
                 metadata=metadata or {},
+                etag=f'"{digest}"',
             )
 
         except Exception as e:
@@ -151,14 +165,111 @@ class AliyunOSSProvider(StorageProvider):
             return None
 
         try:
-            result = self._bucket.get_object(key)
-            return result.read()
+            return await run_blocking(self._get_object_bytes, key)
         except NoSuchKey:
             return None
         except Exception as e:
             logger.error(f"Failed to load from OSS: {e}")
             return None
 
+    def _put_multipart(self, key: str, data: bytes, headers: dict[str, str]):
+        """Upload a large object in parts (runs on the storage executor)."""
+        part_size = max(self.config.multipart_part_size, MIN_PART_SIZE)
+        upload_id = self._bucket.init_multipart_upload(key, headers=headers).upload_id
+        try:
+            parts = []
+            for number, offset in enumerate(range(0, len(data), part_size), start=1):
+                result = self._bucket.upload_part(
+                    key, upload_id, number, data[offset : offset + part_size]
+                )
+                parts.append(oss2.models.PartInfo(number, result.etag))
+            self._bucket.complete_multipart_upload(key, upload_id, parts)
+        except Exception:
+            self._bucket.abort_multipart_upload(key, upload_id)
+            raise
+
+    def _get_object_bytes(self, key: str) -> bytes:
+        """Download a whole object (runs on the storage executor)."""
+        return self._bucket.get_object(key).read()
+
+    async def stream(
+        self,
+        key: str,
+        chunk_size: int | None = None,
+        start: int = 0,
+        length: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream an object from OSS in chunks.
+
+        Args:
+            key: Storage key/path
+            chunk_size: Maximum bytes per yielded chunk (defaults to config)
+            start: Offset of the first byte to read
+            length: Number of bytes to read (None reads to the end)
+
+        Yields:
+            Chunks of raw bytes (nothing if not found)
+        """
+        if not self.is_available:
+            return
+
+        chunk_size = chunk_size or self.config.stream_chunk_size
+        byte_range = None
+        if start or length is not None:
+            # Inclusive bounds; None reads to the end
+            byte_range = (start, start + length - 1 if length is not None else None)
+        try:
+            result = await run_blocking(self._bucket.get_object, key, byte_range=byte_range)
+        except NoSuchKey:
+            return
+        except Exception as e:
+            logger.error(f"Failed to stream from OSS: {e}")
+            return
+
+        try:
+            while chunk := await run_blocking(result.read, chunk_size):
+                yield chunk
+        finally:
+            result.close()
+
+    async def head(self, key: str) -> StorageObject | None:
+        """
+        Get an object's size, type and ETag with a HEAD request.
+
+        Args:
+            key: Storage key/path
+
+        Returns:
+            StorageObject or None if not found
+        """
+        if not self.is_available:
+            return None
+
+        try:
+            result = await run_blocking(self._bucket.head_object, key)
+        except NoSuchKey:
+            return None
+        except Exception as e:
+            if getattr(e, "status", None) != 404:
+                logger.error(f"Failed to stat OSS object: {e}")
+            return None
+
+        # Objects saved before content hashes were recorded fall back to the OSS ETag
+        digest = result.headers.get(f"x-oss-meta-{CONTENT_HASH_FIELD}") or result.etag.strip('"')
+        return StorageObject(
+            key=key,
+            filename=key.split("/")[-1],
+            size=result.content_length or 0,
+            content_type=result.content_type or "application/octet-stream",
+            created_at=datetime.fromtimestamp(result.last_modified).isoformat()
+            if result.last_modified
+            else "",
+            public_url=self.get_public_url(key),
+            etag=f'"{digest}"',
+            last_modified=float(result.last_modified) if result.last_modified else None,
+        )
+
     async def delete(self, key: str) -> bool:
         """
         Delete file from OSS.
@@ -173,7 +284,7 @@ class AliyunOSSProvider(StorageProvider):
             return False
 
         try:
-            self._bucket.delete_object(key)
+            await run_blocking(self._bucket.delete_object, key)
             logger.debug(f"Deleted file from OSS: {key}")
             return True
         except Exception as e:
@@ -194,7 +305,7 @@ class AliyunOSSProvider(StorageProvider):
             return False
 
         try:
-            return self._bucket.object_exists(key)
+            return await run_blocking(self._bucket.object_exists, key)
         except Exception:
             return False
 
@@ -233,14 +344,18 @@ class AliyunOSSProvider(StorageProvider):
         if not self.is_available:
             return []
 
-        keys = []
         try:
-            # Use iterator for listing
-            for obj in oss2.ObjectIterator(self._bucket, prefix=prefix):
-                keys.append(obj.key)
-                if len(keys) >= limit:
-                    break
+            return await run_blocking(self._list_keys, prefix, limit)
         except Exception as e:
             logger.error(f"Failed to list objects: {e}")
+            return []
 
+    def _list_keys(self, prefix: str, limit: int) -> list[str]:
+        """List object keys (runs on the storage executor)."""
+        keys = []
+        # Use iterator for listing
+        for obj in oss2.ObjectIterator(self._bucket, prefix=prefix):
+            keys.append(obj.key)
+            if len(keys) >= limit:
+                break
         return keys
@@ -0,0 +1,211 @@
+"""
+Downscaled image variants (thumbnails and responsive widths).
+
+Grid views only need small images, so each stored image can be served at a
+few standard widths as WebP (or AVIF when Pillow supports it). Variants are
+produced lazily on first request and stored next to the original under a
+deterministic key:
+
+    users/u1/2026/10/16/basic_120000_cat.png
+    users/u1/2026/10/16/basic_120000_cat.w256.webp
+
+Once stored, a variant is an ordinary object and is served (and cached) like
+any other. Decoding and resizing run on a small process pool so large PNGs
+do not hold the GIL of the API worker; JPEG sources are decoded at reduced
+scale (draft mode) and other formats are shrunk with Image.reduce before the
+final resample.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+from PIL import Image, features
+
+if TYPE_CHECKING:
+    from .manager import StorageManager
+
+logger = logging.getLogger(__name__)
+
+# Standard widths; requests for other widths are rejected so the number of
+# stored variants per image stays bounded
+VARIANT_WIDTHS = (256, 512, 1024)
+THUMBNAIL_WIDTH = 256
+
+VARIANT_FORMATS = {"webp": "image/webp", "avif": "image/avif"}
+_QUALITY = {"webp": 80, "avif": 60}
+
+_VARIANT_KEY_RE = re.compile(r"\.w\d+\.(?:webp|avif)$")
+
+_variant_executor: ProcessPoolExecutor | None = None
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def supported_formats() -> list[str]:
+    """Variant formats the installed Pillow can encode."""
+    return [fmt for fmt in VARIANT_FORMATS if features.check(fmt)]
+
+
+def variant_key(key: str, width: int, fmt: str = "webp") -> str:
+    """
+    Get the storage key of an image variant.
+
+    Args:
+        key: Storage key of the original image
+        width: Variant width in pixels
+        fmt: Variant format (webp or avif)
+
+    Returns:
+        Variant storage key
+    """
+    stem, dot, ext = key.rpartition(".")
+    if not dot or "/" in ext:
+        stem = key
+    return f"{stem}.w{width}.{fmt}"
+
+
+def variant_keys(key: str) -> list[str]:
+    """All possible variant keys of an image (used when deleting it)."""
+    return [variant_key(key, width, fmt) for width in VARIANT_WIDTHS for fmt in VARIANT_FORMATS]
+
+
+def is_variant_key(key: str) -> bool:
+    """Whether a key names a variant rather than an original."""
+    return _VARIANT_KEY_RE.search(key) is not None
+
+
+def thumbnail_url(key: str | None, media_type: str = "image") -> str | None:
+    """
+    Get the URL of an image's grid thumbnail.
+
+    Args:
+        key: Storage key of the original image
+        media_type: Media type of the original (videos have no thumbnail)
+
+    Returns:
+        API path serving the thumbnail, or None
+    """
+    if not key or media_type != "image":
+        return None
+    return f"/api/images/{key}?w={THUMBNAIL_WIDTH}"
+
+
+def render_variant(data: bytes, width: int, fmt: str = "webp") -> bytes:
+    """
+    Decode an image, shrink it to a width and encode it.
+
+    Images narrower than the width are re-encoded at their own size; they are
+    never upscaled. Runs in a worker process.
+
+    Args:
+        data: Encoded original image
+        width: Target width in pixels
+        fmt: Output format (webp or avif)
+
+    Returns:
+        Encoded variant bytes
+
+    Raises:
+        PIL.UnidentifiedImageError: If data is not a decodable image
+    """
+    with Image.open(BytesIO(data)) as image:
+        if image.format == "JPEG":
+            # Let libjpeg decode at 1/2, 1/4 or 1/8 scale
+            image.draft("RGB", (width, max(1, width * image.height // image.width)))
+        image.load()
+
+        if image.width > width:
+            factor = image.width // width
+            if factor >= 2:
+                image = image.reduce(factor)
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+
+        has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+        buffer = BytesIO()
+        image.save(buffer, format=fmt.upper(), quality=_QUALITY[fmt])
+        return buffer.getvalue()
+
+
+def get_variant_executor() -> ProcessPoolExecutor:
+    """
+    Get the process pool that renders variants, creating it on first use.
+
+    The pool size comes from the image_variant_workers setting. Workers are
+    spawned rather than forked so they do not inherit the API worker's
+    threads and event loop.
+
+    Returns:
+        ProcessPoolExecutor instance
+    """
+    global _variant_executor
+
+    if _variant_executor is None:
+        from core.config import get_settings
+
+        workers = get_settings().image_variant_workers
+        _variant_executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        logger.info(f"Image variant executor started with {workers} workers")
+
+    return _variant_executor
+
+
+def shutdown_variant_executor(wait: bool = True):
+    """Shut down the variant process pool if it was started."""
+    global _variant_executor
+
+    if _variant_executor is not None:
+        _variant_executor.shutdown(wait=wait, cancel_futures=True)
+        _variant_executor = None
+        logger.info("Image variant executor shut down")
+
+
+async def _create_variant(storage: "StorageManager", key: str, width: int, fmt: str) -> str | None:
+    data = await storage.load_image_bytes(key)
+    if data is None:
+        return None
+
+    loop = asyncio.get_running_loop()
+    encoded = await loop.run_in_executor(get_variant_executor(), render_variant, data, width, fmt)
+
+    target = variant_key(key, width, fmt)
+    await storage.provider.save(target, encoded, content_type=VARIANT_FORMATS[fmt])
+    logger.debug(f"Stored variant {target} ({len(data)} -> {len(encoded)} bytes)")
+    return target
+
+
+async def create_variant(
+    storage: "StorageManager", key: str, width: int, fmt: str = "webp"
+) -> str | None:
+    """
+    Render and store a variant of an image.
+
+    Concurrent requests for the same variant share one render.
+
+    Args:
+        storage: Storage manager holding the original
+        key: Storage key of the original image
+        width: Variant width (one of VARIANT_WIDTHS)
+        fmt: Variant format (one of supported_formats())
+
+    Returns:
+        Variant storage key, or None if the original does not exist
+
+    Raises:
+        PIL.UnidentifiedImageError: If the original is not a decodable image
+    """
+    target = variant_key(key, width, fmt)
+    task = _inflight.get(target)
+    if task is None:
+        task = asyncio.create_task(_create_variant(storage, key, width, fmt))
+        _inflight[target] = task
+        task.add_done_callback(lambda _: _inflight.pop(target, None))
+    return await asyncio.shield(task)
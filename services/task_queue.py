@@ -0,0 +1,140 @@
+"""
+Durable job queue for generation tasks.
+
+Generation work is enqueued on ARQ so that it survives API restarts and runs
+on a worker tier that scales independently of the API (see api.workers).
+Single-image and image-operation jobs share the generation queue; batches get
+their own queue so a large batch cannot starve interactive requests.
+
+Job IDs are the task IDs: enqueuing the same task twice is a no-op, and a job
+retried after a worker crash checks the task hash and skips tasks that
+already reached a final status.
+
+Without an ARQ pool (or with task_queue_enabled off) jobs fall back to
+FastAPI BackgroundTasks in the API process.
+"""
+
+import logging
+from collections.abc import Awaitable, Callable
+from enum import StrEnum
+from typing import Any
+
+from arq.connections import ArqRedis
+from fastapi import BackgroundTasks
+
+from core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+GENERATION_QUEUE = "arq:generation"
+BATCH_QUEUE = "arq:batch"
+
+# Task statuses after which a job must not run again
+TERMINAL_STATUSES = frozenset({"completed", "failed", "cancelled"})
+
+
+class GenerationJob(StrEnum):
+    """Generation job names (also the ARQ function names)."""
+
+    RACE = "generation_race"
+    IMAGE = "image_task"
+    BATCH = "batch_generation"
+
+
+JOB_QUEUES: dict[GenerationJob, str] = {
+    GenerationJob.RACE: GENERATION_QUEUE,
+    GenerationJob.IMAGE: GENERATION_QUEUE,
+    GenerationJob.BATCH: BATCH_QUEUE,
+}
+
+
+def get_job_function(job: GenerationJob) -> Callable[..., Awaitable[None]]:
+    """Get the coroutine that executes a job."""
+    if job == GenerationJob.RACE:
+        from .generation_task import execute_generation_race
+
+        return execute_generation_race
+    if job == GenerationJob.IMAGE:
+        from .image_task import execute_image_task
+
+        return execute_image_task
+
+    from .batch_task import execute_batch_generation
+
+    return execute_batch_generation
+
+
+class TaskQueue:
+    """Enqueues generation jobs on ARQ, or in-process when no pool is available."""
+
+    def __init__(self, pool: ArqRedis | None, background_tasks: BackgroundTasks):
+        """
+        Initialize task queue.
+
+        Args:
+            pool: ARQ Redis pool, or None to run jobs in the API process
+            background_tasks: Request background tasks used as the fallback
+        """
+        self._pool = pool
+        self._background_tasks = background_tasks
+
+    @property
+    def uses_workers(self) -> bool:
+        """Whether jobs are dispatched to ARQ workers."""
+        return self._pool is not None
+
+    async def enqueue(self, job: GenerationJob, task_id: str, **kwargs: Any) -> bool:
+        """
+        Enqueue a generation job.
+
+        Args:
+            job: Job to run
+            task_id: Task ID, also used as the ARQ job ID
+            **kwargs: Keyword arguments for the job function
+
+        Returns:
+            False if a job with this task ID was already queued
+        """
+        if self._pool is not None:
+            try:
+                handle = await self._pool.enqueue_job(
+                    job.value,
+                    _job_id=task_id,
+                    _queue_name=JOB_QUEUES[job],
+                    task_id=task_id,
+                    **kwargs,
+                )
+            except Exception as e:
+                logger.warning(f"Failed to enqueue {job} job {task_id}, running in process: {e}")
+            else:
+                if handle is None:
+                    logger.info(f"Job {task_id} is already queued")
+                    return False
+                return True
+
+        self._background_tasks.add_task(get_job_function(job), task_id=task_id, **kwargs)
+        return True
+
+
+async def run_job_once(job: GenerationJob, task_id: str, **kwargs: Any) -> bool:
+    """
+    Run a job unless its task already reached a final status.
+
+    Called by the ARQ worker functions so that retries are idempotent.
+
+    Args:
+        job: Job to run
+        task_id: Task ID
+        **kwargs: Keyword arguments for the job function
+
+    Returns:
+        True if the job ran
+    """
+    redis = await get_redis()
+    status = await redis.hget(f"task:{task_id}", "status")
+    if status in TERMINAL_STATUSES:
+        logger.info(f"Skipping {job} job {task_id}: task already {status}")
+        return False
+
+    await get_job_function(job)(task_id=task_id, **kwargs)
+    return True
@@ -0,0 +1,196 @@
+"""
+Cache of auth-service users resolved to local database users.
+
+Every authenticated request needs the database UUID of its user. Syncing the
+user (SELECT, UPDATE of profile fields and last_login_at, commit) on each
+request put a write transaction on nearly every API call. This cache maps
+auth_id to the database UUID in a per-process LRU and in Redis, together
+with a fingerprint of the profile fields (email, name, avatar) the user was
+last synced with:
+
+- a hit with the same fingerprint returns the UUID without touching the
+  database;
+- a changed fingerprint (the user edited their profile) or an expired entry
+  runs the sync again, so last_login_at is refreshed about once per TTL;
+- concurrent misses for the same user and fingerprint in one process share
+  a single sync.
+
+Without Redis the in-process tier keeps working on its own.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+from uuid import UUID
+
+from core.config import get_settings
+from core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "authuser"
+
+
+def profile_fingerprint(email: str | None, name: str | None, avatar_url: str | None) -> str:
+    """Hash of the profile fields copied from the token into the users table."""
+    payload = json.dumps([email, name, avatar_url], ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class UserCache:
+    """In-process LRU in front of a Redis map of auth_id to database user UUID."""
+
+    def __init__(self, enabled: bool = True, ttl: int = 300, local_size: int = 10000):
+        """
+        Initialize cache.
+
+        Args:
+            enabled: Whether to cache at all
+            ttl: Seconds an entry lives in either tier
+            local_size: Entries kept in the in-process LRU
+        """
+        self.enabled = enabled
+        self.ttl = ttl
+        self.local_size = local_size
+        self._local: OrderedDict[str, tuple[float, str, UUID]] = OrderedDict()
+        self._inflight: dict[tuple[str, str], asyncio.Future] = {}
+        self._stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "coalesced": 0}
+
+    def _get_local(self, auth_id: str, fingerprint: str) -> UUID | None:
+        entry = self._local.get(auth_id)
+        if entry is None:
+            return None
+        expires_at, cached_fingerprint, user_id = entry
+        if expires_at < time.monotonic():
+            del self._local[auth_id]
+            return None
+        if cached_fingerprint != fingerprint:
+            return None
+        self._local.move_to_end(auth_id)
+        return user_id
+
+    def _set_local(self, auth_id: str, fingerprint: str, user_id: UUID) -> None:
+        self._local[auth_id] = (time.monotonic() + self.ttl, fingerprint, user_id)
+        self._local.move_to_end(auth_id)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    async def _get_redis(self, auth_id: str, fingerprint: str) -> UUID | None:
+        try:
+            redis = await get_redis()
+            raw = await redis.get(f"{KEY_PREFIX}:{auth_id}")
+        except Exception as e:
+            logger.debug(f"User cache read failed: {e}")
+            return None
+        if not raw:
+            return None
+        try:
+            entry = json.loads(raw)
+            if entry["fp"] != fingerprint:
+                return None
+            return UUID(entry["id"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    async def _set_redis(self, auth_id: str, fingerprint: str, user_id: UUID) -> None:
+        try:
+            redis = await get_redis()
+            await redis.set(
+                f"{KEY_PREFIX}:{auth_id}",
+                json.dumps({"id": str(user_id), "fp": fingerprint}),
+                ex=self.ttl,
+            )
+        except Exception as e:
+            logger.debug(f"User cache write failed: {e}")
+
+    async def resolve(
+        self,
+        auth_id: str,
+        fingerprint: str,
+        sync: Callable[[], Awaitable[UUID]],
+    ) -> UUID:
+        """
+        Return the database UUID of a user, syncing the user on a miss.
+
+        Args:
+            auth_id: auth-service user ID (JWT sub)
+            fingerprint: profile_fingerprint() of the token's profile fields
+            sync: Coroutine factory that upserts the user, commits and returns its UUID
+
+        Returns:
+            Database user UUID
+        """
+        if not self.enabled:
+            return await sync()
+
+        user_id = self._get_local(auth_id, fingerprint)
+        if user_id is not None:
+            self._stats["local_hits"] += 1
+            return user_id
+
+        key = (auth_id, fingerprint)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            user_id = await self._get_redis(auth_id, fingerprint)
+            if user_id is not None:
+                self._stats["redis_hits"] += 1
+            else:
+                self._stats["misses"] += 1
+                user_id = await sync()
+                await self._set_redis(auth_id, fingerprint, user_id)
+            self._set_local(auth_id, fingerprint, user_id)
+            future.set_result(user_id)
+            return user_id
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters re-raise it; don't warn about an unretrieved exception
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def invalidate(self, auth_id: str) -> None:
+        """Forget a user everywhere (e.g. after the database row changed)."""
+        self._local.pop(auth_id, None)
+        try:
+            redis = await get_redis()
+            await redis.delete(f"{KEY_PREFIX}:{auth_id}")
+        except Exception as e:
+            logger.debug(f"User cache invalidation failed: {e}")
+
+    def get_stats(self) -> dict[str, Any]:
+        """Hit/miss counters for this process."""
+        hits = self._stats["local_hits"] + self._stats["redis_hits"] + self._stats["coalesced"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "local_entries": len(self._local),
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+_user_cache: UserCache | None = None
+
+
+def get_user_cache() -> UserCache:
+    """Get the global user cache."""
+    global _user_cache
+    if _user_cache is None:
+        settings = get_settings()
+        _user_cache = UserCache(
+            enabled=settings.user_cache_enabled,
+            ttl=settings.user_cache_ttl,
+            local_size=settings.user_cache_local_size,
+        )
+    return _user_cache
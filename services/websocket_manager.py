@@ -2,9 +2,13 @@
 WebSocket connection manager for real-time updates.
 
 Handles WebSocket connections, subscriptions, and message broadcasting.
+When a Redis relay is started, events are fanned out through Redis so that
+sockets connected to any API node receive them.
 """
 
 import asyncio
+import contextlib
+import json
 import logging
 import time
 from dataclasses import dataclass, field
@@ -13,6 +17,11 @@ from typing import Any
 from uuid import uuid4
 
 from fastapi import WebSocket
+from redis.asyncio import Redis
+
+from core.config import SlowConsumerPolicy, get_settings
+
+from .websocket_relay import ALL_TOPIC, WebSocketRelay, channel_topic, user_topic
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +29,10 @@ logger = logging.getLogger(__name__)
 STALE_CHECK_INTERVAL = 60  # seconds between cleanup checks
 STALE_TIMEOUT = 90  # seconds before a connection is considered stale
 
+# Outbound queue constants
+SEND_QUEUE_SIZE = 256  # messages buffered per connection before the slow-consumer policy applies
+SEND_TIMEOUT = 10  # seconds a single frame write may take before the socket is dropped
+
 
 @dataclass
 class Connection:
@@ -31,6 +44,16 @@ class Connection:
     subscriptions: set[str] = field(default_factory=set)
     connected_at: datetime = field(default_factory=datetime.now)
     last_ping: datetime = field(default_factory=datetime.now)
+    queue_size: int = SEND_QUEUE_SIZE
+    queue: asyncio.Queue[str] = field(init=False, repr=False)
+    writer: asyncio.Task | None = None
+    dropped: int = 0  # Messages discarded under the DROP policy
+    closing: bool = False
+    # Live (event_id, frame) pairs held back while missed events are replayed
+    replay_buffer: list[tuple[str | None, str]] | None = None
+
+    def __post_init__(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
 
 
 class WebSocketManager:
@@ -40,16 +63,32 @@ class WebSocketManager:
     Features:
     - Connection management (connect/disconnect)
     - Channel subscriptions
-    - Message broadcasting
+    - Message broadcasting (cross-node via Redis relay when started)
+    - Replay of missed events for reconnecting clients
+    - Presence tracking
     - Heartbeat/ping-pong
+
+    Each connection has a bounded outbound queue drained by its own writer
+    task, so broadcasts never wait on a slow client. Messages are serialized
+    once per send and the same text frame is queued for every recipient.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        send_queue_size: int = SEND_QUEUE_SIZE,
+        slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.DISCONNECT,
+    ):
+        self.node_id = uuid4().hex
+        self._send_queue_size = send_queue_size
+        self._slow_consumer_policy = SlowConsumerPolicy(slow_consumer_policy)
+        self._background_tasks: set[asyncio.Task] = set()
         self._connections: dict[str, Connection] = {}
         self._user_connections: dict[str, set[str]] = {}
         self._channel_subscriptions: dict[str, set[str]] = {}
         self._lock = asyncio.Lock()
+        self._topic_lock = asyncio.Lock()
         self._cleanup_task: asyncio.Task | None = None
+        self._relay: WebSocketRelay | None = None
 
     @property
     def connection_count(self) -> int:
@@ -60,10 +99,14 @@ class WebSocketManager:
         self,
         websocket: WebSocket,
         user_id: str | None = None,
+        last_event_id: str | None = None,
     ) -> str:
         """
         Accept a new WebSocket connection.
 
+        If last_event_id is given, user events missed since then are replayed
+        after the connected message.
+
         Returns the connection ID.
         """
         await websocket.accept()
@@ -73,7 +116,12 @@ class WebSocketManager:
             id=connection_id,
             websocket=websocket,
             user_id=user_id,
+            queue_size=self._send_queue_size,
         )
+        connection.writer = asyncio.create_task(self._run_writer(connection))
+        replaying = bool(user_id and last_event_id and self._relay)
+        if replaying:
+            connection.replay_buffer = []
 
         async with self._lock:
             self._connections[connection_id] = connection
@@ -83,11 +131,18 @@ class WebSocketManager:
                     self._user_connections[user_id] = set()
                 self._user_connections[user_id].add(connection_id)
 
+        if user_id and self._relay:
+            await self._sync_topics(user_topic(user_id))
+            try:
+                await self._relay.mark_online(user_id, connection_id)
+            except Exception as e:
+                logger.warning(f"Failed to register WebSocket user with relay: {e}")
+
         logger.info(f"WebSocket connected: {connection_id} (user: {user_id})")
 
         # Send connected message
-        await self._send(
-            websocket,
+        await self.send_to_connection(
+            connection_id,
             {
                 "type": "connected",
                 "payload": {
@@ -99,6 +154,9 @@ class WebSocketManager:
             },
         )
 
+        if replaying:
+            await self._replay(connection, user_topic(user_id), last_event_id)
+
         return connection_id
 
     async def disconnect(self, connection_id: str) -> None:
@@ -121,21 +179,49 @@ class WebSocketManager:
                     if not self._channel_subscriptions[channel]:
                         del self._channel_subscriptions[channel]
 
+        await self._stop_writer(connection)
+
+        if self._relay:
+            topics = [channel_topic(channel) for channel in connection.subscriptions]
+            if connection.user_id:
+                topics.append(user_topic(connection.user_id))
+                try:
+                    await self._relay.mark_offline(connection.user_id, connection_id)
+                except Exception as e:
+                    logger.warning(f"Failed to clear WebSocket presence: {e}")
+            await self._sync_topics(*topics)
+
         logger.info(f"WebSocket disconnected: {connection_id}")
 
-    async def subscribe(self, connection_id: str, channel: str) -> bool:
-        """Subscribe a connection to a channel."""
+    async def subscribe(
+        self,
+        connection_id: str,
+        channel: str,
+        last_event_id: str | None = None,
+    ) -> bool:
+        """
+        Subscribe a connection to a channel.
+
+        If last_event_id is given, channel events missed since then are
+        replayed after the confirmation.
+        """
         async with self._lock:
             connection = self._connections.get(connection_id)
             if not connection:
                 return False
 
+            replaying = bool(last_event_id and self._relay and connection.replay_buffer is None)
+            if replaying:
+                connection.replay_buffer = []
+
             connection.subscriptions.add(channel)
 
             if channel not in self._channel_subscriptions:
                 self._channel_subscriptions[channel] = set()
             self._channel_subscriptions[channel].add(connection_id)
 
+        await self._sync_topics(channel_topic(channel))
+
         logger.debug(f"Connection {connection_id} subscribed to {channel}")
 
         # Send confirmation
@@ -147,6 +233,9 @@ class WebSocketManager:
             },
         )
 
+        if replaying:
+            await self._replay(connection, channel_topic(channel), last_event_id)
+
         return True
 
     async def unsubscribe(self, connection_id: str, channel: str) -> bool:
@@ -163,6 +252,8 @@ class WebSocketManager:
                 if not self._channel_subscriptions[channel]:
                     del self._channel_subscriptions[channel]
 
+        await self._sync_topics(channel_topic(channel))
+
         # Send confirmation
         await self.send_to_connection(
             connection_id,
@@ -179,59 +270,76 @@ class WebSocketManager:
         connection_id: str,
         message: dict[str, Any],
     ) -> bool:
-        """Send a message to a specific connection."""
+        """Queue a message for a specific connection."""
         connection = self._connections.get(connection_id)
         if not connection:
             return False
 
-        return await self._send(connection.websocket, message)
+        return self._enqueue(connection, self._encode(message))
 
     async def send_to_user(
         self,
         user_id: str,
         message: dict[str, Any],
     ) -> int:
-        """Send a message to all connections for a user."""
-        connection_ids = self._user_connections.get(user_id, set()).copy()
-        sent = 0
-
-        for connection_id in connection_ids:
-            if await self.send_to_connection(connection_id, message):
-                sent += 1
+        """
+        Send a message to all connections for a user.
 
-        return sent
+        With the relay running, the message reaches the user's sockets on
+        every node and the return value is the number of nodes notified.
+        """
+        if self._relay:
+            return await self._publish(user_topic(user_id), message)
+        return await self._send_to_user_local(user_id, message)
 
     async def broadcast_to_channel(
         self,
         channel: str,
         message: dict[str, Any],
     ) -> int:
-        """Broadcast a message to all subscribers of a channel."""
-        connection_ids = self._channel_subscriptions.get(channel, set()).copy()
-        sent = 0
-
-        for connection_id in connection_ids:
-            if await self.send_to_connection(connection_id, message):
-                sent += 1
+        """
+        Broadcast a message to all subscribers of a channel.
 
-        return sent
+        With the relay running, the message reaches subscribers on every
+        node and the return value is the number of nodes notified.
+        """
+        if self._relay:
+            return await self._publish(channel_topic(channel), message)
+        return await self._broadcast_to_channel_local(channel, message)
 
     async def broadcast_all(self, message: dict[str, Any]) -> int:
-        """Broadcast a message to all connections."""
-        connection_ids = list(self._connections.keys())
-        sent = 0
+        """
+        Broadcast a message to all connections.
 
-        for connection_id in connection_ids:
-            if await self.send_to_connection(connection_id, message):
-                sent += 1
+        With the relay running, the message reaches sockets on every node
+        and the return value is the number of nodes notified.
+        """
+        if self._relay:
+            return await self._publish(ALL_TOPIC, message, replay=False)
+        return await self._broadcast_all_local(message)
 
-        return sent
+    async def _send_to_user_local(self, user_id: str, message: dict[str, Any]) -> int:
+        """Send a message to a user's connections on this node."""
+        return self._fan_out(self._user_connections.get(user_id, set()).copy(), message)
+
+    async def _broadcast_to_channel_local(self, channel: str, message: dict[str, Any]) -> int:
+        """Broadcast a message to a channel's subscribers on this node."""
+        return self._fan_out(self._channel_subscriptions.get(channel, set()).copy(), message)
+
+    async def _broadcast_all_local(self, message: dict[str, Any]) -> int:
+        """Broadcast a message to every connection on this node."""
+        return self._fan_out(list(self._connections.keys()), message)
 
     async def handle_ping(self, connection_id: str) -> None:
         """Handle a ping message from a client."""
         connection = self._connections.get(connection_id)
         if connection:
             connection.last_ping = datetime.now()
+            if connection.user_id and self._relay:
+                try:
+                    await self._relay.refresh(connection.user_id, connection_id)
+                except Exception as e:
+                    logger.debug(f"Failed to refresh WebSocket presence: {e}")
 
         await self.send_to_connection(
             connection_id,
@@ -260,7 +368,7 @@ class WebSocketManager:
                 task_id = payload.get("task_id")
                 if task_id:
                     channel = f"{channel}:{task_id}"
-                await self.subscribe(connection_id, channel)
+                await self.subscribe(connection_id, channel, payload.get("last_event_id"))
 
         elif msg_type == "unsubscribe":
             channel = payload.get("channel")
@@ -283,6 +391,127 @@ class WebSocketManager:
                 },
             )
 
+    # ============ Cross-node Relay ============
+
+    @property
+    def relay_enabled(self) -> bool:
+        """Whether events are fanned out through Redis."""
+        return self._relay is not None
+
+    async def start_relay(
+        self,
+        redis: Redis,
+        replay_ttl: int | None = None,
+        replay_maxlen: int | None = None,
+    ) -> None:
+        """
+        Start fanning out events through Redis.
+
+        Topics for already-connected users and channels are watched so that
+        no local socket misses relayed events.
+        """
+        if self._relay:
+            return
+
+        kwargs = {}
+        if replay_ttl is not None:
+            kwargs["replay_ttl"] = replay_ttl
+        if replay_maxlen is not None:
+            kwargs["replay_maxlen"] = replay_maxlen
+
+        relay = WebSocketRelay(redis, self.node_id, self._deliver_relayed, **kwargs)
+        await relay.start()
+        for user_id in list(self._user_connections):
+            await relay.watch(user_topic(user_id))
+        for channel in list(self._channel_subscriptions):
+            await relay.watch(channel_topic(channel))
+        self._relay = relay
+
+    async def stop_relay(self) -> None:
+        """Stop the Redis relay and fall back to local delivery."""
+        if self._relay:
+            relay, self._relay = self._relay, None
+            await relay.stop()
+
+    async def is_user_online(self, user_id: str) -> bool:
+        """Check whether a user has a live connection on any node."""
+        if self._relay:
+            try:
+                return bool(await self._relay.get_presence(user_id))
+            except Exception as e:
+                logger.warning(f"Failed to read WebSocket presence: {e}")
+        return bool(self._user_connections.get(user_id))
+
+    async def _publish(self, topic: str, message: dict[str, Any], replay: bool = True) -> int:
+        """Publish through the relay, delivering locally if Redis fails."""
+        if "timestamp" not in message:
+            message["timestamp"] = datetime.now().isoformat()
+        try:
+            return await self._relay.publish(topic, message, replay=replay)
+        except Exception as e:
+            logger.warning(f"WebSocket relay publish failed, delivering locally: {e}")
+            return await self._deliver_relayed(topic, message)
+
+    async def _deliver_relayed(self, topic: str, message: dict[str, Any]) -> int:
+        """Deliver an event received from the relay to local sockets."""
+        kind, _, key = topic.partition(":")
+        if kind == "user":
+            return await self._send_to_user_local(key, message)
+        if kind == "channel":
+            return await self._broadcast_to_channel_local(key, message)
+        return await self._broadcast_all_local(message)
+
+    async def _sync_topics(self, *topics: str) -> None:
+        """
+        Make the relay watch exactly those topics that have local sockets.
+
+        Each decision is taken under a dedicated lock against the current
+        local state, so a disconnect racing a reconnect cannot leave a topic
+        unwatched while a socket still needs it.
+        """
+        if not self._relay:
+            return
+
+        async with self._topic_lock:
+            for topic in topics:
+                try:
+                    if self._has_local_sockets(topic):
+                        await self._relay.watch(topic)
+                    else:
+                        await self._relay.unwatch(topic)
+                except Exception as e:
+                    logger.warning(f"Failed to update WebSocket relay topic {topic}: {e}")
+
+    def _has_local_sockets(self, topic: str) -> bool:
+        """Whether any socket on this node needs events for a topic."""
+        kind, _, key = topic.partition(":")
+        if kind == "user":
+            return bool(self._user_connections.get(key))
+        if kind == "channel":
+            return bool(self._channel_subscriptions.get(key))
+        return True
+
+    async def _replay(self, connection: Connection, topic: str, last_event_id: str) -> int:
+        """
+        Send events recorded for a topic after last_event_id to one connection.
+
+        Live events fanned out to the connection meanwhile wait in its replay
+        buffer and are flushed afterwards, minus any the replay already sent,
+        so the client sees each event once and in order.
+        """
+        replayed: set[str] = set()
+        try:
+            if self._relay:
+                for message in await self._relay.replay(topic, last_event_id):
+                    if await self.send_to_connection(connection.id, message):
+                        replayed.add(message["event_id"])
+        finally:
+            buffered, connection.replay_buffer = connection.replay_buffer or [], None
+            for event_id, text in buffered:
+                if event_id is None or event_id not in replayed:
+                    self._enqueue(connection, text)
+        return len(replayed)
+
     # ============ Stale Connection Cleanup ============
 
     async def start_stale_cleanup(self) -> None:
@@ -332,23 +561,113 @@ class WebSocketManager:
                     pass
                 await self.disconnect(conn_id)
 
-    async def _send(
-        self,
-        websocket: WebSocket,
-        message: dict[str, Any],
-    ) -> bool:
-        """Send a message to a WebSocket."""
+    # ============ Outbound Queues ============
+
+    @staticmethod
+    def _encode(message: dict[str, Any]) -> str:
+        """Serialize a message once, adding a timestamp if not present."""
+        if "timestamp" not in message:
+            message["timestamp"] = datetime.now().isoformat()
+        return json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+
+    def _fan_out(self, connection_ids, message: dict[str, Any]) -> int:
+        """Queue one serialized message for many connections."""
+        text = self._encode(message)
+        event_id = message.get("event_id")
+        sent = 0
+
+        for connection_id in connection_ids:
+            connection = self._connections.get(connection_id)
+            if not connection:
+                continue
+            if connection.replay_buffer is not None:
+                connection.replay_buffer.append((event_id, text))
+                sent += 1
+            elif self._enqueue(connection, text):
+                sent += 1
+
+        return sent
+
+    def _enqueue(self, connection: Connection, text: str) -> bool:
+        """
+        Put a serialized message on a connection's outbound queue.
+
+        Applies the slow-consumer policy when the queue is full.
+        """
         try:
-            # Add timestamp if not present
-            if "timestamp" not in message:
-                message["timestamp"] = datetime.now().isoformat()
+            connection.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            pass
 
-            await websocket.send_json(message)
+        if self._slow_consumer_policy == SlowConsumerPolicy.DROP:
+            connection.queue.get_nowait()
+            connection.queue.put_nowait(text)
+            connection.dropped += 1
             return True
-        except Exception as e:
-            logger.warning(f"Failed to send WebSocket message: {e}")
+
+        if connection.closing:
             return False
 
+        logger.warning(f"Disconnecting slow WebSocket consumer: {connection.id}")
+        connection.closing = True
+        task = asyncio.create_task(self._close(connection, 4008, "Slow consumer"))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return False
+
+    async def _run_writer(self, connection: Connection) -> None:
+        """Drain a connection's outbound queue onto its socket."""
+        try:
+            while True:
+                text = await connection.queue.get()
+                async with asyncio.timeout(SEND_TIMEOUT):
+                    await connection.websocket.send_text(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if connection.closing:
+                return
+            logger.warning(f"Failed to send WebSocket message to {connection.id}: {e}")
+            await self._close(connection, 1011, "Send failed")
+
+    @staticmethod
+    async def _stop_writer(connection: Connection) -> None:
+        """Cancel a connection's writer and wait for it to finish."""
+        writer = connection.writer
+        # The writer may be the one disconnecting after a failed send
+        if writer is None or writer is asyncio.current_task():
+            return
+        writer.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await writer
+
+    async def close(self) -> None:
+        """Stop every connection's writer and drop all connections (shutdown)."""
+        async with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+            self._user_connections.clear()
+            self._channel_subscriptions.clear()
+
+        for connection in connections:
+            connection.closing = True
+            await self._stop_writer(connection)
+
+        for task in list(self._background_tasks):
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def _close(self, connection: Connection, code: int, reason: str) -> None:
+        """Close a connection's socket and remove it from the manager."""
+        connection.closing = True
+        try:
+            await connection.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+        await self.disconnect(connection.id)
+
     # ============ Task Progress ============
 
     async def send_task_progress(
@@ -374,6 +693,33 @@ class WebSocketManager:
             },
         )
 
+    async def send_task_item(
+        self,
+        task_id: str,
+        index: int,
+        progress: int,
+        total: int,
+        status: str,
+        image: dict[str, Any] | None = None,
+        error: str | None = None,
+    ) -> int:
+        """Send completion of a single batch item."""
+        return await self.broadcast_to_channel(
+            f"task:{task_id}",
+            {
+                "type": "task:item",
+                "payload": {
+                    "task_id": task_id,
+                    "index": index,
+                    "progress": progress,
+                    "total": total,
+                    "status": status,
+                    "image": image,
+                    "error": error,
+                },
+            },
+        )
+
     async def send_task_complete(
         self,
         task_id: str,
@@ -533,5 +879,9 @@ def get_websocket_manager() -> WebSocketManager:
     """Get the WebSocket manager singleton."""
     global _ws_manager
     if _ws_manager is None:
-        _ws_manager = WebSocketManager()
+        settings = get_settings()
+        _ws_manager = WebSocketManager(
+            send_queue_size=settings.ws_send_queue_size,
+            slow_consumer_policy=settings.ws_slow_consumer_policy,
+        )
     return _ws_manager
@@ -0,0 +1,255 @@
+"""
+Cross-node WebSocket event relay backed by Redis.
+
+Every API node publishes WebSocket events to Redis pub/sub instead of writing
+to sockets directly. Each node subscribes only to the topics (users and
+channels) that have sockets connected to it, and delivers incoming events to
+those local sockets.
+
+Targeted events are also appended to a short-lived, capped Redis stream per
+topic so reconnecting clients can replay what they missed. Presence is kept in
+a per-user sorted set of connections scored by when each was last seen, so a
+connection whose node died without cleaning up ages out on its own.
+
+Key layout:
+    ws:topic:{topic}     pub/sub channel carrying event envelopes
+    ws:stream:{topic}    capped replay stream (XADD MAXLEN ~)
+    ws:presence:{user}   sorted set of "{node_id}:{connection_id}" scored by last seen
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+TOPIC_PREFIX = "ws:topic:"
+STREAM_PREFIX = "ws:stream:"
+PRESENCE_PREFIX = "ws:presence:"
+
+# Topic that every node listens to (broadcast_all)
+ALL_TOPIC = "all"
+
+DEFAULT_REPLAY_TTL = 300  # seconds a replay stream lives after its last event
+DEFAULT_REPLAY_MAXLEN = 500  # approximate events kept per replay stream
+PRESENCE_TTL = 180  # seconds a connection counts as online after it was last seen
+
+
+def user_topic(user_id: str) -> str:
+    """Topic name for events addressed to a user."""
+    return f"user:{user_id}"
+
+
+def channel_topic(channel: str) -> str:
+    """Topic name for events addressed to a subscription channel."""
+    return f"channel:{channel}"
+
+
+# Delivers a relayed message to local sockets: (topic, message) -> sockets reached
+DeliverCallback = Callable[[str, dict[str, Any]], Awaitable[int]]
+
+
+class WebSocketRelay:
+    """
+    Redis pub/sub fan-out with replay streams and presence tracking.
+
+    The relay only moves messages between nodes; local socket bookkeeping
+    stays in WebSocketManager, which calls watch()/unwatch() as the first
+    local socket for a topic appears and the last one goes away.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        node_id: str,
+        deliver: DeliverCallback,
+        replay_ttl: int = DEFAULT_REPLAY_TTL,
+        replay_maxlen: int = DEFAULT_REPLAY_MAXLEN,
+    ):
+        """
+        Initialize the relay.
+
+        Args:
+            redis: Redis client
+            node_id: Unique ID of this API node
+            deliver: Callback that writes a relayed message to local sockets
+            replay_ttl: Seconds a replay stream is kept after its last event
+            replay_maxlen: Approximate number of events kept per replay stream
+        """
+        self._redis = redis
+        self.node_id = node_id
+        self._deliver = deliver
+        self._replay_ttl = replay_ttl
+        self._replay_maxlen = replay_maxlen
+        self._pubsub = None
+        self._listener: asyncio.Task | None = None
+        self._topics: set[str] = set()
+
+    @property
+    def is_listening(self) -> bool:
+        """Whether this node is receiving relayed events."""
+        return self._listener is not None and not self._listener.done()
+
+    # ============ Lifecycle ============
+
+    async def start(self) -> None:
+        """Subscribe to the broadcast topic and start the listener task."""
+        if self.is_listening:
+            return
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(TOPIC_PREFIX + ALL_TOPIC)
+        self._topics = {ALL_TOPIC}
+        self._listener = asyncio.create_task(self._listen())
+        logger.info(f"WebSocket relay started on node {self.node_id}")
+
+    async def stop(self) -> None:
+        """Stop the listener and release the pub/sub connection."""
+        if self._listener:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        if self._pubsub is not None:
+            with contextlib.suppress(Exception):
+                await self._pubsub.aclose()
+            self._pubsub = None
+        self._topics.clear()
+        logger.info(f"WebSocket relay stopped on node {self.node_id}")
+
+    async def _listen(self) -> None:
+        """Read envelopes from pub/sub and hand them to the local deliverer."""
+        while True:
+            try:
+                raw = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"WebSocket relay receive failed: {e}")
+                await asyncio.sleep(1.0)
+                continue
+
+            if not raw or raw.get("type") != "message":
+                continue
+
+            try:
+                envelope = json.loads(raw["data"])
+                await self._deliver(envelope["topic"], envelope["message"])
+            except Exception as e:
+                logger.warning(f"Failed to deliver relayed WebSocket event: {e}")
+
+    # ============ Topic Subscriptions ============
+
+    async def watch(self, topic: str) -> None:
+        """Start receiving events for a topic on this node."""
+        if topic in self._topics or self._pubsub is None:
+            return
+        self._topics.add(topic)
+        await self._pubsub.subscribe(TOPIC_PREFIX + topic)
+
+    async def unwatch(self, topic: str) -> None:
+        """Stop receiving events for a topic on this node."""
+        if topic not in self._topics or topic == ALL_TOPIC or self._pubsub is None:
+            return
+        self._topics.discard(topic)
+        await self._pubsub.unsubscribe(TOPIC_PREFIX + topic)
+
+    # ============ Publishing & Replay ============
+
+    async def publish(self, topic: str, message: dict[str, Any], replay: bool = True) -> int:
+        """
+        Publish an event to every node watching a topic.
+
+        Args:
+            topic: Target topic (see user_topic/channel_topic, or ALL_TOPIC)
+            message: WebSocket message; gains an "event_id" when recorded for replay
+            replay: Record the event in the topic's replay stream
+
+        Returns:
+            Number of nodes that received the event
+        """
+        if replay and topic != ALL_TOPIC:
+            stream = STREAM_PREFIX + topic
+            event_id = await self._redis.xadd(
+                stream,
+                {"message": json.dumps(message, ensure_ascii=False)},
+                maxlen=self._replay_maxlen,
+                approximate=True,
+            )
+            await self._redis.expire(stream, self._replay_ttl)
+            message["event_id"] = event_id
+
+        envelope = {"origin": self.node_id, "topic": topic, "message": message}
+        return await self._redis.publish(
+            TOPIC_PREFIX + topic, json.dumps(envelope, ensure_ascii=False)
+        )
+
+    async def replay(self, topic: str, last_event_id: str) -> list[dict[str, Any]]:
+        """
+        Get events recorded for a topic after a given event ID.
+
+        Args:
+            topic: Topic whose replay stream to read
+            last_event_id: Last event ID the client saw
+
+        Returns:
+            Missed messages, oldest first
+        """
+        try:
+            entries = await self._redis.xrange(STREAM_PREFIX + topic, min=f"({last_event_id}")
+        except Exception as e:
+            logger.warning(f"Failed to replay WebSocket events for {topic}: {e}")
+            return []
+
+        messages = []
+        for event_id, fields in entries:
+            message = json.loads(fields["message"])
+            message["event_id"] = event_id
+            messages.append(message)
+        return messages
+
+    # ============ Presence ============
+
+    def _presence_member(self, connection_id: str) -> str:
+        return f"{self.node_id}:{connection_id}"
+
+    async def mark_online(self, user_id: str, connection_id: str) -> None:
+        """Record a user's connection on this node as seen now."""
+        key = PRESENCE_PREFIX + user_id
+        await self._redis.zadd(key, {self._presence_member(connection_id): time.time()})
+        # Drops the whole set once every connection has gone quiet
+        await self._redis.expire(key, PRESENCE_TTL)
+
+    async def refresh(self, user_id: str, connection_id: str) -> None:
+        """Mark a connection as seen now (called on heartbeat)."""
+        await self.mark_online(user_id, connection_id)
+
+    async def mark_offline(self, user_id: str, connection_id: str) -> None:
+        """Remove a user's connection from presence."""
+        await self._redis.zrem(PRESENCE_PREFIX + user_id, self._presence_member(connection_id))
+
+    async def get_presence(self, user_id: str) -> dict[str, str]:
+        """
+        Get a user's live connections across all nodes.
+
+        Connections not seen within PRESENCE_TTL are pruned first, so entries
+        left behind by crashed nodes do not report the user as online.
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Mapping of connection_id to node_id
+        """
+        key = PRESENCE_PREFIX + user_id
+        await self._redis.zremrangebyscore(key, "-inf", time.time() - PRESENCE_TTL)
+        presence = {}
+        for member in await self._redis.zrange(key, 0, -1):
+            node_id, _, connection_id = member.partition(":")
+            presence[connection_id] = node_id
+        return presence
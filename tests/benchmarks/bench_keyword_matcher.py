@@ -0,0 +1,98 @@
+"""
+Micro-benchmark for ContentFilter layer 1 keyword matching.
+
+Compares the original per-keyword regex loop with the Aho–Corasick matcher
+for growing keyword lists, including the shipped config/banned_keywords.json.
+
+Run with:
+    python -m tests.benchmarks.bench_keyword_matcher [--prompts N]
+"""
+
+import argparse
+import json
+import random
+import re
+import string
+import time
+from pathlib import Path
+
+from services.keyword_matcher import KeywordMatcher
+
+KEYWORDS_FILE = Path(__file__).parents[2] / "config" / "banned_keywords.json"
+
+SAMPLE_PROMPTS = [
+    "A serene mountain lake at sunrise, ultra detailed, 8k",
+    "一只可爱的猫咪坐在窗台上，阳光明媚",
+    "Portrait of an old fisherman, dramatic lighting, oil painting style",
+    "cyberpunk city street at night with neon signs and rain reflections",
+    "a couple embracing under the cherry blossoms, watercolor",
+]
+
+
+def legacy_first_match(keywords: list[str], prompt: str) -> str | None:
+    """The previous ContentFilter._check_keywords loop."""
+    normalized = prompt.lower()
+    compact = re.sub(r"[\s\-_]+", "", normalized)
+    for keyword in keywords:
+        keyword_lower = keyword.lower()
+        if " " in keyword_lower:
+            if keyword_lower in normalized:
+                return keyword
+        elif re.search(r"\b" + re.escape(keyword_lower) + r"\b", normalized):
+            return keyword
+        keyword_compact = re.sub(r"[\s\-_]+", "", keyword_lower)
+        if keyword_compact in compact and len(keyword_compact) > 3:
+            return keyword
+    return None
+
+
+def synthetic_keywords(base: list[str], size: int, rng: random.Random) -> list[str]:
+    """Pad the real keyword list with random words and phrases up to size."""
+    keywords = list(base)
+    while len(keywords) < size:
+        words = [
+            "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+            for _ in range(rng.choice((1, 1, 1, 2)))
+        ]
+        keywords.append(" ".join(words))
+    return keywords
+
+
+def time_per_prompt(check, prompts: list[str]) -> float:
+    """Mean microseconds per prompt."""
+    start = time.perf_counter()
+    for prompt in prompts:
+        check(prompt)
+    return (time.perf_counter() - start) / len(prompts) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=200, help="prompts checked per run")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    base = json.loads(KEYWORDS_FILE.read_text(encoding="utf-8"))["keywords"]
+    prompts = [rng.choice(SAMPLE_PROMPTS) for _ in range(args.prompts)]
+
+    print(f"{'keywords':>9} {'build ms':>9} {'legacy us':>10} {'matcher us':>11} {'speedup':>8}")
+    for size in (len(base), 1_000, 10_000, 50_000):
+        keywords = synthetic_keywords(base, size, rng)
+
+        start = time.perf_counter()
+        matcher = KeywordMatcher(keywords)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        # The legacy loop is too slow to run every prompt at large sizes
+        legacy_prompts = prompts[: max(10, args.prompts * 1_000 // size)]
+        legacy_us = time_per_prompt(lambda p, k=keywords: legacy_first_match(k, p), legacy_prompts)
+        matcher_us = time_per_prompt(matcher.find_all, prompts)
+
+        print(
+            f"{size:>9} {build_ms:>9.1f} {legacy_us:>10.1f} {matcher_us:>11.1f} "
+            f"{legacy_us / matcher_us:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -48,6 +48,8 @@ class MockRedis:
         self._data: dict[str, Any] = {}
         self._sets: dict[str, set] = {}
         self._hashes: dict[str, dict[str, str]] = {}
+        self._lists: dict[str, list[str]] = {}
+        self._zsets: dict[str, dict[str, float]] = {}
         self._expiry: dict[str, int] = {}
 
     async def get(self, key: str) -> str | None:
@@ -64,14 +66,19 @@ class MockRedis:
         self._expiry[key] = seconds
         return True
 
-    async def delete(self, key: str) -> int:
-        if key in self._data:
-            del self._data[key]
-            return 1
-        return 0
+    def _stores(self):
+        return (self._data, self._sets, self._hashes, self._lists, self._zsets)
 
-    async def exists(self, key: str) -> int:
-        return 1 if key in self._data else 0
+    async def delete(self, *keys: str) -> int:
+        count = 0
+        for key in keys:
+            for store in self._stores():
+                if store.pop(key, None) is not None:
+                    count += 1
+        return count
+
+    async def exists(self, *keys: str) -> int:
+        return sum(1 for key in keys if any(key in store for store in self._stores()))
 
     async def expire(self, key: str, seconds: int) -> bool:
         self._expiry[key] = seconds
@@ -82,13 +89,13 @@ class MockRedis:
     ) -> int:
         if key not in self._hashes:
             self._hashes[key] = {}
-        if mapping:
-            self._hashes[key].update({str(k): str(v) for k, v in mapping.items()})
-            return len(mapping)
+        values = {str(k): str(v) for k, v in (mapping or {}).items()}
         if field and value is not None:
-            self._hashes[key][field] = str(value)
-            return 1
-        return 0
+            values[field] = str(value)
+        # Like Redis, count only fields that did not exist yet
+        added = sum(1 for k in values if k not in self._hashes[key])
+        self._hashes[key].update(values)
+        return added
 
     async def hget(self, key: str, field: str) -> str | None:
         if key in self._hashes:
@@ -145,7 +152,43 @@ class MockRedis:
     async def smembers(self, key: str) -> set:
         return self._sets.get(key, set())
 
-    def pipeline(self):
+    async def rpush(self, key: str, *values: str) -> int:
+        self._lists.setdefault(key, []).extend(values)
+        return len(self._lists[key])
+
+    async def lrange(self, key: str, start: int, end: int) -> list[str]:
+        items = self._lists.get(key, [])
+        start = max(0, len(items) + start) if start < 0 else start
+        end = len(items) + end if end < 0 else end
+        return items[start : end + 1]
+
+    async def llen(self, key: str) -> int:
+        return len(self._lists.get(key, []))
+
+    async def zadd(self, key: str, mapping: dict[str, float]) -> int:
+        zset = self._zsets.setdefault(key, {})
+        added = sum(1 for member in mapping if member not in zset)
+        zset.update(mapping)
+        return added
+
+    async def zrem(self, key: str, *members: str) -> int:
+        zset = self._zsets.get(key, {})
+        return sum(1 for member in members if zset.pop(member, None) is not None)
+
+    async def zrevrange(self, key: str, start: int, end: int) -> list[str]:
+        members = sorted(self._zsets.get(key, {}).items(), key=lambda item: -item[1])
+        end = len(members) + end if end < 0 else end
+        return [member for member, _ in members[start : end + 1]]
+
+    async def zremrangebyscore(self, key: str, min_score, max_score) -> int:
+        zset = self._zsets.get(key, {})
+        low, high = float(min_score), float(max_score)
+        removed = [member for member, score in zset.items() if low <= score <= high]
+        for member in removed:
+            del zset[member]
+        return len(removed)
+
+    def pipeline(self, transaction: bool = True):
         return MockPipeline(self)
 
     async def close(self):
@@ -159,33 +202,21 @@ class MockPipeline:
         self._redis = redis
         self._commands = []
 
-    def incrby(self, key: str, amount: int):
-        self._commands.append(("incrby", key, amount))
-        return self
+    def __getattr__(self, name: str):
+        # Queue any MockRedis command; results come back from execute()
+        command = getattr(self._redis, name)
 
-    def hincrby(self, key: str, field: str, amount: int):
-        self._commands.append(("hincrby", key, field, amount))
-        return self
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
 
-    def hset(self, key: str, field: str, value: str):
-        self._commands.append(("hset", key, field, value))
-        return self
-
-    def expire(self, key: str, seconds: int):
-        self._commands.append(("expire", key, seconds))
-        return self
+        return queue
 
     async def execute(self):
         results = []
-        for cmd in self._commands:
-            if cmd[0] == "incrby":
-                results.append(await self._redis.incrby(cmd[1], cmd[2]))
-            elif cmd[0] == "hincrby":
-                results.append(await self._redis.hincrby(cmd[1], cmd[2], cmd[3]))
-            elif cmd[0] == "hset":
-                results.append(await self._redis.hset(cmd[1], cmd[2], cmd[3]))
-            elif cmd[0] == "expire":
-                results.append(await self._redis.expire(cmd[1], cmd[2]))
+        for command, args, kwargs in self._commands:
+            results.append(await command(*args, **kwargs))
+        self._commands = []
         return results
 
     async def __aenter__(self):
@@ -214,7 +245,8 @@ def mock_redis_fixture(mock_redis):
                 with patch("api.routers.quota.get_redis", get_mock_redis):
                     with patch("api.routers.tasks.get_redis", get_mock_redis):
                         with patch("services.generation_task.get_redis", get_mock_redis):
-                            yield mock_redis
+                            with patch("services.batch_task.get_redis", get_mock_redis):
+                                yield mock_redis
 
 
 # ============ Mock Services ============
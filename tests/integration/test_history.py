@@ -5,6 +5,39 @@ Integration tests for history endpoints.
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from services.storage import StorageObject
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+PNG_ETAG = '"png-etag"'
+
+
+def _mock_image_storage(data: bytes | None) -> MagicMock:
+    """Mock remote storage holding one image (or none) for the image endpoint."""
+    mock_storage = MagicMock()
+    mock_storage.etag_from_key.return_value = None
+    mock_storage.local_image_path.return_value = None
+    mock_storage.head_image = AsyncMock(
+        return_value=StorageObject(
+            key="test-item",
+            filename="test-item",
+            size=len(data),
+            content_type="image/png",
+            etag=PNG_ETAG,
+        )
+        if data is not None
+        else None
+    )
+
+    def stream_image(key, start=0, length=None):
+        async def chunks():
+            end = len(data) if length is None else start + length
+            yield data[start:end]
+
+        return chunks()
+
+    mock_storage.stream_image = MagicMock(side_effect=stream_image)
+    return mock_storage
+
 
 class TestHistoryEndpoints:
     """Tests for /api/history endpoints."""
@@ -13,6 +46,7 @@ class TestHistoryEndpoints:
         """Test listing history when empty."""
         mock_storage = MagicMock()
         mock_storage.get_history = AsyncMock(return_value=[])
+        mock_storage.count_history = AsyncMock(return_value=0)
 
         with patch("api.routers.history.get_storage_manager", return_value=mock_storage):
             response = client.get("/api/history")
@@ -47,6 +81,7 @@ class TestHistoryEndpoints:
                 },
             ]
         )
+        mock_storage.count_history = AsyncMock(return_value=2)
         mock_storage.get_public_url = MagicMock(return_value="https://example.com/image.png")
 
         with patch("api.routers.history.get_storage_manager", return_value=mock_storage):
@@ -60,6 +95,7 @@ class TestHistoryEndpoints:
         """Test listing history with mode filter."""
         mock_storage = MagicMock()
         mock_storage.get_history = AsyncMock(return_value=[])
+        mock_storage.count_history = AsyncMock(return_value=0)
 
         with patch("api.routers.history.get_storage_manager", return_value=mock_storage):
             response = client.get("/api/history?mode=basic")
@@ -71,6 +107,7 @@ class TestHistoryEndpoints:
         """Test listing history with search filter."""
         mock_storage = MagicMock()
         mock_storage.get_history = AsyncMock(return_value=[])
+        mock_storage.count_history = AsyncMock(return_value=0)
 
         with patch("api.routers.history.get_storage_manager", return_value=mock_storage):
             response = client.get("/api/history?search=sunset")
@@ -81,6 +118,7 @@ class TestHistoryEndpoints:
         """Test history pagination."""
         mock_storage = MagicMock()
         mock_storage.get_history = AsyncMock(return_value=[])
+        mock_storage.count_history = AsyncMock(return_value=0)
 
         with patch("api.routers.history.get_storage_manager", return_value=mock_storage):
             response = client.get("/api/history?limit=10&offset=20")
@@ -93,27 +131,15 @@ class TestHistoryEndpoints:
     def test_get_history_stats(self, client):
         """Test getting history statistics."""
         mock_storage = MagicMock()
-        mock_storage.get_history = AsyncMock(
-            return_value=[
-                {
-                    "key": "1",
-                    "mode": "basic",
-                    "duration": 1.5,
-                    "created_at": datetime.now().isoformat(),
-                },
-                {
-                    "key": "2",
-                    "mode": "basic",
-                    "duration": 2.0,
-                    "created_at": datetime.now().isoformat(),
-                },
-                {
-                    "key": "3",
-                    "mode": "chat",
-                    "duration": 1.0,
-                    "created_at": datetime.now().isoformat(),
-                },
-            ]
+        mock_storage.get_history_stats = AsyncMock(
+            return_value={
+                "total_images": 3,
+                "images_by_mode": {"basic": 2, "chat": 1},
+                "total_duration": 4.5,
+                "average_duration": 1.5,
+                "earliest_date": datetime(2024, 1, 1).isoformat(),
+                "latest_date": datetime.now().isoformat(),
+            }
         )
 
         with patch("api.routers.history.get_storage_manager", return_value=mock_storage):
@@ -122,7 +148,26 @@ class TestHistoryEndpoints:
             assert response.status_code == 200
             data = response.json()
             assert data["total_images"] == 3
-            assert "images_by_mode" in data
+            assert data["images_by_mode"] == {"basic": 2, "chat": 1}
+            mock_storage.get_history.assert_not_called()
+
+    def test_list_history_returns_next_cursor(self, client):
+        """Test that a full file-storage page exposes a keyset cursor."""
+        mock_storage = MagicMock()
+        mock_storage.get_history = AsyncMock(
+            return_value=[
+                {"key": f"{seq}.png", "filename": f"{seq}.png", "seq": seq} for seq in (9, 8, 7)
+            ]
+        )
+        mock_storage.count_history = AsyncMock(return_value=9)
+        mock_storage.get_public_url = MagicMock(return_value=None)
+
+        with patch("api.routers.history.get_storage_manager", return_value=mock_storage):
+            response = client.get("/api/history?limit=2&cursor=10")
+
+            assert response.status_code == 200
+            assert response.json()["next_cursor"] == 8
+            assert mock_storage.get_history.call_args.kwargs["cursor"] == 10
 
     def test_get_history_item_not_found(self, client):
         """Test getting non-existent history item."""
@@ -182,22 +227,61 @@ class TestHistoryEndpoints:
 
     def test_get_history_image_not_found(self, client):
         """Test getting image that doesn't exist."""
-        mock_storage = MagicMock()
-        mock_storage.load_image_bytes = AsyncMock(return_value=None)
+        mock_storage = _mock_image_storage(None)
 
         with patch("api.routers.history.get_storage_manager", return_value=mock_storage):
             response = client.get("/api/history/nonexistent/image")
 
             assert response.status_code == 404
+            mock_storage.stream_image.assert_not_called()
 
     def test_get_history_image_success(self, client):
         """Test getting image successfully."""
-        mock_storage = MagicMock()
-        # Create simple PNG image bytes
-        mock_storage.load_image_bytes = AsyncMock(return_value=b"\x89PNG\r\n\x1a\n" + b"\x00" * 100)
+        mock_storage = _mock_image_storage(PNG_BYTES)
 
         with patch("api.routers.history.get_storage_manager", return_value=mock_storage):
             response = client.get("/api/history/test-item/image")
 
             assert response.status_code == 200
             assert response.headers["content-type"] == "image/png"
+            assert response.headers["etag"] == PNG_ETAG
+            assert response.headers["cache-control"] == "private, max-age=86400"
+            assert response.content == PNG_BYTES
+
+    def test_get_history_image_not_modified(self, client):
+        """A matching If-None-Match is answered with 304 and no body."""
+        mock_storage = _mock_image_storage(PNG_BYTES)
+
+        with patch("api.routers.history.get_storage_manager", return_value=mock_storage):
+            response = client.get(
+                "/api/history/test-item/image", headers={"If-None-Match": PNG_ETAG}
+            )
+
+            assert response.status_code == 304
+            assert response.headers["etag"] == PNG_ETAG
+            assert response.content == b""
+            mock_storage.stream_image.assert_not_called()
+
+    def test_get_history_image_range(self, client):
+        """A single byte range is answered with 206 and Content-Range."""
+        mock_storage = _mock_image_storage(PNG_BYTES)
+
+        with patch("api.routers.history.get_storage_manager", return_value=mock_storage):
+            response = client.get("/api/history/test-item/image", headers={"Range": "bytes=0-7"})
+
+            assert response.status_code == 206
+            assert response.headers["content-range"] == f"bytes 0-7/{len(PNG_BYTES)}"
+            assert response.headers["content-length"] == "8"
+            assert response.content == PNG_BYTES[:8]
+            mock_storage.stream_image.assert_called_once_with("test-item", start=0, length=8)
+
+    def test_get_history_image_range_not_satisfiable(self, client):
+        """A range past the end of the image is answered with 416."""
+        mock_storage = _mock_image_storage(PNG_BYTES)
+
+        with patch("api.routers.history.get_storage_manager", return_value=mock_storage):
+            response = client.get("/api/history/test-item/image", headers={"Range": "bytes=5000-"})
+
+            assert response.status_code == 416
+            assert response.headers["content-range"] == f"bytes */{len(PNG_BYTES)}"
+            mock_storage.stream_image.assert_not_called()
@@ -0,0 +1,173 @@
+"""
+Unit tests for the batched audit log sink.
+"""
+
+import gzip
+import json
+import threading
+import uuid
+from pathlib import Path
+
+import pytest
+
+from services.audit_sink import AuditSink, audit_filter_result, iter_segment_entries
+
+
+def make_entry(allowed: bool = True, needs_review: bool = False) -> dict:
+    return {
+        "log_id": str(uuid.uuid4()),
+        "user_input": {"prompt": "a calm lake"},
+        "final_decision": {
+            "allowed": allowed,
+            "blocked_reason": None if allowed else "keyword:gore",
+        },
+        "analysis_flags": {"needs_review": needs_review},
+    }
+
+
+def read_segments(base_path: Path) -> list[dict]:
+    entries = []
+    for day_dir in sorted({p.parent for p in base_path.rglob("*.jsonl.gz")}):
+        entries.extend(iter_segment_entries(day_dir))
+    return entries
+
+
+@pytest.fixture
+def make_sink(tmp_path):
+    sinks = []
+
+    def make(**kwargs) -> AuditSink:
+        kwargs.setdefault("flush_interval", 0.05)
+        sink = AuditSink(tmp_path, **kwargs)
+        sinks.append(sink)
+        return sink
+
+    yield make
+    for sink in sinks:
+        sink.shutdown()
+
+
+class TestAuditSink:
+    def test_entries_are_batched_into_one_segment(self, make_sink, tmp_path):
+        sink = make_sink(batch_size=3)
+        entries = [make_entry() for _ in range(7)]
+
+        for entry in entries:
+            assert sink.submit(entry)
+        assert sink.flush()
+
+        assert read_segments(tmp_path) == entries
+        assert len(list(tmp_path.rglob("*.jsonl.gz"))) == 1
+        stats = sink.get_stats()
+        assert stats["written"] == 7
+        assert stats["batches"] == 3
+        assert stats["queue_depth"] == 0
+
+    def test_partial_batch_flushes_after_interval(self, make_sink, tmp_path):
+        sink = make_sink(batch_size=100, flush_interval=0.05)
+        sink.submit(make_entry())
+
+        for _ in range(50):
+            if sink.get_stats()["written"]:
+                break
+            threading.Event().wait(0.02)
+
+        assert sink.get_stats()["written"] == 1
+
+    def test_entries_are_filed_under_their_own_day(self, make_sink, tmp_path):
+        sink = make_sink(batch_size=10)
+        late = {**make_entry(), "timestamp": "2026-10-15T23:59:59.800000+00:00"}
+        early = {**make_entry(), "timestamp": "2026-10-16T00:00:00.200000+00:00"}
+
+        # Both land in one batch, flushed after midnight
+        sink.submit(late)
+        sink.submit(early)
+        sink.flush()
+
+        assert list(iter_segment_entries(tmp_path / "2026/10/15")) == [late]
+        assert list(iter_segment_entries(tmp_path / "2026/10/16")) == [early]
+        assert sink.get_stats()["batches"] == 1
+
+    def test_segments_rotate_by_size(self, make_sink, tmp_path):
+        sink = make_sink(batch_size=1, segment_max_bytes=1)
+
+        for _ in range(3):
+            sink.submit(make_entry())
+        sink.flush()
+
+        assert len(list(tmp_path.rglob("*.jsonl.gz"))) == 3
+        assert len(read_segments(tmp_path)) == 3
+
+    def test_full_queue_drops_without_blocking(self, make_sink):
+        sink = make_sink(batch_size=1, max_queue=2)
+        blocker = threading.Event()
+        # Stall the writer so the queue fills up
+        sink._append_segment = lambda _entries: blocker.wait(5)
+
+        results = [sink.submit(make_entry()) for _ in range(10)]
+        blocker.set()
+
+        assert results.count(False) > 0
+        stats = sink.get_stats()
+        assert stats["dropped"] == results.count(False)
+        assert stats["high_watermark"] <= 2
+        assert stats["backpressure"] is True
+
+    def test_segments_are_gzip_jsonl(self, make_sink, tmp_path):
+        sink = make_sink()
+        sink.submit(make_entry(allowed=False))
+        sink.flush()
+
+        segment = next(tmp_path.rglob("*.jsonl.gz"))
+        with gzip.open(segment, "rt", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert json.loads(lines[0])["final_decision"]["blocked_reason"] == "keyword:gore"
+
+
+class FakeConnection:
+    def __init__(self, statements):
+        self.statements = statements
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+
+
+class FakeBegin:
+    def __init__(self, statements):
+        self.statements = statements
+
+    async def __aenter__(self):
+        return FakeConnection(self.statements)
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeEngine:
+    def __init__(self):
+        self.statements = []
+
+    def begin(self):
+        return FakeBegin(self.statements)
+
+
+class TestAuditRows:
+    def test_filter_result_categories(self):
+        assert audit_filter_result(make_entry()) == "allowed"
+        assert audit_filter_result(make_entry(allowed=False)) == "blocked"
+        assert audit_filter_result(make_entry(allowed=False, needs_review=True)) == "flagged"
+
+    @pytest.mark.asyncio
+    async def test_batch_is_one_multi_row_insert(self, make_sink):
+        sink = make_sink()
+        engine = FakeEngine()
+        entries = [make_entry(), make_entry(allowed=False)]
+
+        await sink._insert_rows(entries, engine)
+
+        assert len(engine.statements) == 1
+        params = engine.statements[0].compile().params
+        assert params["filter_result_m0"] == "allowed"
+        assert params["filter_result_m1"] == "blocked"
+        assert str(params["id_m1"]) == entries[1]["log_id"]
+        assert sink.get_stats()["db_written"] == 2
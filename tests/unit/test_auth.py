@@ -2,11 +2,21 @@
 Unit tests for core.auth module.
 """
 
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from core.auth import AppUser, _to_app_user, get_current_user, require_admin, require_current_user
+from core.auth import (
+    AppUser,
+    TokenCache,
+    _to_app_user,
+    get_current_user,
+    get_token_cache,
+    require_admin,
+    require_current_user,
+    verify_token,
+)
 
 
 class TestToAppUser:
@@ -160,3 +170,87 @@ class TestRequireAdmin:
 
         assert result.is_admin is True
         assert result.id == "admin-uuid"
+
+
+def make_validator(sub: str = "test-uuid", exp: float | None = None) -> MagicMock:
+    """Validator whose tokens carry an exp claim (cacheable when set)."""
+    mock_auth_user = MagicMock()
+    mock_auth_user.sub = sub
+    mock_auth_user.email = "test@example.com"
+    mock_auth_user.scopes = ["user"]
+    mock_auth_user.raw_payload = {"name": "Test"} if exp is None else {"name": "Test", "exp": exp}
+    mock_validator = MagicMock()
+    mock_validator.verify_async = AsyncMock(return_value=mock_auth_user)
+    return mock_validator
+
+
+class TestTokenCache:
+    """Tests for the verified token cache and per-request memo."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self):
+        with patch("core.auth._token_cache", TokenCache(max_entries=2)):
+            yield
+
+    @pytest.mark.asyncio
+    async def test_repeated_token_is_verified_once(self):
+        """Test that a cached token skips signature verification."""
+        mock_validator = make_validator(exp=time.time() + 600)
+
+        with patch("core.auth.get_validator", return_value=mock_validator):
+            first = await verify_token("cached-token")
+            second = await verify_token("cached-token")
+
+        assert first.id == second.id == "test-uuid"
+        assert mock_validator.verify_async.await_count == 1
+        stats = get_token_cache().get_stats()
+        assert stats["hits"] == 1
+        assert stats["verifications"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_is_verified_again(self):
+        """Test that entries are dropped once the token's exp passes."""
+        mock_validator = make_validator(exp=time.time() + 600)
+
+        with patch("core.auth.get_validator", return_value=mock_validator):
+            await verify_token("short-token")
+            with patch("core.auth.time.time", return_value=time.time() + 601):
+                await verify_token("short-token")
+
+        assert mock_validator.verify_async.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_token_without_exp_is_not_cached(self):
+        """Test that tokens lacking exp are always verified."""
+        mock_validator = make_validator()
+
+        with patch("core.auth.get_validator", return_value=mock_validator):
+            await verify_token("no-exp-token")
+            await verify_token("no-exp-token")
+
+        assert mock_validator.verify_async.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_is_bounded(self):
+        """Test that the least recently used token is evicted."""
+        mock_validator = make_validator(exp=time.time() + 600)
+
+        with patch("core.auth.get_validator", return_value=mock_validator):
+            for token in ("a", "b", "c", "a"):
+                await verify_token(token)
+
+        assert get_token_cache().get_stats()["entries"] == 2
+        assert mock_validator.verify_async.await_count == 4
+
+    @pytest.mark.asyncio
+    async def test_request_verifies_at_most_once(self):
+        """Test that dependencies in one request share a verification, even for bad tokens."""
+        mock_validator = MagicMock()
+        mock_validator.verify_async = AsyncMock(side_effect=Exception("Invalid token"))
+
+        with patch("core.auth.get_validator", return_value=mock_validator):
+            assert await get_current_user(authorization="Bearer bad-token") is None
+            assert await get_current_user(authorization="Bearer bad-token") is None
+
+        assert mock_validator.verify_async.await_count == 1
+        assert get_token_cache().get_stats()["memo_hits"] == 1
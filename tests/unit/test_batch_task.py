@@ -0,0 +1,185 @@
+"""
+Unit tests for the parallel batch generation engine.
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from services.batch_task import BatchLimiter, batch_items_key, execute_batch_generation
+from services.provider_router import RoutingDecision
+from services.providers.base import GenerationResult
+from tests.conftest import MockRedis
+
+SETTINGS = {"aspect_ratio": "1:1", "resolution": "1K", "safety_level": "moderate"}
+
+
+class FakeRouter:
+    """Router that takes a fixed time per item and rotates providers."""
+
+    def __init__(self, delay: float = 0.1, fail_prompts: tuple[str, ...] = ()):
+        self.delay = delay
+        self.fail_prompts = fail_prompts
+        self.providers = ["google", "openai"]
+        self.routed = 0
+        self.running = 0
+        self.max_running = 0
+
+    async def route(self, request, strategy=None):
+        provider = self.providers[self.routed % len(self.providers)]
+        self.routed += 1
+        return RoutingDecision(provider_name=provider, model_id="m", strategy_used=strategy)
+
+    async def execute_with_fallback(self, request, decision=None, coalesce=True):
+        assert not coalesce
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        if request.prompt in self.fail_prompts:
+            return GenerationResult(success=False, error="blocked", provider=decision.provider_name)
+        return GenerationResult(
+            success=True,
+            image_data=b"png",
+            image_mime_type="image/png",
+            provider=decision.provider_name,
+        )
+
+
+@pytest.fixture
+def batch_env():
+    """Patch the batch task's collaborators with fakes."""
+    redis = MockRedis()
+    router = FakeRouter()
+    storage = MagicMock()
+    storage.save_image = AsyncMock(
+        side_effect=lambda **kw: SimpleNamespace(
+            key=f"k/{kw['prompt']}", filename=f"{kw['prompt']}.png", public_url=None
+        )
+    )
+    ws = MagicMock()
+    ws.send_task_item = AsyncMock()
+    ws.send_task_complete = AsyncMock()
+    settings = MagicMock(is_prompt_pipeline_configured=False)
+    env = SimpleNamespace(
+        redis=redis,
+        router=router,
+        storage=storage,
+        ws=ws,
+        limiter=BatchLimiter(max_concurrency=8, user_concurrency=8),
+    )
+
+    with (
+        patch("services.batch_task.get_redis", AsyncMock(return_value=redis)),
+        patch("services.batch_task.get_provider_router", return_value=router),
+        patch("services.batch_task.get_storage_manager", return_value=storage),
+        patch("services.batch_task.get_websocket_manager", return_value=ws),
+        patch("services.batch_task.get_settings", return_value=settings),
+        patch("services.batch_task.get_batch_limiter", side_effect=lambda: env.limiter),
+    ):
+        yield env
+
+
+async def _run(env, prompts, task_id="batch_1", user_id="u1"):
+    await env.redis.hset(f"task:{task_id}", mapping={"status": "queued", "progress": "0"})
+    await execute_batch_generation(task_id, prompts, SETTINGS, user_id)
+
+
+class TestBatchGeneration:
+    """Tests for execute_batch_generation."""
+
+    @pytest.mark.asyncio
+    async def test_items_run_concurrently(self, batch_env):
+        start = time.monotonic()
+        await _run(batch_env, [f"p{i}" for i in range(5)])
+        elapsed = time.monotonic() - start
+
+        assert batch_env.router.max_running == 5
+        assert elapsed < 0.3  # five 0.1s items, roughly the time of one
+
+    @pytest.mark.asyncio
+    async def test_user_cap_bounds_concurrency(self, batch_env):
+        batch_env.limiter = BatchLimiter(max_concurrency=8, user_concurrency=2)
+
+        await _run(batch_env, [f"p{i}" for i in range(5)])
+
+        assert batch_env.router.max_running == 2
+
+    @pytest.mark.asyncio
+    async def test_global_cap_is_shared_across_users(self, batch_env):
+        batch_env.limiter = BatchLimiter(max_concurrency=3, user_concurrency=3)
+
+        await asyncio.gather(
+            _run(batch_env, ["a1", "a2", "a3"], task_id="batch_a", user_id="a"),
+            _run(batch_env, ["b1", "b2", "b3"], task_id="batch_b", user_id="b"),
+        )
+
+        assert batch_env.router.max_running == 3
+
+    @pytest.mark.asyncio
+    async def test_items_spread_across_providers(self, batch_env):
+        await _run(batch_env, ["a", "b", "c", "d"])
+
+        items = await batch_env.redis.hgetall(batch_items_key("batch_1"))
+        providers = [json.loads(items[str(i)])["provider"] for i in range(4)]
+        assert providers.count("google") == 2
+        assert providers.count("openai") == 2
+
+    @pytest.mark.asyncio
+    async def test_records_per_item_results_and_streams_them(self, batch_env):
+        batch_env.router.fail_prompts = ("bad",)
+
+        await _run(batch_env, ["good", "bad"])
+
+        task = await batch_env.redis.hgetall("task:batch_1")
+        assert task["status"] == "completed"
+        assert task["progress"] == "2"
+        assert "results" not in task
+
+        items = await batch_env.redis.hgetall(batch_items_key("batch_1"))
+        assert json.loads(items["0"])["image"]["key"] == "k/good"
+        assert json.loads(items["1"]) == {"status": "failed", "error": "blocked"}
+
+        statuses = {
+            call.kwargs["index"]: call.kwargs["status"]
+            for call in batch_env.ws.send_task_item.await_args_list
+        }
+        assert statuses == {0: "completed", 1: "failed"}
+        batch_env.ws.send_task_complete.assert_awaited_once()
+        assert batch_env.ws.send_task_complete.await_args.kwargs["results"] == [
+            {"key": "k/good", "filename": "good.png", "url": None}
+        ]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_batch_skips_remaining_items(self, batch_env):
+        batch_env.limiter = BatchLimiter(max_concurrency=1, user_concurrency=1)
+        original = batch_env.router.execute_with_fallback
+
+        async def cancel_after_first(request, decision=None, coalesce=True):
+            await batch_env.redis.hset("task:batch_1", "cancelled", "1")
+            return await original(request, decision=decision, coalesce=coalesce)
+
+        batch_env.router.execute_with_fallback = cancel_after_first
+
+        await _run(batch_env, ["a", "b", "c"])
+
+        task = await batch_env.redis.hgetall("task:batch_1")
+        assert task["status"] == "cancelled"
+        assert task["progress"] == "1"
+        batch_env.ws.send_task_complete.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_retry_only_generates_missing_items(self, batch_env):
+        done = {"status": "completed", "image": {"key": "k/a", "filename": "a", "url": None}}
+        await batch_env.redis.hset(batch_items_key("batch_1"), "0", json.dumps(done))
+
+        await _run(batch_env, ["a", "b"])
+
+        assert batch_env.router.routed == 1
+        assert len(batch_env.ws.send_task_complete.await_args.kwargs["results"]) == 2
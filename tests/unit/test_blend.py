@@ -20,20 +20,19 @@ def _make_blend_request(image_keys=None, blend_prompt=None, settings=None):
 
 def _make_fake_result(success=True, error=None):
     """Build a fake provider result."""
-    img = Image.new("RGB", (512, 512), color="blue") if success else None
-    return type(
-        "Result",
-        (),
-        {
-            "success": success,
-            "image": img,
-            "error": error,
-            "text_response": "Blended image",
-            "duration": 2.5,
-            "provider": "google",
-            "model": "gemini-2.0-flash-preview-image-generation",
-        },
-    )()
+    from services.providers.base import GenerationResult
+
+    result = GenerationResult(
+        success=success,
+        error=error,
+        text_response="Blended image",
+        duration=2.5,
+        provider="google",
+        model="gemini-2.0-flash-preview-image-generation",
+    )
+    if success:
+        result.image = Image.new("RGB", (512, 512), color="blue")
+    return result
 
 
 def _make_storage_obj():
@@ -64,6 +64,7 @@ def _patch_chat_deps(mock_redis, mock_quota_service, storage_mock, chat_session_
     # but preserves class-level constants the router accesses
     mock_cls = MagicMock(return_value=chat_session_mock)
     mock_cls.IMAGE_HISTORY_TURNS = RealChatSession.IMAGE_HISTORY_TURNS
+    mock_cls.MAX_HISTORY_TURNS = RealChatSession.MAX_HISTORY_TURNS
 
     with (
         patch("api.routers.chat.get_redis", get_mock_redis),
@@ -118,7 +119,7 @@ class TestSendMessageSuccess:
         )
 
         storage_mock = MagicMock()
-        storage_mock.load_image = AsyncMock(return_value=None)
+        storage_mock.load_image_bytes = AsyncMock(return_value=None)
 
         with _patch_chat_deps(mock_redis, mock_quota_service, storage_mock, chat_mock):
             response = client.post(
@@ -146,7 +147,7 @@ class TestSendMessageSuccess:
         )
 
         storage_mock = MagicMock()
-        storage_mock.load_image = AsyncMock(return_value=None)
+        storage_mock.load_image_bytes = AsyncMock(return_value=None)
         save_result = MagicMock()
         save_result.key = "images/chat/test.png"
         save_result.filename = "test.png"
@@ -179,7 +180,7 @@ class TestSendMessageSuccess:
         )
 
         storage_mock = MagicMock()
-        storage_mock.load_image = AsyncMock(return_value=None)
+        storage_mock.load_image_bytes = AsyncMock(return_value=None)
 
         with _patch_chat_deps(mock_redis, mock_quota_service, storage_mock, chat_mock):
             response = client.post(
@@ -201,7 +202,7 @@ class TestSendMessageSuccess:
         chat_mock.send_message.return_value = _make_chat_response(text="Square version.")
 
         storage_mock = MagicMock()
-        storage_mock.load_image = AsyncMock(return_value=None)
+        storage_mock.load_image_bytes = AsyncMock(return_value=None)
 
         with _patch_chat_deps(mock_redis, mock_quota_service, storage_mock, chat_mock):
             response = client.post(
@@ -224,7 +225,7 @@ class TestSendMessageSuccess:
         chat_mock.send_message.return_value = _make_chat_response(text="Updated!")
 
         storage_mock = MagicMock()
-        storage_mock.load_image = AsyncMock(return_value=None)
+        storage_mock.load_image_bytes = AsyncMock(return_value=None)
 
         with _patch_chat_deps(mock_redis, mock_quota_service, storage_mock, chat_mock):
             client.post(
@@ -232,13 +233,16 @@ class TestSendMessageSuccess:
                 json=_make_send_request(message="Add a sunset"),
             )
 
-        # Verify Redis was updated with the new messages
-        updated_data = json.loads(mock_redis._data[session_key])
-        assert len(updated_data["messages"]) == 2
-        assert updated_data["messages"][0]["role"] == "user"
-        assert updated_data["messages"][0]["content"] == "Add a sunset"
-        assert updated_data["messages"][1]["role"] == "assistant"
-        assert updated_data["messages"][1]["content"] == "Updated!"
+        # Verify the new messages were appended to the session's list
+        messages = [json.loads(m) for m in mock_redis._lists[f"{session_key}:messages"]]
+        assert len(messages) == 2
+        assert messages[0]["role"] == "user"
+        assert messages[0]["content"] == "Add a sunset"
+        assert messages[1]["role"] == "assistant"
+        assert messages[1]["content"] == "Updated!"
+        assert mock_redis._hashes[f"{session_key}:meta"]["message_count"] == "2"
+        # The legacy JSON blob was converted
+        assert session_key not in mock_redis._data
 
     def test_send_with_existing_conversation(self, client, mock_redis, mock_quota_service):
         """Send message in session that already has messages."""
@@ -260,7 +264,7 @@ class TestSendMessageSuccess:
         chat_mock.send_message.return_value = _make_chat_response(text="Made it colorful!")
 
         storage_mock = MagicMock()
-        storage_mock.load_image = AsyncMock(return_value=None)
+        storage_mock.load_image_bytes = AsyncMock(return_value=None)
 
         with _patch_chat_deps(mock_redis, mock_quota_service, storage_mock, chat_mock):
             response = client.post(
@@ -292,7 +296,7 @@ class TestSendMessageSuccess:
         chat_mock.send_message.return_value = _make_chat_response(text="OK!")
 
         storage_mock = MagicMock()
-        storage_mock.load_image = AsyncMock(return_value=None)
+        storage_mock.load_image_bytes = AsyncMock(return_value=None)
 
         with _patch_chat_deps(mock_redis, mock_quota_service, storage_mock, chat_mock):
             client.post(
@@ -319,7 +323,7 @@ class TestSendMessageErrors:
     def test_session_not_found(self, client, mock_redis, mock_quota_service):
         """Send to non-existent session returns 404."""
         storage_mock = MagicMock()
-        storage_mock.load_image = AsyncMock(return_value=None)
+        storage_mock.load_image_bytes = AsyncMock(return_value=None)
         chat_mock = MagicMock()
 
         with _patch_chat_deps(mock_redis, mock_quota_service, storage_mock, chat_mock):
@@ -343,7 +347,7 @@ class TestSendMessageErrors:
 
         chat_mock = MagicMock()
         storage_mock = MagicMock()
-        storage_mock.load_image = AsyncMock(return_value=None)
+        storage_mock.load_image_bytes = AsyncMock(return_value=None)
 
         with _patch_chat_deps(mock_redis, quota_service, storage_mock, chat_mock):
             response = client.post(
@@ -365,7 +369,7 @@ class TestSendMessageErrors:
         )
 
         storage_mock = MagicMock()
-        storage_mock.load_image = AsyncMock(return_value=None)
+        storage_mock.load_image_bytes = AsyncMock(return_value=None)
 
         with _patch_chat_deps(mock_redis, mock_quota_service, storage_mock, chat_mock):
             response = client.post(
@@ -387,7 +391,7 @@ class TestSendMessageErrors:
         )
 
         storage_mock = MagicMock()
-        storage_mock.load_image = AsyncMock(return_value=None)
+        storage_mock.load_image_bytes = AsyncMock(return_value=None)
 
         with _patch_chat_deps(mock_redis, mock_quota_service, storage_mock, chat_mock):
             response = client.post(
@@ -404,7 +408,7 @@ class TestSendMessageErrors:
         mock_redis._data[session_key] = json.dumps(session_data)
 
         storage_mock = MagicMock()
-        storage_mock.load_image = AsyncMock(return_value=None)
+        storage_mock.load_image_bytes = AsyncMock(return_value=None)
 
         # Patch ChatSession to raise on init (no API key) and settings to return None
         with _patch_no_api_key(mock_redis, mock_quota_service, storage_mock):
@@ -531,6 +535,21 @@ class TestBuildContents:
         assert model_msg.parts[1].inline_data is not None
         assert model_msg.parts[1].inline_data.mime_type == "image/png"
 
+    def test_stored_bytes_sent_as_is(self, session):
+        """Encoded history images are passed through with their own MIME type."""
+        buf = BytesIO()
+        Image.new("RGB", (64, 64), color="red").save(buf, format="JPEG")
+        history = [
+            {"role": "user", "content": "draw a cat"},
+            {"role": "assistant", "content": "here is a cat", "image_key": "img/cat.jpg"},
+        ]
+
+        contents = session._build_contents(history, "make it blue", {"img/cat.jpg": buf.getvalue()})
+
+        blob = contents[1].parts[1].inline_data
+        assert blob.mime_type == "image/jpeg"
+        assert blob.data == buf.getvalue()
+
     def test_truncation(self, session):
         """History beyond MAX_HISTORY_TURNS is truncated."""
         # Create 50 messages (25 turns) — exceeds MAX_HISTORY_TURNS=20
@@ -794,12 +813,14 @@ class TestRouterHistoryImageLoading:
         session_key = "chat:anonymous:test-session-123"
         mock_redis._data[session_key] = json.dumps(session_data)
 
-        cat_img = Image.new("RGB", (64, 64), color="orange")
+        buf = BytesIO()
+        Image.new("RGB", (64, 64), color="orange").save(buf, format="PNG")
+        cat_png = buf.getvalue()
         chat_mock = MagicMock()
         chat_mock.send_message.return_value = _make_chat_response(text="Blue cat!")
 
         storage_mock = MagicMock()
-        storage_mock.load_image = AsyncMock(return_value=cat_img)
+        storage_mock.load_image_bytes = AsyncMock(return_value=cat_png)
 
         with _patch_chat_deps(mock_redis, mock_quota_service, storage_mock, chat_mock):
             response = client.post(
@@ -808,9 +829,9 @@ class TestRouterHistoryImageLoading:
             )
 
         assert response.status_code == 200
-        # Verify send_message received history_images with the loaded image
+        # Verify send_message received the stored bytes, not a decoded image
         call_kwargs = chat_mock.send_message.call_args.kwargs
-        assert "img/cat.png" in call_kwargs["history_images"]
+        assert call_kwargs["history_images"]["img/cat.png"] == cat_png
 
     def test_router_handles_failed_image_load(self, client, mock_redis, mock_quota_service):
         """Router gracefully handles image loading failures."""
@@ -832,7 +853,7 @@ class TestRouterHistoryImageLoading:
         chat_mock.send_message.return_value = _make_chat_response(text="OK")
 
         storage_mock = MagicMock()
-        storage_mock.load_image = AsyncMock(side_effect=Exception("File not found"))
+        storage_mock.load_image_bytes = AsyncMock(side_effect=Exception("File not found"))
 
         with _patch_chat_deps(mock_redis, mock_quota_service, storage_mock, chat_mock):
             response = client.post(
@@ -0,0 +1,64 @@
+"""
+Unit tests for the per-session chat image cache.
+"""
+
+from unittest.mock import patch
+
+from services.chat_image_cache import ChatImageCache
+
+
+def make_cache(**kwargs) -> ChatImageCache:
+    options = {"ttl": 60, "images_per_session": 2, "max_bytes": 1000}
+    return ChatImageCache(**{**options, **kwargs})
+
+
+class TestChatImageCache:
+    def test_hits_and_misses(self):
+        cache = make_cache()
+        cache.put("chat:u1:s1", "a.png", b"aaa")
+
+        assert cache.get_many("chat:u1:s1", ["a.png", "b.png"]) == {"a.png": b"aaa"}
+        assert cache.get_many("chat:u1:s2", ["a.png"]) == {}
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+
+    def test_keeps_only_recent_images_per_session(self):
+        cache = make_cache()
+        for key in ("1.png", "2.png", "3.png"):
+            cache.put("chat:u1:s1", key, b"x" * 10)
+
+        assert set(cache.get_many("chat:u1:s1", ["1.png", "2.png", "3.png"])) == {
+            "2.png",
+            "3.png",
+        }
+        assert cache.get_stats()["bytes"] == 20
+
+    def test_byte_limit_drops_least_recent_session(self):
+        cache = make_cache(max_bytes=25)
+        cache.put("chat:u1:old", "a.png", b"x" * 10)
+        cache.put("chat:u1:new", "b.png", b"x" * 10)
+        cache.get_many("chat:u1:new", ["b.png"])
+        cache.put("chat:u1:new", "c.png", b"x" * 10)
+
+        assert cache.get_many("chat:u1:old", ["a.png"]) == {}
+        assert cache.get_stats()["evictions"] == 1
+        assert cache.get_stats()["bytes"] == 20
+
+    def test_expired_session_is_dropped(self):
+        cache = make_cache(ttl=10)
+        with patch("services.chat_image_cache.time.monotonic", return_value=100.0):
+            cache.put("chat:u1:s1", "a.png", b"aaa")
+        with patch("services.chat_image_cache.time.monotonic", return_value=111.0):
+            assert cache.get_many("chat:u1:s1", ["a.png"]) == {}
+        assert cache.get_stats()["bytes"] == 0
+
+    def test_drop_and_disabled(self):
+        cache = make_cache()
+        cache.put("chat:u1:s1", "a.png", b"aaa")
+        cache.drop("chat:u1:s1")
+        assert cache.get_stats()["sessions"] == 0
+
+        disabled = make_cache(max_bytes=0)
+        disabled.put("chat:u1:s1", "a.png", b"aaa")
+        assert disabled.get_many("chat:u1:s1", ["a.png"]) == {}
@@ -0,0 +1,155 @@
+"""
+Unit tests for the Redis chat session store.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.chat_store import ChatStore
+
+
+def _message(n: int) -> dict:
+    return {"role": "user", "content": f"message {n}", "timestamp": datetime.now().isoformat()}
+
+
+def _meta(when: datetime, aspect_ratio: str = "16:9") -> dict:
+    return {
+        "aspect_ratio": aspect_ratio,
+        "created_at": when.isoformat(),
+        "last_activity": when.isoformat(),
+    }
+
+
+@pytest.fixture
+def store(mock_redis):
+    return ChatStore(mock_redis, ttl=3600)
+
+
+class TestChatStore:
+    @pytest.mark.asyncio
+    async def test_append_and_load(self, store):
+        now = datetime.now()
+        await store.save("u1", "s1", _meta(now))
+
+        count = await store.append("u1", "s1", [_message(1), _message(2)], now)
+        count = await store.append("u1", "s1", [_message(3)], now)
+
+        meta, messages = await store.load("u1", "s1")
+        assert count == 3
+        assert meta["message_count"] == 3
+        assert meta["session_id"] == "s1"
+        assert [m["content"] for m in messages] == ["message 1", "message 2", "message 3"]
+
+    @pytest.mark.asyncio
+    async def test_load_reads_only_the_tail(self, store):
+        now = datetime.now()
+        await store.save("u1", "s1", _meta(now), [_message(n) for n in range(10)])
+
+        meta, messages = await store.load("u1", "s1", last=4)
+
+        assert meta["message_count"] == 10
+        assert [m["content"] for m in messages] == [f"message {n}" for n in range(6, 10)]
+
+    @pytest.mark.asyncio
+    async def test_missing_session(self, store):
+        assert await store.load("u1", "missing") is None
+        assert await store.delete("u1", "missing") is False
+
+    @pytest.mark.asyncio
+    async def test_list_newest_first_and_prunes_expired(self, store, mock_redis):
+        now = datetime.now()
+        await store.save("u1", "old", _meta(now - timedelta(minutes=5)))
+        await store.save("u1", "new", _meta(now))
+        await store.save("u1", "gone", _meta(now - timedelta(hours=2)))
+        await store.save("u2", "other", _meta(now))
+        await store.append("u1", "old", [_message(1)], now + timedelta(seconds=1))
+
+        sessions = await store.list_sessions("u1")
+
+        assert [s["session_id"] for s in sessions] == ["old", "new"]
+        assert sessions[0]["message_count"] == 1
+        assert "gone" not in mock_redis._zsets["chat_index:u1"]
+
+    @pytest.mark.asyncio
+    async def test_delete(self, store, mock_redis):
+        now = datetime.now()
+        await store.save("u1", "s1", _meta(now), [_message(1)])
+
+        assert await store.delete("u1", "s1") is True
+
+        assert await store.load("u1", "s1") is None
+        assert await store.list_sessions("u1") == []
+        assert not mock_redis._lists
+
+    @pytest.mark.asyncio
+    async def test_append_to_expired_session_leaves_nothing_behind(self, store, mock_redis):
+        now = datetime.now()
+        await store.save("u1", "s1", _meta(now), [_message(1)])
+        assert await store.load("u1", "s1") is not None
+        # The session expires between the load and the append
+        mock_redis._hashes.clear()
+        mock_redis._lists.clear()
+
+        count = await store.append("u1", "s1", [_message(2)], now)
+
+        assert count == 0
+        assert not mock_redis._hashes
+        assert not mock_redis._lists
+        assert await store.list_sessions("u1") == []
+
+    @pytest.mark.asyncio
+    async def test_partial_metadata_is_not_a_session(self, store, mock_redis):
+        now = datetime.now()
+        await store.save("u1", "s1", _meta(now))
+        await mock_redis.hset("chat:u1:s2:meta", mapping={"last_activity": now.isoformat()})
+        await mock_redis.zadd("chat_index:u1", {"s2": now.timestamp()})
+
+        assert [s["session_id"] for s in await store.list_sessions("u1")] == ["s1"]
+        assert await store.load("u1", "s2") is None
+
+
+class TestLegacyMigration:
+    def _legacy(self, mock_redis, session_id: str, messages: list[dict]):
+        now = datetime.now().isoformat()
+        mock_redis._data[f"chat:u1:{session_id}"] = json.dumps(
+            {
+                "session_id": session_id,
+                "user_id": "u1",
+                "aspect_ratio": "1:1",
+                "messages": messages,
+                "created_at": now,
+                "last_activity": now,
+            }
+        )
+        mock_redis._sets.setdefault("chat_sessions:u1", set()).add(session_id)
+
+    @pytest.mark.asyncio
+    async def test_load_converts_blob(self, store, mock_redis):
+        self._legacy(mock_redis, "s1", [_message(1), _message(2)])
+
+        meta, messages = await store.load("u1", "s1", last=1)
+
+        assert meta["aspect_ratio"] == "1:1"
+        assert meta["message_count"] == 2
+        assert [m["content"] for m in messages] == ["message 2"]
+        assert "chat:u1:s1" not in mock_redis._data
+        assert "s1" not in mock_redis._sets["chat_sessions:u1"]
+
+    @pytest.mark.asyncio
+    async def test_list_converts_legacy_index(self, store, mock_redis):
+        self._legacy(mock_redis, "s1", [])
+        self._legacy(mock_redis, "s2", [_message(1)])
+
+        sessions = await store.list_sessions("u1")
+
+        assert {s["session_id"] for s in sessions} == {"s1", "s2"}
+        assert "chat_sessions:u1" not in mock_redis._sets
+
+    @pytest.mark.asyncio
+    async def test_delete_legacy_session(self, store, mock_redis):
+        self._legacy(mock_redis, "s1", [])
+
+        assert await store.delete("u1", "s1") is True
+        assert await store.load("u1", "s1") is None
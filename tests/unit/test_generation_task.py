@@ -26,6 +26,13 @@ class FakeResult:
     search_sources: str | None = None
     retryable: bool = False
     safety_blocked: bool = False
+    image_data: bytes | None = None
+    image_mime_type: str | None = None
+    cached: bool = False
+
+    @property
+    def has_image(self) -> bool:
+        return self.image is not None or self.image_data is not None
 
 
 class FakeImage:
@@ -88,9 +95,12 @@ class FakeAdaptive:
         self.success_rates = {}
         self.costs = {}
 
-    def update(self, provider, success, latency, cost):
+    def update(self, provider, success, latency, cost, model=None):
         pass
 
+    def latency_quantile(self, provider, q, model=None, min_samples=0):
+        return None
+
     def score(self, provider, weights=None):
         return 0.5
 
@@ -111,10 +121,17 @@ class FakeRouter:
         self._registry = FakeRegistry(providers)
         self._adaptive = FakeAdaptive()
         self._initialized = True
+        self.refunded: list[str] = []
 
     def initialize(self):
         pass
 
+    async def admit(self, model, wait=0):
+        return True
+
+    async def refund(self, provider_name, model_id, media_type=None):
+        self.refunded.append(provider_name)
+
 
 def _make_settings(**overrides):
     """Build a fake settings object."""
@@ -517,3 +534,60 @@ class TestExecuteGenerationRace:
             assert status == "failed"
             ws_mock.send_generate_error.assert_called_once()
             mock_quota_svc.refund_quota.assert_called_once_with("user1", 1)
+
+    @pytest.mark.asyncio
+    async def test_cached_result_refunds_routed_token(self, mock_redis):
+        """A result-cache hit calls no provider, so the routed token is given back."""
+        primary = FakeProvider("google", delay=0.0)
+        primary.generate = AsyncMock()
+        router = FakeRouter([primary])
+        cached = FakeResult(success=True, image=FakeImage(), provider="google", cached=True)
+        result_cache = MagicMock()
+        result_cache.get = AsyncMock(return_value=cached)
+        result_cache.is_cacheable.return_value = False
+
+        fake_storage_obj = MagicMock()
+        fake_storage_obj.key = "test/img.png"
+        fake_storage_obj.filename = "img.png"
+        fake_storage_obj.public_url = "http://example.com/img.png"
+        fake_storage = MagicMock()
+        fake_storage.save_image = AsyncMock(return_value=fake_storage_obj)
+
+        with (
+            patch("services.generation_task.get_redis", AsyncMock(return_value=mock_redis)),
+            patch("services.generation_task.get_settings", return_value=_make_settings()),
+            patch("services.generation_task.get_provider_router", return_value=router),
+            patch("services.generation_task.get_result_cache", return_value=result_cache),
+            patch("services.generation_task.get_websocket_manager") as mock_ws,
+            patch("services.generation_task.get_storage_manager", return_value=fake_storage),
+            patch("services.generation_task.is_database_available", return_value=False),
+        ):
+            ws_mock = MagicMock()
+            ws_mock.send_generate_progress = AsyncMock(return_value=0)
+            ws_mock.send_generate_complete = AsyncMock(return_value=0)
+            mock_ws.return_value = ws_mock
+
+            from services.generation_task import execute_generation_race
+
+            await mock_redis.hset("task:gen_cached", mapping={"status": "queued"})
+            await execute_generation_race(
+                task_id="gen_cached",
+                request=MagicMock(),
+                original_prompt="test prompt",
+                processed_prompt=None,
+                negative_prompt=None,
+                settings_dict={"aspect_ratio": "16:9", "resolution": "1K"},
+                user_id="user1",
+                primary_provider="google",
+                primary_model="model-1",
+                fallback_names=[],
+                preset_used="balanced",
+                template_used=False,
+                was_translated=False,
+                was_enhanced=False,
+                template_name=None,
+            )
+
+            assert await mock_redis.hget("task:gen_cached", "status") == "completed"
+            primary.generate.assert_not_awaited()
+            assert router.refunded == ["google"]
@@ -0,0 +1,128 @@
+"""
+Unit tests for the image codec executor.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from api.middleware import ImageBudgetMiddleware
+from core.exceptions import ImageBudgetExceededError
+from services.image_codec import (
+    _request_budget,
+    decode_image,
+    encode_image,
+    get_codec_stats,
+    image_budget,
+    run_image_op,
+)
+
+
+class TestCodec:
+    @pytest.mark.asyncio
+    async def test_round_trip_runs_off_loop(self):
+        image = Image.new("RGB", (64, 32), (42, 128, 200))
+
+        data = await encode_image(image)
+        decoded = await decode_image(data)
+
+        assert data.startswith(b"\x89PNG")
+        assert decoded.size == (64, 32)
+        assert decoded.getpixel((5, 5)) == (42, 128, 200)
+        thread = await run_image_op(lambda: threading.current_thread().name)
+        assert thread.startswith("image-codec")
+
+    @pytest.mark.asyncio
+    async def test_stats_count_operations(self):
+        before = get_codec_stats()
+
+        await run_image_op(time.sleep, 0.01)
+        with pytest.raises(ZeroDivisionError):
+            await run_image_op(lambda: 1 / 0)
+
+        stats = get_codec_stats()
+        assert stats["submitted"] == before["submitted"] + 2
+        assert stats["completed"] == before["completed"] + 1
+        assert stats["failed"] == before["failed"] + 1
+        assert stats["queued"] == 0
+        assert stats["running"] == 0
+        assert stats["run_ms_total"] >= before["run_ms_total"] + 10
+
+
+class TestImageBudget:
+    @pytest.mark.asyncio
+    async def test_limits_concurrency_per_request(self):
+        running = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def work():
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+
+        with image_budget(max_concurrency=1, max_ms=0):
+            await asyncio.gather(*(run_image_op(work) for _ in range(3)))
+
+        assert peak == 1
+
+    @pytest.mark.asyncio
+    async def test_spent_budget_rejects_further_work(self):
+        with image_budget(max_concurrency=2, max_ms=5) as budget:
+            await run_image_op(time.sleep, 0.01)
+            assert budget.spent_ms >= 5
+
+            with pytest.raises(ImageBudgetExceededError):
+                await run_image_op(time.sleep, 0)
+
+        # Outside the block there is no budget
+        await run_image_op(time.sleep, 0)
+
+
+class TestImageBudgetMiddleware:
+    def test_each_request_gets_a_fresh_budget(self):
+        app = FastAPI()
+        app.add_middleware(ImageBudgetMiddleware)
+        seen = []
+
+        @app.get("/")
+        async def endpoint():
+            seen.append(_request_budget.get())
+            return {}
+
+        client = TestClient(app)
+        client.get("/")
+        client.get("/")
+
+        assert all(budget is not None for budget in seen)
+        assert seen[0] is not seen[1]
+
+    def test_background_tasks_run_outside_the_budget(self):
+        app = FastAPI()
+        app.add_middleware(ImageBudgetMiddleware)
+        results = []
+
+        async def job():
+            results.append(await run_image_op(lambda: "ran"))
+
+        @app.get("/")
+        async def endpoint(background_tasks: BackgroundTasks):
+            # The request has used up its budget
+            budget = _request_budget.get()
+            budget.max_ms = budget.spent_ms = 1
+            background_tasks.add_task(job)
+            return {}
+
+        response = TestClient(app).get("/")
+
+        assert response.status_code == 200
+        assert results == ["ran"]
@@ -0,0 +1,117 @@
+"""
+Unit tests for generated image records of content-addressed results.
+"""
+
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from database.models import ChatMessage, Favorite, GeneratedImage, ProjectImage, QuotaUsage
+from database.models.base import Base
+from database.repositories.image_repo import ImageRepository
+from services.storage.base import StorageConfig
+from services.storage.manager import StorageManager
+
+
+class _Session:
+    """AsyncSession stand-in over a synchronous in-memory SQLite session."""
+
+    def __init__(self, session: Session):
+        self._session = session
+
+    def add(self, obj):
+        self._session.add(obj)
+
+    async def execute(self, statement):
+        return self._session.execute(statement)
+
+    async def flush(self):
+        self._session.flush()
+
+    async def delete(self, obj):
+        self._session.delete(obj)
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite://")
+    # The image table and the tables its deletes cascade or load through
+    models = (GeneratedImage, ChatMessage, Favorite, ProjectImage, QuotaUsage)
+    Base.metadata.create_all(engine, tables=[model.__table__ for model in models])
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def image_repo(db_session):
+    return ImageRepository(_Session(db_session))
+
+
+@pytest.fixture
+def storage(tmp_path):
+    config = StorageConfig(backend="local", local_path=str(tmp_path))
+    return StorageManager(config, user_id="user1")
+
+
+def _png() -> bytes:
+    buf = BytesIO()
+    Image.new("RGB", (16, 16), color="green").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _count(db_session, key: str) -> int:
+    return db_session.scalar(
+        select(func.count()).select_from(GeneratedImage).where(GeneratedImage.storage_key == key)
+    )
+
+
+class TestContentAddressedRecords:
+    async def _save(self, storage, image_repo, data: bytes) -> str:
+        obj = await storage.save_image(
+            image=data, prompt="a fox", settings={}, content_addressed=True
+        )
+        await image_repo.get_or_create(
+            storage_key=obj.key, filename=obj.filename, prompt="a fox", mode="basic"
+        )
+        return obj.key
+
+    @pytest.mark.asyncio
+    async def test_repeated_seeded_result_shares_one_record(self, storage, image_repo, db_session):
+        data = _png()
+
+        first = await self._save(storage, image_repo, data)
+        second = await self._save(storage, image_repo, data)
+        third = await self._save(storage, image_repo, data)
+
+        assert first == second == third
+        assert _count(db_session, first) == 1
+        assert (await image_repo.get_by_storage_key(first)).prompt == "a fox"
+
+    @pytest.mark.asyncio
+    async def test_delete_removes_object_and_records(self, storage, image_repo, db_session):
+        key = await self._save(storage, image_repo, _png())
+        await self._save(storage, image_repo, _png())
+
+        assert await storage.delete_image(key) is True
+        assert await image_repo.delete_by_storage_key(key) is True
+
+        assert await storage.get_history_item(key) is None
+        assert await image_repo.get_by_storage_key(key) is None
+        assert _count(db_session, key) == 0
+
+    @pytest.mark.asyncio
+    async def test_existing_duplicate_records_still_resolve(self, image_repo, db_session):
+        # Rows written before repeats reused their record
+        for prompt in ("first", "second"):
+            await image_repo.create(
+                storage_key="u/objects/ab/dup.png", filename="dup.png", prompt=prompt
+            )
+
+        image = await image_repo.get_by_storage_key("u/objects/ab/dup.png")
+
+        assert image is not None
+        assert await image_repo.delete_by_storage_key("u/objects/ab/dup.png") is True
+        assert _count(db_session, "u/objects/ab/dup.png") == 0
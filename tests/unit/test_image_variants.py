@@ -0,0 +1,145 @@
+"""
+Unit tests for thumbnails and resized image variants.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import pytest
+from PIL import Image, UnidentifiedImageError
+from starlette.requests import Request
+
+from api.responses import storage_response
+from services.storage import variants
+from services.storage.base import StorageConfig
+from services.storage.manager import StorageManager
+from services.storage.variants import (
+    create_variant,
+    is_variant_key,
+    render_variant,
+    supported_formats,
+    thumbnail_url,
+    variant_key,
+)
+
+
+def _encode(fmt: str, size=(2048, 1024), mode="RGB", color="red") -> bytes:
+    buffer = BytesIO()
+    Image.new(mode, size, color).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return StorageManager(StorageConfig(backend="local", local_path=str(tmp_path)), user_id="user1")
+
+
+@pytest.fixture
+def thread_executor(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(variants, "get_variant_executor", lambda: executor)
+    yield executor
+    executor.shutdown()
+
+
+class TestVariantKeys:
+    def test_variant_sits_next_to_original(self):
+        assert (
+            variant_key("users/u1/2026/10/16/cat.png", 256) == "users/u1/2026/10/16/cat.w256.webp"
+        )
+        assert variant_key("users/u1/a.b/cat", 512, "avif") == "users/u1/a.b/cat.w512.avif"
+
+    def test_is_variant_key(self):
+        assert is_variant_key("users/u1/cat.w256.webp")
+        assert not is_variant_key("users/u1/cat.webp")
+
+    def test_thumbnail_url(self):
+        assert thumbnail_url("users/u1/cat.png") == "/api/images/users/u1/cat.png?w=256"
+        assert thumbnail_url("users/u1/clip.mp4", media_type="video") is None
+        assert thumbnail_url(None) is None
+
+
+class TestRenderVariant:
+    def test_downscales_to_width(self):
+        data = render_variant(_encode("PNG"), 256)
+
+        with Image.open(BytesIO(data)) as image:
+            assert image.format == "WEBP"
+            assert image.size == (256, 128)
+
+    def test_jpeg_source(self):
+        data = render_variant(_encode("JPEG", size=(4000, 3000)), 512)
+
+        with Image.open(BytesIO(data)) as image:
+            assert image.size == (512, 384)
+
+    def test_small_image_not_upscaled(self):
+        data = render_variant(_encode("PNG", size=(100, 50)), 1024)
+
+        with Image.open(BytesIO(data)) as image:
+            assert image.size == (100, 50)
+
+    def test_alpha_kept(self):
+        data = render_variant(_encode("PNG", mode="RGBA", color=(255, 0, 0, 128)), 256)
+
+        with Image.open(BytesIO(data)) as image:
+            assert image.mode == "RGBA"
+
+    def test_not_an_image(self):
+        with pytest.raises(UnidentifiedImageError):
+            render_variant(b"not an image", 256)
+
+
+class TestCreateVariant:
+    @pytest.mark.asyncio
+    async def test_stored_under_variant_key(self, storage, thread_executor):
+        obj = await storage.save_image(image=_encode("PNG"), prompt="a cat", settings={})
+
+        key = await create_variant(storage, obj.key, 256)
+
+        assert key == variant_key(obj.key, 256)
+        info = await storage.head_image(key)
+        assert info.content_type == "image/webp"
+        assert info.etag
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif("avif" not in supported_formats(), reason="Pillow cannot encode AVIF")
+    async def test_avif_variant_served_as_avif(self, storage, thread_executor):
+        obj = await storage.save_image(image=_encode("PNG"), prompt="a cat", settings={})
+        key = await create_variant(storage, obj.key, 256, "avif")
+        request = Request({"type": "http", "method": "GET", "headers": []})
+
+        response = await storage_response(request, storage, key)
+
+        assert (await storage.head_image(key)).content_type == "image/avif"
+        assert response.media_type == "image/avif"
+
+    @pytest.mark.asyncio
+    async def test_missing_original(self, storage, thread_executor):
+        assert await create_variant(storage, "users/user1/missing.png", 256) is None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_render_once(self, storage, thread_executor, monkeypatch):
+        obj = await storage.save_image(image=_encode("PNG"), prompt="a cat", settings={})
+        calls = []
+
+        def counting_render(data, width, fmt):
+            calls.append(width)
+            return render_variant(data, width, fmt)
+
+        monkeypatch.setattr(variants, "render_variant", counting_render)
+
+        keys = await asyncio.gather(*(create_variant(storage, obj.key, 512) for _ in range(4)))
+
+        assert set(keys) == {variant_key(obj.key, 512)}
+        assert calls == [512]
+
+    @pytest.mark.asyncio
+    async def test_deleting_original_drops_variants(self, storage, thread_executor):
+        obj = await storage.save_image(image=_encode("PNG"), prompt="a cat", settings={})
+        key = await create_variant(storage, obj.key, 256)
+
+        await storage.delete_image(obj.key)
+
+        assert await storage.head_image(key) is None
@@ -37,20 +37,19 @@ def _make_inpaint_request(
 
 def _make_fake_result(success=True, error=None):
     """Build a fake provider result."""
-    img = Image.new("RGB", (512, 512), color="magenta") if success else None
-    return type(
-        "Result",
-        (),
-        {
-            "success": success,
-            "image": img,
-            "error": error,
-            "text_response": "Inpainted image",
-            "duration": 3.0,
-            "provider": "google",
-            "model": "imagen-3.0-capability-001",
-        },
-    )()
+    from services.providers.base import GenerationResult
+
+    result = GenerationResult(
+        success=success,
+        error=error,
+        text_response="Inpainted image",
+        duration=3.0,
+        provider="google",
+        model="imagen-3.0-capability-001",
+    )
+    if success:
+        result.image = Image.new("RGB", (512, 512), color="magenta")
+    return result
 
 
 def _make_storage_obj():
@@ -0,0 +1,116 @@
+"""
+Unit tests for the Aho–Corasick keyword matcher and ContentFilter layer 1.
+"""
+
+import random
+import re
+from unittest.mock import patch
+
+import pytest
+
+from services.content_filter import ContentFilter
+from services.keyword_matcher import KeywordMatcher
+
+
+def legacy_check(keywords: list[str], prompt: str) -> list[str]:
+    """The original per-keyword regex check, extended to collect every match."""
+    normalized = prompt.lower()
+    compact = re.sub(r"[\s\-_]+", "", normalized)
+    matched = []
+    for keyword in keywords:
+        keyword_lower = keyword.lower()
+        if " " in keyword_lower:
+            hit = keyword_lower in normalized
+        else:
+            hit = re.search(r"\b" + re.escape(keyword_lower) + r"\b", normalized) is not None
+        keyword_compact = re.sub(r"[\s\-_]+", "", keyword_lower)
+        if hit or (keyword_compact in compact and len(keyword_compact) > 3):
+            matched.append(keyword)
+    return matched
+
+
+KEYWORDS = ["nsfw", "bra", "making love", "gore", "裸体", "色情", "18+", "x-rated"]
+
+
+class TestKeywordMatcher:
+    @pytest.mark.parametrize(
+        ("prompt", "expected"),
+        [
+            ("A cat in a garden", []),
+            ("NSFW art", ["nsfw"]),
+            ("embracing the sunrise", []),
+            ("a red bra", ["bra"]),
+            ("n s f w", ["nsfw"]),
+            ("n-s-f-w and g_o_r_e", ["nsfw", "gore"]),
+            ("couple making love", ["making love"]),
+            ("couple makinglove", ["making love"]),
+            ("一个裸体的人", []),
+            ("裸体", ["裸体"]),
+            # \b after "+" needs a word character, as in the regex check
+            ("rated 18+ only", []),
+            ("rated 18+x", ["18+"]),
+            ("x rated film", ["x-rated"]),
+        ],
+    )
+    def test_matches_legacy_semantics(self, prompt, expected):
+        matcher = KeywordMatcher(KEYWORDS)
+
+        assert matcher.find_all(prompt) == expected
+        assert legacy_check(KEYWORDS, prompt) == expected
+
+    def test_returns_all_matches_in_keyword_order(self):
+        matcher = KeywordMatcher(KEYWORDS)
+
+        assert matcher.find_all("gore, bra and nsfw, nsfw again") == ["nsfw", "bra", "gore"]
+
+    def test_overlapping_keywords(self):
+        matcher = KeywordMatcher(["she", "he", "hers", "his"])
+
+        # "hers" inside "ushers" only matches through the compact check
+        assert matcher.find_all("ushers he his") == ["he", "hers", "his"]
+
+    def test_empty_keyword_list(self):
+        assert KeywordMatcher([]).find_all("anything") == []
+
+    def test_randomized_equivalence_with_legacy_check(self):
+        rng = random.Random(7)
+        alphabet = "abcde -_"
+        keywords = list(
+            {
+                "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 6))).strip() or "a"
+                for _ in range(200)
+            }
+        )
+        matcher = KeywordMatcher(keywords)
+
+        for _ in range(300):
+            prompt = "".join(rng.choice(alphabet + "xyz") for _ in range(rng.randint(0, 40)))
+            assert matcher.find_all(prompt) == legacy_check(keywords, prompt)
+
+
+class TestContentFilterKeywords:
+    @pytest.fixture
+    def content_filter(self):
+        with (
+            patch.object(ContentFilter, "_load_from_file", return_value=["nsfw", "gore"]),
+            patch("services.ai_content_moderator.get_ai_moderator", return_value=None),
+        ):
+            yield ContentFilter()
+
+    def test_check_keywords_reports_first_match(self, content_filter):
+        assert content_filter._check_keywords("gore and nsfw") == (False, "nsfw")
+        assert content_filter._check_keywords("a calm lake") == (True, "")
+
+    def test_refresh_swaps_in_new_keywords(self, content_filter):
+        with patch.object(ContentFilter, "_load_from_file", return_value=["lake"]):
+            assert content_filter.refresh_keywords() == 1
+
+        assert content_filter.banned_keywords == ["lake"]
+        assert content_filter.find_keywords("a calm lake") == ["lake"]
+        assert content_filter.find_keywords("nsfw") == []
+
+    def test_failed_refresh_keeps_current_keywords(self, content_filter):
+        with patch.object(ContentFilter, "_load_from_file", return_value=None):
+            assert content_filter.refresh_keywords() == 2
+
+        assert content_filter.find_keywords("nsfw") == ["nsfw"]
@@ -0,0 +1,101 @@
+"""
+Unit tests for log-bucketed latency histograms.
+"""
+
+import random
+
+import pytest
+
+from services.latency_histogram import (
+    MAX_LATENCY,
+    DecayingLatencyHistogram,
+    LatencyHistogram,
+    bucket_index,
+    bucket_value,
+)
+
+
+class TestLatencyHistogram:
+    """Tests for the fixed-size histogram."""
+
+    def test_empty_histogram_has_no_quantiles(self):
+        hist = LatencyHistogram()
+
+        assert hist.quantile(0.5) is None
+        assert hist.mean() is None
+
+    @pytest.mark.parametrize("q", [0.5, 0.9, 0.99])
+    def test_quantiles_within_bucket_resolution(self, q):
+        rng = random.Random(42)
+        samples = [rng.lognormvariate(1.0, 0.8) for _ in range(5000)]
+        hist = LatencyHistogram()
+        for sample in samples:
+            hist.add(sample)
+
+        exact = sorted(samples)[int(q * len(samples)) - 1]
+        assert hist.quantile(q) == pytest.approx(exact, rel=0.06)
+
+    def test_out_of_range_latencies_are_clamped(self):
+        hist = LatencyHistogram()
+        hist.add(0.0)
+        hist.add(MAX_LATENCY * 10)
+
+        assert bucket_index(0.0) == 0
+        assert hist.quantile(1.0) == pytest.approx(bucket_value(bucket_index(MAX_LATENCY * 10)))
+
+    def test_merge_sums_counts(self):
+        fast, slow = LatencyHistogram(), LatencyHistogram()
+        for _ in range(10):
+            fast.add(1.0)
+            slow.add(9.0)
+
+        fast.merge(slow)
+
+        assert fast.total == 20
+        assert fast.mean() == pytest.approx(5.0)
+        assert fast.quantile(0.9) == pytest.approx(9.0, rel=0.05)
+
+    def test_dict_round_trip_accepts_redis_strings(self):
+        hist = LatencyHistogram()
+        hist.add(2.0)
+        hist.add(3.0)
+
+        data = {k: str(v) for k, v in hist.to_dict().items()}
+        restored = LatencyHistogram.from_dict(data)
+
+        assert restored.counts == hist.counts
+        assert restored.mean() == pytest.approx(2.5)
+
+
+class TestDecayingLatencyHistogram:
+    """Tests for the time-windowed histogram."""
+
+    def test_old_windows_weigh_less(self):
+        hist = DecayingLatencyHistogram(window_seconds=60, max_windows=10, half_life=60)
+        for _ in range(10):
+            hist.add(10.0, now=0)
+        for _ in range(10):
+            hist.add(1.0, now=60)
+
+        hist._roll(60)
+        # The slow window is one half-life old: 10 fast samples vs 5 slow ones
+        assert hist._aggregate.total == pytest.approx(15.0)
+        assert hist._aggregate.quantile(0.5) == pytest.approx(1.0, rel=0.05)
+
+    def test_windows_beyond_horizon_are_dropped(self):
+        hist = DecayingLatencyHistogram(window_seconds=60, max_windows=2)
+        hist.add(10.0, now=0)
+        hist.add(1.0, now=120)
+
+        assert sorted(hist._windows) == [120]
+
+    def test_replace_windows_uses_given_histograms(self):
+        hist = DecayingLatencyHistogram(window_seconds=60)
+        window = LatencyHistogram()
+        for _ in range(4):
+            window.add(3.0)
+
+        hist.replace_windows([(hist.window_start(), window)])
+
+        assert hist.count == 4
+        assert hist.percentiles()["p50"] == pytest.approx(3.0, rel=0.05)
@@ -0,0 +1,164 @@
+"""
+Unit tests for incremental moderation statistics.
+"""
+
+from collections import defaultdict
+
+import pytest
+
+from services.moderation_stats import (
+    counters_key,
+    fold_entries,
+    read_rollups,
+    record_entries,
+    summarize,
+    timing_bucket,
+)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+
+        return queue
+
+    async def execute(self):
+        return [
+            getattr(self._redis, name)(*args, **kwargs) for name, args, kwargs in self._commands
+        ]
+
+
+class FakeRedis:
+    """In-memory stand-in for the hash and sorted set commands used by the counters."""
+
+    def __init__(self):
+        self.hashes = defaultdict(dict)
+        self.zsets = defaultdict(dict)
+        self.ttls = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        self.round_trips += 1
+        return FakePipeline(self)
+
+    def hincrby(self, key, field, amount):
+        self.hashes[key][field] = str(int(self.hashes[key].get(field, 0)) + amount)
+
+    def hincrbyfloat(self, key, field, amount):
+        self.hashes[key][field] = str(float(self.hashes[key].get(field, 0)) + amount)
+
+    def zincrby(self, key, amount, member):
+        self.zsets[key][member] = self.zsets[key].get(member, 0) + amount
+
+    def expire(self, key, ttl):
+        self.ttls[key] = ttl
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def zrevrange(self, key, start, end, withscores=False):
+        items = sorted(self.zsets.get(key, {}).items(), key=lambda kv: kv[1], reverse=True)
+        items = items[start:] if end == -1 else items[start : end + 1]
+        return items if withscores else [k for k, _ in items]
+
+
+def make_entry(
+    timestamp: str = "2026-10-16T09:15:00+00:00",
+    blocked_by: str | None = None,
+    reason: str | None = None,
+    needs_review: bool = False,
+    layer1_ms: float = 0.4,
+    layer2_ms: float | None = None,
+) -> dict:
+    return {
+        "timestamp": timestamp,
+        "layer1_keyword": {"checked": True, "execution_time_ms": layer1_ms},
+        "layer2_ai": {"checked": layer2_ms is not None, "execution_time_ms": layer2_ms or 0},
+        "final_decision": {
+            "allowed": blocked_by is None,
+            "blocked_by": blocked_by,
+            "blocked_reason": reason,
+        },
+        "analysis_flags": {"needs_review": needs_review},
+    }
+
+
+class TestFoldEntries:
+    def test_counts_land_in_day_and_hour(self):
+        rollups = fold_entries(
+            [
+                make_entry(),
+                make_entry("2026-10-16T10:01:00+00:00", "keyword", "keyword:gore"),
+            ]
+        )
+
+        assert set(rollups) == {"2026-10-16", "2026-10-16T09", "2026-10-16T10"}
+        day = rollups["2026-10-16"]["counters"]
+        assert day["checks"] == 2
+        assert day["allowed"] == 1
+        assert day["blocked"] == 1
+        assert day["blocked:layer1"] == 1
+        assert rollups["2026-10-16"]["keywords"] == {"gore": 1}
+        assert rollups["2026-10-16T09"]["counters"]["checks"] == 1
+
+    def test_timing_histogram_skips_unchecked_layers(self):
+        rollups = fold_entries([make_entry(layer1_ms=3, layer2_ms=700)])
+        counters = rollups["2026-10-16"]["counters"]
+
+        assert counters[f"layer1:le:{timing_bucket(3)}"] == 1
+        assert counters["layer2:le:1000"] == 1
+        assert counters["layer2:count"] == 1
+
+        counters = fold_entries([make_entry()])["2026-10-16"]["counters"]
+        assert counters["layer2:count"] == 0
+
+    def test_timing_bucket_bounds(self):
+        assert timing_bucket(0) == "1"
+        assert timing_bucket(1) == "1"
+        assert timing_bucket(1.01) == "2"
+        assert timing_bucket(60000) == "inf"
+
+
+class TestRedisCounters:
+    @pytest.mark.asyncio
+    async def test_batches_accumulate_in_one_round_trip_each(self):
+        redis = FakeRedis()
+        await record_entries(
+            redis, [make_entry(), make_entry(blocked_by="ai", reason="ai:violence")]
+        )
+        await record_entries(redis, [make_entry(needs_review=True, layer2_ms=120)])
+
+        assert redis.round_trips == 2
+        assert redis.hashes[counters_key("2026-10-16")]["checks"] == "3"
+
+        (rollup,) = await read_rollups(redis, ["2026-10-16"])
+        summary = summarize("2026-10-16", rollup)
+        assert summary["total_checks"] == 3
+        assert summary["blocked"] == 1
+        assert summary["flagged"] == 1
+        assert summary["ai_classifications"] == {"violence": 1}
+        assert summary["block_breakdown"] == {"layer1_keyword": 0, "layer2_ai": 1}
+        assert summary["timings"]["layer2"]["p50_ms"] == 250.0
+
+    @pytest.mark.asyncio
+    async def test_missing_period_reads_as_none(self):
+        rollups = await read_rollups(FakeRedis(), ["2026-10-15", "2026-10-15T03"])
+        assert rollups == [None, None]
+
+    def test_summary_matches_scan_shape(self):
+        entries = [make_entry(blocked_by="keyword", reason=f"keyword:k{i % 3}") for i in range(12)]
+        summary = summarize("2026-10-16", fold_entries(entries)["2026-10-16"])
+
+        assert summary["top_blocked_keywords"][0] == {"keyword": "k0", "count": 4}
+        assert summary["accuracy_metrics"]["block_rate"] == 100.0
+        assert summary["average_times_ms"]["layer1"] == 0.4
+
+    def test_empty_summary(self):
+        summary = summarize("2026-10-16", None)
+        assert summary["total_checks"] == 0
+        assert summary["timings"]["layer1"]["p95_ms"] is None
@@ -0,0 +1,132 @@
+"""
+Unit tests for the two-tier prompt pipeline cache.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from services.prompt_cache import GENERATION_KEY, PromptCache, normalize_text
+from services.prompt_pipeline import PromptPipeline
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, 0)) + 1)
+        return int(self.values[key])
+
+
+@pytest.fixture
+def redis():
+    fake = FakeRedis()
+    with patch("services.prompt_cache.get_redis", AsyncMock(return_value=fake)):
+        yield fake
+
+
+class TestPromptCache:
+    """Tests for the local and shared tiers."""
+
+    def test_normalization_collapses_whitespace(self):
+        assert normalize_text("  a  cute\n cat ") == "a cute cat"
+
+    @pytest.mark.asyncio
+    async def test_local_hit_skips_compute(self, redis):
+        cache = PromptCache()
+        compute = AsyncMock(return_value="A cute cat")
+
+        first = await cache.get_or_compute("translate", "一只猫", compute, context="meta")
+        second = await cache.get_or_compute("translate", " 一只猫 ", compute, context="meta")
+
+        assert first == second == "A cute cat"
+        compute.assert_awaited_once()
+        assert cache.get_stats()["steps"]["translate"] == {
+            "local_hits": 1,
+            "redis_hits": 0,
+            "misses": 1,
+        }
+
+    @pytest.mark.asyncio
+    async def test_other_process_hits_redis(self, redis):
+        await PromptCache().get_or_compute("enhance", "cat", AsyncMock(return_value="Cat, 8k"))
+        other = PromptCache()
+        compute = AsyncMock()
+
+        assert await other.get_or_compute("enhance", "cat", compute) == "Cat, 8k"
+        compute.assert_not_awaited()
+        assert other.get_stats()["steps"]["enhance"]["redis_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_meta_prompt_change_is_a_miss(self, redis):
+        cache = PromptCache()
+        compute = AsyncMock(return_value="x")
+
+        await cache.get_or_compute("negative", "cat", compute, context="meta v1")
+        await cache.get_or_compute("negative", "cat", compute, context="meta v2")
+
+        assert compute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_none_results_are_not_cached(self, redis):
+        cache = PromptCache()
+        compute = AsyncMock(return_value=None)
+
+        await cache.get_or_compute("render:x", "{}", compute)
+        await cache.get_or_compute("render:x", "{}", compute)
+
+        assert compute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate_retires_entries_everywhere(self, redis):
+        cache = PromptCache()
+        compute = AsyncMock(return_value="x")
+        await cache.get_or_compute("translate", "猫", compute)
+
+        assert await cache.invalidate() == 1
+        await cache.get_or_compute("translate", "猫", compute)
+
+        assert redis.values[GENERATION_KEY] == "1"
+        assert compute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_lru_evicts_oldest_local_entry(self):
+        cache = PromptCache(local_size=2)
+
+        with patch("services.prompt_cache.get_redis", AsyncMock(side_effect=RuntimeError)):
+            for text in ("a", "b", "c"):
+                await cache.get_or_compute("enhance", text, AsyncMock(return_value=text))
+
+        assert cache.get_stats()["local_entries"] == 2
+
+
+class TestPipelineCaching:
+    """Tests for pipeline steps going through the cache."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_translation_calls_llm_once(self, redis):
+        pipeline = PromptPipeline(cache=PromptCache())
+        pipeline._fetch_rendered_prompt = AsyncMock(return_value="Translate to English")
+        settings = MagicMock(prompt_auto_translate=True, openrouter_model="m")
+
+        with (
+            patch("services.prompt_pipeline.get_settings", return_value=settings),
+            patch("services.llm_client.get_llm_client") as mock_get_llm,
+        ):
+            mock_llm = AsyncMock()
+            mock_llm.generate.return_value = "A cute cat"
+            mock_get_llm.return_value = mock_llm
+
+            for _ in range(3):
+                result = await pipeline.process(prompt="一只可爱的猫咪")
+
+        assert result.final == "A cute cat"
+        mock_llm.generate.assert_awaited_once()
+        pipeline._fetch_rendered_prompt.assert_awaited_once()
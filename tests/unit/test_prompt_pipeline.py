@@ -2,6 +2,7 @@
 Unit tests for the prompt processing pipeline.
 """
 
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 
@@ -49,6 +50,7 @@ class TestProcessedPrompt:
         assert p.final == ""
         assert p.language_detected is None
         assert p.pipeline_duration == 0.0
+        assert p.step_timings == {}
 
 
 # ============ Pipeline Passthrough ============
@@ -430,3 +432,45 @@ class TestFullPipeline:
             )
 
         assert result.pipeline_duration >= 0
+
+    @pytest.mark.asyncio
+    async def test_enhance_and_negative_run_concurrently_from_translation(self):
+        """Enhancement and negative prompt both start from the translated text, in parallel."""
+        pipeline = PromptPipeline()
+        both_started = asyncio.Event()
+        inputs: dict[str, str] = {}
+
+        async def mock_generate(prompt, system_message=None, temperature=0.7, **kwargs):
+            if temperature == 0.3:
+                return "A cute cat"
+            step = "enhance" if temperature == 0.7 else "negative"
+            inputs[step] = prompt
+            if len(inputs) == 2:
+                both_started.set()
+            # Deadlocks (and times out) unless the other step is running too
+            await asyncio.wait_for(both_started.wait(), timeout=1)
+            return "A fluffy cute cat" if step == "enhance" else "blurry"
+
+        with (
+            patch("services.prompt_pipeline.get_settings") as mock_settings,
+            patch.object(pipeline, "_render_prompt", return_value="meta prompt"),
+            patch("services.llm_client.get_llm_client") as mock_get_llm,
+        ):
+            settings = MagicMock()
+            settings.prompt_auto_translate = True
+            mock_settings.return_value = settings
+
+            mock_llm = AsyncMock()
+            mock_llm.generate = mock_generate
+            mock_get_llm.return_value = mock_llm
+
+            result = await pipeline.process(
+                prompt="一只可爱的猫咪",
+                enhance=True,
+                generate_negative=True,
+            )
+
+        assert inputs == {"enhance": "A cute cat", "negative": "A cute cat"}
+        assert result.final == "A fluffy cute cat"
+        assert result.negative_prompt == "blurry"
+        assert set(result.step_timings) == {"translate", "enhance", "negative"}
@@ -0,0 +1,208 @@
+"""
+Unit tests for provider state shared across processes.
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from services.latency_histogram import DecayingLatencyHistogram, bucket_index
+from services.provider_router import AdaptiveRoutingStrategy
+from services.provider_state import (
+    LATENCY_NAMES_KEY,
+    SharedProviderState,
+    breaker_key,
+    latency_key,
+    stats_key,
+)
+from services.providers.base import CircuitBreaker, CircuitBreakerManager
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+
+    def hgetall(self, key):
+        self._commands.append(self._redis.hashes.get(key, {}))
+        return self
+
+    async def execute(self):
+        return self._commands
+
+
+class FakeSharedRedis:
+    """Redis stand-in with canned script replies and readable shared state."""
+
+    def __init__(self, script_reply=None):
+        self.script = AsyncMock(return_value=script_reply)
+        self.names: set[str] = set()
+        self.latency_names: set[str] = set()
+        self.hashes: dict[str, dict] = {}
+
+    def register_script(self, source):
+        return self.script
+
+    async def sadd(self, key, *values):
+        self._set(key).update(values)
+
+    async def smembers(self, key):
+        return set(self._set(key))
+
+    def _set(self, key):
+        return self.latency_names if key == LATENCY_NAMES_KEY else self.names
+
+    async def delete(self, key):
+        self.hashes.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+@pytest.fixture(autouse=True)
+def isolated_breakers():
+    """Keep the class-level breaker registry clean between tests."""
+    breakers, shared = CircuitBreakerManager._breakers, CircuitBreakerManager._shared
+    CircuitBreakerManager._breakers, CircuitBreakerManager._shared = {}, None
+    yield
+    CircuitBreakerManager._breakers, CircuitBreakerManager._shared = breakers, shared
+
+
+async def _drain(shared: SharedProviderState):
+    await asyncio.gather(*shared._tasks)
+
+
+class TestSharedBreakers:
+    """Tests for mirroring circuit breakers through Redis."""
+
+    @pytest.mark.asyncio
+    async def test_fleet_failures_open_local_breaker(self):
+        redis = FakeSharedRedis(script_reply=["open", 5, 0, str(time.time())])
+        shared = SharedProviderState()
+        CircuitBreakerManager.use_shared_state(shared)
+        breaker = CircuitBreakerManager.get("google")
+
+        with patch("services.provider_state.get_redis", AsyncMock(return_value=redis)):
+            breaker.record_failure()
+            await _drain(shared)
+
+        # One local failure, but the fleet already reached the threshold
+        assert breaker.state == "open"
+        assert breaker.failure_count == 5
+        assert not breaker.can_execute()
+        assert redis.script.await_args.kwargs["args"][0] == "failure"
+        assert redis.names == {"google"}
+
+    def test_works_locally_without_event_loop(self):
+        CircuitBreakerManager.use_shared_state(SharedProviderState())
+        breaker = CircuitBreakerManager.get("google")
+
+        for _ in range(breaker.config.failure_threshold):
+            breaker.record_failure()
+
+        assert breaker.state == "open"
+
+    @pytest.mark.asyncio
+    async def test_redis_errors_keep_local_state(self):
+        shared = SharedProviderState()
+        breaker = CircuitBreaker("google")
+        breaker.shared = shared
+
+        with patch("services.provider_state.get_redis", AsyncMock(side_effect=RuntimeError)):
+            breaker.record_failure()
+            await _drain(shared)
+
+        assert breaker.state == "closed"
+        assert breaker.failure_count == 1
+
+    def test_stale_open_state_keeps_local_probe(self):
+        breaker = CircuitBreaker("google")
+        breaker.state = "half-open"
+        breaker.last_failure_time = 100.0
+
+        breaker.apply_shared_state("open", 5, 0, last_failure_time=100.0)
+        assert breaker.state == "half-open"
+
+        breaker.apply_shared_state("open", 6, 0, last_failure_time=200.0)
+        assert breaker.state == "open"
+
+
+class TestSharedRefresh:
+    """Tests for refreshing local state from Redis."""
+
+    @pytest.mark.asyncio
+    async def test_refresh_applies_breakers_and_stats(self):
+        redis = FakeSharedRedis()
+        redis.names = {"openai"}
+        redis.hashes[breaker_key("openai")] = {
+            "state": "open",
+            "failures": "5",
+            "successes": "0",
+            "last_failure": str(time.time()),
+        }
+        redis.hashes[stats_key("openai")] = {"success_rate": "0.25", "cost": "0.04"}
+        redis.latency_names = {"openai", "openai/dall-e-3"}
+        window = DecayingLatencyHistogram().window_start()
+        for name in redis.latency_names:
+            redis.hashes[latency_key(name, window)] = {
+                str(bucket_index(2.0)): "3",
+                "sum": "6.0",
+            }
+
+        shared = SharedProviderState()
+        adaptive = AdaptiveRoutingStrategy()
+        adaptive.use_shared_state(shared)
+
+        with patch("services.provider_state.get_redis", AsyncMock(return_value=redis)):
+            await shared.refresh()
+
+        assert not CircuitBreakerManager.get("openai").can_execute()
+        assert adaptive.success_rates["openai"] == 0.25
+        assert adaptive.costs["openai"] == 0.04
+        assert adaptive.latencies["openai"].count == 3
+        assert adaptive.latencies["openai"].mean() == pytest.approx(2.0)
+        assert adaptive.latency_quantile("openai", 0.5, model="dall-e-3") == pytest.approx(
+            2.0, rel=0.05
+        )
+
+    @pytest.mark.asyncio
+    async def test_refresh_runs_at_most_once_per_ttl(self):
+        shared = SharedProviderState(cache_ttl=60)
+        shared.refresh = AsyncMock()
+
+        shared.maybe_refresh()
+        shared.maybe_refresh()
+        await _drain(shared)
+
+        shared.refresh.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_adaptive_update_publishes_stats(self):
+        shared = MagicMock()
+        adaptive = AdaptiveRoutingStrategy()
+        adaptive.use_shared_state(shared)
+
+        adaptive.update("google", success=True, latency=2.5, cost=0.02, model="imagen")
+
+        shared.publish_stats.assert_called_once_with("google", True, 2.5, 0.02, 0.1, "imagen")
+
+    @pytest.mark.asyncio
+    async def test_stats_count_latency_in_provider_and_model_windows(self):
+        redis = FakeSharedRedis(script_reply="0.9")
+        shared = SharedProviderState()
+
+        with patch("services.provider_state.get_redis", AsyncMock(return_value=redis)):
+            shared.publish_stats("google", True, 2.5, 0.02, 0.1, "imagen")
+            await _drain(shared)
+
+        window = DecayingLatencyHistogram().window_start()
+        kwargs = redis.script.await_args.kwargs
+        assert kwargs["keys"] == [
+            stats_key("google"),
+            latency_key("google", window),
+            latency_key("google/imagen", window),
+        ]
+        assert kwargs["args"][4] == bucket_index(2.5)
+        assert redis.latency_names == {"google", "google/imagen"}
@@ -0,0 +1,280 @@
+"""
+Unit tests for provider rate limiting and rate-aware routing.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from services.provider_router import ProviderRouter
+from services.providers.base import (
+    CircuitBreakerManager,
+    GenerationRequest,
+    GenerationResult,
+    MediaType,
+    ProviderModel,
+)
+from services.rate_limiter import ProviderRateLimiter, RateLimitDecision
+
+
+def _model(provider: str, rpm: int | None = 60, daily: int | None = None) -> ProviderModel:
+    return ProviderModel(
+        id=f"{provider}-model",
+        name=f"{provider} model",
+        provider=provider,
+        media_type=MediaType.IMAGE,
+        capabilities=[],
+        rate_limit_rpm=rpm,
+        rate_limit_daily=daily,
+    )
+
+
+def _redis_with_script(*replies):
+    """Redis stand-in whose registered script returns the given replies in turn."""
+    script = AsyncMock(side_effect=list(replies))
+    redis = MagicMock()
+    redis.register_script.return_value = script
+    return redis, script
+
+
+class TestProviderRateLimiter:
+    """Tests for the token-bucket limiter client."""
+
+    @pytest.mark.asyncio
+    async def test_unlimited_model_skips_redis(self):
+        limiter = ProviderRateLimiter()
+
+        with patch("services.rate_limiter.get_redis", AsyncMock(side_effect=AssertionError)):
+            decision = await limiter.acquire(_model("google", rpm=None))
+
+        assert decision.allowed
+
+    @pytest.mark.asyncio
+    async def test_acquire_passes_limits_and_parses_reply(self):
+        redis, script = _redis_with_script([0, 250, 45000, 3])
+        limiter = ProviderRateLimiter()
+
+        with patch("services.rate_limiter.get_redis", AsyncMock(return_value=redis)):
+            decision = await limiter.acquire(_model("openai", rpm=10, daily=100))
+
+        assert decision == RateLimitDecision(
+            allowed=False, tokens=0.25, retry_after=45.0, daily_used=3
+        )
+        script.assert_awaited_once_with(
+            keys=["ratelimit:openai:openai-model", "ratelimit:openai:openai-model:daily"],
+            args=[10, 100, 1],
+        )
+
+    @pytest.mark.asyncio
+    async def test_fails_open_when_redis_is_down(self):
+        limiter = ProviderRateLimiter()
+
+        with patch("services.rate_limiter.get_redis", AsyncMock(side_effect=RuntimeError)):
+            assert (await limiter.acquire(_model("google"))).allowed
+
+    @pytest.mark.asyncio
+    async def test_wait_queues_until_a_token_frees_up(self):
+        redis, script = _redis_with_script([0, 900, 10, 0], [1, 0, 0, 0])
+        limiter = ProviderRateLimiter()
+
+        with patch("services.rate_limiter.get_redis", AsyncMock(return_value=redis)):
+            assert await limiter.wait(_model("google"), timeout=1.0)
+
+        assert script.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_wait_gives_up_when_retry_exceeds_timeout(self):
+        redis, _ = _redis_with_script([0, 0, 30000, 0])
+        limiter = ProviderRateLimiter()
+
+        with patch("services.rate_limiter.get_redis", AsyncMock(return_value=redis)):
+            assert not await limiter.wait(_model("google"), timeout=1.0)
+
+    @pytest.mark.asyncio
+    async def test_levels_peek_without_consuming(self):
+        redis, script = _redis_with_script([1, 500, 0, 7])
+        limiter = ProviderRateLimiter()
+
+        with patch("services.rate_limiter.get_redis", AsyncMock(return_value=redis)):
+            levels = await limiter.get_levels(_model("google", rpm=60, daily=1000))
+
+        assert script.await_args.kwargs["args"][2] == 0
+        assert levels["tokens"] == 0.5
+        assert levels["daily_used"] == 7
+        assert levels["retry_after"] == pytest.approx(0.5)
+
+    @pytest.mark.asyncio
+    async def test_release_gives_back_one_token(self):
+        redis, script = _redis_with_script([1, 1000, 0, 2])
+        limiter = ProviderRateLimiter()
+
+        with patch("services.rate_limiter.get_redis", AsyncMock(return_value=redis)):
+            await limiter.release(_model("openai", rpm=10, daily=100))
+            await limiter.release(_model("google", rpm=None))
+
+        script.assert_awaited_once_with(
+            keys=["ratelimit:openai:openai-model", "ratelimit:openai:openai-model:daily"],
+            args=[10, 100, -1],
+        )
+
+
+class FakeProvider:
+    def __init__(self, name: str):
+        self.name = name
+        self.is_available = True
+        self.models = [_model(name)]
+
+    def get_default_model(self):
+        return self.models[0]
+
+
+class FakeRegistry:
+    def __init__(self, providers):
+        self._providers = providers
+
+    def get_available_image_providers(self):
+        return list(self._providers)
+
+    def get_image_provider(self, name):
+        return next((p for p in self._providers if p.name == name), None)
+
+    def get_video_provider(self, name):
+        return None
+
+
+class FakeLimiter:
+    """Limiter that rejects a fixed set of saturated providers."""
+
+    def __init__(self, saturated: set[str]):
+        self.saturated = saturated
+        self.waited: list[str] = []
+        self.released: list[str] = []
+
+    async def acquire(self, model):
+        return RateLimitDecision(allowed=model.provider not in self.saturated)
+
+    async def wait(self, model, timeout):
+        self.waited.append(model.provider)
+        return model.provider not in self.saturated
+
+    async def release(self, model):
+        self.released.append(model.provider)
+
+
+@pytest.fixture
+def make_router():
+    def make(saturated: set[str]) -> ProviderRouter:
+        router = ProviderRouter(
+            registry=FakeRegistry([FakeProvider("google"), FakeProvider("openai")])
+        )
+        router._initialized = True
+        router._rate_limiter = FakeLimiter(saturated)
+        return router
+
+    shared = CircuitBreakerManager._shared
+    yield make
+    CircuitBreakerManager.use_shared_state(shared)
+
+
+class TestRateAwareRouting:
+    """Tests for routing around saturated models."""
+
+    @pytest.mark.asyncio
+    async def test_routes_around_saturated_provider(self, make_router):
+        router = make_router({"google"})
+
+        decision = await router.route(GenerationRequest(prompt="cat"), strategy="priority")
+
+        assert decision.provider_name == "openai"
+
+    @pytest.mark.asyncio
+    async def test_requested_provider_queues_then_reroutes(self, make_router):
+        router = make_router({"google"})
+
+        decision = await router.route(
+            GenerationRequest(prompt="cat", preferred_provider="google"), strategy="priority"
+        )
+
+        assert router._rate_limiter.waited == ["google"]
+        assert decision.provider_name == "openai"
+
+    @pytest.mark.asyncio
+    async def test_all_saturated_raises(self, make_router):
+        router = make_router({"google", "openai"})
+
+        with pytest.raises(ValueError, match="rate limited"):
+            await router.route(GenerationRequest(prompt="cat"), strategy="priority")
+
+        assert router._rate_limiter.waited == ["google"]
+
+    @pytest.mark.asyncio
+    async def test_fallback_skips_saturated_provider(self, make_router):
+        router = make_router({"openai"})
+        router._settings = MagicMock(
+            fallback_image_providers=["google", "openai"],
+            provider_timeout=5,
+            enable_fallback=True,
+        )
+        google = router._registry.get_image_provider("google")
+        openai = router._registry.get_image_provider("openai")
+        google.generate = AsyncMock(return_value=MagicMock(success=False, retryable=True))
+        openai.generate = AsyncMock()
+
+        decision = await router.route(GenerationRequest(prompt="cat"), strategy="priority")
+        await router.execute_with_fallback(GenerationRequest(prompt="cat"), decision=decision)
+
+        openai.generate.assert_not_awaited()
+
+
+class TestTokenRefunds:
+    """Tests for giving back tokens of routed requests that are never dispatched."""
+
+    @pytest.mark.asyncio
+    async def test_refund_releases_routed_model(self, make_router):
+        router = make_router(set())
+
+        await router.refund("openai", "openai-model")
+        await router.refund("openai", "unknown-model")
+        await router.refund("missing", "missing-model")
+
+        assert router._rate_limiter.released == ["openai"]
+
+    @pytest.mark.asyncio
+    async def test_coalesced_follower_refunds_its_token(self, make_router):
+        router = make_router(set())
+        router._settings = MagicMock(
+            fallback_image_providers=[], provider_timeout=5, enable_fallback=True
+        )
+        google = router._registry.get_image_provider("google")
+
+        async def generate(request, model_id=None):
+            await asyncio.sleep(0.05)
+            return GenerationResult(success=True, provider="google", model=model_id)
+
+        google.generate = AsyncMock(side_effect=generate)
+        request = GenerationRequest(prompt="cat", seed=1)
+        decisions = [await router.route(request, strategy="priority") for _ in range(2)]
+
+        with patch("services.request_coalescer.get_redis", AsyncMock(side_effect=RuntimeError)):
+            results = await asyncio.gather(
+                *(router.execute_with_fallback(request, decision=d) for d in decisions)
+            )
+
+        assert all(result.success for result in results)
+        assert google.generate.await_count == 1
+        assert router._rate_limiter.released == ["google"]
+
+    @pytest.mark.asyncio
+    async def test_abandoned_speculative_route_refunds_its_token(self, make_router):
+        from api.routers.generate import _abandon_speculative_route
+
+        router = make_router(set())
+        routing_task = asyncio.create_task(
+            router.route(GenerationRequest(prompt="cat"), strategy="priority")
+        )
+        await routing_task
+
+        await _abandon_speculative_route(router, routing_task)
+
+        assert router._rate_limiter.released == ["google"]
@@ -0,0 +1,164 @@
+"""
+Unit tests for single-flight request coalescing.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from PIL import Image
+
+from services.providers.base import GenerationRequest, GenerationResult, MediaType
+from services.request_coalescer import (
+    RequestCoalescer,
+    dump_result,
+    load_result,
+    request_fingerprint,
+)
+
+
+class FakeRedis:
+    """Minimal Redis with SET NX/EX, GET and a compare-and-delete script."""
+
+    def __init__(self):
+        self.values: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def register_script(self, source):
+        async def release(keys, args):
+            if self.values.get(keys[0]) == args[0]:
+                del self.values[keys[0]]
+
+        return release
+
+
+def _slow(result: GenerationResult | None, delay: float = 0.02) -> AsyncMock:
+    """Provider call stand-in that takes a moment to finish."""
+
+    async def call():
+        await asyncio.sleep(delay)
+        return result
+
+    return AsyncMock(side_effect=call)
+
+
+def _result(prompt: str = "cat") -> GenerationResult:
+    result = GenerationResult(success=True, provider="google", model="imagen", cost=0.02)
+    result.set_image_bytes(b"\x89PNG\r\n\x1a\n" + prompt.encode(), "image/png")
+    return result
+
+
+class TestFingerprint:
+    """Tests for canonical request hashing."""
+
+    def test_ignores_caller_identity(self):
+        a = GenerationRequest(prompt="cat", seed=1, user_id="u1", request_id="r1")
+        b = GenerationRequest(prompt="cat", seed=1, user_id="u2", request_id="r2")
+
+        assert request_fingerprint(a) == request_fingerprint(b)
+
+    def test_distinguishes_output_settings(self):
+        base = request_fingerprint(GenerationRequest(prompt="cat", seed=1))
+
+        assert request_fingerprint(GenerationRequest(prompt="cat", seed=2)) != base
+        assert request_fingerprint(GenerationRequest(prompt="cat", seed=1, resolution="2K")) != base
+        assert request_fingerprint(GenerationRequest(prompt="cat", seed=1), MediaType.VIDEO) != base
+
+    def test_requests_with_input_images_are_not_coalesced(self):
+        request = GenerationRequest(prompt="cat", reference_images=[Image.new("RGB", (1, 1))])
+
+        assert request_fingerprint(request) is None
+
+
+class TestResultSerialization:
+    def test_round_trip_keeps_image_bytes(self):
+        result = _result()
+
+        restored = load_result(dump_result(result))
+
+        assert restored.image_data == result.image_data
+        assert restored.image_mime_type == "image/png"
+        assert restored.media_type == MediaType.IMAGE
+        assert restored.cost == 0.02
+
+
+class TestRequestCoalescer:
+    """Tests for local and cross-worker single flight."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_share_one_call(self):
+        coalescer = RequestCoalescer()
+        call = _slow(_result())
+
+        with patch("services.request_coalescer.get_redis", AsyncMock(side_effect=RuntimeError)):
+            results = await asyncio.gather(
+                *(coalescer.run(GenerationRequest(prompt="cat", user_id=u), call) for u in "abc")
+            )
+
+        call.assert_awaited_once()
+        assert all(r is results[0] for r in results)
+
+    @pytest.mark.asyncio
+    async def test_different_requests_run_separately(self):
+        coalescer = RequestCoalescer()
+        call = AsyncMock(return_value=_result())
+
+        with patch("services.request_coalescer.get_redis", AsyncMock(side_effect=RuntimeError)):
+            await asyncio.gather(
+                coalescer.run(GenerationRequest(prompt="cat"), call),
+                coalescer.run(GenerationRequest(prompt="dog"), call),
+            )
+
+        assert call.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_unshared_none_result_reruns_for_joiners(self):
+        coalescer = RequestCoalescer()
+        leader = _slow(None)
+        joiner = AsyncMock(return_value=_result())
+
+        with patch("services.request_coalescer.get_redis", AsyncMock(side_effect=RuntimeError)):
+            first, second = await asyncio.gather(
+                coalescer.run(GenerationRequest(prompt="cat"), leader),
+                coalescer.run(GenerationRequest(prompt="cat"), joiner),
+            )
+
+        assert first is None
+        assert second.success
+        joiner.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_leader_publishes_result_for_other_workers(self):
+        redis = FakeRedis()
+        worker_a, worker_b = RequestCoalescer(), RequestCoalescer(poll_interval=0.01)
+        call_a = _slow(_result(), delay=0.05)
+        call_b = AsyncMock()
+
+        with patch("services.request_coalescer.get_redis", AsyncMock(return_value=redis)):
+            result_a, result_b = await asyncio.gather(
+                worker_a.run(GenerationRequest(prompt="cat"), call_a),
+                worker_b.run(GenerationRequest(prompt="cat"), call_b),
+            )
+
+        call_a.assert_awaited_once()
+        call_b.assert_not_awaited()
+        assert result_b.image_data == result_a.image_data
+        # Lock released, result kept for late joiners
+        assert [k.split(":")[1] for k in redis.values] == ["result"]
+
+    @pytest.mark.asyncio
+    async def test_disabled_coalescer_always_calls(self):
+        coalescer = RequestCoalescer(enabled=False)
+        call = AsyncMock(return_value=_result())
+
+        await asyncio.gather(*(coalescer.run(GenerationRequest(prompt="cat"), call) for _ in "ab"))
+
+        assert call.await_count == 2
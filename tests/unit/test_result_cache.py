@@ -0,0 +1,160 @@
+"""
+Unit tests for the seeded generation result cache.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from services.providers.alibaba import ALIBABA_MODELS, AlibabaProvider
+from services.providers.base import GenerationRequest, GenerationResult, ProviderConfig
+from services.result_cache import LRU_KEY, ResultCache, result_cache_key
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"pixels"
+
+
+class FakeRedis:
+    """Redis stand-in covering strings and the LRU sorted set."""
+
+    def __init__(self):
+        self.values: dict[str, str] = {}
+        self.scores: dict[str, float] = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def expire(self, key, ttl):
+        pass
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+    async def zadd(self, key, mapping):
+        self.scores.update(mapping)
+
+    async def zrem(self, key, member):
+        self.scores.pop(member, None)
+
+    async def zcard(self, key):
+        return len(self.scores)
+
+    async def zpopmin(self, key, count):
+        lowest = sorted(self.scores.items(), key=lambda item: item[1])[:count]
+        for member, _ in lowest:
+            del self.scores[member]
+        return lowest
+
+
+def _result(provider: str = "bfl") -> GenerationResult:
+    result = GenerationResult(success=True, provider=provider, model="flux-pro")
+    result.set_image_bytes(PNG, "image/png")
+    return result
+
+
+@pytest.fixture
+def env():
+    redis = FakeRedis()
+    storage = MagicMock()
+    storage.load_image_bytes = AsyncMock(return_value=PNG)
+    with (
+        patch("services.result_cache.get_redis", AsyncMock(return_value=redis)),
+        patch("services.result_cache.get_storage_manager", return_value=storage),
+    ):
+        yield redis, storage
+
+
+class TestResultCache:
+    """Tests for storing and reusing seeded results."""
+
+    def test_key_covers_seed_and_model(self):
+        request = GenerationRequest(prompt="cat", seed=7)
+
+        key = result_cache_key(request, "bfl", "flux-pro")
+
+        assert key == result_cache_key(GenerationRequest(prompt="cat", seed=7), "bfl", "flux-pro")
+        assert key != result_cache_key(GenerationRequest(prompt="cat", seed=8), "bfl", "flux-pro")
+        assert key != result_cache_key(request, "bfl", "flux-dev")
+
+    def test_only_seeded_requests_to_opted_in_providers(self):
+        cache = ResultCache(providers=["bfl"])
+
+        assert cache.is_cacheable(GenerationRequest(prompt="cat", seed=7), "bfl")
+        assert not cache.is_cacheable(GenerationRequest(prompt="cat"), "bfl")
+        assert not cache.is_cacheable(GenerationRequest(prompt="cat", seed=7), "google")
+
+    @pytest.mark.asyncio
+    async def test_seed_zero_reaches_opted_in_provider(self):
+        # Seed 0 is cacheable, so the provider must not treat it as "no seed"
+        provider = AlibabaProvider(ProviderConfig(api_key="sk-test-0000000000"))
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"output": {"task_id": "t1"}}
+        client = MagicMock(post=AsyncMock(return_value=response))
+        request = GenerationRequest(prompt="cat", seed=0)
+
+        with patch.object(provider, "_get_client", AsyncMock(return_value=client)):
+            await provider.submit_task(request, ALIBABA_MODELS[0])
+
+        assert ResultCache(providers=["alibaba"]).is_cacheable(request, "alibaba")
+        assert client.post.call_args.kwargs["json"]["parameters"]["seed"] == 0
+
+    @pytest.mark.asyncio
+    async def test_hit_returns_stored_bytes(self, env):
+        redis, storage = env
+        cache = ResultCache(providers=["bfl"])
+        request = GenerationRequest(prompt="cat", seed=7)
+
+        await cache.put(request, _result(), "users/u1/objects/ab/abc.png")
+        hit = await cache.get(request, "bfl", "flux-pro")
+
+        assert hit.cached
+        assert hit.image_data == PNG
+        assert hit.provider == "bfl"
+        storage.load_image_bytes.assert_awaited_once_with("users/u1/objects/ab/abc.png")
+
+    @pytest.mark.asyncio
+    async def test_cached_results_are_not_stored_again(self, env):
+        redis, _ = env
+        cache = ResultCache(providers=["bfl"])
+        result = _result()
+        result.cached = True
+
+        await cache.put(GenerationRequest(prompt="cat", seed=7), result, "k.png")
+
+        assert redis.values == {}
+
+    @pytest.mark.asyncio
+    async def test_deleted_object_is_a_miss(self, env):
+        redis, storage = env
+        storage.load_image_bytes.return_value = None
+        cache = ResultCache(providers=["bfl"])
+        request = GenerationRequest(prompt="cat", seed=7)
+        await cache.put(request, _result(), "gone.png")
+
+        assert await cache.get(request, "bfl", "flux-pro") is None
+        assert redis.values == {}
+        assert redis.scores == {}
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_entries_are_evicted(self, env):
+        redis, _ = env
+        cache = ResultCache(providers=["bfl"], max_entries=2)
+
+        for seed in (1, 2, 3):
+            await cache.put(GenerationRequest(prompt="cat", seed=seed), _result(), f"{seed}.png")
+
+        assert len(redis.values) == 2
+        assert len(redis.scores) == 2
+        oldest = result_cache_key(GenerationRequest(prompt="cat", seed=1), "bfl", "flux-pro")
+        assert oldest not in redis.scores
+        assert LRU_KEY not in redis.values
+
+    @pytest.mark.asyncio
+    async def test_redis_down_is_a_miss(self):
+        cache = ResultCache(providers=["bfl"])
+
+        with patch("services.result_cache.get_redis", AsyncMock(side_effect=RuntimeError)):
+            assert await cache.get(GenerationRequest(prompt="cat", seed=7), "bfl", "x") is None
@@ -0,0 +1,631 @@
+"""
+Unit tests for storage encoded-bytes passthrough and remote backends.
+"""
+
+import asyncio
+import json
+import threading
+from io import BytesIO
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image, features
+
+from api.responses import parse_range
+from services.providers.base import GenerationResult
+from services.storage import minio as minio_module
+from services.storage import oss as oss_module
+from services.storage.base import (
+    StorageConfig,
+    StorageObject,
+    content_hash,
+    detect_image_mime_type,
+)
+from services.storage.history import BucketHistoryStore
+from services.storage.manager import LEGACY_MIGRATED_KEY, StorageManager
+from services.storage.minio import MinIOStorageProvider
+from services.storage.oss import AliyunOSSProvider
+from utils.image_types import mime_type_from_key
+
+
+def _encode(fmt: str, size=(32, 16)) -> bytes:
+    buf = BytesIO()
+    Image.new("RGB", size, color="blue").save(buf, format=fmt)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def storage(tmp_path):
+    config = StorageConfig(backend="local", local_path=str(tmp_path))
+    return StorageManager(config, user_id="user1")
+
+
+class TestDetectMimeType:
+    """Tests for magic-byte MIME detection."""
+
+    def test_png(self):
+        assert detect_image_mime_type(_encode("PNG")) == "image/png"
+
+    def test_jpeg(self):
+        assert detect_image_mime_type(_encode("JPEG")) == "image/jpeg"
+
+    def test_webp(self):
+        assert detect_image_mime_type(_encode("WEBP")) == "image/webp"
+
+    @pytest.mark.skipif(not features.check("avif"), reason="Pillow cannot encode AVIF")
+    def test_avif(self):
+        assert detect_image_mime_type(_encode("AVIF")) == "image/avif"
+
+    def test_unknown_uses_default(self):
+        assert detect_image_mime_type(b"not an image") == "image/png"
+
+    def test_from_key_extension(self):
+        assert mime_type_from_key("users/u/2024/01/01/basic_1_cat.JPG") == "image/jpeg"
+        assert mime_type_from_key("a.webp") == "image/webp"
+        assert mime_type_from_key("a.w256.avif") == "image/avif"
+        assert mime_type_from_key("no_extension") == "image/png"
+
+
+class TestGenerationResultImageBytes:
+    """Tests for lazy image access on GenerationResult."""
+
+    def test_set_image_bytes_does_not_open_image(self):
+        result = GenerationResult()
+        result.set_image_bytes(_encode("JPEG"))
+
+        assert result.has_image
+        assert result.image_mime_type == "image/jpeg"
+        assert result._image is None
+
+    def test_image_opened_on_access(self):
+        result = GenerationResult()
+        result.set_image_bytes(_encode("PNG", size=(64, 48)))
+
+        assert result.image.size == (64, 48)
+
+    def test_assigning_image_clears_bytes(self):
+        result = GenerationResult()
+        result.set_image_bytes(_encode("PNG"))
+        result.image = Image.new("RGB", (8, 8))
+
+        assert result.image_data is None
+        assert result.image_mime_type is None
+        assert result.has_image
+
+    def test_empty_result_has_no_image(self):
+        result = GenerationResult()
+        assert not result.has_image
+        assert result.image is None
+
+
+class TestStorageManagerSaveImage:
+    """Tests for StorageManager.save_image with encoded bytes."""
+
+    @pytest.mark.asyncio
+    async def test_bytes_written_verbatim(self, storage):
+        data = _encode("JPEG")
+
+        obj = await storage.save_image(image=data, prompt="a cat", settings={})
+
+        assert obj.key.endswith(".jpg")
+        assert obj.content_type == "image/jpeg"
+        assert await storage.load_image_bytes(obj.key) == data
+
+    @pytest.mark.asyncio
+    async def test_explicit_content_type(self, storage):
+        data = _encode("WEBP")
+
+        obj = await storage.save_image(
+            image=data, prompt="a cat", settings={}, content_type="image/webp"
+        )
+
+        assert obj.key.endswith(".webp")
+        assert obj.content_type == "image/webp"
+
+    @pytest.mark.asyncio
+    async def test_pil_image_encoded_as_png(self, storage):
+        obj = await storage.save_image(
+            image=Image.new("RGB", (10, 10)), prompt="a dog", settings={}
+        )
+
+        assert obj.key.endswith(".png")
+        data = await storage.load_image_bytes(obj.key)
+        assert detect_image_mime_type(data) == "image/png"
+
+    @pytest.mark.asyncio
+    async def test_content_addressed_bytes_share_one_object(self, storage):
+        data = _encode("PNG")
+
+        first = await storage.save_image(
+            image=data, prompt="a cat", settings={}, content_addressed=True
+        )
+        second = await storage.save_image(
+            image=data, prompt="a cat again", settings={}, content_addressed=True
+        )
+
+        assert first.key == second.key
+        assert "/objects/" in first.key
+        history = await storage.get_history()
+        assert [item["prompt"] for item in history] == ["a cat again"]
+
+
+class TestStorageDelivery:
+    """Tests for metadata lookups and ranged reads used when serving images."""
+
+    @pytest.mark.asyncio
+    async def test_head_reports_content_hash_etag(self, storage):
+        data = _encode("PNG")
+        obj = await storage.save_image(image=data, prompt="a cat", settings={})
+
+        info = await storage.head_image(obj.key)
+
+        assert info.size == len(data)
+        assert info.etag == f'"{content_hash(data)}"'
+        assert info.etag == obj.etag
+        assert info.last_modified is not None
+        assert storage.local_image_path(obj.key).read_bytes() == data
+
+    @pytest.mark.asyncio
+    async def test_missing_image(self, storage):
+        assert await storage.head_image("user1/missing.png") is None
+        assert storage.local_image_path("user1/missing.png") is None
+
+    @pytest.mark.asyncio
+    async def test_ranged_stream(self, storage):
+        obj = await storage.save_image(image=_encode("PNG"), prompt="a cat", settings={})
+        data = await storage.load_image_bytes(obj.key)
+
+        chunks = [chunk async for chunk in storage.stream_image(obj.key, start=4, length=10)]
+
+        assert b"".join(chunks) == data[4:14]
+
+    @pytest.mark.asyncio
+    async def test_etag_from_content_addressed_key(self, storage):
+        data = _encode("PNG")
+        obj = await storage.save_image(
+            image=data, prompt="a cat", settings={}, content_addressed=True
+        )
+
+        assert storage.etag_from_key(obj.key) == f'"{content_hash(data)}"'
+        assert storage.etag_from_key("user1/2026/10/16/abc.png") is None
+
+    @pytest.mark.asyncio
+    async def test_etag_sidecar_not_listed_or_kept(self, storage):
+        obj = await storage.save_image(image=_encode("PNG"), prompt="a cat", settings={})
+
+        assert all(".etags" not in key for key in await storage._provider.list_keys(""))
+        await storage.delete_image(obj.key)
+        assert not any((storage._provider.base_path / ".etags").rglob("*.*"))
+
+
+class TestParseRange:
+    def test_closed_open_and_suffix_ranges(self):
+        assert parse_range("bytes=0-99", 1000) == (0, 100)
+        assert parse_range("bytes=900-", 1000) == (900, 100)
+        assert parse_range("bytes=-100", 1000) == (900, 100)
+        assert parse_range("bytes=990-2000", 1000) == (990, 10)
+
+    def test_whole_object_when_not_a_single_range(self):
+        assert parse_range(None, 1000) is None
+        assert parse_range("bytes=0-1,5-9", 1000) is None
+        assert parse_range("items=0-1", 1000) is None
+        assert parse_range("bytes=a-b", 1000) is None
+
+    def test_unsatisfiable_range(self):
+        with pytest.raises(HTTPException) as exc_info:
+            parse_range("bytes=1000-", 1000)
+        assert exc_info.value.status_code == 416
+        assert exc_info.value.headers["Content-Range"] == "bytes */1000"
+
+
+class StubMinio:
+    """In-memory stand-in for the MinIO client that records calling threads."""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.objects: dict[str, bytes] = {}
+        self.put_calls: list[dict] = []
+        self.threads: list[str] = []
+
+    def bucket_exists(self, bucket):
+        return True
+
+    def put_object(self, bucket, key, data, length, **kwargs):
+        self.threads.append(threading.current_thread().name)
+        self.put_calls.append(kwargs)
+        self.objects[key] = data.read(length)
+
+    def get_object(self, bucket, key, offset=0, length=0):
+        self.threads.append(threading.current_thread().name)
+        if key not in self.objects:
+            raise minio_module.S3Error(
+                "NoSuchKey", "not found", key, "req", "host", None, bucket, key
+            )
+        data = self.objects[key][offset:]
+        return StubResponse(data[:length] if length else data)
+
+    def stat_object(self, bucket, key):
+        self.threads.append(threading.current_thread().name)
+        if key not in self.objects:
+            raise minio_module.S3Error(
+                "NoSuchKey", "not found", key, "req", "host", None, bucket, key
+            )
+
+    def remove_object(self, bucket, key):
+        self.objects.pop(key, None)
+
+
+class StubResponse:
+    """File-like HTTP response returned by StubMinio.get_object."""
+
+    def __init__(self, data: bytes):
+        self._buffer = BytesIO(data)
+        self.released = False
+
+    def read(self, amt=None):
+        return self._buffer.read(amt)
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        self.released = True
+
+
+@pytest.fixture
+def minio_storage(monkeypatch):
+    monkeypatch.setattr(minio_module, "Minio", StubMinio)
+    config = StorageConfig(
+        backend="minio",
+        endpoint="http://localhost:9000",
+        public_url="http://cdn.local",
+        access_key="key",
+        secret_key="secret",
+        io_workers=2,
+        multipart_threshold=10 * 1024 * 1024,
+        multipart_part_size=5 * 1024 * 1024,
+    )
+    return MinIOStorageProvider(config)
+
+
+class TestMinIOStorageProvider:
+    """Tests for MinIO SDK calls running off the event loop."""
+
+    def test_client_uses_pooled_http_client(self, minio_storage):
+        http_client = minio_storage._client.kwargs["http_client"]
+        assert http_client.connection_pool_kw["maxsize"] == 2
+
+    @pytest.mark.asyncio
+    async def test_save_and_load_run_on_storage_executor(self, minio_storage):
+        await minio_storage.save("a.png", b"data")
+
+        assert await minio_storage.load("a.png") == b"data"
+        assert all(name.startswith("storage-io") for name in minio_storage._client.threads)
+
+    @pytest.mark.asyncio
+    async def test_small_upload_is_single_part(self, minio_storage):
+        data = b"x" * 1024
+        await minio_storage.save("a.png", data)
+
+        assert minio_storage._client.put_calls[0]["part_size"] >= len(data)
+
+    @pytest.mark.asyncio
+    async def test_upload_below_threshold_is_single_part(self, minio_storage):
+        # Larger than the configured part size but under the multipart threshold
+        data = b"x" * (6 * 1024 * 1024)
+        await minio_storage.save("mid.png", data)
+
+        assert minio_storage._client.put_calls[0]["part_size"] >= len(data)
+
+    @pytest.mark.asyncio
+    async def test_large_upload_uses_configured_part_size(self, minio_storage):
+        await minio_storage.save("big.png", b"x" * (11 * 1024 * 1024))
+
+        assert minio_storage._client.put_calls[0]["part_size"] == 5 * 1024 * 1024
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_chunks(self, minio_storage):
+        await minio_storage.save("a.png", b"0123456789")
+
+        chunks = [chunk async for chunk in minio_storage.stream("a.png", chunk_size=4)]
+
+        assert chunks == [b"0123", b"4567", b"89"]
+
+    @pytest.mark.asyncio
+    async def test_stream_uses_configured_chunk_size(self, minio_storage):
+        minio_storage.config.stream_chunk_size = 3
+        await minio_storage.save("a.png", b"0123456")
+
+        chunks = [chunk async for chunk in minio_storage.stream("a.png")]
+
+        assert chunks == [b"012", b"345", b"6"]
+
+    @pytest.mark.asyncio
+    async def test_ranged_stream_requests_only_the_range(self, minio_storage):
+        await minio_storage.save("a.png", b"0123456789")
+
+        chunks = [chunk async for chunk in minio_storage.stream("a.png", start=3, length=4)]
+
+        assert b"".join(chunks) == b"3456"
+
+    @pytest.mark.asyncio
+    async def test_missing_key(self, minio_storage):
+        assert await minio_storage.load("missing.png") is None
+        assert not await minio_storage.exists("missing.png")
+        assert [chunk async for chunk in minio_storage.stream("missing.png")] == []
+
+
+class TestHistoryStore:
+    """Tests for the indexed file-mode history store."""
+
+    @pytest.mark.asyncio
+    async def test_history_is_newest_first_and_uncapped(self, storage):
+        for i in range(120):
+            await storage._update_history(
+                StorageObject(key=f"k{i}.png", filename=f"k{i}.png"),
+                {"prompt": f"prompt {i}", "mode": "chat" if i % 2 else "basic"},
+            )
+
+        assert await storage.count_history() == 120
+        page = await storage.get_history(limit=3, offset=1)
+        assert [r["key"] for r in page] == ["k118.png", "k117.png", "k116.png"]
+        oldest = await storage.get_history(limit=1, oldest_first=True)
+        assert oldest[0]["key"] == "k0.png"
+
+    @pytest.mark.asyncio
+    async def test_filters(self, storage):
+        await storage._update_history(
+            StorageObject(key="a.png", filename="a.png"), {"prompt": "Red sunset", "mode": "basic"}
+        )
+        await storage._update_history(
+            StorageObject(key="b.png", filename="b.png"), {"prompt": "blue sea", "mode": "chat"}
+        )
+
+        assert [r["key"] for r in await storage.get_history(mode="chat")] == ["b.png"]
+        assert [r["key"] for r in await storage.get_history(search="sunset")] == ["a.png"]
+        assert await storage.count_history(search="100%") == 0
+
+    @pytest.mark.asyncio
+    async def test_delete_removes_record(self, storage):
+        obj = await storage.save_image(image=_encode("PNG"), prompt="a cat", settings={})
+
+        assert await storage.get_history_item(obj.filename) is not None
+        assert await storage.delete_image(obj.key)
+        assert await storage.get_history_item(obj.key) is None
+        assert await storage.count_history() == 0
+
+    @pytest.mark.asyncio
+    async def test_migrates_legacy_history_json(self, tmp_path):
+        config = StorageConfig(backend="local", local_path=str(tmp_path))
+        legacy = StorageManager(config, user_id="user2")
+        records = [{"key": "new.png", "prompt": "new"}, {"key": "old.png", "prompt": "old"}]
+        await legacy.provider.save(
+            legacy._get_history_key(), json.dumps(records).encode(), "application/json"
+        )
+
+        history = await legacy.get_history()
+
+        assert [r["key"] for r in history] == ["new.png", "old.png"]
+
+        # A second manager on the same user does not import again
+        await legacy.provider.delete("new.png")
+        await legacy._remove_from_history("new.png")
+        reopened = StorageManager(config, user_id="user2")
+        assert [r["key"] for r in await reopened.get_history()] == ["old.png"]
+
+    @pytest.mark.asyncio
+    async def test_unreadable_legacy_history_is_retried(self, tmp_path):
+        config = StorageConfig(backend="local", local_path=str(tmp_path))
+        manager = StorageManager(config, user_id="user3")
+        history_key = manager._get_history_key()
+        await manager.provider.save(history_key, b"{not json", "application/json")
+
+        assert await manager.get_history() == []
+        assert await manager._history.get_meta(LEGACY_MIGRATED_KEY) is None
+
+        records = [{"key": "a.png", "prompt": "a"}]
+        await manager.provider.save(history_key, json.dumps(records).encode(), "application/json")
+        retried = StorageManager(config, user_id="user3")
+        assert [r["key"] for r in await retried.get_history()] == ["a.png"]
+
+    @pytest.mark.asyncio
+    async def test_cursor_pagination(self, storage):
+        for i in range(5):
+            await storage._update_history(
+                StorageObject(key=f"k{i}.png", filename=f"k{i}.png"), {"prompt": str(i)}
+            )
+
+        first = await storage.get_history(limit=2)
+        second = await storage.get_history(limit=2, cursor=first[-1]["seq"])
+        oldest = await storage.get_history(limit=2, oldest_first=True, cursor=first[-1]["seq"])
+
+        assert [r["key"] for r in first] == ["k4.png", "k3.png"]
+        assert [r["key"] for r in second] == ["k2.png", "k1.png"]
+        assert [r["key"] for r in oldest] == ["k4.png"]
+
+    @pytest.mark.asyncio
+    async def test_stats_are_aggregated(self, storage):
+        for i, mode in enumerate(["basic", "basic", "chat"]):
+            await storage._update_history(
+                StorageObject(key=f"k{i}.png", filename=f"k{i}.png"),
+                {"mode": mode, "duration": i + 1},
+            )
+
+        stats = await storage.get_history_stats()
+
+        assert stats["total_images"] == 3
+        assert stats["images_by_mode"] == {"basic": 2, "chat": 1}
+        assert stats["total_duration"] == 6
+        assert stats["average_duration"] == 2
+        assert stats["earliest_date"] <= stats["latest_date"]
+
+    @pytest.mark.asyncio
+    async def test_stats_empty(self, storage):
+        stats = await storage.get_history_stats()
+
+        assert stats["total_images"] == 0
+        assert stats["earliest_date"] is None
+
+
+class TestBucketHistoryStore:
+    """Tests for history kept in the object-storage bucket."""
+
+    @pytest.fixture
+    def remote_storage(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(minio_module, "Minio", StubMinio)
+        config = StorageConfig(
+            backend="minio",
+            endpoint="http://localhost:9000",
+            public_url="http://cdn.local",
+            access_key="key",
+            secret_key="secret",
+            local_path=str(tmp_path),
+        )
+        return StorageManager(config, user_id="user1")
+
+    @pytest.mark.asyncio
+    async def test_history_lives_in_bucket(self, remote_storage, tmp_path):
+        assert isinstance(remote_storage._history, BucketHistoryStore)
+
+        await remote_storage._update_history(
+            StorageObject(key="a.png", filename="a.png"), {"prompt": "a", "duration": 2}
+        )
+        await remote_storage._update_history(
+            StorageObject(key="b.png", filename="b.png"), {"prompt": "b", "mode": "chat"}
+        )
+
+        objects = remote_storage.provider._client.objects
+        stored = json.loads(objects[remote_storage._get_history_key()])
+        assert [r["key"] for r in stored] == ["b.png", "a.png"]
+        assert not list(tmp_path.iterdir())
+
+        first = await remote_storage.get_history(limit=1)
+        rest = await remote_storage.get_history(cursor=first[0]["seq"])
+        assert [r["key"] for r in rest] == ["a.png"]
+        assert await remote_storage.count_history(mode="chat") == 1
+        assert (await remote_storage.get_history_stats())["total_duration"] == 2
+
+    @pytest.mark.asyncio
+    async def test_remove_and_clear(self, remote_storage):
+        await remote_storage._update_history(
+            StorageObject(key="a.png", filename="a.png"), {"prompt": "a"}
+        )
+        await remote_storage._remove_from_history("a.png")
+        assert await remote_storage.get_history_item("a.png") is None
+
+        await remote_storage._update_history(
+            StorageObject(key="b.png", filename="b.png"), {"prompt": "b"}
+        )
+        await remote_storage.clear_history()
+        assert remote_storage.provider._client.objects == {}
+
+    @pytest.mark.asyncio
+    async def test_writers_in_other_processes_do_not_lose_records(self):
+        objects: dict[str, bytes] = {}
+        locks: dict[str, str] = {}
+
+        async def load(key):
+            await asyncio.sleep(0.01)
+            return objects.get(key)
+
+        async def save(key, data, content_type):
+            await asyncio.sleep(0.01)
+            objects[key] = data
+
+        async def set_lock(key, value, nx=False, ex=None):
+            if nx and key in locks:
+                return None
+            locks[key] = value
+            return True
+
+        def register_script(source):
+            async def release(keys, args):
+                if locks.get(keys[0]) == args[0]:
+                    del locks[keys[0]]
+
+            return release
+
+        provider = SimpleNamespace(load=load, save=save)
+        redis = SimpleNamespace(set=set_lock, register_script=register_script)
+        # One store per process: they share only the bucket and Redis
+        stores = [BucketHistoryStore(provider, "users/u1/history.json") for _ in range(4)]
+
+        with patch("services.storage.history.get_redis", AsyncMock(return_value=redis)):
+            await asyncio.gather(
+                *(store.add({"key": f"{n}.png"}) for n, store in enumerate(stores))
+            )
+
+        records = json.loads(objects["users/u1/history.json"])
+        assert sorted(r["key"] for r in records) == ["0.png", "1.png", "2.png", "3.png"]
+        assert locks == {}
+
+
+class StubOSSBucket:
+    """In-memory stand-in for oss2.Bucket recording multipart calls."""
+
+    def __init__(self, auth, endpoint, bucket_name):
+        self.parts: list[bytes] = []
+        self.completed: list[list] = []
+        self.aborted: list[str] = []
+        self.fail_on_part: int | None = None
+
+    def init_multipart_upload(self, key, headers=None):
+        return SimpleNamespace(upload_id="upload-1")
+
+    def upload_part(self, key, upload_id, number, data):
+        if number == self.fail_on_part:
+            raise ConnectionError("part upload failed")
+        self.parts.append(data)
+        return SimpleNamespace(etag=f"etag-{number}")
+
+    def complete_multipart_upload(self, key, upload_id, parts):
+        self.completed.append(parts)
+
+    def abort_multipart_upload(self, key, upload_id):
+        self.aborted.append(upload_id)
+
+
+@pytest.fixture
+def oss_storage(monkeypatch):
+    fake_oss2 = SimpleNamespace(
+        Auth=lambda key, secret: (key, secret),
+        Bucket=StubOSSBucket,
+        defaults=SimpleNamespace(connection_pool_size=None),
+        models=SimpleNamespace(PartInfo=lambda number, etag: (number, etag)),
+    )
+    monkeypatch.setattr(oss_module, "OSS_AVAILABLE", True)
+    monkeypatch.setattr(oss_module, "oss2", fake_oss2)
+    config = StorageConfig(
+        backend="oss",
+        endpoint="oss-cn-hangzhou.aliyuncs.com",
+        access_key="key",
+        secret_key="secret",
+        multipart_part_size=4,
+    )
+    return AliyunOSSProvider(config)
+
+
+class TestAliyunOSSMultipart:
+    """Tests for OSS multipart uploads."""
+
+    def test_part_size_clamped_to_oss_minimum(self, oss_storage):
+        data = b"x" * (oss_module.MIN_PART_SIZE + 10)
+
+        oss_storage._put_multipart("big.png", data, {})
+
+        bucket = oss_storage._bucket
+        assert [len(part) for part in bucket.parts] == [oss_module.MIN_PART_SIZE, 10]
+        assert bucket.completed == [[(1, "etag-1"), (2, "etag-2")]]
+        assert bucket.aborted == []
+
+    def test_failed_part_aborts_upload(self, oss_storage):
+        oss_storage._bucket.fail_on_part = 2
+        data = b"x" * (oss_module.MIN_PART_SIZE * 3)
+
+        with pytest.raises(ConnectionError):
+            oss_storage._put_multipart("big.png", data, {})
+
+        assert oss_storage._bucket.aborted == ["upload-1"]
+        assert oss_storage._bucket.completed == []
@@ -0,0 +1,108 @@
+"""
+Unit tests for the ARQ-backed generation task queue.
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import BackgroundTasks
+
+from services.task_queue import (
+    BATCH_QUEUE,
+    GENERATION_QUEUE,
+    GenerationJob,
+    TaskQueue,
+    run_job_once,
+)
+from tests.conftest import MockRedis
+
+
+class FakeArqPool:
+    """ARQ pool stand-in that refuses duplicate job IDs like ARQ does."""
+
+    def __init__(self):
+        self.jobs: dict[str, dict] = {}
+
+    async def enqueue_job(self, function, *args, _job_id=None, _queue_name=None, **kwargs):
+        if _job_id in self.jobs:
+            return None
+        self.jobs[_job_id] = {"function": function, "queue": _queue_name, "kwargs": kwargs}
+        return AsyncMock(job_id=_job_id)
+
+
+class TestTaskQueue:
+    """Tests for enqueuing generation jobs."""
+
+    @pytest.mark.asyncio
+    async def test_enqueues_on_job_queue_with_task_id(self):
+        pool = FakeArqPool()
+        background = BackgroundTasks()
+        queue = TaskQueue(pool, background)
+
+        assert await queue.enqueue(GenerationJob.RACE, task_id="gen_1", user_id="u1")
+        assert await queue.enqueue(GenerationJob.BATCH, task_id="batch_1", prompts=["a"])
+
+        assert pool.jobs["gen_1"] == {
+            "function": "generation_race",
+            "queue": GENERATION_QUEUE,
+            "kwargs": {"task_id": "gen_1", "user_id": "u1"},
+        }
+        assert pool.jobs["batch_1"]["queue"] == BATCH_QUEUE
+        assert not background.tasks
+
+    @pytest.mark.asyncio
+    async def test_duplicate_task_id_is_not_enqueued_twice(self):
+        queue = TaskQueue(FakeArqPool(), BackgroundTasks())
+
+        assert await queue.enqueue(GenerationJob.IMAGE, task_id="gen_1", mode="blend")
+        assert not await queue.enqueue(GenerationJob.IMAGE, task_id="gen_1", mode="blend")
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_background_tasks_without_pool(self):
+        background = BackgroundTasks()
+        queue = TaskQueue(None, background)
+
+        assert await queue.enqueue(GenerationJob.IMAGE, task_id="gen_1", mode="blend")
+
+        assert not queue.uses_workers
+        assert background.tasks[0].kwargs == {"task_id": "gen_1", "mode": "blend"}
+
+    @pytest.mark.asyncio
+    async def test_falls_back_when_enqueue_fails(self):
+        pool = AsyncMock()
+        pool.enqueue_job.side_effect = ConnectionError("redis down")
+        background = BackgroundTasks()
+
+        assert await TaskQueue(pool, background).enqueue(GenerationJob.RACE, task_id="gen_1")
+        assert len(background.tasks) == 1
+
+
+class TestRunJobOnce:
+    """Tests for idempotent job execution on the worker."""
+
+    @pytest.fixture
+    def redis(self):
+        redis = MockRedis()
+        with patch("services.task_queue.get_redis", AsyncMock(return_value=redis)):
+            yield redis
+
+    @pytest.mark.asyncio
+    async def test_runs_queued_task(self, redis):
+        await redis.hset("task:gen_1", "status", "queued")
+        job = AsyncMock()
+
+        with patch("services.task_queue.get_job_function", return_value=job):
+            assert await run_job_once(GenerationJob.RACE, "gen_1", user_id="u1")
+
+        job.assert_awaited_once_with(task_id="gen_1", user_id="u1")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("status", ["completed", "failed", "cancelled"])
+    async def test_skips_finished_task_on_retry(self, redis, status):
+        await redis.hset("task:gen_1", "status", status)
+        job = AsyncMock()
+
+        with patch("services.task_queue.get_job_function", return_value=job):
+            assert not await run_job_once(GenerationJob.RACE, "gen_1")
+
+        job.assert_not_awaited()
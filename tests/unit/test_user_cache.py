@@ -0,0 +1,124 @@
+"""
+Unit tests for the auth_id -> database user cache.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+
+from services.user_cache import UserCache, profile_fingerprint
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+
+@pytest.fixture
+def redis():
+    fake = FakeRedis()
+    with patch("services.user_cache.get_redis", AsyncMock(return_value=fake)):
+        yield fake
+
+
+def counting_sync(user_id):
+    calls = []
+
+    async def sync():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return user_id
+
+    return sync, calls
+
+
+class TestUserCache:
+    @pytest.mark.asyncio
+    async def test_repeat_requests_skip_sync(self, redis):
+        cache = UserCache()
+        user_id = uuid4()
+        sync, calls = counting_sync(user_id)
+        fingerprint = profile_fingerprint("a@example.com", "Ann", None)
+
+        for _ in range(3):
+            assert await cache.resolve("auth-1", fingerprint, sync) == user_id
+
+        assert len(calls) == 1
+        assert cache.get_stats()["local_hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_profile_change_syncs_again(self, redis):
+        cache = UserCache()
+        sync, calls = counting_sync(uuid4())
+
+        await cache.resolve("auth-1", profile_fingerprint("a@example.com", "Ann", None), sync)
+        await cache.resolve("auth-1", profile_fingerprint("a@example.com", "Anna", None), sync)
+
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_sync(self, redis):
+        cache = UserCache()
+        user_id = uuid4()
+        sync, calls = counting_sync(user_id)
+        fingerprint = profile_fingerprint("a@example.com", None, None)
+
+        results = await asyncio.gather(
+            *(cache.resolve("auth-1", fingerprint, sync) for _ in range(5))
+        )
+
+        assert results == [user_id] * 5
+        assert len(calls) == 1
+        assert cache.get_stats()["coalesced"] == 4
+
+    @pytest.mark.asyncio
+    async def test_other_process_reads_shared_entry(self, redis):
+        user_id = uuid4()
+        sync, calls = counting_sync(user_id)
+        fingerprint = profile_fingerprint("a@example.com", None, None)
+
+        await UserCache().resolve("auth-1", fingerprint, sync)
+        other = UserCache()
+        assert await other.resolve("auth-1", fingerprint, sync) == user_id
+
+        assert len(calls) == 1
+        assert other.get_stats()["redis_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_sync_failure_is_not_cached(self, redis):
+        cache = UserCache()
+        fingerprint = profile_fingerprint(None, None, None)
+
+        async def failing():
+            raise RuntimeError("db down")
+
+        with pytest.raises(RuntimeError):
+            await cache.resolve("auth-1", fingerprint, failing)
+
+        user_id = uuid4()
+        sync, calls = counting_sync(user_id)
+        assert await cache.resolve("auth-1", fingerprint, sync) == user_id
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_works_without_redis(self):
+        cache = UserCache()
+        sync, calls = counting_sync(uuid4())
+        fingerprint = profile_fingerprint(None, None, None)
+
+        with patch("services.user_cache.get_redis", AsyncMock(side_effect=RuntimeError)):
+            await cache.resolve("auth-1", fingerprint, sync)
+            await cache.resolve("auth-1", fingerprint, sync)
+
+        assert len(calls) == 1
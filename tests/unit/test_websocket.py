@@ -1,7 +1,10 @@
 """
-Unit tests for WebSocket manager stale connection cleanup.
+Unit tests for WebSocket manager stale cleanup, send queues and Redis relay.
 """
 
+import asyncio
+import json
+import time
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock
 
@@ -10,8 +13,10 @@ import pytest
 from services.websocket_manager import (
     STALE_TIMEOUT,
     Connection,
+    SlowConsumerPolicy,
     WebSocketManager,
 )
+from services.websocket_relay import PRESENCE_TTL
 
 
 def _make_connection(conn_id: str, last_ping_offset: float = 0) -> Connection:
@@ -113,3 +118,333 @@ class TestStaleConnectionCleanup:
 
         # Connection should still be removed from manager
         assert "stale1" not in manager._connections
+
+
+class FakeRelayRedis:
+    """In-memory Redis stand-in with pub/sub, streams and sorted sets shared by nodes."""
+
+    def __init__(self):
+        self.subscribers: dict[str, list[asyncio.Queue]] = {}
+        self.streams: dict[str, list[tuple[str, dict]]] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+        self._seq = 0
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+
+    async def publish(self, channel, data):
+        queues = self.subscribers.get(channel, [])
+        for queue in queues:
+            queue.put_nowait({"type": "message", "channel": channel, "data": data})
+        return len(queues)
+
+    async def xadd(self, stream, fields, maxlen=None, approximate=True):
+        self._seq += 1
+        event_id = f"{self._seq}-0"
+        self.streams.setdefault(stream, []).append((event_id, fields))
+        return event_id
+
+    async def xrange(self, stream, min="-", max="+"):
+        after = int(min.lstrip("(").split("-")[0])
+        return [e for e in self.streams.get(stream, []) if int(e[0].split("-")[0]) > after]
+
+    async def expire(self, key, seconds):
+        return True
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+        return len(mapping)
+
+    async def zrem(self, key, *members):
+        return sum(1 for m in members if self.zsets.get(key, {}).pop(m, None) is not None)
+
+    async def zremrangebyscore(self, key, min, max):
+        zset = self.zsets.get(key, {})
+        stale = [m for m, score in zset.items() if score <= float(max)]
+        for member in stale:
+            del zset[member]
+        return len(stale)
+
+    async def zrange(self, key, start, end):
+        zset = self.zsets.get(key, {})
+        return sorted(zset, key=zset.get)
+
+
+class FakePubSub:
+    def __init__(self, redis: FakeRelayRedis):
+        self._redis = redis
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, *channels):
+        for channel in channels:
+            self._redis.subscribers.setdefault(channel, []).append(self._queue)
+
+    async def unsubscribe(self, *channels):
+        for channel in channels:
+            self._redis.subscribers.get(channel, []).remove(self._queue)
+
+    async def get_message(self, timeout=None):
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+    async def aclose(self):
+        pass
+
+
+async def _settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def _sent(ws) -> list[dict]:
+    """Messages written to a mock socket by its writer task."""
+    return [json.loads(c.args[0]) for c in ws.send_text.call_args_list]
+
+
+@pytest.fixture
+async def make_manager():
+    """Build managers whose writer tasks are stopped at teardown."""
+    managers = []
+
+    def factory(**kwargs) -> WebSocketManager:
+        manager = WebSocketManager(**kwargs)
+        managers.append(manager)
+        return manager
+
+    yield factory
+    for manager in managers:
+        await manager.close()
+
+
+@pytest.fixture
+async def relay_nodes():
+    redis = FakeRelayRedis()
+    node_a, node_b = WebSocketManager(), WebSocketManager()
+    await node_a.start_relay(redis)
+    await node_b.start_relay(redis)
+    yield redis, node_a, node_b
+    for node in (node_a, node_b):
+        await node.stop_relay()
+        await node.close()
+
+
+class TestRedisRelay:
+    """Tests for cross-node delivery through the Redis relay."""
+
+    @pytest.mark.asyncio
+    async def test_user_event_reaches_other_node(self, relay_nodes):
+        _, node_a, node_b = relay_nodes
+        ws = AsyncMock()
+        await node_b.connect(ws, user_id="u1")
+
+        await node_a.send_generate_progress("u1", "req1", "generating")
+        await _settle()
+
+        message = _sent(ws)[-1]
+        assert message["type"] == "generate:progress"
+        assert "event_id" in message
+
+    @pytest.mark.asyncio
+    async def test_node_only_subscribes_to_local_topics(self, relay_nodes):
+        redis, node_a, node_b = relay_nodes
+        await node_b.connect(AsyncMock(), user_id="u1")
+
+        assert await node_a.send_to_user("u1", {"type": "x"}) == 1
+        assert await node_a.send_to_user("nobody", {"type": "x"}) == 0
+
+    @pytest.mark.asyncio
+    async def test_channel_unwatched_after_last_subscriber(self, relay_nodes):
+        redis, _, node_b = relay_nodes
+        conn_id = await node_b.connect(AsyncMock())
+        await node_b.subscribe(conn_id, "task:t1")
+        assert redis.subscribers["ws:topic:channel:task:t1"]
+
+        await node_b.disconnect(conn_id)
+
+        assert not redis.subscribers["ws:topic:channel:task:t1"]
+
+    @pytest.mark.asyncio
+    async def test_replay_missed_events_on_reconnect(self, relay_nodes):
+        _, node_a, node_b = relay_nodes
+        first = AsyncMock()
+        conn_id = await node_b.connect(first, user_id="u1")
+        await node_a.send_generate_progress("u1", "req1", "queued")
+        await _settle()
+        last_seen = _sent(first)[-1]["event_id"]
+        await node_b.disconnect(conn_id)
+
+        await node_a.send_generate_progress("u1", "req1", "generating")
+        await node_a.send_generate_progress("u1", "req1", "storing")
+
+        ws = AsyncMock()
+        await node_b.connect(ws, user_id="u1", last_event_id=last_seen)
+        await _settle()
+
+        stages = [m["payload"].get("stage") for m in _sent(ws)[1:]]
+        assert stages == ["generating", "storing"]
+
+    @pytest.mark.asyncio
+    async def test_presence_across_nodes(self, relay_nodes):
+        _, node_a, node_b = relay_nodes
+        conn_id = await node_b.connect(AsyncMock(), user_id="u1")
+
+        assert await node_a.is_user_online("u1")
+
+        await node_b.disconnect(conn_id)
+        assert not await node_a.is_user_online("u1")
+
+    @pytest.mark.asyncio
+    async def test_presence_prunes_connections_not_seen_recently(self, relay_nodes):
+        redis, node_a, node_b = relay_nodes
+        await node_b.connect(AsyncMock(), user_id="u1")
+        # A connection left behind by a node that crashed long ago
+        redis.zsets["ws:presence:u1"]["deadnode:ghost"] = time.time() - PRESENCE_TTL - 1
+
+        presence = await node_a._relay.get_presence("u1")
+
+        assert list(presence.values()) == [node_b.node_id]
+        assert "ghost" not in presence
+
+    @pytest.mark.asyncio
+    async def test_reconnect_during_disconnect_keeps_topic_watched(self, relay_nodes):
+        _, node_a, node_b = relay_nodes
+        old_id = await node_b.connect(AsyncMock(), user_id="u1")
+
+        # Hold the disconnect after local state is removed, before the relay update
+        gate = asyncio.Event()
+
+        async def slow_mark_offline(user_id, connection_id):
+            await gate.wait()
+
+        node_b._relay.mark_offline = slow_mark_offline
+        disconnecting = asyncio.create_task(node_b.disconnect(old_id))
+        await _settle()
+
+        ws = AsyncMock()
+        await node_b.connect(ws, user_id="u1")
+        gate.set()
+        await disconnecting
+
+        await node_a.send_generate_progress("u1", "req1", "generating")
+        await _settle()
+        assert _sent(ws)[-1]["type"] == "generate:progress"
+
+    @pytest.mark.asyncio
+    async def test_live_events_during_replay_are_not_duplicated(self, relay_nodes):
+        _, node_a, node_b = relay_nodes
+        await node_a.send_generate_progress("u1", "req1", "queued")
+        await node_a.send_generate_progress("u1", "req1", "generating")
+
+        # A live event lands between the watch and the replay read
+        original_replay = node_b._relay.replay
+
+        async def replay_after_live_event(topic, last_event_id):
+            await node_a.send_generate_progress("u1", "req1", "storing")
+            await _settle()
+            return await original_replay(topic, last_event_id)
+
+        node_b._relay.replay = replay_after_live_event
+        ws = AsyncMock()
+        await node_b.connect(ws, user_id="u1", last_event_id="1-0")
+        await node_a.send_generate_progress("u1", "req1", "done")
+        await _settle()
+
+        stages = [m["payload"].get("stage") for m in _sent(ws)[1:]]
+        assert stages == ["generating", "storing", "done"]
+
+
+class BlockedSocket:
+    """Socket whose writes never complete, simulating a stalled client."""
+
+    def __init__(self):
+        self.accept = AsyncMock()
+        self.close = AsyncMock()
+        self.sent: list[str] = []
+        self._gate = asyncio.Event()
+
+    async def send_text(self, text):
+        self.sent.append(text)
+        await self._gate.wait()
+
+
+class TestSendQueues:
+    """Tests for per-connection outbound queues."""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_serializes_once(self, make_manager, monkeypatch):
+        manager = make_manager()
+        sockets = [AsyncMock() for _ in range(3)]
+        for ws in sockets:
+            await manager.connect(ws)
+        await _settle()
+
+        dumps_calls = []
+        real_dumps = json.dumps
+        monkeypatch.setattr(
+            "services.websocket_manager.json.dumps",
+            lambda *a, **k: dumps_calls.append(a) or real_dumps(*a, **k),
+        )
+
+        assert await manager.broadcast_all({"type": "announcement"}) == 3
+        await _settle()
+
+        assert len(dumps_calls) == 1
+        texts = {ws.send_text.call_args.args[0] for ws in sockets}
+        assert len(texts) == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_client_does_not_block_others(self, make_manager):
+        manager = make_manager(send_queue_size=4)
+        slow, fast = BlockedSocket(), AsyncMock()
+        await manager.connect(slow, user_id="slow")
+        await manager.connect(fast, user_id="fast")
+
+        for i in range(3):
+            await manager.broadcast_all({"type": "tick", "payload": {"i": i}})
+        await _settle()
+
+        assert [m["type"] for m in _sent(fast)] == ["connected", "tick", "tick", "tick"]
+
+    @pytest.mark.asyncio
+    async def test_disconnect_policy_closes_slow_consumer(self, make_manager):
+        manager = make_manager(send_queue_size=2)
+        slow = BlockedSocket()
+        conn_id = await manager.connect(slow, user_id="slow")
+        await _settle()
+
+        for _ in range(4):
+            await manager.send_to_user("slow", {"type": "tick"})
+        await _settle()
+
+        slow.close.assert_called_once_with(code=4008, reason="Slow consumer")
+        assert conn_id not in manager._connections
+
+    @pytest.mark.asyncio
+    async def test_drop_policy_discards_oldest(self, make_manager):
+        manager = make_manager(send_queue_size=2, slow_consumer_policy=SlowConsumerPolicy.DROP)
+        slow = BlockedSocket()
+        conn_id = await manager.connect(slow, user_id="slow")
+        await _settle()
+
+        for i in range(4):
+            await manager.send_to_user("slow", {"type": "tick", "payload": {"i": i}})
+
+        connection = manager._connections[conn_id]
+        assert connection.dropped == 2
+        queued = [json.loads(t)["payload"]["i"] for t in list(connection.queue._queue)]
+        assert queued == [2, 3]
+
+    @pytest.mark.asyncio
+    async def test_close_stops_blocked_writers(self, make_manager):
+        manager = make_manager()
+        slow = BlockedSocket()
+        conn_id = await manager.connect(slow, user_id="slow")
+        await _settle()
+        writer = manager._connections[conn_id].writer
+
+        await manager.close()
+
+        assert writer.done()
+        assert manager.connection_count == 0
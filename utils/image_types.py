@@ -0,0 +1,68 @@
+"""
+Image MIME type helpers.
+
+Shared by the providers (tagging generated bytes) and storage (choosing key
+extensions and Content-Type headers).
+"""
+
+# File extensions for the image MIME types we store
+IMAGE_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/webp": "webp",
+    "image/gif": "gif",
+    "image/avif": "avif",
+}
+
+# Reverse lookup, including common aliases
+_EXTENSION_MIME_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "gif": "image/gif",
+    "avif": "image/avif",
+    # Videos share the storage and serving path
+    "mp4": "video/mp4",
+    "webm": "video/webm",
+    "mov": "video/quicktime",
+}
+
+
+def detect_image_mime_type(data: bytes, default: str = "image/png") -> str:
+    """
+    Detect an image MIME type from its magic bytes.
+
+    Args:
+        data: Encoded image bytes
+        default: MIME type to assume when the signature is not recognized
+
+    Returns:
+        MIME type string
+    """
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if data[4:12] in (b"ftypavif", b"ftypavis"):
+        return "image/avif"
+    return default
+
+
+def mime_type_from_key(key: str, default: str = "image/png") -> str:
+    """
+    Get an image MIME type from a storage key's file extension.
+
+    Args:
+        key: Storage key or filename
+        default: MIME type to assume for unknown extensions
+
+    Returns:
+        MIME type string
+    """
+    ext = key.rsplit(".", 1)[-1].lower() if "." in key else ""
+    return _EXTENSION_MIME_TYPES.get(ext, default)